@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils import timezone
-from .models import User
+from .models import User, MonthlySubscriptionSnapshot
 
 
 @admin.register(User)
@@ -26,4 +26,11 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
     
-    readonly_fields = ('date_joined', 'last_login')
\ No newline at end of file
+    readonly_fields = ('date_joined', 'last_login')
+
+
+@admin.register(MonthlySubscriptionSnapshot)
+class MonthlySubscriptionSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('month', 'total_users', 'active_users', 'trial_users', 'past_due_users', 'canceled_users', 'updated_at')
+    ordering = ('-month',)
+    readonly_fields = ('updated_at',)
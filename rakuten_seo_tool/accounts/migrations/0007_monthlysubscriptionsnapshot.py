@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_subscription_plan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySubscriptionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='月初日', unique=True, verbose_name='対象月')),
+                ('total_users', models.PositiveIntegerField(default=0, verbose_name='ユーザー数')),
+                ('active_users', models.PositiveIntegerField(default=0, verbose_name='課金中')),
+                ('trial_users', models.PositiveIntegerField(default=0, verbose_name='無料体験中')),
+                ('past_due_users', models.PositiveIntegerField(default=0, verbose_name='支払い遅延')),
+                ('canceled_users', models.PositiveIntegerField(default=0, verbose_name='キャンセル')),
+                ('inactive_users', models.PositiveIntegerField(default=0, verbose_name='無効')),
+                ('standard_active_users', models.PositiveIntegerField(default=0, verbose_name='課金中（スタンダード）')),
+                ('master_active_users', models.PositiveIntegerField(default=0, verbose_name='課金中（マスター）')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+            ],
+            options={
+                'verbose_name': '月次サブスクリプション状況',
+                'verbose_name_plural': '月次サブスクリプション状況',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
@@ -206,7 +206,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     def can_execute_auto_search_today(self):
         """今日自動検索を実行可能かチェック"""
         from django.utils import timezone
-        today = timezone.now().date()
+        today = timezone.localdate()
         return self.last_bulk_search_date != today
     
     def should_execute_auto_search_now(self):
@@ -226,7 +226,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     def update_last_auto_search_date(self):
         """最終一括検索日を今日に更新"""
         from django.utils import timezone
-        self.last_bulk_search_date = timezone.now().date()
+        self.last_bulk_search_date = timezone.localdate()
         self.save()
     
     def get_keyword_limit(self):
@@ -278,4 +278,66 @@ class User(AbstractBaseUser, PermissionsMixin):
             from seo_ranking.models import RPPKeyword
             current_count = RPPKeyword.objects.filter(user=self).count()
         
-        return current_count < keyword_limit
\ No newline at end of file
+        return current_count < keyword_limit
+
+
+class MonthlySubscriptionSnapshot(models.Model):
+    """
+    月ごとのサブスクリプション状況（売上管理の前月比較用）
+
+    StripeのWebhookでサブスクリプション状態が変わるたびに当月分を更新するため、
+    前月の行は前月末時点の状況を表す。
+    """
+    month = models.DateField(
+        verbose_name='対象月',
+        unique=True,
+        help_text='月初日'
+    )
+    total_users = models.PositiveIntegerField(verbose_name='ユーザー数', default=0)
+    active_users = models.PositiveIntegerField(verbose_name='課金中', default=0)
+    trial_users = models.PositiveIntegerField(verbose_name='無料体験中', default=0)
+    past_due_users = models.PositiveIntegerField(verbose_name='支払い遅延', default=0)
+    canceled_users = models.PositiveIntegerField(verbose_name='キャンセル', default=0)
+    inactive_users = models.PositiveIntegerField(verbose_name='無効', default=0)
+    standard_active_users = models.PositiveIntegerField(verbose_name='課金中（スタンダード）', default=0)
+    master_active_users = models.PositiveIntegerField(verbose_name='課金中（マスター）', default=0)
+    updated_at = models.DateTimeField(verbose_name='更新日時', auto_now=True)
+
+    class Meta:
+        verbose_name = '月次サブスクリプション状況'
+        verbose_name_plural = '月次サブスクリプション状況'
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} 課金中{self.active_users}名"
+
+    @staticmethod
+    def subscription_counts():
+        """課金対象ユーザー（マスター・招待アカウント以外）の状態別人数を1クエリで集計"""
+        from django.db.models import Count, Q
+        return User.objects.filter(is_master=False, is_invited_user=False).aggregate(
+            total_users=Count('id'),
+            active_users=Count('id', filter=Q(subscription_status='active')),
+            trial_users=Count('id', filter=Q(subscription_status='trial')),
+            past_due_users=Count('id', filter=Q(subscription_status='past_due')),
+            canceled_users=Count('id', filter=Q(subscription_status='canceled')),
+            inactive_users=Count('id', filter=Q(subscription_status='inactive')),
+            standard_active_users=Count('id', filter=Q(subscription_status='active', subscription_plan='standard')),
+            master_active_users=Count('id', filter=Q(subscription_status='active', subscription_plan='master')),
+        )
+
+    @classmethod
+    def record_current_month(cls):
+        """当月のスナップショットを現在の状況で更新"""
+        month = timezone.localdate().replace(day=1)
+        snapshot, _ = cls.objects.update_or_create(month=month, defaults=cls.subscription_counts())
+        return snapshot
+
+    @classmethod
+    def for_month(cls, month):
+        """
+        指定月末時点のスナップショットを取得
+
+        その月にWebhookが無かった場合は状態が変わっていないため、それ以前の最新の月を使用する。
+        """
+        return cls.objects.filter(month__lte=month).order_by('-month').first()
@@ -32,8 +32,9 @@ class DashboardView(TemplateView):
                 f'マスターアカウントでログイン中です。全機能・全店舗データにアクセス可能です。'
             )
         
-        # キーワード数を取得
+        # キーワード数を取得（集計値はキャッシュし、キーワードの変更時に無効化）
         from seo_ranking.models import Keyword
+        from seo_ranking.dashboard_cache import get_or_compute, tenant_scope
         
         # マスターアカウントの場合は選択店舗のデータを表示
         if user.is_master:
@@ -47,18 +48,24 @@ class DashboardView(TemplateView):
             if selected_store_id:
                 try:
                     selected_user = User.objects.get(id=selected_store_id, is_invited_user=True)
-                    keyword_count = Keyword.objects.filter(user=selected_user).count()
+                    keyword_count = get_or_compute(
+                        tenant_scope(selected_user.id), 'keyword_count',
+                        lambda: Keyword.objects.filter(user=selected_user).count()
+                    )
                     context['selected_store'] = selected_user
                 except User.DoesNotExist:
                     # 選択店舗が見つからない場合はセッションをクリア
                     self.request.session.pop('selected_store_id', None)
                     self.request.session.pop('selected_store_name', None)
-                    keyword_count = Keyword.objects.filter(user__is_invited_user=True).count()
+                    keyword_count = self._invited_keyword_count()
             else:
                 # 招待ユーザーのキーワード数
-                keyword_count = Keyword.objects.filter(user__is_invited_user=True).count()
+                keyword_count = self._invited_keyword_count()
         else:
-            keyword_count = Keyword.objects.filter(user=user).count()
+            keyword_count = get_or_compute(
+                tenant_scope(user.id), 'keyword_count',
+                lambda: Keyword.objects.filter(user=user).count()
+            )
         
         context['has_active_subscription'] = user.has_active_subscription()
         context['subscription_status'] = user.subscription_status
@@ -66,6 +73,15 @@ class DashboardView(TemplateView):
         context['keyword_count'] = keyword_count
         
         return context
+    
+    def _invited_keyword_count(self):
+        """招待ユーザー全体のキーワード数"""
+        from seo_ranking.models import Keyword
+        from seo_ranking.dashboard_cache import get_or_compute, STORES_SCOPE
+        return get_or_compute(
+            STORES_SCOPE, 'invited_keyword_count',
+            lambda: Keyword.objects.filter(user__is_invited_user=True).count()
+        )
 
 
 @login_required
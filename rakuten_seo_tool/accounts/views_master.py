@@ -3,17 +3,20 @@ from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
-from django.db.models import Q, Count
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Q, Count, DateField
+from django.db.models.functions import TruncMonth
+from django.http import JsonResponse, StreamingHttpResponse
 from django.core.paginator import Paginator
+from django.conf import settings
 from django.utils import timezone
-from datetime import datetime, timedelta
-import csv
-from .models import User
+from datetime import datetime, time
+from .models import User, MonthlySubscriptionSnapshot
 from .decorators import master_account_required
 from .forms_master import StoreCreateForm, StoreUpdateForm
-from seo_ranking.models import Keyword, RankingResult
-from seo_ranking.models_rpp import RPPKeyword, RPPResult
+from seo_ranking.models import Keyword
+from seo_ranking.models_rpp import RPPKeyword
+from seo_ranking.exports import stream_csv
+from seo_ranking.dashboard_cache import get_or_compute, invalidate_tenants, STORES_SCOPE
 
 
 @method_decorator(master_account_required, name='dispatch')
@@ -60,15 +63,20 @@ class StoreListView(ListView):
         context['search'] = self.request.GET.get('search', '')
         context['status'] = self.request.GET.get('status', '')
         
-        # 統計情報
-        all_stores = User.objects.filter(is_master=False)
-        context['total_stores'] = all_stores.count()
-        context['active_stores'] = all_stores.filter(is_active=True, subscription_status='active').count()
-        context['trial_stores'] = all_stores.filter(subscription_status='trial').count()
-        context['inactive_stores'] = all_stores.filter(Q(is_active=False) | Q(subscription_status='inactive')).count()
+        # 統計情報（1クエリで集計し、店舗・サブスクリプションの変更時まではキャッシュを使用）
+        context.update(get_or_compute(STORES_SCOPE, 'store_counts', self._compute_store_counts))
         
         return context
 
+    @staticmethod
+    def _compute_store_counts():
+        return User.objects.filter(is_master=False).aggregate(
+            total_stores=Count('id'),
+            active_stores=Count('id', filter=Q(is_active=True, subscription_status='active')),
+            trial_stores=Count('id', filter=Q(subscription_status='trial')),
+            inactive_stores=Count('id', filter=Q(is_active=False) | Q(subscription_status='inactive')),
+        )
+
 
 @method_decorator(master_account_required, name='dispatch')
 class StoreDetailView(DetailView):
@@ -88,20 +96,26 @@ class StoreDetailView(DetailView):
         seo_keywords = Keyword.objects.filter(user=store)
         context['seo_keyword_count'] = seo_keywords.count()
         
-        # 最新の順位結果
-        latest_rankings = RankingResult.objects.filter(
-            keyword__user=store
-        ).order_by('-checked_at')[:5]
+        # 最新の順位結果（キーワードごとの最新結果スナップショットから取得）
+        latest_rankings = [
+            keyword.latest_result
+            for keyword in seo_keywords.filter(
+                latest_result__isnull=False
+            ).select_related('latest_result__keyword').order_by('-latest_checked_at')[:5]
+        ]
         context['latest_rankings'] = latest_rankings
         
         # RPPキーワード統計
         rpp_keywords = RPPKeyword.objects.filter(user=store)
         context['rpp_keyword_count'] = rpp_keywords.count()
         
-        # 最新のRPP結果
-        latest_rpp_results = RPPResult.objects.filter(
-            keyword__user=store
-        ).order_by('-checked_at')[:5]
+        # 最新のRPP結果（キーワードごとの最新結果スナップショットから取得）
+        latest_rpp_results = [
+            keyword.latest_result
+            for keyword in rpp_keywords.filter(
+                latest_result__isnull=False
+            ).select_related('latest_result__keyword').order_by('-latest_checked_at')[:5]
+        ]
         context['latest_rpp_results'] = latest_rpp_results
         
         return context
@@ -181,36 +195,33 @@ class StoreDeleteView(DeleteView):
 
 @master_account_required
 def store_export_csv(request):
-    """店舗データCSVエクスポート"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="stores.csv"'
-    response.write('\ufeff')  # BOM for Excel
-
-    writer = csv.writer(response)
-    writer.writerow([
-        '楽天店舗ID', '会社名', '担当者名', 'メールアドレス', '電話番号',
-        'サブスクリプション状態', '有効', '登録日時', 'SEOキーワード数', 'RPPキーワード数'
-    ])
-
+    """店舗データCSVエクスポート（店舗を少しずつ取得してストリーミングで返す）"""
     stores = User.objects.filter(is_master=False).annotate(
         keyword_count=Count('keywords', distinct=True),
         rpp_keyword_count=Count('rpp_keywords', distinct=True)
-    )
-
-    for store in stores:
-        writer.writerow([
-            store.rakuten_shop_id or '',
-            store.company_name,
-            store.contact_name,
-            store.email,
-            store.phone_number,
-            store.get_subscription_status_display(),
-            '有効' if store.is_active else '無効',
-            store.date_joined.strftime('%Y-%m-%d %H:%M:%S'),
-            store.keyword_count,
-            store.rpp_keyword_count,
-        ])
-
+    ).order_by('id')
+
+    def iter_rows():
+        yield [
+            '楽天店舗ID', '会社名', '担当者名', 'メールアドレス', '電話番号',
+            'サブスクリプション状態', '有効', '登録日時', 'SEOキーワード数', 'RPPキーワード数'
+        ]
+        for store in stores.iterator(chunk_size=getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)):
+            yield [
+                store.rakuten_shop_id or '',
+                store.company_name,
+                store.contact_name,
+                store.email,
+                store.phone_number,
+                store.get_subscription_status_display(),
+                '有効' if store.is_active else '無効',
+                timezone.localtime(store.date_joined).strftime('%Y-%m-%d %H:%M:%S'),
+                store.keyword_count,
+                store.rpp_keyword_count,
+            ]
+
+    response = StreamingHttpResponse(stream_csv(iter_rows()), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="stores.csv"'
     return response
 
 
@@ -236,6 +247,9 @@ def store_bulk_action(request):
         messages.success(request, f'{len(store_ids)}件の店舗を無効にしました。')
     else:
         return JsonResponse({'success': False, 'error': '無効な操作です'})
+    
+    # update() はシグナルを送らないため集計キャッシュをここで無効化
+    invalidate_tenants(store_ids)
 
     return JsonResponse({'success': True})
 
@@ -284,37 +298,75 @@ def view_store_dashboard(request, pk):
         return redirect('accounts:master_store_list')
 
 
+def _month_starts(month_start, count):
+    """month_start を最後とする直近 count か月の月初日（古い順）"""
+    months = []
+    year, month = month_start.year, month_start.month
+    for _ in range(count):
+        months.append(month_start.replace(year=year, month=month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    months.reverse()
+    return months
+
+
+def _compute_revenue_user_stats(all_users, today):
+    """売上管理ダッシュボードのユーザー数集計（状態別1クエリ + 月別登録数1クエリ + 前月スナップショット）"""
+    months = _month_starts(today.replace(day=1), 12)
+    
+    # ユーザー状況の詳細（状態別の人数を条件付き集計で1クエリ）
+    counts = MonthlySubscriptionSnapshot.subscription_counts()
+    
+    # 月別の登録ユーザー数推移（直近12ヶ月、TruncMonthで月ごとにまとめて集計）
+    range_start = timezone.make_aware(datetime.combine(months[0], time.min))
+    registrations = {
+        row['month']: row['count']
+        for row in all_users.filter(date_joined__gte=range_start)
+        .annotate(month=TruncMonth('date_joined', output_field=DateField()))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by()
+    }
+    monthly_registrations = [
+        {'month': month.strftime('%Y-%m'), 'count': registrations.get(month, 0)}
+        for month in months
+    ]
+    
+    user_stats = {
+        'total_users': counts['total_users'],
+        'trial_users': counts['trial_users'],
+        'active_users': counts['active_users'],
+        'inactive_users': counts['inactive_users'],
+        'new_users_this_month': monthly_registrations[-1]['count'],
+        'new_users_last_month': monthly_registrations[-2]['count'],
+    }
+    
+    # 先月末時点の課金ユーザー数（Webhookで記録した履歴）
+    last_month_snapshot = MonthlySubscriptionSnapshot.for_month(months[-2])
+    
+    return {
+        'user_stats': user_stats,
+        'monthly_registrations': monthly_registrations,
+        'last_month_active_users': last_month_snapshot.active_users if last_month_snapshot else None,
+    }
+
+
 @master_account_required
 def revenue_dashboard(request):
     """売上管理ダッシュボード"""
     # 現在の日付
     today = timezone.now().date()
     
-    # 今月の開始日
-    month_start = today.replace(day=1)
-    
-    # 先月の開始日
-    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
-    
     # 全ユーザー（マスター以外、招待アカウント除く）
     all_users = User.objects.filter(is_master=False, is_invited_user=False)
     
-    # 無料体験中のユーザー数
-    trial_users = all_users.filter(subscription_status='trial').count()
-    
-    # 課金中のユーザー数
-    active_users = all_users.filter(subscription_status='active').count()
-    
-    # 今月新規登録ユーザー数
-    new_users_this_month = all_users.filter(
-        date_joined__gte=month_start
-    ).count()
-    
-    # 先月新規登録ユーザー数
-    new_users_last_month = all_users.filter(
-        date_joined__gte=last_month_start,
-        date_joined__lt=month_start
-    ).count()
+    # ユーザー数の集計はキャッシュし、店舗・サブスクリプションの変更時に無効化
+    stats = get_or_compute(
+        STORES_SCOPE, f"revenue_dashboard:{today.isoformat()}",
+        lambda: _compute_revenue_user_stats(all_users, today)
+    )
+    user_stats = stats['user_stats']
+    monthly_registrations = stats['monthly_registrations']
+    active_users = user_stats['active_users']
     
     # 月額料金（¥3,980）
     monthly_fee = 3980
@@ -322,21 +374,13 @@ def revenue_dashboard(request):
     # 今月の推定売上（課金ユーザー数 × 月額料金）
     estimated_revenue = active_users * monthly_fee
     
-    # 先月の課金ユーザー数（概算）
-    # 実際のデータがない場合は現在の数値を使用
-    last_month_active_users = active_users  # 実際には履歴データが必要
+    # 先月の課金ユーザー数（月次スナップショット）
+    # 履歴がまだ無い場合は現在の数値を使用
+    last_month_active_users = stats['last_month_active_users']
+    if last_month_active_users is None:
+        last_month_active_users = active_users
     last_month_revenue = last_month_active_users * monthly_fee
     
-    # ユーザー状況の詳細
-    user_stats = {
-        'total_users': all_users.count(),
-        'trial_users': trial_users,
-        'active_users': active_users,
-        'inactive_users': all_users.filter(subscription_status='inactive').count(),
-        'new_users_this_month': new_users_this_month,
-        'new_users_last_month': new_users_last_month,
-    }
-    
     # 売上情報
     revenue_stats = {
         'estimated_monthly_revenue': estimated_revenue,
@@ -348,24 +392,6 @@ def revenue_dashboard(request):
     # 最近の新規登録ユーザー（直近10件）
     recent_users = all_users.order_by('-date_joined')[:10]
     
-    # 月別の登録ユーザー数推移（直近12ヶ月）
-    monthly_registrations = []
-    for i in range(12):
-        month_date = (today.replace(day=1) - timedelta(days=i*30)).replace(day=1)
-        next_month = (month_date + timedelta(days=32)).replace(day=1)
-        
-        count = all_users.filter(
-            date_joined__gte=month_date,
-            date_joined__lt=next_month
-        ).count()
-        
-        monthly_registrations.append({
-            'month': month_date.strftime('%Y-%m'),
-            'count': count
-        })
-    
-    monthly_registrations.reverse()
-    
     context = {
         'user_stats': user_stats,
         'revenue_stats': revenue_stats,
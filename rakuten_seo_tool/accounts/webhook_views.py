@@ -9,7 +9,7 @@ from django.utils.decorators import method_decorator
 from django.utils import timezone
 from allauth.account.models import EmailAddress
 from allauth.account.utils import send_email_confirmation
-from .models import User
+from .models import User, MonthlySubscriptionSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +53,13 @@ def stripe_webhook(request):
         handle_payment_failed(event['data']['object'])
     else:
         logger.info(f"Unhandled event type: {event['type']}")
+        return HttpResponse(status=200)
+    
+    # 売上管理の前月比較用に当月のサブスクリプション状況を記録
+    try:
+        MonthlySubscriptionSnapshot.record_current_month()
+    except Exception as e:
+        logger.error(f"Error recording subscription snapshot: {e}")
     
     return HttpResponse(status=200)
 
@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -98,13 +101,69 @@ WSGI_APPLICATION = 'inspice_seo_tool.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql で PostgreSQL を使用（未設定時は開発用のSQLite）
+# SQLiteは書き込みロックが1つのため、Gunicorn・Celeryワーカーを複数動かす本番環境では PostgreSQL を使用する
+# 既存のSQLiteのデータは migrate_sqlite_to_postgres コマンドで移行できる
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'inspice_seo_tool'),
+            'USER': os.environ.get('DB_USER', 'inspice'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # 接続を使い回す秒数（リクエスト・タスクごとの接続確立を省く）と、再利用前の接続確認
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '10')),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # 書き込みロックの待機秒数
+                'timeout': int(os.environ.get('SQLITE_TIMEOUT', '20')),
+            },
+        }
+    }
+
+
+# Cache
+# ジャンル名などワーカー間で共有するデータの保存先（空の場合はプロセス内メモリ）
+# 本番環境（DJANGO_ENV=production）では必須。テスト実行時は常にプロセス内メモリを使用する
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL', '')
+
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    REDIS_CACHE_URL = ''
+elif not REDIS_CACHE_URL and os.environ.get('DJANGO_ENV') == 'production':
+    raise ImproperlyConfigured('REDIS_CACHE_URL must be set when DJANGO_ENV=production')
+
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'seo_tool',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
+# ダッシュボード・店舗一覧・売上管理の集計値をキャッシュする秒数（0で無効）
+# キーワード・検索結果・サブスクリプションの変更時はシグナルで無効化する
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', '300'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -208,6 +267,47 @@ RAKUTEN_APP_ID = os.environ.get('RAKUTEN_APP_ID')
 RAKUTEN_APPLICATION_ID = os.environ.get('RAKUTEN_APP_ID')  # 楽天ランキングAPI用
 RAKUTEN_APP_SECRET = os.environ.get('RAKUTEN_APP_SECRET')
 CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY')
+# Claude APIのエンドポイント（ローカルのスタブサーバーで検証する場合に変更）
+CLAUDE_API_URL = os.environ.get('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages')
+# API失敗時のフォールバック分析を再生成するまでの分数
+AI_ANALYSIS_RETRY_MINUTES = int(os.environ.get('AI_ANALYSIS_RETRY_MINUTES', '60'))
+
+# 外部HTTPリクエストの共通接続プール（ホスト数 / 1ホストあたりの接続数 / 接続エラー・5xxの再試行回数とバックオフ係数）
+# 1ホストあたりの接続数は順位検索の同時取得ページ数より大きくする
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '20'))
+HTTP_RETRY_TOTAL = int(os.environ.get('HTTP_RETRY_TOTAL', '2'))
+HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', '0.5'))
+
+# 検索パイプラインのメトリクス（/metrics/ でPrometheus形式に出力）
+# METRICS_BACKEND=redis の場合は全プロセス分をRedisで集計、local の場合はプロセス内のみ
+# METRICS_TOKEN を設定した場合は Authorization: Bearer <token> で取得（未設定時はマスターアカウントのみ）
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_BACKEND = os.environ.get('METRICS_BACKEND', 'redis')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '2'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# 順位検索で同時に取得するページ数（1の場合は従来の逐次取得）
+RAKUTEN_SEARCH_CONCURRENCY = int(os.environ.get('RAKUTEN_SEARCH_CONCURRENCY', '3'))
+
+# 順位検索の戦略（top10: 1ページ目のみ / full: 先頭から順に全ページ / adaptive: 前回順位のページから前後へ）と最大ページ数
+# adaptive は一致したページより前のページもすべて確認するため、取得ページ数は full 以上になる（取得順のみ異なる）
+RANK_SEARCH_STRATEGY = os.environ.get('RANK_SEARCH_STRATEGY', 'full')
+RANK_SEARCH_MAX_PAGES = int(os.environ.get('RANK_SEARCH_MAX_PAGES', '10'))
+
+# ジャンル名キャッシュ（共有キャッシュのTTL秒 / プロセス内LRUの最大件数）
+GENRE_CACHE_TTL = int(os.environ.get('GENRE_CACHE_TTL', str(60 * 60 * 24 * 30)))
+GENRE_CACHE_LOCAL_SIZE = int(os.environ.get('GENRE_CACHE_LOCAL_SIZE', '5000'))
+
+# RPP一括検索で同時に処理するキーワード数（接続プールは全キーワードで共有）
+RPP_SCRAPE_CONCURRENCY = int(os.environ.get('RPP_SCRAPE_CONCURRENCY', '4'))
+
+# SEO検索結果のまとめ保存（キーワード数 / 最初の結果から保存までの最大秒数）
+RESULT_WRITER_FLUSH_SIZE = int(os.environ.get('RESULT_WRITER_FLUSH_SIZE', '20'))
+RESULT_WRITER_FLUSH_INTERVAL = float(os.environ.get('RESULT_WRITER_FLUSH_INTERVAL', '5'))
+
+# バッチ実行（深夜・自動・一括検索）内で同じキーワードの検索結果を店舗間で共有する最大秒数（0で無効）
+FETCH_CACHE_WINDOW = int(os.environ.get('FETCH_CACHE_WINDOW', '1800'))
 
 # CSRF settings for development and production
 CSRF_TRUSTED_ORIGINS = [
@@ -231,6 +331,35 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# 楽天向けリクエストのレート制限（Celeryワーカー間でRedis上の予算を共有）
+# テストでは RATE_LIMIT_REDIS_URL=fakeredis:// でローカルの疑似Redisを使用できる
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'redis')  # 'redis' または 'local'（プロセス内のみ）
+RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL', CELERY_BROKER_URL)
+RAKUTEN_RATE_LIMITS = {
+    # rate: 1秒あたりのリクエスト数 / burst: 瞬間的に許容するリクエスト数
+    'ichiba_item': {
+        'rate': float(os.environ.get('RAKUTEN_API_RATE_LIMIT', '1')),
+        'burst': int(os.environ.get('RAKUTEN_API_BURST', '3')),
+    },
+    'ichiba_genre': {
+        'rate': float(os.environ.get('RAKUTEN_GENRE_API_RATE_LIMIT', '1')),
+        'burst': int(os.environ.get('RAKUTEN_GENRE_API_BURST', '3')),
+    },
+    'ichiba_tag': {
+        'rate': float(os.environ.get('RAKUTEN_TAG_API_RATE_LIMIT', '0.5')),
+        'burst': int(os.environ.get('RAKUTEN_TAG_API_BURST', '1')),
+    },
+    'search_html': {  # search.rakuten.co.jp（RPP広告スクレイピング）
+        'rate': float(os.environ.get('RAKUTEN_SEARCH_HTML_RATE_LIMIT', '3')),
+        'burst': int(os.environ.get('RAKUTEN_SEARCH_HTML_BURST', '5')),
+    },
+}
+
+# 深夜自動検索（0時から NIGHTTIME_END_HOUR 時まで、ユーザーごとのタスクを均等に分散して投入）
+NIGHTTIME_END_HOUR = int(os.environ.get('NIGHTTIME_END_HOUR', '7'))
+NIGHTTIME_SCHEDULER_INTERVAL = int(os.environ.get('NIGHTTIME_SCHEDULER_INTERVAL', '300'))  # スケジューラの実行間隔（秒）
+NIGHTTIME_MAX_CONCURRENCY = int(os.environ.get('NIGHTTIME_MAX_CONCURRENCY', '4'))  # 同時に実行するユーザー数
+
 # Celery Beat settings (定期実行スケジュール)
 CELERY_BEAT_SCHEDULE = {
     'auto-keyword-search-master': {
@@ -239,14 +368,43 @@ CELERY_BEAT_SCHEDULE = {
     },
     'nighttime-auto-search': {
         'task': 'seo_ranking.tasks.nighttime_auto_search',
-        'schedule': 300.0,  # 5分間隔で実行（深夜0-7時のみ有効）
+        'schedule': float(NIGHTTIME_SCHEDULER_INTERVAL),  # 5分間隔で実行（深夜0-7時のみ有効）
     },
     'cleanup-old-data': {
         'task': 'seo_ranking.tasks.cleanup_old_data_task',
         'schedule': 86400.0,  # 24時間間隔で実行
     },
+    'resume-stale-bulk-searches': {
+        'task': 'seo_ranking.tasks.resume_stale_bulk_searches',
+        'schedule': 300.0,  # 5分間隔で停止した一括検索を再開
+    },
 }
 
+# データ保持期間の削除（1トランザクションの件数 / バッチ間の待機秒 / 1回の実行時間上限 / 続きの再投入までの秒数）
+RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', '500'))
+RETENTION_BATCH_PAUSE = float(os.environ.get('RETENTION_BATCH_PAUSE', '0.1'))
+RETENTION_MAX_SECONDS = int(os.environ.get('RETENTION_MAX_SECONDS', '600'))
+RETENTION_RESUME_DELAY = int(os.environ.get('RETENTION_RESUME_DELAY', '60'))
+LOG_RETENTION_DAYS = int(os.environ.get('LOG_RETENTION_DAYS', '30'))  # 検索ログの保持日数（全ユーザー共通）
+
+# 順位データのエクスポート（DBから一度に取得する行数 / その場でダウンロードする最大行数 / 作成ファイルの保存先と保存時間）
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+EXPORT_SYNC_MAX_ROWS = int(os.environ.get('EXPORT_SYNC_MAX_ROWS', '20000'))
+EXPORT_ROOT = os.environ.get('EXPORT_ROOT', str(BASE_DIR / 'exports'))  # 公開されない場所に保存（MEDIA_ROOT以外）
+EXPORT_FILE_TTL_HOURS = int(os.environ.get('EXPORT_FILE_TTL_HOURS', '72'))
+
+# キーワード一括インポート（この行数を超える場合はバックグラウンドで実行 / bulk_create の1回の件数 / アップロードファイルの最大バイト数）
+KEYWORD_IMPORT_SYNC_MAX_ROWS = int(os.environ.get('KEYWORD_IMPORT_SYNC_MAX_ROWS', '500'))
+KEYWORD_IMPORT_BATCH_SIZE = int(os.environ.get('KEYWORD_IMPORT_BATCH_SIZE', '500'))
+KEYWORD_IMPORT_MAX_FILE_SIZE = int(os.environ.get('KEYWORD_IMPORT_MAX_FILE_SIZE', str(5 * 1024 * 1024)))
+
+# SEO一括検索の進捗がこの分数以上止まっている場合はワーカー停止とみなして再開する
+BULK_SEARCH_STALE_MINUTES = int(os.environ.get('BULK_SEARCH_STALE_MINUTES', '10'))
+
+# SEO一括検索をキーワード単位のタスクで並行実行する / 一括検索（SEO・RPP）の1店舗あたりの同時実行タスク数
+BULK_SEARCH_PARALLEL = os.environ.get('BULK_SEARCH_PARALLEL', 'True') == 'True'
+BULK_SEARCH_MAX_IN_FLIGHT = int(os.environ.get('BULK_SEARCH_MAX_IN_FLIGHT', '3'))
+
 # Logging configuration
 LOGGING = {
     'version': 1,
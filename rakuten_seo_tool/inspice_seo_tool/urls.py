@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 from seo_ranking import views
+from seo_ranking.views_metrics import metrics_endpoint
 from accounts.views_signup import CustomSignupView
 
 urlpatterns = [
@@ -30,6 +31,7 @@ urlpatterns = [
     path('seo/', include('seo_ranking.urls')),
     path('webhooks/', include('accounts.webhook_urls')),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('metrics/', metrics_endpoint, name='metrics'),
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
 ]
 
@@ -4,11 +4,16 @@ Claude APIを使用して商品データを分析し、改善提案を生成す
 """
 
 import json
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+from datetime import timedelta
+from typing import Dict, List, Optional, Any, Tuple
 from django.conf import settings
+from django.utils import timezone
 import requests
 
+from .http_transport import PooledHttpClient
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +22,7 @@ class ClaudeAnalyzer:
     
     def __init__(self):
         self.api_key = settings.CLAUDE_API_KEY
-        self.api_url = "https://api.anthropic.com/v1/messages"
+        self.api_url = getattr(settings, 'CLAUDE_API_URL', None) or "https://api.anthropic.com/v1/messages"
         self.headers = {
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
@@ -182,7 +187,7 @@ class ClaudeAnalyzer:
                 ]
             }
             
-            response = requests.post(
+            response = PooledHttpClient().post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
@@ -406,20 +411,18 @@ class ClaudeAnalyzer:
         }
 
 
-def get_ai_analysis(keyword_obj, ranking_result, top_products) -> Dict[str, Any]:
+def build_analysis_inputs(keyword_obj, ranking_result, top_products) -> Tuple[Dict, List[Dict]]:
     """
-    AI分析の実行とデータ整形を行う便利関数
+    AI分析に渡す自社商品データと競合商品データを作成
     
     Args:
         keyword_obj: Keywordモデルのインスタンス
-        ranking_result: RankingResultモデルのインスタンス  
+        ranking_result: RankingResultモデルのインスタンス
         top_products: TopProductモデルのクエリセット
         
     Returns:
-        AI分析結果の辞書
+        (自社商品データ, 競合商品データのリスト)
     """
-    analyzer = ClaudeAnalyzer()
-    
     # 自社商品データの準備
     own_product_data = {
         'rank': ranking_result.rank if ranking_result.is_found else '圏外',
@@ -442,9 +445,134 @@ def get_ai_analysis(keyword_obj, ranking_result, top_products) -> Dict[str, Any]
             'review_average': float(product.review_average or 0)
         })
     
+    return own_product_data, competitor_data
+
+
+def compute_analysis_hash(keyword: str, own_product_data: Dict, competitor_data: List[Dict]) -> str:
+    """分析入力（キーワード・自社商品・上位商品）の内容ハッシュを計算"""
+    payload = json.dumps(
+        {'keyword': keyword, 'own': own_product_data, 'competitors': competitor_data},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_ai_analysis(keyword_obj, ranking_result, top_products) -> Dict[str, Any]:
+    """
+    AI分析の実行とデータ整形を行う便利関数
+    
+    Args:
+        keyword_obj: Keywordモデルのインスタンス
+        ranking_result: RankingResultモデルのインスタンス  
+        top_products: TopProductモデルのクエリセット
+        
+    Returns:
+        AI分析結果の辞書
+    """
+    analyzer = ClaudeAnalyzer()
+    own_product_data, competitor_data = build_analysis_inputs(keyword_obj, ranking_result, top_products)
+    
     # AI分析の実行
     return analyzer.analyze_ranking_data(
         keyword=keyword_obj.keyword,
         own_product_data=own_product_data,
         competitor_data=competitor_data
-    )
\ No newline at end of file
+    )
+
+
+def get_ranking_analysis_hash(ranking_result) -> str:
+    """順位結果の現在の上位商品データから分析入力ハッシュを計算"""
+    top_products = ranking_result.top_products.all().order_by('rank')
+    own_product_data, competitor_data = build_analysis_inputs(ranking_result.keyword, ranking_result, top_products)
+    return compute_analysis_hash(ranking_result.keyword.keyword, own_product_data, competitor_data)
+
+
+def load_saved_analysis(ranking_result) -> Optional[Dict[str, Any]]:
+    """保存済みのAI分析結果を取得（未生成・形式不正の場合はNone）"""
+    if not ranking_result.ai_analysis:
+        return None
+    try:
+        saved = json.loads(ranking_result.ai_analysis)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(saved, dict) or 'analysis' not in saved:
+        return None
+    return saved
+
+
+def get_cached_ai_analysis(ranking_result, analysis_hash: str = None) -> Optional[Dict[str, Any]]:
+    """
+    入力が変わっていない保存済みAI分析結果を取得
+    
+    フォールバック分析（API失敗時）は AI_ANALYSIS_RETRY_MINUTES 経過後に再生成の対象とする。
+    
+    Args:
+        ranking_result: RankingResultモデルのインスタンス
+        analysis_hash: 計算済みの入力ハッシュ（省略時は計算する）
+        
+    Returns:
+        AI分析結果の辞書（再生成が必要な場合はNone）
+    """
+    saved = load_saved_analysis(ranking_result)
+    if saved is None:
+        return None
+    
+    if analysis_hash is None:
+        analysis_hash = get_ranking_analysis_hash(ranking_result)
+    if ranking_result.ai_analysis_hash != analysis_hash:
+        return None
+    
+    if not saved.get('success'):
+        retry_minutes = getattr(settings, 'AI_ANALYSIS_RETRY_MINUTES', 60)
+        updated_at = ranking_result.ai_analysis_updated_at
+        if updated_at is None or timezone.now() - updated_at >= timedelta(minutes=retry_minutes):
+            return None
+    return saved
+
+
+def generate_ranking_analysis(ranking_result) -> Dict[str, Any]:
+    """
+    順位結果のAI分析を生成して保存
+    
+    同じ入力ハッシュで成功済みの分析が他の順位結果にあれば、APIを呼ばずに再利用する。
+    
+    Args:
+        ranking_result: RankingResultモデルのインスタンス
+        
+    Returns:
+        AI分析結果の辞書
+    """
+    from .models import RankingResult
+    
+    keyword_obj = ranking_result.keyword
+    top_products = ranking_result.top_products.all().order_by('rank')
+    own_product_data, competitor_data = build_analysis_inputs(keyword_obj, ranking_result, top_products)
+    analysis_hash = compute_analysis_hash(keyword_obj.keyword, own_product_data, competitor_data)
+    
+    cached = get_cached_ai_analysis(ranking_result, analysis_hash)
+    if cached is not None:
+        return cached
+    
+    result = None
+    for candidate in RankingResult.objects.filter(ai_analysis_hash=analysis_hash).exclude(id=ranking_result.id).only('ai_analysis')[:5]:
+        saved = load_saved_analysis(candidate)
+        if saved and saved.get('success'):
+            logger.info(f"AI分析を再利用: RankingResult {candidate.id} → {ranking_result.id}")
+            result = saved
+            break
+    
+    if result is None:
+        analyzer = ClaudeAnalyzer()
+        result = analyzer.analyze_ranking_data(
+            keyword=keyword_obj.keyword,
+            own_product_data=own_product_data,
+            competitor_data=competitor_data
+        )
+    
+    RankingResult.objects.filter(id=ranking_result.id).update(
+        ai_analysis=json.dumps(result, ensure_ascii=False),
+        ai_analysis_hash=analysis_hash,
+        ai_analysis_updated_at=timezone.now()
+    )
+    return result
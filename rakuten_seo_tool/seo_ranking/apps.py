@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SeoRankingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'seo_ranking'
+
+    def ready(self):
+        import seo_ranking.signals
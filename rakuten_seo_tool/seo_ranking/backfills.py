@@ -0,0 +1,153 @@
+"""
+既存データからの集計・スナップショットの作成
+管理コマンドとマイグレーション（RunPython）の両方から使うため、モデルは引数で受け取る
+（マイグレーションでは apps.get_model() の履歴モデルを渡す）
+"""
+
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .rollups import apply_result
+from .store_matrix import sync_keywords
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ['latest_result', 'latest_rank', 'previous_rank', 'latest_checked_at']
+
+ROLLUP_FIELDS = ['best_rank', 'worst_rank', 'last_rank', 'last_checked_at', 'check_count', 'found_count']
+
+
+def backfill_latest_results(keyword_model, result_model, batch_size: int = 500, progress=None) -> int:
+    """
+    キーワードごとに最新2件の結果から最新結果スナップショットを作成
+
+    Args:
+        keyword_model: Keyword / RPPKeyword
+        result_model: RankingResult / RPPResult
+        batch_size: 1回に更新するキーワード数
+        progress: 途中経過を受け取る関数（引数は更新済み件数）
+
+    Returns:
+        更新したキーワード数
+    """
+    results = result_model.objects.filter(keyword=OuterRef('pk')).order_by('-checked_at', '-id')
+    keywords = keyword_model.objects.annotate(
+        snapshot_result_id=Subquery(results.values('id')[:1]),
+        snapshot_rank=Subquery(results.values('rank')[:1]),
+        snapshot_is_found=Subquery(results.values('is_found')[:1]),
+        snapshot_checked_at=Subquery(results.values('checked_at')[:1]),
+        snapshot_previous_rank=Subquery(results.values('rank')[1:2]),
+        snapshot_previous_is_found=Subquery(results.values('is_found')[1:2]),
+    ).order_by('id')
+
+    updated_count = 0
+    batch = []
+    for keyword in keywords.iterator(chunk_size=batch_size):
+        keyword.latest_result_id = keyword.snapshot_result_id
+        keyword.latest_rank = keyword.snapshot_rank if keyword.snapshot_is_found else None
+        keyword.previous_rank = keyword.snapshot_previous_rank if keyword.snapshot_previous_is_found else None
+        keyword.latest_checked_at = keyword.snapshot_checked_at
+        batch.append(keyword)
+
+        if len(batch) >= batch_size:
+            updated_count += _save_snapshots(keyword_model, batch)
+            batch = []
+            if progress:
+                progress(updated_count)
+
+    if batch:
+        updated_count += _save_snapshots(keyword_model, batch)
+    return updated_count
+
+
+def _save_snapshots(keyword_model, batch):
+    with transaction.atomic():
+        keyword_model.objects.bulk_update(batch, SNAPSHOT_FIELDS)
+    return len(batch)
+
+
+def rebuild_daily_rollups(result_model, rollup_model, days: int = None, batch_size: int = 1000,
+                          overwrite: bool = True) -> int:
+    """
+    検索結果をキーワード・日付順に走査して日次集計を作成（既存の集計は上書き）
+
+    Args:
+        result_model: RankingResult / RPPResult
+        rollup_model: DailyRankRollup / RPPDailyRankRollup
+        days: 直近何日分を再作成するか（Noneの場合は残っている検索結果すべて）
+        batch_size: 1回に保存する集計件数
+        overwrite: 既存の集計を上書きするか（False の場合は単純に追加する。集計テーブルを作成した
+            マイグレーション内ではユニーク制約が未作成のため上書き保存できない）
+
+    Returns:
+        保存した集計件数
+    """
+    results = result_model.objects.all()
+    if days:
+        start_date = timezone.localdate() - timedelta(days=days)
+        results = results.filter(checked_at__date__gte=start_date)
+    results = results.order_by('keyword_id', 'checked_at').values_list(
+        'keyword_id', 'rank', 'is_found', 'checked_at'
+    )
+
+    saved_count = 0
+    batch = []
+    current = None
+    for keyword_id, rank, is_found, checked_at in results.iterator(chunk_size=batch_size):
+        date = timezone.localdate(checked_at)
+        if current is None or current.keyword_id != keyword_id or current.date != date:
+            current = rollup_model(keyword_id=keyword_id, date=date)
+            batch.append(current)
+            if len(batch) > batch_size:
+                saved_count += _save_rollups(rollup_model, batch[:-1], overwrite)
+                batch = batch[-1:]
+        apply_result(current, rank if is_found else None, checked_at)
+
+    if batch:
+        saved_count += _save_rollups(rollup_model, batch, overwrite)
+    return saved_count
+
+
+def _save_rollups(rollup_model, batch, overwrite):
+    with transaction.atomic():
+        if overwrite:
+            rollup_model.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=['keyword', 'date'],
+                update_fields=ROLLUP_FIELDS
+            )
+        else:
+            rollup_model.objects.bulk_create(batch)
+    return len(batch)
+
+
+def backfill_keyword_matrix(keyword_model, matrix_model, prefix: str, batch_size: int = 500, progress=None) -> int:
+    """
+    キーワードをID順に読み込んで全店舗キーワード一覧に反映
+
+    Args:
+        keyword_model: Keyword / RPPKeyword
+        matrix_model: StoreKeywordMatrix
+        prefix: 'seo' / 'rpp'
+        batch_size: 1回に反映するキーワード数
+        progress: 途中経過を受け取る関数（引数は反映済み件数）
+
+    Returns:
+        反映した行数
+    """
+    synced_count = 0
+    batch = []
+    for keyword in keyword_model.objects.select_related('user').order_by('id').iterator(chunk_size=batch_size):
+        batch.append(keyword)
+        if len(batch) >= batch_size:
+            synced_count += sync_keywords(batch, batch_size=batch_size, prefix=prefix, matrix_model=matrix_model)
+            batch = []
+            if progress:
+                progress(synced_count)
+    if batch:
+        synced_count += sync_keywords(batch, batch_size=batch_size, prefix=prefix, matrix_model=matrix_model)
+    return synced_count
@@ -0,0 +1,95 @@
+"""
+ダッシュボード集計のキャッシュ
+ダッシュボード・店舗一覧・売上管理の集計値（count等）をDjangoキャッシュ（Redis）に保存する
+
+キーは名前空間（店舗ごとの tenant:<ユーザーID> / 全店舗共通の stores）ごとのバージョン番号を含み、
+キーワード・検索結果・サブスクリプションの変更時にシグナルからバージョンを上げて無効化する。
+古いバージョンのキーは削除せず、TTLで自然に消える。
+"""
+
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 全店舗の集計（マスター向けダッシュボード）の名前空間
+STORES_SCOPE = 'stores'
+
+# バージョン番号の保持期間（集計値のTTLより十分長くする）
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def tenant_scope(user_id) -> str:
+    """店舗ごとの名前空間"""
+    return f"tenant:{user_id}"
+
+
+def _version_key(scope: str) -> str:
+    return f"dashboard:{scope}:version"
+
+
+def _get_version(scope: str) -> int:
+    version = cache.get(_version_key(scope))
+    if version is None:
+        cache.add(_version_key(scope), 1, timeout=VERSION_TIMEOUT)
+        version = cache.get(_version_key(scope)) or 1
+    return version
+
+
+def get_or_compute(scope: str, name: str, compute, timeout: int = None):
+    """
+    集計値をキャッシュから取得（無い場合は計算して保存）
+
+    Args:
+        scope: 名前空間（tenant_scope() または STORES_SCOPE）
+        name: 集計名（日付など値が変わる条件も含める）
+        compute: 集計値を計算する関数（引数なし）
+        timeout: 保存秒数（省略時は settings.DASHBOARD_CACHE_TTL）
+
+    Returns:
+        集計値
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+    if timeout <= 0:
+        return compute()
+
+    try:
+        key = f"dashboard:{scope}:v{_get_version(scope)}:{name}"
+        value = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache read failed ({scope}/{name}): {e}")
+        return compute()
+
+    if value is not None:
+        metrics.inc('seo_cache_requests_total', cache='dashboard', panel=name.split(':', 1)[0], result='hit')
+        return value
+
+    metrics.inc('seo_cache_requests_total', cache='dashboard', panel=name.split(':', 1)[0], result='miss')
+    value = compute()
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Dashboard cache write failed ({scope}/{name}): {e}")
+    return value
+
+
+def invalidate(*scopes: str):
+    """名前空間のバージョンを上げて、保存済みの集計値を無効化"""
+    for scope in scopes:
+        try:
+            try:
+                cache.incr(_version_key(scope))
+            except ValueError:
+                # バージョン未作成（まだ集計が保存されていない）
+                cache.add(_version_key(scope), 1, timeout=VERSION_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Dashboard cache invalidation failed ({scope}): {e}")
+
+
+def invalidate_tenants(user_ids):
+    """店舗の集計と、全店舗の集計を無効化"""
+    invalidate(*[tenant_scope(user_id) for user_id in set(user_ids)], STORES_SCOPE)
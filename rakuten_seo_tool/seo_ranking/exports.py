@@ -0,0 +1,278 @@
+"""
+順位データの一括エクスポート
+店舗・キーワード・期間を指定して複数の検索結果をCSV/XLSXに出力する
+
+CSVとXLSXは同じ行データ（iter_export_rows）を使用する。行は iterator(chunk_size=...) で
+少しずつ取得するため、件数に関係なくメモリ使用量は一定になる。
+件数が多い場合は ExportJob としてバックグラウンドでファイルに書き出す。
+"""
+
+import os
+import csv
+import logging
+import urllib.parse
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FORMAT_CSV = 'csv'
+FORMAT_XLSX = 'xlsx'
+FORMATS = [FORMAT_CSV, FORMAT_XLSX]
+
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _format_datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _format_rank(rank, is_found=True):
+    return rank if is_found and rank is not None else '圏外'
+
+
+def _seo_results(filters):
+    from .models import RankingResult
+    return RankingResult.objects.filter(**filters['seo']).order_by('checked_at', 'id').values_list(
+        'keyword__rakuten_shop_id', 'keyword__keyword', 'checked_at',
+        'rank', 'is_found', 'total_products', 'error_message'
+    )
+
+
+def _seo_result_row(row):
+    shop_id, keyword, checked_at, rank, is_found, total_products, error_message = row
+    return [shop_id, keyword, _format_datetime(checked_at), _format_rank(rank, is_found),
+            '有' if is_found else '無', total_products or 0, error_message or '']
+
+
+def _seo_products(filters):
+    from .models import TopProduct
+    prefixed = {f"ranking_result__{key}": value for key, value in filters['seo'].items()}
+    return TopProduct.objects.filter(**prefixed).order_by('ranking_result__checked_at', 'ranking_result_id', 'rank').values_list(
+        'ranking_result__keyword__rakuten_shop_id', 'ranking_result__keyword__keyword', 'ranking_result__checked_at',
+        'rank', 'product_name', 'shop_name', 'shop_id', 'price', 'review_count', 'review_average',
+        'point_rate', 'genre_name', 'product_url', 'is_own_product'
+    )
+
+
+def _seo_product_row(row):
+    (shop_id, keyword, checked_at, rank, product_name, shop_name, product_shop_id, price,
+     review_count, review_average, point_rate, genre_name, product_url, is_own_product) = row
+    return [shop_id, keyword, _format_datetime(checked_at), rank, product_name, shop_name, product_shop_id,
+            price, review_count, float(review_average or 0), point_rate, genre_name or '', product_url,
+            '自社' if is_own_product else '']
+
+
+def _rpp_results(filters):
+    from .models_rpp import RPPResult
+    return RPPResult.objects.filter(**filters['rpp']).order_by('checked_at', 'id').values_list(
+        'keyword__rakuten_shop_id', 'keyword__keyword', 'checked_at',
+        'rank', 'is_found', 'total_ads', 'pages_checked', 'error_message'
+    )
+
+
+def _rpp_result_row(row):
+    shop_id, keyword, checked_at, rank, is_found, total_ads, pages_checked, error_message = row
+    return [shop_id, keyword, _format_datetime(checked_at), _format_rank(rank, is_found),
+            '有' if is_found else '無', total_ads or 0, pages_checked, error_message or '']
+
+
+def _rpp_ads(filters):
+    from .models_rpp import RPPAd
+    prefixed = {f"rpp_result__{key}": value for key, value in filters['rpp'].items()}
+    return RPPAd.objects.filter(**prefixed).order_by('rpp_result__checked_at', 'rpp_result_id', 'rank').values_list(
+        'rpp_result__keyword__rakuten_shop_id', 'rpp_result__keyword__keyword', 'rpp_result__checked_at',
+        'rank', 'product_name', 'shop_name', 'shop_id', 'price', 'page_number', 'product_url', 'is_own_product'
+    )
+
+
+def _rpp_ad_row(row):
+    (shop_id, keyword, checked_at, rank, product_name, shop_name, ad_shop_id, price,
+     page_number, product_url, is_own_product) = row
+    return [shop_id, keyword, _format_datetime(checked_at), rank, product_name, shop_name, ad_shop_id,
+            price or '', page_number, product_url, '自社' if is_own_product else '']
+
+
+# エクスポート種別: (表示名, ヘッダー, クエリ作成関数, 行変換関数)
+EXPORT_TYPES = {
+    'seo': (
+        'SEO順位結果',
+        ['店舗ID', 'キーワード', 'チェック日時', '順位', '発見', '総商品数', 'エラー'],
+        _seo_results, _seo_result_row,
+    ),
+    'seo_products': (
+        'SEO上位商品',
+        ['店舗ID', 'キーワード', 'チェック日時', '順位', '商品名', '店舗名', '商品の店舗ID', '価格',
+         'レビュー件数', 'レビュー評価', 'ポイント倍率', 'ジャンル', '商品URL', '自社商品'],
+        _seo_products, _seo_product_row,
+    ),
+    'rpp': (
+        'RPP順位結果',
+        ['店舗ID', 'キーワード', 'チェック日時', '広告順位', '発見', '総広告数', 'チェックページ数', 'エラー'],
+        _rpp_results, _rpp_result_row,
+    ),
+    'rpp_ads': (
+        'RPP広告',
+        ['店舗ID', 'キーワード', 'チェック日時', '広告順位', '商品名', '店舗名', '広告の店舗ID', '価格',
+         'ページ', '商品URL', '自社商品'],
+        _rpp_ads, _rpp_ad_row,
+    ),
+}
+
+
+def build_export_filters(user, params: dict) -> dict:
+    """
+    エクスポート条件からSEO/RPPそれぞれの結果テーブル用の絞り込み条件を作成
+
+    Args:
+        user: 実行ユーザー（マスターアカウント以外は自分のデータのみ）
+        params: keyword_ids（リスト）, shop_id, date_from, date_to（YYYY-MM-DD）
+
+    Returns:
+        {'seo': {...}, 'rpp': {...}}（RankingResult / RPPResult に対する filter 引数）
+
+    Raises:
+        ValueError: 日付の形式が不正な場合
+    """
+    common = {}
+    if not user.is_master:
+        common['keyword__user'] = user
+    if params.get('shop_id'):
+        common['keyword__rakuten_shop_id'] = params['shop_id']
+    if params.get('keyword_ids'):
+        common['keyword_id__in'] = [int(keyword_id) for keyword_id in params['keyword_ids']]
+
+    tz = timezone.get_current_timezone()
+    if params.get('date_from'):
+        date_from = datetime.strptime(params['date_from'], '%Y-%m-%d')
+        common['checked_at__gte'] = timezone.make_aware(date_from, tz)
+    if params.get('date_to'):
+        date_to = datetime.strptime(params['date_to'], '%Y-%m-%d') + timedelta(days=1)
+        common['checked_at__lt'] = timezone.make_aware(date_to, tz)
+
+    return {'seo': dict(common), 'rpp': dict(common)}
+
+
+def get_export_queryset(export_type: str, filters: dict):
+    """エクスポート対象の行クエリセット（values_list）を取得"""
+    return EXPORT_TYPES[export_type][2](filters)
+
+
+def iter_export_rows(export_type: str, filters: dict, chunk_size: int = None):
+    """
+    ヘッダー行とデータ行を順に返す（CSV/XLSX共通）
+
+    Args:
+        export_type: エクスポート種別
+        filters: build_export_filters の戻り値
+        chunk_size: DBから一度に取得する行数（省略時は settings.EXPORT_CHUNK_SIZE）
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    _, header, _, to_row = EXPORT_TYPES[export_type]
+    yield header
+    for row in get_export_queryset(export_type, filters).iterator(chunk_size=chunk_size):
+        yield to_row(row)
+
+
+class _Echo:
+    """csv.writer の出力をそのまま返す疑似ファイル"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """行データをCSVの文字列として1行ずつ返す（先頭にExcel用のBOM）"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv_file(rows, path: str) -> int:
+    """行データをCSVファイルに書き出す（ヘッダーを除いた行数を返す）"""
+    count = -1
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return max(count, 0)
+
+
+def write_xlsx_file(rows, path, title: str = 'export') -> int:
+    """
+    行データをXLSXファイルに書き出す（書き込み専用モードで一定のメモリ使用量）
+
+    Args:
+        rows: iter_export_rows の戻り値
+        path: 保存先のパスまたはバイナリのファイルオブジェクト
+        title: シート名（31文字まで）
+
+    Returns:
+        ヘッダーを除いた行数
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    count = -1
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(path)
+    return max(count, 0)
+
+
+def write_export_file(export_type: str, file_format: str, filters: dict, path: str) -> int:
+    """エクスポートファイルを書き出す"""
+    rows = iter_export_rows(export_type, filters)
+    if file_format == FORMAT_XLSX:
+        return write_xlsx_file(rows, path, EXPORT_TYPES[export_type][0])
+    return write_csv_file(rows, path)
+
+
+def get_export_root() -> str:
+    """エクスポートファイルの保存先ディレクトリ（公開ディレクトリの外）"""
+    export_root = str(getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'exports')))
+    os.makedirs(export_root, exist_ok=True)
+    return export_root
+
+
+def build_filename(export_type: str, file_format: str, suffix: str = '') -> str:
+    """ダウンロード用のファイル名"""
+    timestamp = timezone.localtime().strftime('%Y%m%d_%H%M')
+    label = EXPORT_TYPES[export_type][0]
+    return f"{label}_{timestamp}{suffix}.{file_format}"
+
+
+def content_disposition(filename: str) -> str:
+    """日本語ファイル名に対応した Content-Disposition"""
+    encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
+    ascii_name = filename.encode('ascii', 'ignore').decode() or f"export.{filename.rsplit('.', 1)[-1]}"
+    return f'attachment; filename="{ascii_name}"; filename*=UTF-8\'\'{encoded_filename}'
+
+
+def purge_expired_exports():
+    """保存期間を過ぎたエクスポートファイルとジョブを削除"""
+    from .models import ExportJob
+
+    ttl_hours = getattr(settings, 'EXPORT_FILE_TTL_HOURS', 72)
+    cutoff = timezone.now() - timedelta(hours=ttl_hours)
+    deleted_count = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).iterator():
+        if job.file_path:
+            try:
+                os.remove(os.path.join(get_export_root(), job.file_path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to remove export file {job.file_path}: {e}")
+        job.delete()
+        deleted_count += 1
+    return deleted_count
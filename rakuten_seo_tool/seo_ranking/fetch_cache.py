@@ -0,0 +1,92 @@
+"""
+検索結果の取得キャッシュ
+同じキーワードを複数店舗が登録している場合に、同じバッチ実行（深夜・自動・一括検索）の検索結果を
+実行ID・正規化キーワード・ページ単位で共有する
+
+Djangoキャッシュ（Redis）に保存するため、ワーカー間でも1回の取得を使い回せる。
+順位の抽出は店舗ごとに行うので、キャッシュするのは検索結果そのものだけ。
+実行IDを渡さない検索（画面からの単体検索など）はキャッシュを使わず、常に最新の検索結果を取得する。
+"""
+
+import uuid
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# 名前空間
+ICHIBA_ITEM_SEARCH = 'ichiba_item'
+RPP_SEARCH_PAGE = 'rpp_page'
+
+
+def normalize_keyword(keyword: str) -> str:
+    """キーワードの空白を正規化（前後の空白除去・連続空白の統一）"""
+    return ' '.join((keyword or '').split())
+
+
+def new_run_id(kind: str) -> str:
+    """バッチ実行ごとの実行IDを作成（同じ実行IDを渡した検索どうしで検索結果を共有する）"""
+    return f"{kind}:{uuid.uuid4().hex}"
+
+
+class FetchCache:
+    """バッチ実行ごとの検索結果キャッシュ"""
+
+    def __init__(self, namespace: str, window: int = None, cache_alias: str = 'default'):
+        """
+        初期化
+
+        Args:
+            namespace: 取得元ごとの名前空間
+            window: 検索結果の保持秒数（同じ実行内でもこれより古い結果は使わない）。0の場合はキャッシュしない
+            cache_alias: 使用するDjangoキャッシュのエイリアス
+        """
+        if window is None:
+            window = getattr(settings, 'FETCH_CACHE_WINDOW', 1800)
+        self.namespace = namespace
+        self.window = int(window)
+        self.cache_alias = cache_alias
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _key(self, run_id: str, keyword: str, parts) -> str:
+        digest = hashlib.sha1(keyword.encode('utf-8')).hexdigest()
+        suffix = ':'.join(str(part) for part in parts)
+        return f"fetch:{self.namespace}:{run_id}:{digest}:{suffix}"
+
+    def get(self, run_id: str, keyword: str, *parts):
+        """同じ実行でキャッシュ済みの検索結果を取得（無い場合・実行IDが無い場合はNone）"""
+        if not self.enabled or not run_id:
+            return None
+        try:
+            value = caches[self.cache_alias].get(self._key(run_id, keyword, parts))
+        except Exception as e:
+            logger.warning(f"Fetch cache read failed ({self.namespace}): {e}")
+            return None
+        if value is not None:
+            logger.debug(f"Fetch cache hit: {self.namespace} '{keyword}' {parts}")
+        return value
+
+    def set(self, run_id: str, keyword: str, value, *parts):
+        """検索結果を実行IDに紐付けて保存（実行IDが無い場合は保存しない）"""
+        if not self.enabled or not run_id:
+            return
+        try:
+            caches[self.cache_alias].set(self._key(run_id, keyword, parts), value, timeout=self.window)
+        except Exception as e:
+            logger.warning(f"Fetch cache write failed ({self.namespace}): {e}")
+
+
+_fetch_caches = {}
+
+
+def get_fetch_cache(namespace: str) -> FetchCache:
+    """名前空間ごとの取得キャッシュを取得"""
+    fetch_cache = _fetch_caches.get(namespace)
+    if fetch_cache is None:
+        fetch_cache = _fetch_caches.setdefault(namespace, FetchCache(namespace))
+    return fetch_cache
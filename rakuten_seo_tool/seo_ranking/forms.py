@@ -1,5 +1,42 @@
 from django import forms
+from django.conf import settings
 from .models import Keyword
+from .keyword_import import parse_keyword_rows, read_uploaded_text
+
+
+class KeywordImportSourceMixin:
+    """一括登録フォームの入力（貼り付けテキスト・CSV/TSVファイル）を行に変換する"""
+    
+    def clean_keyword_file(self):
+        keyword_file = self.cleaned_data.get('keyword_file')
+        max_size = getattr(settings, 'KEYWORD_IMPORT_MAX_FILE_SIZE', 5 * 1024 * 1024)
+        if keyword_file and keyword_file.size > max_size:
+            raise forms.ValidationError(f'ファイルサイズは{max_size // (1024 * 1024)}MB以内にしてください。')
+        return keyword_file
+    
+    def clean_import_rows(self, cleaned_data):
+        """cleaned_data['rows'] に入力行を設定（キーワード単位の検証はインポート時に行ごとに行う）"""
+        rows = []
+        keywords_text = cleaned_data.get('keywords') or ''
+        if keywords_text.strip():
+            for row in parse_keyword_rows(keywords_text):
+                row['source'] = 'text'
+                rows.append(row)
+        
+        keyword_file = cleaned_data.get('keyword_file')
+        if keyword_file:
+            delimiter = ',' if keyword_file.name.lower().endswith('.csv') else '\t'
+            for row in parse_keyword_rows(read_uploaded_text(keyword_file), delimiter=delimiter):
+                row['source'] = 'file'
+                rows.append(row)
+        
+        if not rows and 'keywords' not in self.errors and 'keyword_file' not in self.errors:
+            self.add_error('keywords', 'キーワードを入力するか、CSV/TSVファイルを選択してください。')
+        cleaned_data['rows'] = rows
+        return cleaned_data
+
+
+KEYWORD_FILE_HELP_TEXT = 'CSV/TSVファイル（1列目: キーワード、2列目: 対象商品URL、3列目: 有効 1/0。2列目以降は省略可）'
 
 
 class KeywordForm(forms.ModelForm):
@@ -99,19 +136,29 @@ class KeywordForm(forms.ModelForm):
         return url
 
 
-class BulkKeywordForm(forms.Form):
+class BulkKeywordForm(KeywordImportSourceMixin, forms.Form):
     """キーワード一括登録フォーム"""
     
     keywords = forms.CharField(
         label='キーワード一覧',
+        required=False,
         widget=forms.Textarea(attrs={
             'class': 'form-control',
             'rows': 10,
             'placeholder': 'キーワードを改行で区切って入力してください\n例：\n楽天 商品名\nショップ名 商品\nブランド名 アイテム',
-            'required': True
         })
     )
     
+    keyword_file = forms.FileField(
+        label='ファイルから登録',
+        required=False,
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.tsv,.txt',
+        }),
+        help_text=KEYWORD_FILE_HELP_TEXT
+    )
+    
     rakuten_shop_id = forms.CharField(
         label='楽天店舗ID',
         max_length=100,
@@ -157,7 +204,7 @@ class BulkKeywordForm(forms.Form):
                 'class': 'form-control bg-light',
                 'title': f'選択店舗: {self.selected_store.company_name}'
             })
-            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます（最大10個まで）'
+            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます（登録数はプランの上限まで）'
         elif self.user and not self.user.is_master:
             # 通常ユーザーは自分の店舗IDを自動設定
             self.fields['rakuten_shop_id'].initial = self.user.rakuten_shop_id
@@ -165,46 +212,14 @@ class BulkKeywordForm(forms.Form):
                 'readonly': True,
                 'class': 'form-control bg-light'
             })
-            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます（最大10個まで）'
+            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます（登録数はプランの上限まで）'
         else:
             # マスターアカウントで店舗未選択の場合
-            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます（最大50個まで）'
+            self.fields['keywords'].help_text = '改行で区切って複数のキーワードを入力できます'
     
-    def clean_keywords(self):
-        keywords_text = self.cleaned_data.get('keywords')
-        if not keywords_text:
-            raise forms.ValidationError('キーワードは必須です。')
-        
-        # 改行で分割してキーワードリストを作成
-        keywords_list = [kw.strip() for kw in keywords_text.split('\n') if kw.strip()]
-        
-        if not keywords_list:
-            raise forms.ValidationError('有効なキーワードが入力されていません。')
-        
-        # ユーザーに応じた最大数チェック
-        if self.user and not self.user.is_master:
-            # 現在の登録数を取得
-            from .models import Keyword
-            current_count = Keyword.objects.filter(user=self.user).count()
-            remaining = 10 - current_count
-            
-            if remaining <= 0:
-                raise forms.ValidationError('キーワード登録数の上限（10個）に達しています。')
-            
-            if len(keywords_list) > remaining:
-                raise forms.ValidationError(f'登録可能なキーワード数は残り{remaining}個です。')
-        else:
-            if len(keywords_list) > 50:
-                raise forms.ValidationError('キーワードは最大50個まで登録できます。')
-        
-        # 各キーワードの長さチェック
-        for keyword in keywords_list:
-            if len(keyword) < 2:
-                raise forms.ValidationError(f'キーワード「{keyword}」は2文字以上で入力してください。')
-            if len(keyword) > 100:
-                raise forms.ValidationError(f'キーワード「{keyword}」は100文字以内で入力してください。')
-        
-        return keywords_list
+    def clean(self):
+        # キーワードの件数・文字数は行ごとにインポート結果で報告する（1行の誤りで全体を拒否しない）
+        return self.clean_import_rows(super().clean())
     
     def clean_rakuten_shop_id(self):
         shop_id = self.cleaned_data.get('rakuten_shop_id')
@@ -5,6 +5,7 @@ RPP広告順位関連のフォーム
 from django import forms
 from django.core.exceptions import ValidationError
 from .models_rpp import RPPKeyword
+from .forms import KeywordImportSourceMixin, KEYWORD_FILE_HELP_TEXT
 
 
 class RPPKeywordForm(forms.ModelForm):
@@ -125,11 +126,12 @@ class RPPKeywordForm(forms.ModelForm):
         return cleaned_data
 
 
-class BulkRPPKeywordForm(forms.Form):
+class BulkRPPKeywordForm(KeywordImportSourceMixin, forms.Form):
     """RPPキーワード一括登録フォーム"""
     
     keywords = forms.CharField(
         label='RPPキーワード（複数）',
+        required=False,
         widget=forms.Textarea(attrs={
             'class': 'form-control',
             'rows': 10,
@@ -139,7 +141,17 @@ class BulkRPPKeywordForm(forms.Form):
 バスケットシューズ 白
 サッカーシューズ ジュニア''',
         }),
-        help_text='改行で区切って複数のキーワードを入力してください（最大10個）'
+        help_text='改行で区切って複数のキーワードを入力してください（登録数はプランの上限まで）'
+    )
+    
+    keyword_file = forms.FileField(
+        label='ファイルから登録',
+        required=False,
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.tsv,.txt',
+        }),
+        help_text=KEYWORD_FILE_HELP_TEXT
     )
     
     rakuten_shop_id = forms.CharField(
@@ -193,45 +205,6 @@ class BulkRPPKeywordForm(forms.Form):
             self.fields['rakuten_shop_id'].widget = forms.HiddenInput()
             self.fields['rakuten_shop_id'].initial = user.rakuten_shop_id
     
-    def clean_keywords(self):
-        keywords_text = self.cleaned_data.get('keywords', '')
-        if not keywords_text.strip():
-            raise ValidationError('キーワードは必須です。')
-        
-        # 改行で分割してキーワードリストを作成
-        keywords = []
-        for line in keywords_text.strip().split('\n'):
-            keyword = line.strip()
-            if keyword:  # 空行は無視
-                keywords.append(keyword)
-        
-        if not keywords:
-            raise ValidationError('有効なキーワードを入力してください。')
-        
-        if len(keywords) > 10:
-            raise ValidationError('一括登録できるキーワードは最大10個です。')
-        
-        # 各キーワードの妥当性をチェック
-        validated_keywords = []
-        for keyword in keywords:
-            if len(keyword) > 100:
-                raise ValidationError(f'キーワード「{keyword}」は100文字以内で入力してください。')
-            
-            # 禁止文字チェック
-            invalid_chars = ['<', '>', '"', "'", '&']
-            for char in invalid_chars:
-                if char in keyword:
-                    raise ValidationError(f'キーワード「{keyword}」に使用できない文字が含まれています: {char}')
-            
-            validated_keywords.append(keyword.strip())
-        
-        # 重複チェック
-        unique_keywords = list(set(validated_keywords))
-        if len(unique_keywords) != len(validated_keywords):
-            raise ValidationError('重複するキーワードがあります。')
-        
-        return unique_keywords
-    
     def clean_rakuten_shop_id(self):
         shop_id = self.cleaned_data.get('rakuten_shop_id')
         if not shop_id:
@@ -245,20 +218,5 @@ class BulkRPPKeywordForm(forms.Form):
         return shop_id.strip()
     
     def clean(self):
-        cleaned_data = super().clean()
-        keywords = cleaned_data.get('keywords', [])
-        shop_id = cleaned_data.get('rakuten_shop_id')
-        
-        # 登録数制限チェック（マスターアカウント以外）
-        if self.target_user and not self.user.is_master and keywords:
-            current_count = RPPKeyword.objects.filter(user=self.target_user).count()
-            new_count = len(keywords)
-            
-            if current_count + new_count > 10:
-                available_slots = 10 - current_count
-                raise ValidationError(
-                    f'登録可能なキーワードは残り{available_slots}個です。'
-                    f'{new_count}個のキーワードを登録しようとしていますが、上限を超えています。'
-                )
-        
-        return cleaned_data
\ No newline at end of file
+        # キーワードの件数・文字数・禁止文字は行ごとにインポート結果で報告する
+        return self.clean_import_rows(super().clean())
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+楽天ジャンル名キャッシュ
+プロセス内LRUとDjangoキャッシュ（Redis）の2層でジャンルID→ジャンル名を保持する
+
+ジャンル名はほとんど変化せずキーワード間でもほぼ同じIDが繰り返し出現するため、
+長めのTTLでワーカー間・実行間で共有し、IchibaGenre APIの呼び出しを削減する。
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'rakuten:genre:'
+
+
+class GenreNameCache:
+    """2層ジャンル名キャッシュ（プロセス内LRU → Djangoキャッシュ）"""
+
+    def __init__(self, max_local_entries: int = 5000, ttl: int = 60 * 60 * 24 * 30,
+                 cache_alias: str = 'default'):
+        """
+        初期化
+
+        Args:
+            max_local_entries: プロセス内LRUに保持する最大件数
+            ttl: 共有キャッシュの有効期限（秒）
+            cache_alias: 使用するDjangoキャッシュのエイリアス
+        """
+        self.max_local_entries = max(1, int(max_local_entries))
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _shared(self):
+        return caches[self.cache_alias]
+
+    def _key(self, genre_id) -> str:
+        return f"{CACHE_KEY_PREFIX}{genre_id}"
+
+    def _remember_local(self, genre_id: str, genre_name: str):
+        with self._lock:
+            self._local[genre_id] = genre_name
+            self._local.move_to_end(genre_id)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def get(self, genre_id) -> str:
+        """キャッシュからジャンル名を取得（存在しない場合はNone）"""
+        genre_id = str(genre_id)
+        with self._lock:
+            if genre_id in self._local:
+                self._local.move_to_end(genre_id)
+                return self._local[genre_id]
+
+        try:
+            genre_name = self._shared.get(self._key(genre_id))
+        except Exception as e:
+            logger.warning(f"Genre cache read failed for {genre_id}: {e}")
+            return None
+
+        if genre_name is not None:
+            self._remember_local(genre_id, genre_name)
+        return genre_name
+
+    def set(self, genre_id, genre_name: str):
+        """ジャンル名を両方の層に保存"""
+        self.set_many({genre_id: genre_name})
+
+    def set_many(self, genre_names: dict):
+        """複数のジャンル名をまとめて保存"""
+        if not genre_names:
+            return
+
+        genre_names = {str(genre_id): name for genre_id, name in genre_names.items()}
+        for genre_id, genre_name in genre_names.items():
+            self._remember_local(genre_id, genre_name)
+
+        try:
+            self._shared.set_many(
+                {self._key(genre_id): name for genre_id, name in genre_names.items()},
+                timeout=self.ttl,
+            )
+        except Exception as e:
+            logger.warning(f"Genre cache write failed ({len(genre_names)} entries): {e}")
+
+    def clear_local(self):
+        """プロセス内LRUを破棄する（テスト用）"""
+        with self._lock:
+            self._local.clear()
+
+
+_genre_cache = None
+_genre_cache_lock = threading.Lock()
+
+
+def get_genre_cache() -> GenreNameCache:
+    """プロセス共通のジャンル名キャッシュを取得"""
+    global _genre_cache
+    if _genre_cache is None:
+        with _genre_cache_lock:
+            if _genre_cache is None:
+                _genre_cache = GenreNameCache(
+                    max_local_entries=getattr(settings, 'GENRE_CACHE_LOCAL_SIZE', 5000),
+                    ttl=getattr(settings, 'GENRE_CACHE_TTL', 60 * 60 * 24 * 30),
+                )
+    return _genre_cache
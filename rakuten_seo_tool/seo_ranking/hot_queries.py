@@ -0,0 +1,97 @@
+"""
+主要画面の頻出クエリ一覧
+index_advisor コマンドで実行計画（EXPLAIN）を確認する対象を登録する
+
+各クエリは (ユーザーID, SEOキーワードID, RPPキーワードID, RPP結果ID) を受け取り、
+画面と同じ条件のクエリセットを返す関数として登録する。
+"""
+
+from datetime import timedelta
+from django.utils import timezone
+
+from .models import Keyword, RankingResult, SearchLog
+from .models_rpp import RPPKeyword, RPPResult, RPPAd, RPPSearchLog
+
+_hot_queries = {}
+
+
+def register_hot_query(name: str, source: str):
+    """
+    頻出クエリを登録するデコレーター
+
+    Args:
+        name: クエリ名
+        source: 使用している画面・処理
+    """
+    def decorator(func):
+        _hot_queries[name] = (source, func)
+        return func
+    return decorator
+
+
+def get_hot_queries():
+    """登録済みの頻出クエリを取得（{名前: (使用箇所, 関数)}）"""
+    return dict(_hot_queries)
+
+
+@register_hot_query('seo_keyword_list', 'keyword_list')
+def seo_keyword_list(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return Keyword.objects.filter(user_id=user_id).order_by('-created_at')
+
+
+@register_hot_query('seo_active_keywords', 'dashboard / bulk_keyword_search')
+def seo_active_keywords(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return Keyword.objects.filter(user_id=user_id, is_active=True)
+
+
+@register_hot_query('seo_ranking_results', 'ranking_results')
+def seo_ranking_results(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RankingResult.objects.filter(keyword_id=keyword_id).order_by('-checked_at')
+
+
+@register_hot_query('seo_recent_results', 'dashboard / StoreDetailView')
+def seo_recent_results(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RankingResult.objects.filter(keyword__user_id=user_id).order_by('-checked_at')[:10]
+
+
+@register_hot_query('seo_search_logs', 'search_logs')
+def seo_search_logs(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return SearchLog.objects.filter(user_id=user_id).order_by('-created_at')
+
+
+@register_hot_query('seo_recent_search_logs', 'dashboard')
+def seo_recent_search_logs(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return SearchLog.objects.filter(
+        user_id=user_id,
+        created_at__gte=timezone.now() - timedelta(days=30)
+    )
+
+
+@register_hot_query('rpp_keyword_list', 'rpp_keyword_list')
+def rpp_keyword_list(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPKeyword.objects.filter(user_id=user_id).order_by('-created_at')
+
+
+@register_hot_query('rpp_active_keywords', 'rpp_bulk_search')
+def rpp_active_keywords(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPKeyword.objects.filter(user_id=user_id, is_active=True).order_by('keyword')
+
+
+@register_hot_query('rpp_results', 'rpp_results')
+def rpp_results(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPResult.objects.filter(keyword_id=rpp_keyword_id).order_by('-checked_at')
+
+
+@register_hot_query('rpp_recent_results', 'StoreDetailView')
+def rpp_recent_results(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPResult.objects.filter(keyword__user_id=user_id).order_by('-checked_at')[:5]
+
+
+@register_hot_query('rpp_top_ads', 'rpp_result_detail')
+def rpp_top_ads(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPAd.objects.filter(rpp_result_id=rpp_result_id).order_by('rank')[:10]
+
+
+@register_hot_query('rpp_search_logs', 'rpp_search_logs')
+def rpp_search_logs(user_id, keyword_id, rpp_keyword_id, rpp_result_id):
+    return RPPSearchLog.objects.filter(user_id=user_id).order_by('-created_at')
@@ -0,0 +1,219 @@
+"""
+プロセス共通のHTTP接続プール
+楽天API・RPP検索ページ・Claude APIへのリクエストで1つの requests.Session を共有し、
+キープアライブの接続をクライアントやユーザーをまたいで再利用する
+
+接続エラー・5xxは urllib3 の Retry で指数バックオフ付きで再試行する。
+429 は呼び出し側が共有レートリミッターを減速させて再試行するため、ここでは再試行しない。
+ホストごとのリクエスト数・エラー数・レイテンシ・新規接続数を get_transport_stats() で取得できる。
+"""
+
+import os
+import time
+import threading
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class CountingRetry(Retry):
+    """urllib3の再試行をメトリクスに記録するRetry"""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        host = getattr(_pool, 'host', '') or ''
+        reason = f"status_{response.status}" if response is not None else type(error).__name__
+        metrics.inc('seo_http_retries_total', host=host, reason=reason)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _create_session() -> requests.Session:
+    """接続プールとリトライ設定を持つセッションを生成"""
+    retry = CountingRetry(
+        total=getattr(settings, 'HTTP_RETRY_TOTAL', 2),
+        backoff_factor=getattr(settings, 'HTTP_RETRY_BACKOFF', 0.5),
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, 'HTTP_POOL_CONNECTIONS', 10),
+        pool_maxsize=getattr(settings, 'HTTP_POOL_MAXSIZE', 20),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    プロセス共通のセッションを取得
+
+    Celeryのpreforkワーカーでは親プロセスの接続を引き継がないよう、プロセスごとに生成する。
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _session_pid = pid
+                logger.debug(f"HTTP session initialized (pid {pid})")
+    return _session
+
+
+def reset_http_session():
+    """セッションと統計を破棄する（設定変更時やテスト用）"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+    with _stats_lock:
+        _stats.clear()
+
+
+def record_request(host: str, seconds: float, status: int = None, error: str = None):
+    """
+    ホストごとのリクエスト統計を記録
+
+    Args:
+        host: 接続先ホスト
+        seconds: レスポンスまでの秒数
+        status: HTTPステータスコード（応答があった場合）
+        error: 例外名（接続エラー・タイムアウトの場合）
+    """
+    with _stats_lock:
+        host_stats = _stats.setdefault(host, {
+            'requests': 0,
+            'errors': 0,
+            'status': {},
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        })
+        host_stats['requests'] += 1
+        host_stats['latency_total'] += seconds
+        host_stats['latency_max'] = max(host_stats['latency_max'], seconds)
+        if status is not None:
+            status_class = f"{status // 100}xx" if status != 429 else '429'
+            host_stats['status'][status_class] = host_stats['status'].get(status_class, 0) + 1
+        if error is not None:
+            host_stats['errors'] += 1
+            host_stats['status'][error] = host_stats['status'].get(error, 0) + 1
+
+    metrics.observe('seo_http_request_seconds', seconds, host=host)
+    if status is not None:
+        metrics.inc('seo_http_requests_total', host=host, status=status)
+        if status == 429:
+            metrics.inc('seo_http_rate_limited_total', host=host)
+    elif error is not None and 'Timeout' in error:
+        metrics.inc('seo_http_timeouts_total', host=host)
+    elif error is not None:
+        metrics.inc('seo_http_errors_total', host=host, error=error)
+
+
+def _connection_counts() -> dict:
+    """urllib3の接続プールからホストごとの新規接続数と送信リクエスト数を取得"""
+    counts = {}
+    if _session is None or _session_pid != os.getpid():
+        return counts
+    for adapter in set(_session.adapters.values()):
+        pool_manager = getattr(adapter, 'poolmanager', None)
+        if pool_manager is None:
+            continue
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            host_counts = counts.setdefault(pool.host, {'connections_opened': 0, 'pool_requests': 0})
+            host_counts['connections_opened'] += pool.num_connections
+            host_counts['pool_requests'] += pool.num_requests
+    return counts
+
+
+def get_transport_stats() -> dict:
+    """
+    このプロセスのホストごとの接続・レイテンシ統計を取得
+
+    Returns:
+        {ホスト: {requests, errors, status, latency_avg, latency_max, connections_opened, pool_requests}}
+        pool_requests はリトライを含む実際の送信数。connections_opened が少ないほど接続が再利用されている
+    """
+    with _stats_lock:
+        snapshot = {host: dict(host_stats, status=dict(host_stats['status'])) for host, host_stats in _stats.items()}
+
+    for host, host_counts in _connection_counts().items():
+        snapshot.setdefault(host, {
+            'requests': 0, 'errors': 0, 'status': {}, 'latency_total': 0.0, 'latency_max': 0.0,
+        }).update(host_counts)
+
+    for host_stats in snapshot.values():
+        requests_count = host_stats['requests']
+        host_stats['latency_avg'] = round(host_stats.pop('latency_total') / requests_count, 4) if requests_count else 0.0
+        host_stats['latency_max'] = round(host_stats['latency_max'], 4)
+        host_stats.setdefault('connections_opened', 0)
+        host_stats.setdefault('pool_requests', 0)
+    return snapshot
+
+
+class PooledHttpClient:
+    """
+    共通の接続プールを使うHTTPクライアント
+
+    クライアントごとの既定ヘッダー・タイムアウトを持ち、requests.Session と同じ
+    get / post のインターフェースで使用できる。
+    """
+
+    def __init__(self, headers: dict = None, timeout: float = 30):
+        """
+        初期化
+
+        Args:
+            headers: 全リクエストに付与するヘッダー
+            timeout: 既定のタイムアウト秒数
+        """
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """共通セッションでリクエストを送信し、ホスト別の統計を記録する"""
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('timeout', self.timeout)
+
+        host = urlsplit(url).hostname or ''
+        start_time = time.monotonic()
+        try:
+            response = get_http_session().request(method, url, headers=headers, **kwargs)
+        except requests.exceptions.RequestException as e:
+            record_request(host, time.monotonic() - start_time, error=type(e).__name__)
+            raise
+        record_request(host, time.monotonic() - start_time, status=response.status_code)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """共通の接続プールは閉じない（互換性のため）"""
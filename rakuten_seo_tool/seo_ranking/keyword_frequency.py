@@ -0,0 +1,92 @@
+"""
+商品テキスト内の検索キーワード露出頻度の集計
+TopProduct の保存時に1回だけ集計して保存し、詳細画面・CSVでは保存済みの結果を使用する
+"""
+
+import re
+from functools import lru_cache
+
+# キーワードを文字種（ひらがな・カタカナ・漢字・英数字）で分割するパターン
+_WORD_PATTERN = re.compile(r'[ぁ-ん]+|[ァ-ヶー]+|[一-龠々]+|[a-zA-Z0-9]+')
+_JAPANESE_PATTERN = re.compile(r'^[ぁ-んァ-ヶ一-龠々]+$')
+_ENGLISH_PATTERN = re.compile(r'^[a-zA-Z0-9]+$')
+
+
+@lru_cache(maxsize=1024)
+def split_keyword(keyword: str) -> tuple:
+    """
+    キーワードを単語に分割（空白で分割した後、さらに文字種で分割）
+
+    Returns:
+        小文字化した単語のタプル（重複を含む、出現順）
+    """
+    words = []
+    for word in keyword.split():
+        words.extend(_WORD_PATTERN.findall(word.lower()))
+    return tuple(words)
+
+
+@lru_cache(maxsize=1024)
+def _countable_words(keyword: str) -> tuple:
+    """集計対象の単語（漢字・ひらがな・カタカナは1文字以上、英数字は2文字以上）"""
+    return tuple(
+        word for word in split_keyword(keyword)
+        if _JAPANESE_PATTERN.match(word) or (_ENGLISH_PATTERN.match(word) and len(word) >= 2)
+    )
+
+
+def compute_keyword_frequency(keyword: str, product_name: str = '', catchcopy: str = '',
+                              product_spec: str = '') -> dict:
+    """
+    検索キーワードの露出頻度を計算（個別キーワード別）
+
+    Args:
+        keyword: 検索キーワード
+        product_name: 商品名
+        catchcopy: キャッチコピー
+        product_spec: 商品説明
+
+    Returns:
+        商品名・キャッチコピー・商品説明ごとの出現回数と個別キーワードの詳細
+        （集計に使用したキーワードを 'keyword' に含む）
+    """
+    texts = (
+        (product_name or '').lower(),
+        (catchcopy or '').lower(),
+        (product_spec or '').lower(),
+    )
+
+    # 同じ単語はテキストごとに1回だけ数える（str.count は重ならない出現回数）
+    counts = {}
+    for word in _countable_words(keyword):
+        if word not in counts:
+            counts[word] = tuple(text.count(word) for text in texts)
+
+    keyword_details = {}
+    total_name_count = 0
+    total_catchcopy_count = 0
+    total_spec_count = 0
+
+    for word in _countable_words(keyword):
+        name_count, catchcopy_count, spec_count = counts[word]
+        word_total = name_count + catchcopy_count + spec_count
+        if word_total > 0:  # 1回以上出現したキーワードのみ記録
+            keyword_details[word] = {
+                'name_count': name_count,
+                'catchcopy_count': catchcopy_count,
+                'spec_count': spec_count,
+                'total': word_total
+            }
+        total_name_count += name_count
+        total_catchcopy_count += catchcopy_count
+        total_spec_count += spec_count
+
+    return {
+        'keyword': keyword,
+        'name_count': total_name_count,
+        'catchcopy_count': total_catchcopy_count,
+        'spec_count': total_spec_count,
+        'total_count': total_name_count + total_catchcopy_count + total_spec_count,
+        'keywords_used': list(split_keyword(keyword)),
+        'keyword_details': keyword_details
+    }
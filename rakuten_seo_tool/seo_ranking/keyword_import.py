@@ -0,0 +1,272 @@
+"""
+キーワードの一括インポート
+貼り付けテキスト・CSV/TSVファイルから SEO / RPP キーワードをまとめて登録する
+
+正規化・重複除外はメモリ上で行い（既存キーワードは1クエリで取得）、プランの登録上限は
+1回だけ判定して、bulk_create(ignore_conflicts=True) で1トランザクションにまとめて保存する。
+行ごとの結果（登録・登録済み・入力エラーなど）をレポートとして返す。
+"""
+
+import io
+import re
+import csv
+import logging
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+
+from .models import Keyword
+from .models_rpp import RPPKeyword
+from .fetch_cache import normalize_keyword
+from .dashboard_cache import invalidate_tenants
+from . import store_matrix
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_TYPE_SEO = 'seo'
+KEYWORD_TYPE_RPP = 'rpp'
+
+KEYWORD_MODELS = {
+    KEYWORD_TYPE_SEO: Keyword,
+    KEYWORD_TYPE_RPP: RPPKeyword,
+}
+
+# キーワードの入力ルール（登録フォームと同じ）
+KEYWORD_RULES = {
+    KEYWORD_TYPE_SEO: {'min_length': 2, 'max_length': 100, 'invalid_chars': ''},
+    KEYWORD_TYPE_RPP: {'min_length': 1, 'max_length': 100, 'invalid_chars': '<>"\'&'},
+}
+
+# 行ごとの結果
+ROW_CREATED = 'created'
+ROW_EXISTS = 'exists'
+ROW_DUPLICATE = 'duplicate'
+ROW_INVALID = 'invalid'
+ROW_OVER_LIMIT = 'over_limit'
+ROW_STATUS_LABELS = {
+    ROW_CREATED: '登録',
+    ROW_EXISTS: '登録済み',
+    ROW_DUPLICATE: '重複（入力内）',
+    ROW_INVALID: '入力エラー',
+    ROW_OVER_LIMIT: '上限超過',
+}
+
+# CSV/TSVの見出し行（1列目がこの値の場合は読み飛ばす）
+HEADER_NAMES = {'keyword', 'keywords', 'キーワード'}
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on', '有効', '○'}
+FALSE_VALUES = {'0', 'false', 'no', 'off', '無効', '×'}
+
+_url_validator = URLValidator()
+
+
+def read_uploaded_text(uploaded_file) -> str:
+    """アップロードファイルを文字列として読み込む（UTF-8、読めない場合はExcelのShift_JIS）"""
+    content = uploaded_file.read()
+    try:
+        return content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return content.decode('cp932', errors='replace')
+
+
+def parse_keyword_rows(text: str, delimiter: str = None) -> list:
+    """
+    入力テキストを行に分割
+
+    Args:
+        text: 貼り付けテキストまたはファイルの内容
+        delimiter: 区切り文字（省略時はタブを含めばTSV、それ以外は1行1キーワード）
+
+    Returns:
+        [{'line', 'keyword', 'target_product_url', 'is_active'}]（URL・有効は列が無い場合None）
+    """
+    if delimiter is None and '\t' in text:
+        delimiter = '\t'
+
+    if delimiter:
+        reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+    else:
+        reader = ([line] for line in text.splitlines())
+
+    rows = []
+    for line_number, cells in enumerate(reader, start=1):
+        cells = [cell.strip() for cell in cells]
+        if not cells or not cells[0]:
+            continue
+        if not rows and cells[0].lower() in HEADER_NAMES:
+            continue
+        rows.append({
+            'line': line_number,
+            'keyword': cells[0],
+            'target_product_url': cells[1] if len(cells) > 1 and cells[1] else None,
+            'is_active': cells[2] if len(cells) > 2 and cells[2] else None,
+        })
+    return rows
+
+
+def extract_product_id(target_product_url: str) -> str:
+    """商品URLから商品IDを抽出（https://item.rakuten.co.jp/shop-id/item-id/ → item-id）"""
+    if not target_product_url:
+        return ''
+    match = re.search(r'/([^/]+)/?$', target_product_url.rstrip('/'))
+    return match.group(1) if match else ''
+
+
+def _parse_is_active(value, default: bool):
+    if value is None:
+        return default
+    lowered = str(value).strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"有効/無効の値が正しくありません: {value}")
+
+
+def _validate_keyword(keyword: str, rules: dict):
+    """キーワードの入力エラーを返す（問題無い場合はNone）"""
+    if len(keyword) < rules['min_length']:
+        return f"{rules['min_length']}文字以上で入力してください"
+    if len(keyword) > rules['max_length']:
+        return f"{rules['max_length']}文字以内で入力してください"
+    for char in rules['invalid_chars']:
+        if char in keyword:
+            return f"使用できない文字が含まれています: {char}"
+    return None
+
+
+class KeywordImporter:
+    """キーワードの一括登録"""
+
+    def __init__(self, keyword_type: str, user, rakuten_shop_id: str,
+                 target_product_url: str = '', is_active: bool = True, batch_size: int = None):
+        """
+        初期化
+
+        Args:
+            keyword_type: seo / rpp
+            user: 登録先のユーザー（マスターアカウントの場合は選択店舗）
+            rakuten_shop_id: 全キーワードに適用する楽天店舗ID
+            target_product_url: 既定の対象商品URL（行で指定した場合はそちらを優先）
+            is_active: 既定の有効/無効（行で指定した場合はそちらを優先）
+            batch_size: bulk_create の1回の件数（省略時は settings.KEYWORD_IMPORT_BATCH_SIZE）
+        """
+        self.keyword_type = keyword_type
+        self.model = KEYWORD_MODELS[keyword_type]
+        self.rules = KEYWORD_RULES[keyword_type]
+        self.user = user
+        self.rakuten_shop_id = rakuten_shop_id
+        self.target_product_url = target_product_url or ''
+        self.is_active = is_active
+        self.batch_size = batch_size or getattr(settings, 'KEYWORD_IMPORT_BATCH_SIZE', 500)
+
+    def run(self, rows: list) -> dict:
+        """
+        行を正規化・検証して登録
+
+        Args:
+            rows: parse_keyword_rows() の戻り値
+
+        Returns:
+            {'total_rows', 'created_count', 'skipped_count', 'keyword_limit', 'rows': [行ごとの結果]}
+        """
+        existing = set(
+            self.model.objects.filter(user=self.user, rakuten_shop_id=self.rakuten_shop_id)
+            .values_list('keyword', flat=True)
+        )
+        existing_normalized = {normalize_keyword(keyword) for keyword in existing}
+
+        # プランの登録上限（1回だけ判定）
+        keyword_limit = self.user.get_keyword_limit()
+        remaining = None
+        if keyword_limit is not None:
+            remaining = max(0, keyword_limit - self.model.objects.filter(user=self.user).count())
+
+        report_rows = []
+        seen = set()
+        to_create = []
+        pending_results = {}
+        for row in rows:
+            keyword = normalize_keyword(row['keyword'])
+            result = {'line': row['line'], 'keyword': keyword, 'status': ROW_CREATED, 'message': ''}
+            report_rows.append(result)
+
+            error = _validate_keyword(keyword, self.rules)
+            target_product_url = row.get('target_product_url') or self.target_product_url
+            if error is None and row.get('target_product_url'):
+                try:
+                    _url_validator(target_product_url)
+                except ValidationError:
+                    error = '対象商品URLの形式が正しくありません'
+            if error is None:
+                try:
+                    is_active = _parse_is_active(row.get('is_active'), self.is_active)
+                except ValueError as e:
+                    error = str(e)
+
+            if error is not None:
+                result.update(status=ROW_INVALID, message=error)
+                continue
+            if keyword in existing or keyword in existing_normalized:
+                result['status'] = ROW_EXISTS
+                continue
+            if keyword in seen:
+                result['status'] = ROW_DUPLICATE
+                continue
+            seen.add(keyword)
+
+            if remaining is not None and len(to_create) >= remaining:
+                result.update(status=ROW_OVER_LIMIT, message=f"登録数の上限（{keyword_limit}個）を超えています")
+                continue
+
+            pending_results[keyword] = result
+            to_create.append(self.model(
+                user=self.user,
+                keyword=keyword,
+                rakuten_shop_id=self.rakuten_shop_id,
+                target_product_url=target_product_url,
+                target_product_id=extract_product_id(target_product_url),
+                is_active=is_active
+            ))
+
+        created_count = 0
+        if to_create:
+            keywords = [keyword.keyword for keyword in to_create]
+            store_keywords = self.model.objects.filter(
+                user=self.user, rakuten_shop_id=self.rakuten_shop_id, keyword__in=keywords
+            )
+            with transaction.atomic():
+                # 読み込み後に同じキーワードが登録された場合は一意制約で無視されるため、
+                # 保存前後の件数の差を登録数とし、保存前からあった行は登録済みとする
+                concurrent = set(store_keywords.values_list('keyword', flat=True))
+                self.model.objects.bulk_create(to_create, batch_size=self.batch_size, ignore_conflicts=True)
+                # bulk_create はシグナルを送らないため、全店舗キーワード一覧へここで反映
+                # （ignore_conflicts ではIDが返らないため登録後に読み直す）
+                saved = list(store_keywords.select_related('user'))
+                store_matrix.sync_keywords(saved, batch_size=self.batch_size)
+            created_count = len(saved) - len(concurrent)
+            for keyword in concurrent:
+                pending_results[keyword]['status'] = ROW_EXISTS
+            # ダッシュボード集計も同様にここで無効化
+            invalidate_tenants([self.user.id])
+
+        logger.info(
+            f"Keyword import ({self.keyword_type}) for user {self.user.id}: "
+            f"{created_count} created / {len(rows)} rows"
+        )
+        return {
+            'total_rows': len(rows),
+            'created_count': created_count,
+            'skipped_count': len(rows) - created_count,
+            'keyword_limit': keyword_limit,
+            'rows': report_rows,
+        }
+
+
+def summarize_report(report: dict) -> dict:
+    """結果別の件数（表示用）"""
+    counts = {status: 0 for status in ROW_STATUS_LABELS}
+    for row in report.get('rows', []):
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+    return {ROW_STATUS_LABELS[status]: count for status, count in counts.items() if count}
@@ -0,0 +1,147 @@
+"""
+Redisを使った分散ロック・セマフォ
+Celeryワーカー間で同じ処理の二重実行を防ぎ、同時実行数を制限する
+
+Luaスクリプトは使わずWATCH/MULTIで原子的に更新する（fakeredisでも動作する）。
+"""
+
+import time
+import uuid
+import logging
+
+import redis
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLock:
+    """有効期限付きの排他ロック（保持者のトークンが一致する場合のみ解放）"""
+
+    def __init__(self, name: str, timeout: int = 600, client=None):
+        """
+        初期化
+
+        Args:
+            name: ロック名
+            timeout: ロックの有効期限（秒）。保持者が停止しても期限後に解放される
+            client: Redisクライアント（省略時は共通クライアント）
+        """
+        self.key = f"lock:{name}"
+        self.timeout = timeout
+        self.client = client or get_redis_client()
+        self.token = None
+
+    def acquire(self) -> bool:
+        """ロックを取得（取得できない場合は待たずにFalse）"""
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(self.key, token, nx=True, ex=self.timeout)
+        except redis.RedisError as e:
+            logger.warning(f"Lock {self.key} unavailable: {e}")
+            return False
+        if acquired:
+            self.token = token
+            return True
+        return False
+
+    def release(self):
+        """自分が保持しているロックのみ解放する"""
+        if self.token is None:
+            return
+        try:
+            with self.client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(self.key)
+                        if pipe.get(self.key) != self.token:
+                            pipe.unwatch()
+                            break
+                        pipe.multi()
+                        pipe.delete(self.key)
+                        pipe.execute()
+                        break
+                    except redis.WatchError:
+                        continue
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release lock {self.key}: {e}")
+        finally:
+            self.token = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class RedisSemaphore:
+    """
+    有効期限付きの計数セマフォ
+
+    保持者ごとにソート済みセットへ取得時刻を記録し、timeout を過ぎた保持者は
+    停止したものとみなして枠を回収する。
+    """
+
+    def __init__(self, name: str, limit: int, timeout: int = 3600, client=None):
+        """
+        初期化
+
+        Args:
+            name: セマフォ名
+            limit: 同時に保持できる数
+            timeout: 1保持あたりの最大秒数
+            client: Redisクライアント（省略時は共通クライアント）
+        """
+        self.key = f"semaphore:{name}"
+        self.limit = max(1, int(limit))
+        self.timeout = timeout
+        self.client = client or get_redis_client()
+
+    def acquire(self):
+        """
+        枠を取得
+
+        Returns:
+            取得できた場合は解放用トークン、満杯の場合はNone
+            （Redisに接続できない場合は制限なしとして空文字のトークンを返す）
+        """
+        token = uuid.uuid4().hex
+        try:
+            with self.client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(self.key)
+                        now = time.time()
+                        # 期限切れの保持者は数えない（削除はトランザクション内で行う）
+                        if pipe.zcount(self.key, now - self.timeout, '+inf') >= self.limit:
+                            pipe.unwatch()
+                            return None
+                        pipe.multi()
+                        pipe.zremrangebyscore(self.key, '-inf', now - self.timeout)
+                        pipe.zadd(self.key, {token: now})
+                        pipe.expire(self.key, self.timeout)
+                        pipe.execute()
+                        return token
+                    except redis.WatchError:
+                        continue
+        except redis.RedisError as e:
+            logger.warning(f"Semaphore {self.key} unavailable, running without limit: {e}")
+            return ''
+
+    def release(self, token: str):
+        """枠を解放"""
+        if not token:
+            return
+        try:
+            self.client.zrem(self.key, token)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release semaphore {self.key}: {e}")
+
+    def count(self) -> int:
+        """現在の保持数"""
+        try:
+            return self.client.zcount(self.key, time.time() - self.timeout, '+inf')
+        except redis.RedisError:
+            return 0
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from seo_ranking.models import TopProduct
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '上位商品のキーワード露出頻度を集計して保存（未集計の既存データ用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1回に更新する商品数（デフォルト: 500）'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='集計済みの商品も再集計する'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        products = TopProduct.objects.select_related('ranking_result__keyword').only(
+            'id', 'product_name', 'catchcopy', 'product_spec', 'keyword_frequency',
+            'ranking_result__keyword__keyword'
+        ).order_by('id')
+        if not options['all']:
+            products = products.filter(keyword_frequency__isnull=True)
+
+        updated_count = 0
+        batch = []
+        for product in products.iterator(chunk_size=batch_size):
+            product.refresh_keyword_frequency(product.ranking_result.keyword.keyword)
+            batch.append(product)
+
+            if len(batch) >= batch_size:
+                updated_count += self._save_batch(batch)
+                batch = []
+                self.stdout.write(f"  {updated_count}件更新")
+
+        if batch:
+            updated_count += self._save_batch(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"キーワード露出頻度を保存: {updated_count}件"))
+
+    def _save_batch(self, batch):
+        with transaction.atomic():
+            TopProduct.objects.bulk_update(batch, ['keyword_frequency'])
+        return len(batch)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from seo_ranking.models import Keyword, RankingResult
+from seo_ranking.models_rpp import RPPKeyword, RPPResult
+from seo_ranking.backfills import backfill_latest_results
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'キーワードの最新結果スナップショット（最新順位・前回順位・最終チェック日時）を既存の結果から再作成'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=['all', 'seo', 'rpp'],
+            default='all',
+            help='対象（デフォルト: all）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1回に更新するキーワード数（デフォルト: 500）'
+        )
+
+    def _backfill(self, keyword_model, result_model, label, batch_size):
+        """キーワードごとに最新2件の結果からスナップショットを作成"""
+        return backfill_latest_results(
+            keyword_model,
+            result_model,
+            batch_size=batch_size,
+            progress=lambda count: self.stdout.write(f"  {label}: {count}件更新")
+        )
+
+    def handle(self, *args, **options):
+        target = options['type']
+        batch_size = max(1, options['batch_size'])
+
+        if target in ('all', 'seo'):
+            count = self._backfill(Keyword, RankingResult, 'SEOキーワード', batch_size)
+            self.stdout.write(self.style.SUCCESS(f"SEOキーワードのスナップショットを更新: {count}件"))
+
+        if target in ('all', 'rpp'):
+            count = self._backfill(RPPKeyword, RPPResult, 'RPPキーワード', batch_size)
+            self.stdout.write(self.style.SUCCESS(f"RPPキーワードのスナップショットを更新: {count}件"))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from seo_ranking.models import RankingResult, SearchLog
+from seo_ranking.retention import run_retention
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,17 @@ class Command(BaseCommand):
             default=30,
             help='検索ログの保持日数（デフォルト: 30日）'
         )
+        parser.add_argument(
+            '--by-plan',
+            action='store_true',
+            help='定期タスクと同じく、ユーザーのプラン別保持期間でSEO・RPPのデータをバッチ削除'
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=int,
+            default=0,
+            help='--by-plan の実行時間上限（秒、0で無制限）'
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -29,6 +41,16 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        if options['by_plan']:
+            progress = run_retention(max_seconds=options['max_seconds'])
+            for name, count in sorted(progress['deleted'].items()):
+                self.stdout.write(f"  {name}: {count}件削除")
+            status = '完了' if progress['finished'] else '時間上限で中断（再実行で続きから削除）'
+            self.stdout.write(
+                self.style.SUCCESS(f"プラン別データクリーンアップ{status}: {progress['batches']}バッチ, {progress['elapsed_seconds']}秒")
+            )
+            return
+
         ranking_days = options['ranking_days']
         log_days = options['log_days']
         dry_run = options['dry_run']
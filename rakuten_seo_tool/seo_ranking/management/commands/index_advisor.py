@@ -0,0 +1,126 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from seo_ranking.hot_queries import get_hot_queries
+from seo_ranking.models import Keyword
+from seo_ranking.models_rpp import RPPKeyword, RPPResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 全件走査とみなす実行計画（SQLite / PostgreSQL）
+FULL_SCAN_PATTERNS = [
+    re.compile(r'\bSCAN (?:TABLE )?(\w+)$'),
+    re.compile(r'\bSCAN (?:TABLE )?(\w+) USING COVERING INDEX'),
+    re.compile(r'\bSeq Scan on (\w+)'),
+]
+# インデックスで並び順を満たせず一時ソートしている実行計画
+SORT_PATTERNS = [
+    re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    re.compile(r'^\s*(?:->\s*)?Sort\b'),
+]
+
+
+class Command(BaseCommand):
+    help = '主要画面の頻出クエリの実行計画を確認し、全件走査しているクエリを報告'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='クエリ条件に使用するユーザーID（省略時はキーワードを持つ最初のユーザー）'
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            help='確認するクエリ名（複数指定可。省略時は全件）'
+        )
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='すべてのクエリの実行計画を表示'
+        )
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help='全件走査があった場合にエラー終了する（CI用）'
+        )
+
+    def _sample_ids(self, user_id):
+        """クエリ条件に使用するサンプルID（データが無い場合は0）"""
+        keyword_qs = Keyword.objects.all()
+        rpp_keyword_qs = RPPKeyword.objects.all()
+        if user_id is None:
+            user_id = (
+                keyword_qs.values_list('user_id', flat=True).first()
+                or rpp_keyword_qs.values_list('user_id', flat=True).first()
+                or 0
+            )
+        keyword_id = keyword_qs.filter(user_id=user_id).values_list('id', flat=True).first() or 0
+        rpp_keyword_id = rpp_keyword_qs.filter(user_id=user_id).values_list('id', flat=True).first() or 0
+        rpp_result_id = RPPResult.objects.filter(
+            keyword_id=rpp_keyword_id
+        ).values_list('id', flat=True).first() or 0
+        return user_id, keyword_id, rpp_keyword_id, rpp_result_id
+
+    def _analyze_plan(self, plan):
+        """実行計画から全件走査テーブルと一時ソートの有無を抽出"""
+        scanned_tables = []
+        needs_sort = False
+        for line in plan.splitlines():
+            for pattern in FULL_SCAN_PATTERNS:
+                match = pattern.search(line.strip())
+                if match:
+                    scanned_tables.append(match.group(1))
+            if any(pattern.search(line) for pattern in SORT_PATTERNS):
+                needs_sort = True
+        return scanned_tables, needs_sort
+
+    def handle(self, *args, **options):
+        hot_queries = get_hot_queries()
+        names = options['query'] or list(hot_queries)
+        unknown = [name for name in names if name not in hot_queries]
+        if unknown:
+            raise CommandError(f"未登録のクエリ: {', '.join(unknown)}（登録済み: {', '.join(hot_queries)}）")
+
+        sample_ids = self._sample_ids(options['user_id'])
+        self.stdout.write(
+            f"実行計画を確認: {len(names)}件（DB: {connection.vendor}, "
+            f"user={sample_ids[0]}, keyword={sample_ids[1]}, rpp_keyword={sample_ids[2]}, rpp_result={sample_ids[3]}）"
+        )
+
+        scan_count = 0
+        for name in names:
+            source, build_query = hot_queries[name]
+            try:
+                plan = build_query(*sample_ids).explain()
+            except Exception as e:
+                logger.error(f"EXPLAIN failed for {name}: {e}")
+                self.stdout.write(self.style.ERROR(f"  ✗ {name} ({source}): EXPLAIN失敗 {e}"))
+                continue
+
+            scanned_tables, needs_sort = self._analyze_plan(plan)
+            if scanned_tables:
+                scan_count += 1
+                self.stdout.write(self.style.ERROR(
+                    f"  ✗ {name} ({source}): 全件走査 {', '.join(sorted(set(scanned_tables)))}"
+                ))
+            elif needs_sort:
+                self.stdout.write(self.style.WARNING(f"  △ {name} ({source}): インデックス使用・一時ソートあり"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {name} ({source})"))
+
+            if options['verbose_plan'] or scanned_tables:
+                for line in plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if connection.vendor == 'postgresql':
+            self.stdout.write("※ PostgreSQLは行数が少ないテーブルでは Seq Scan を選ぶため、本番相当のデータで確認してください")
+
+        if scan_count:
+            message = f"全件走査のクエリ: {scan_count}件"
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("全件走査のクエリはありません"))
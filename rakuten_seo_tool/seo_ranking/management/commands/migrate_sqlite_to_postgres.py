@@ -0,0 +1,212 @@
+"""
+SQLiteからPostgreSQLへのデータ移行
+コピー元のSQLiteファイルを別名の接続で開き、モデルごとに主キー順のチャンクで読み込んで
+現在のデータベース（DB_ENGINE=postgresql）へそのまま挿入する
+
+- コピー元とコピー先の適用済みマイグレーションが一致している必要がある（先に両方で migrate を実行）
+- 外部キーの循環参照があるため、全テーブルを1トランザクションでコピーする
+- コピー後に主キーの連番を合わせ、テーブルごとの件数を照合する
+
+使い方: DB_ENGINE=postgresql python manage.py migrate_sqlite_to_postgres --source db.sqlite3
+"""
+
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.migrations.recorder import MigrationRecorder
+import logging
+
+logger = logging.getLogger(__name__)
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+def sort_models_by_dependency(models):
+    """
+    外部キーの参照先が先になるようにモデルを並べる
+
+    循環参照（Keyword.latest_result ⇔ RankingResult.keyword など）は残るため、
+    コピーは1トランザクションで行い、外部キーの確認はコミット時（DEFERRED）に任せる。
+    """
+    model_set = set(models)
+    dependencies = {
+        model: {
+            field.related_model._meta.concrete_model
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not None
+            and field.related_model._meta.concrete_model in model_set
+            and field.related_model._meta.concrete_model is not model
+        }
+        for model in models
+    }
+
+    ordered = []
+    remaining = list(models)
+    while remaining:
+        ready = [model for model in remaining if not (dependencies[model] - set(ordered))]
+        if not ready:
+            # 循環参照: 残りの先頭から処理する
+            ready = remaining[:1]
+        for model in ready:
+            ordered.append(model)
+            remaining.remove(model)
+    return ordered
+
+
+class Command(BaseCommand):
+    help = 'SQLiteのデータを現在のデータベース（PostgreSQL）へチャンク単位でコピーし、件数を照合'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=str(settings.BASE_DIR / 'db.sqlite3'),
+            help='コピー元のSQLiteファイル（デフォルト: db.sqlite3）'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='1回に読み込む行数（デフォルト: 2000）'
+        )
+        parser.add_argument(
+            '--noinput',
+            action='store_true',
+            help='コピー先のデータ削除の確認を省略'
+        )
+
+    def handle(self, *args, **options):
+        source_path = Path(options['source']).resolve()
+        chunk_size = options['chunk_size']
+        if not source_path.exists():
+            raise CommandError(f"コピー元のSQLiteファイルがありません: {source_path}")
+
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor == 'sqlite' and Path(target.settings_dict['NAME']).resolve() == source_path:
+            raise CommandError('コピー先がコピー元と同じSQLiteファイルです。DB_ENGINE=postgresql を設定してください。')
+
+        source = self._open_source(source_path)
+        self._check_migrations(source, target)
+
+        source_tables = set(source.introspection.table_names())
+        models = sort_models_by_dependency([
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+            and model._meta.db_table in source_tables
+        ])
+
+        self.stdout.write(
+            f"コピー元: {source_path}\n"
+            f"コピー先: {target.vendor} {target.settings_dict['NAME']}（{len(models)}テーブル）"
+        )
+        if not options['noinput']:
+            answer = input('コピー先の対象テーブルのデータを削除してからコピーします。続行しますか？ [y/N]: ')
+            if answer.strip().lower() != 'y':
+                self.stdout.write('中止しました')
+                return
+
+        # 外部キーの循環参照があるため全テーブルを1トランザクションでコピーする
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            self._flush_target(target, models)
+            for model in models:
+                copied_count = self._copy_model(model, source, target, chunk_size)
+                self.stdout.write(f"  {model._meta.db_table}: {copied_count}件")
+            self._reset_sequences(target, models)
+
+        mismatches = self._verify_counts(models, source)
+        if mismatches:
+            for table, source_count, target_count in mismatches:
+                self.stderr.write(f"  件数不一致 {table}: コピー元 {source_count} / コピー先 {target_count}")
+            raise CommandError(f"{len(mismatches)}テーブルで件数が一致しません")
+
+        self.stdout.write(self.style.SUCCESS(f"コピーが完了しました（{len(models)}テーブルの件数が一致）"))
+
+    def _open_source(self, source_path):
+        """コピー元のSQLiteを別名の接続として登録"""
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            SOURCE_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(source_path)},
+        })[SOURCE_ALIAS]
+        return connections[SOURCE_ALIAS]
+
+    def _check_migrations(self, source, target):
+        """コピー元とコピー先の適用済みマイグレーションが同じか確認"""
+        source_applied = set(MigrationRecorder(source).applied_migrations())
+        target_applied = set(MigrationRecorder(target).applied_migrations())
+        missing = sorted(source_applied - target_applied)
+        if missing:
+            names = ', '.join(f"{app}.{name}" for app, name in missing[:5])
+            raise CommandError(
+                f"コピー先に未適用のマイグレーションがあります（{names} など）。先に migrate を実行してください。"
+            )
+        extra = sorted(target_applied - source_applied)
+        if extra:
+            names = ', '.join(f"{app}.{name}" for app, name in extra[:5])
+            raise CommandError(
+                f"コピー元に未適用のマイグレーションがあります（{names} など）。"
+                f"コピー元のSQLiteで migrate を実行してから移行してください。"
+            )
+
+    def _flush_target(self, target, models):
+        """コピー先の対象テーブルを空にする（migrate で作成されたコンテンツタイプ・権限も含む）"""
+        tables = [model._meta.db_table for model in models]
+        sql_list = target.ops.sql_flush(no_style(), tables, reset_sequences=False, allow_cascade=True)
+        target.ops.execute_sql_flush(sql_list)
+
+    def _copy_model(self, model, source, target, chunk_size):
+        """1テーブル分をチャンク単位でコピー（auto_now などの保存時処理を通さず値をそのまま挿入）"""
+        fields = model._meta.concrete_fields
+        attnames = [field.attname for field in fields]
+        quote_name = target.ops.quote_name
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        batch_size = max(1, min(chunk_size, target.ops.bulk_batch_size(fields, [None] * chunk_size)))
+
+        rows = (
+            model._base_manager.using(SOURCE_ALIAS)
+            .order_by(model._meta.pk.attname)
+            .values_list(*attnames)
+            .iterator(chunk_size=chunk_size)
+        )
+
+        copied_count = 0
+        batch = []
+        with target.cursor() as cursor:
+            for row in rows:
+                batch.append([
+                    field.get_db_prep_save(value, connection=target)
+                    for field, value in zip(fields, row)
+                ])
+                if len(batch) >= batch_size:
+                    copied_count += self._insert_rows(cursor, model, columns, placeholder, batch)
+                    batch = []
+            if batch:
+                copied_count += self._insert_rows(cursor, model, columns, placeholder, batch)
+        return copied_count
+
+    def _insert_rows(self, cursor, model, columns, placeholder, batch):
+        table = cursor.db.ops.quote_name(model._meta.db_table)
+        sql = f"INSERT INTO {table} ({columns}) VALUES {', '.join([placeholder] * len(batch))}"
+        cursor.execute(sql, [value for row in batch for value in row])
+        return len(batch)
+
+    def _reset_sequences(self, target, models):
+        """主キーの連番をコピーしたデータの最大値に合わせる"""
+        sql_list = target.ops.sequence_reset_sql(no_style(), models)
+        if sql_list:
+            with target.cursor() as cursor:
+                for sql in sql_list:
+                    cursor.execute(sql)
+
+    def _verify_counts(self, models, source):
+        """テーブルごとの件数をコピー元とコピー先で照合"""
+        mismatches = []
+        for model in models:
+            source_count = model._base_manager.using(SOURCE_ALIAS).count()
+            target_count = model._base_manager.using(DEFAULT_DB_ALIAS).count()
+            if source_count != target_count:
+                mismatches.append((model._meta.db_table, source_count, target_count))
+        return mismatches
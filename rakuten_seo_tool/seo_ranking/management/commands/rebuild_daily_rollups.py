@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from seo_ranking.backfills import rebuild_daily_rollups
+from seo_ranking.models import RankingResult, DailyRankRollup
+from seo_ranking.models_rpp import RPPResult, RPPDailyRankRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '既存の検索結果から日次順位集計を再作成（検索結果が残っている日のみ上書き）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=['all', 'seo', 'rpp'],
+            default='all',
+            help='対象（デフォルト: all）'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='直近何日分を再作成するか（省略時は残っている検索結果すべて）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='1回に保存する集計件数（デフォルト: 1000）'
+        )
+
+    def _rebuild(self, result_model, rollup_model, label, days, batch_size):
+        saved_count = rebuild_daily_rollups(result_model, rollup_model, days=days, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{label}の日次集計を再作成: {saved_count}件"))
+
+    def handle(self, *args, **options):
+        target = options['type']
+        days = options['days']
+        batch_size = max(1, options['batch_size'])
+
+        if target in ('all', 'seo'):
+            self._rebuild(RankingResult, DailyRankRollup, 'SEO', days, batch_size)
+        if target in ('all', 'rpp'):
+            self._rebuild(RPPResult, RPPDailyRankRollup, 'RPP', days, batch_size)
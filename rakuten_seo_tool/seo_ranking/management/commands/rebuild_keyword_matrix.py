@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from seo_ranking.models import Keyword, StoreKeywordMatrix
+from seo_ranking.models_rpp import RPPKeyword
+from seo_ranking.backfills import backfill_keyword_matrix
+from seo_ranking.dashboard_cache import invalidate, STORES_SCOPE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '全店舗キーワード一覧（店舗×キーワードの最新SEO/RPP順位）を登録済みキーワードから再作成'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1回に保存するキーワード数（デフォルト: 500）'
+        )
+
+    def _sync(self, keyword_model, prefix, label, batch_size):
+        synced_count = backfill_keyword_matrix(keyword_model, StoreKeywordMatrix, prefix, batch_size=batch_size)
+        self.stdout.write(f"  {label}: {synced_count}件")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        # 再作成中も一覧を表示できるよう1トランザクションで入れ替える
+        with transaction.atomic():
+            deleted_count, _ = StoreKeywordMatrix.objects.all().delete()
+            self._sync(Keyword, 'seo', 'SEO', batch_size)
+            self._sync(RPPKeyword, 'rpp', 'RPP', batch_size)
+        invalidate(STORES_SCOPE)
+
+        row_count = StoreKeywordMatrix.objects.count()
+        logger.info(f"Keyword matrix rebuilt: {row_count} rows (previous {deleted_count})")
+        self.stdout.write(self.style.SUCCESS(f"全店舗キーワード一覧を再作成: {row_count}行"))
@@ -0,0 +1,83 @@
+from collections import deque
+from django.core.management.base import BaseCommand, CommandError
+from seo_ranking.rakuten_api import RakutenSearchAPI
+from seo_ranking.genre_cache import get_genre_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '楽天ジャンルツリーを辿ってジャンル名キャッシュを事前に作成'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root',
+            type=str,
+            default='0',
+            help='起点のジャンルID（デフォルト: 0 = 全ジャンル）'
+        )
+        parser.add_argument(
+            '--max-depth',
+            type=int,
+            default=3,
+            help='起点から辿る階層数（デフォルト: 3）'
+        )
+
+    def _extract_children(self, data):
+        """レスポンスから子ジャンルのリストを取り出す（formatVersion 1/2 の両方に対応）"""
+        children = []
+        for entry in data.get('children', []) or []:
+            child = entry.get('child', entry) if isinstance(entry, dict) else None
+            if child and child.get('genreId') is not None:
+                children.append(child)
+        return children
+
+    def handle(self, *args, **options):
+        root = options['root']
+        max_depth = options['max_depth']
+
+        api = RakutenSearchAPI()
+        if not api.api_key:
+            raise CommandError('RAKUTEN_API_KEY が設定されていません')
+
+        genre_cache = get_genre_cache()
+        queue = deque([(root, 0)])
+        cached_count = 0
+        request_count = 0
+        error_count = 0
+
+        self.stdout.write(f"ジャンルキャッシュ作成開始: 起点 {root}, 階層数 {max_depth}")
+
+        while queue:
+            genre_id, depth = queue.popleft()
+            try:
+                data = api.get_genre(genre_id)
+                request_count += 1
+            except Exception as e:
+                error_count += 1
+                logger.error(f"Failed to fetch genre {genre_id}: {e}")
+                continue
+
+            names = {}
+            current = data.get('current') or {}
+            if current.get('genreId') is not None:
+                names[current['genreId']] = current.get('genreName', '')
+
+            children = self._extract_children(data)
+            for child in children:
+                names[child['genreId']] = child.get('genreName', '')
+                if depth + 1 < max_depth:
+                    queue.append((child['genreId'], depth + 1))
+
+            genre_cache.set_many(names)
+            cached_count += len(names)
+
+            if request_count % 50 == 0:
+                self.stdout.write(f"  {request_count} リクエスト / {cached_count} 件キャッシュ済み（残り {len(queue)}）")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ジャンルキャッシュ作成完了: {cached_count}件（APIリクエスト {request_count}回, エラー {error_count}件）"
+            )
+        )
@@ -0,0 +1,175 @@
+"""
+検索パイプラインのメトリクス
+段階別の処理時間（HTTP待ち・解析・照合・DB保存）と、429・タイムアウト・再試行・
+解析フォールバックなどの件数を集計し、Prometheus形式のテキストで出力する
+
+記録はプロセス内にバッファし、METRICS_FLUSH_INTERVAL 秒ごとにRedisのハッシュへ
+まとめて加算する（Celeryワーカー・Webの全プロセス分を1か所で集計する）。
+METRICS_BACKEND=local の場合、またはRedisに接続できない場合はプロセス内の値のみを出力する。
+"""
+
+import time
+import atexit
+import threading
+import logging
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis上の集計先
+METRICS_KEY = 'metrics:counters'
+
+# Redisへの加算に失敗した後、再接続を試みるまでの秒数（検索処理を接続待ちで止めない）
+BACKEND_RETRY_SECONDS = 60
+
+# メトリクス名: (種類, 説明)
+METRIC_DEFINITIONS = {
+    'seo_stage_seconds': ('summary', '検索パイプラインの段階別処理時間（秒）'),
+    'seo_searches_total': ('counter', 'キーワード検索の実行件数（結果別）'),
+    'seo_pages_fetched_total': ('counter', '順位検索で取得したページ数'),
+    'seo_http_requests_total': ('counter', '外部HTTPリクエスト数（ホスト・ステータス別）'),
+    'seo_http_request_seconds': ('summary', '外部HTTPリクエストの応答時間（秒）'),
+    'seo_http_rate_limited_total': ('counter', '429（レート制限）の応答数'),
+    'seo_http_timeouts_total': ('counter', 'タイムアウトしたリクエスト数'),
+    'seo_http_errors_total': ('counter', '接続エラー等で応答が無かったリクエスト数'),
+    'seo_http_retries_total': ('counter', '再試行したリクエスト数（理由別）'),
+    'seo_parser_path_total': ('counter', 'RPP検索ページの解析経路別の件数（dom はフォールバック）'),
+    'seo_cache_requests_total': ('counter', '集計キャッシュの参照数（hit / miss）'),
+}
+
+
+def _escape(value) -> str:
+    """ラベル値のエスケープ（バックスラッシュ・ダブルクォート・改行）"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name: str, labels: dict) -> str:
+    """Prometheus形式の系列名（name{label="value",...}）"""
+    if not labels:
+        return name
+    label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{label_text}}}"
+
+
+class MetricsRegistry:
+    """プロセス内でバッファし、Redisへまとめて加算するメトリクス集計"""
+
+    def __init__(self, flush_interval: float = None):
+        """
+        初期化
+
+        Args:
+            flush_interval: Redisへ加算する間隔（秒、省略時は settings.METRICS_FLUSH_INTERVAL）
+        """
+        if flush_interval is None:
+            flush_interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 2.0)
+        self.flush_interval = float(flush_interval)
+        self._pending = {}
+        self._local_totals = {}
+        self._last_flush = time.monotonic()
+        self._backend_down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'METRICS_ENABLED', True)
+
+    def _use_redis(self) -> bool:
+        return (
+            getattr(settings, 'METRICS_BACKEND', 'redis') == 'redis'
+            and time.monotonic() >= self._backend_down_until
+        )
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """カウンターを加算"""
+        if not self.enabled:
+            return
+        series = _series(name, labels)
+        with self._lock:
+            self._pending[series] = self._pending.get(series, 0) + value
+            self._local_totals[series] = self._local_totals.get(series, 0) + value
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def observe(self, name: str, seconds: float, **labels):
+        """処理時間を記録（Prometheusのsummaryとして _sum と _count を加算）"""
+        self.inc(f"{name}_sum", seconds, **labels)
+        self.inc(f"{name}_count", 1, **labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """with文の処理時間を記録"""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start_time, **labels)
+
+    def flush(self):
+        """バッファした値をRedisへ加算"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+        if not pending or not self._use_redis():
+            return
+
+        try:
+            with get_redis_client().pipeline(transaction=False) as pipe:
+                for series, value in pending.items():
+                    pipe.hincrbyfloat(METRICS_KEY, series, value)
+                pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            self._backend_down_until = time.monotonic() + BACKEND_RETRY_SECONDS
+            logger.warning(f"Metrics flush failed, using local values for {BACKEND_RETRY_SECONDS}s: {e}")
+
+    def collect(self) -> dict:
+        """全プロセスの集計値を取得（Redisに接続できない場合はこのプロセスの値）"""
+        self.flush()
+        if self._use_redis():
+            try:
+                values = get_redis_client().hgetall(METRICS_KEY)
+                return {series: float(value) for series, value in values.items()}
+            except (redis.RedisError, OSError) as e:
+                self._backend_down_until = time.monotonic() + BACKEND_RETRY_SECONDS
+                logger.warning(f"Metrics backend unavailable, using local values: {e}")
+        with self._lock:
+            return dict(self._local_totals)
+
+    def render_prometheus(self) -> str:
+        """Prometheusのテキスト形式で出力"""
+        values = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+            series_names = sorted(
+                series for series in values
+                if series.split('{', 1)[0] in (name, f"{name}_sum", f"{name}_count")
+            )
+            if not series_names:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for series in series_names:
+                value = values[series]
+                lines.append(f"{series} {int(value) if value == int(value) else round(value, 6)}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """集計をリセットする（テスト用）"""
+        with self._lock:
+            self._pending = {}
+            self._local_totals = {}
+        try:
+            get_redis_client().delete(METRICS_KEY)
+        except (redis.RedisError, OSError) as e:
+            logger.debug(f"Metrics reset skipped: {e}")
+
+
+metrics = MetricsRegistry()
+atexit.register(metrics.flush)
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0013_rankingresult_ai_analysis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkSearchLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('completed', '完了'), ('failed', '失敗')], default='pending', max_length=20, verbose_name='ステータス')),
+                ('task_id', models.CharField(blank=True, max_length=255, verbose_name='タスクID')),
+                ('keywords_count', models.IntegerField(default=0, verbose_name='実行キーワード数')),
+                ('success_count', models.IntegerField(default=0, verbose_name='成功件数')),
+                ('error_count', models.IntegerField(default=0, verbose_name='エラー件数')),
+                ('total_execution_time', models.FloatField(default=0, verbose_name='総実行時間（秒）')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='エラーメッセージ')),
+                ('executed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='実行日時')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始日時')),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='ワーカー停止の検知に使用', null=True, verbose_name='最終進捗日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_search_logs', to=settings.AUTH_USER_MODEL, verbose_name='ユーザー')),
+            ],
+            options={
+                'verbose_name': 'SEO一括検索ログ',
+                'verbose_name_plural': 'SEO一括検索ログ',
+                'ordering': ['-executed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BulkSearchItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('success', '成功'), ('error', 'エラー')], default='pending', max_length=20, verbose_name='ステータス')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='エラーメッセージ')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_search_items', to='seo_ranking.keyword', verbose_name='キーワード')),
+                ('ranking_result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='seo_ranking.rankingresult', verbose_name='検索結果')),
+                ('bulk_log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='seo_ranking.bulksearchlog', verbose_name='一括検索ログ')),
+            ],
+            options={
+                'verbose_name': 'SEO一括検索キーワード',
+                'verbose_name_plural': 'SEO一括検索キーワード',
+                'ordering': ['id'],
+                'unique_together': {('bulk_log', 'keyword')},
+            },
+        ),
+    ]
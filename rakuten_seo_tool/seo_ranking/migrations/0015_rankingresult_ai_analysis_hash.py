@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0014_bulksearchlog_bulksearchitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rankingresult',
+            name='ai_analysis_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='AI分析に使用した上位商品データのハッシュ', max_length=64, verbose_name='AI分析入力ハッシュ'),
+        ),
+        migrations.AddField(
+            model_name='rankingresult',
+            name='ai_analysis_updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='AI分析日時'),
+        ),
+    ]
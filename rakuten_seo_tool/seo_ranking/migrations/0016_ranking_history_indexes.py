@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0015_rankingresult_ai_analysis_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='keyword',
+            index=models.Index(fields=['user', '-created_at'], name='seo_kw_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyword',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'keyword'], name='seo_kw_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rankingresult',
+            index=models.Index(fields=['keyword', '-checked_at'], name='seo_rr_kw_checked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rankingresult',
+            index=models.Index(fields=['-checked_at'], name='seo_rr_checked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rppkeyword',
+            index=models.Index(fields=['user', '-created_at'], name='rpp_kw_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rppkeyword',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'keyword'], name='rpp_kw_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rppresult',
+            index=models.Index(fields=['keyword', '-checked_at'], name='rpp_rr_kw_checked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rppresult',
+            index=models.Index(fields=['-checked_at'], name='rpp_rr_checked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rppsearchlog',
+            index=models.Index(fields=['user', '-created_at'], name='rpp_log_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['user', '-created_at'], name='seo_log_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from seo_ranking.backfills import backfill_latest_results
+
+
+def backfill_snapshots(apps, schema_editor):
+    """既存のキーワードの最新結果スナップショットを既存の結果から作成"""
+    backfill_latest_results(apps.get_model('seo_ranking', 'Keyword'), apps.get_model('seo_ranking', 'RankingResult'))
+    backfill_latest_results(apps.get_model('seo_ranking', 'RPPKeyword'), apps.get_model('seo_ranking', 'RPPResult'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0016_ranking_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keyword',
+            name='latest_checked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最終チェック日時'),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='latest_rank',
+            field=models.IntegerField(blank=True, help_text='圏外・エラーの場合はNULL', null=True, verbose_name='最新順位'),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='latest_result',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='seo_ranking.rankingresult', verbose_name='最新の順位結果'),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='previous_rank',
+            field=models.IntegerField(blank=True, null=True, verbose_name='前回順位'),
+        ),
+        migrations.AddField(
+            model_name='rppkeyword',
+            name='latest_checked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最終チェック日時'),
+        ),
+        migrations.AddField(
+            model_name='rppkeyword',
+            name='latest_rank',
+            field=models.IntegerField(blank=True, help_text='圏外・エラーの場合はNULL', null=True, verbose_name='最新順位'),
+        ),
+        migrations.AddField(
+            model_name='rppkeyword',
+            name='latest_result',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='seo_ranking.rppresult', verbose_name='最新のRPP結果'),
+        ),
+        migrations.AddField(
+            model_name='rppkeyword',
+            name='previous_rank',
+            field=models.IntegerField(blank=True, null=True, verbose_name='前回順位'),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from seo_ranking.backfills import rebuild_daily_rollups
+
+
+def backfill_rollups(apps, schema_editor):
+    """残っている検索結果から日次集計を作成（作成前の履歴もグラフに表示するため）"""
+    # 作成直後の空のテーブルのため上書きは不要（ユニーク制約はマイグレーション終了時に作成される）
+    rebuild_daily_rollups(
+        apps.get_model('seo_ranking', 'RankingResult'), apps.get_model('seo_ranking', 'DailyRankRollup'), overwrite=False
+    )
+    rebuild_daily_rollups(
+        apps.get_model('seo_ranking', 'RPPResult'), apps.get_model('seo_ranking', 'RPPDailyRankRollup'), overwrite=False
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0017_keyword_latest_result_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRankRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('best_rank', models.IntegerField(blank=True, null=True, verbose_name='最高順位')),
+                ('worst_rank', models.IntegerField(blank=True, help_text='発見できた検索のうち最も低い順位', null=True, verbose_name='最低順位')),
+                ('last_rank', models.IntegerField(blank=True, help_text='その日の最後の検索結果（圏外の場合はNULL）', null=True, verbose_name='最終順位')),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True, verbose_name='最終チェック日時')),
+                ('check_count', models.PositiveIntegerField(default=0, verbose_name='検索回数')),
+                ('found_count', models.PositiveIntegerField(default=0, verbose_name='発見回数')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='seo_ranking.keyword', verbose_name='キーワード')),
+            ],
+            options={
+                'verbose_name': '日次順位集計',
+                'verbose_name_plural': '日次順位集計',
+                'ordering': ['date'],
+                'unique_together': {('keyword', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RPPDailyRankRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('best_rank', models.IntegerField(blank=True, null=True, verbose_name='最高順位')),
+                ('worst_rank', models.IntegerField(blank=True, help_text='発見できた検索のうち最も低い順位', null=True, verbose_name='最低順位')),
+                ('last_rank', models.IntegerField(blank=True, help_text='その日の最後の検索結果（圏外の場合はNULL）', null=True, verbose_name='最終順位')),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True, verbose_name='最終チェック日時')),
+                ('check_count', models.PositiveIntegerField(default=0, verbose_name='検索回数')),
+                ('found_count', models.PositiveIntegerField(default=0, verbose_name='発見回数')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='seo_ranking.rppkeyword', verbose_name='キーワード')),
+            ],
+            options={
+                'verbose_name': 'RPP日次順位集計',
+                'verbose_name_plural': 'RPP日次順位集計',
+                'ordering': ['date'],
+                'unique_together': {('keyword', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0018_daily_rank_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export_type', models.CharField(max_length=20, verbose_name='エクスポート種別')),
+                ('file_format', models.CharField(default='csv', max_length=10, verbose_name='ファイル形式')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='抽出条件')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('completed', '完了'), ('failed', '失敗')], default='pending', max_length=20, verbose_name='ステータス')),
+                ('task_id', models.CharField(blank=True, max_length=255, verbose_name='タスクID')),
+                ('row_count', models.IntegerField(default=0, verbose_name='出力行数')),
+                ('file_path', models.CharField(blank=True, help_text='EXPORT_ROOT からの相対パス', max_length=255, verbose_name='ファイルパス')),
+                ('filename', models.CharField(blank=True, max_length=255, verbose_name='ダウンロードファイル名')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='エラーメッセージ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='ユーザー')),
+            ],
+            options={
+                'verbose_name': 'エクスポートジョブ',
+                'verbose_name_plural': 'エクスポートジョブ',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='seo_export_user_created_idx')],
+            },
+        ),
+    ]
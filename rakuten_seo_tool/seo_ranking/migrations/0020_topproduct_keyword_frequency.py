@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0019_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topproduct',
+            name='keyword_frequency',
+            field=models.JSONField(blank=True, help_text='保存時の検索キーワードで集計した結果', null=True, verbose_name='キーワード露出頻度'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0020_topproduct_keyword_frequency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword_type', models.CharField(help_text='seo / rpp', max_length=10, verbose_name='キーワード種別')),
+                ('rakuten_shop_id', models.CharField(max_length=100, verbose_name='楽天店舗ID')),
+                ('target_product_url', models.URLField(blank=True, default='', verbose_name='対象商品URL')),
+                ('is_active', models.BooleanField(default=True, verbose_name='有効')),
+                ('rows', models.JSONField(blank=True, default=list, verbose_name='入力行')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('completed', '完了'), ('failed', '失敗')], default='pending', max_length=20, verbose_name='ステータス')),
+                ('task_id', models.CharField(blank=True, max_length=255, verbose_name='タスクID')),
+                ('total_rows', models.IntegerField(default=0, verbose_name='入力行数')),
+                ('created_count', models.IntegerField(default=0, verbose_name='登録数')),
+                ('skipped_count', models.IntegerField(default=0, verbose_name='スキップ数')),
+                ('report', models.JSONField(blank=True, default=dict, verbose_name='行ごとの結果')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='エラーメッセージ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('target_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='登録先ユーザー')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyword_import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='実行ユーザー')),
+            ],
+            options={
+                'verbose_name': 'キーワードインポートジョブ',
+                'verbose_name_plural': 'キーワードインポートジョブ',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+TRIGRAM_INDEX_NAME = 'seo_matrix_search_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    """PostgreSQLのみ: 検索用テキストの部分一致に pg_trgm のGIN索引を作成（SQLiteは対象外）"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('seo_ranking', 'StoreKeywordMatrix')._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} ON {table} USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0021_keywordimportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreKeywordMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rakuten_shop_id', models.CharField(max_length=100, verbose_name='楽天店舗ID')),
+                ('keyword', models.CharField(max_length=255, verbose_name='キーワード')),
+                ('company_name', models.CharField(blank=True, default='', max_length=255, verbose_name='会社名')),
+                ('search_text', models.TextField(blank=True, default='', help_text='キーワード・店舗ID・会社名を正規化・小文字化したもの（PostgreSQLではトライグラム索引）', verbose_name='検索用テキスト')),
+                ('seo_is_active', models.BooleanField(default=False, verbose_name='SEO有効')),
+                ('seo_created_at', models.DateTimeField(blank=True, null=True, verbose_name='SEO登録日時')),
+                ('seo_rank', models.IntegerField(blank=True, null=True, verbose_name='SEO最新順位')),
+                ('seo_previous_rank', models.IntegerField(blank=True, null=True, verbose_name='SEO前回順位')),
+                ('seo_checked_at', models.DateTimeField(blank=True, null=True, verbose_name='SEO最終確認日時')),
+                ('rpp_is_active', models.BooleanField(default=False, verbose_name='RPP有効')),
+                ('rpp_created_at', models.DateTimeField(blank=True, null=True, verbose_name='RPP登録日時')),
+                ('rpp_rank', models.IntegerField(blank=True, null=True, verbose_name='RPP最新順位')),
+                ('rpp_previous_rank', models.IntegerField(blank=True, null=True, verbose_name='RPP前回順位')),
+                ('rpp_checked_at', models.DateTimeField(blank=True, null=True, verbose_name='RPP最終確認日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('rpp_keyword', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matrix_row', to='seo_ranking.rppkeyword', verbose_name='RPPキーワード')),
+                ('seo_keyword', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matrix_row', to='seo_ranking.keyword', verbose_name='SEOキーワード')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyword_matrix_rows', to=settings.AUTH_USER_MODEL, verbose_name='ユーザー')),
+            ],
+            options={
+                'verbose_name': '全店舗キーワード一覧',
+                'verbose_name_plural': '全店舗キーワード一覧',
+                'indexes': [models.Index(condition=models.Q(('seo_keyword__isnull', False)), fields=['-seo_created_at', '-id'], name='seo_matrix_seo_created_idx'), models.Index(condition=models.Q(('rpp_keyword__isnull', False)), fields=['-rpp_created_at', '-id'], name='seo_matrix_rpp_created_idx'), models.Index(fields=['rakuten_shop_id'], name='seo_matrix_shop_idx')],
+                'unique_together': {('user', 'rakuten_shop_id', 'keyword')},
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:06
+
+from django.db import migrations
+
+from seo_ranking.backfills import backfill_keyword_matrix
+
+
+def backfill_matrix(apps, schema_editor):
+    """登録済みのキーワードから全店舗キーワード一覧を作成（作成前のキーワードも一覧に表示するため）"""
+    matrix_model = apps.get_model('seo_ranking', 'StoreKeywordMatrix')
+    backfill_keyword_matrix(apps.get_model('seo_ranking', 'Keyword'), matrix_model, 'seo')
+    backfill_keyword_matrix(apps.get_model('seo_ranking', 'RPPKeyword'), matrix_model, 'rpp')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0022_storekeywordmatrix'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_matrix, migrations.RunPython.noop),
+    ]
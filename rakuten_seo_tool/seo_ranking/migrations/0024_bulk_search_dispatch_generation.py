@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo_ranking', '0023_backfill_storekeywordmatrix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulksearchitem',
+            name='dispatch_generation',
+            field=models.PositiveIntegerField(default=0, help_text='このキーワードを投入した一括検索ログの投入世代', verbose_name='投入世代'),
+        ),
+        migrations.AddField(
+            model_name='bulksearchlog',
+            name='dispatch_generation',
+            field=models.PositiveIntegerField(default=0, help_text='並行実行の開始・再開ごとに増やし、それ以前に投入したchordのタスク・コールバックを無視する', verbose_name='投入世代'),
+        ),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, F
 from django.utils import timezone
 from accounts.models import User
+from .rollups import DailyRankRollupBase
+from .retention import delete_in_batches
+from .keyword_frequency import compute_keyword_frequency
 
 
 class Keyword(models.Model):
@@ -43,15 +47,73 @@ class Keyword(models.Model):
         verbose_name='更新日時',
         auto_now=True
     )
+    # 最新結果のスナップショット（RankingResult 保存時に同じトランザクションで更新）
+    latest_result = models.ForeignKey(
+        'RankingResult',
+        on_delete=models.SET_NULL,
+        verbose_name='最新の順位結果',
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    latest_rank = models.IntegerField(
+        verbose_name='最新順位',
+        null=True,
+        blank=True,
+        help_text='圏外・エラーの場合はNULL'
+    )
+    previous_rank = models.IntegerField(
+        verbose_name='前回順位',
+        null=True,
+        blank=True
+    )
+    latest_checked_at = models.DateTimeField(
+        verbose_name='最終チェック日時',
+        null=True,
+        blank=True
+    )
 
     class Meta:
         verbose_name = 'キーワード'
         verbose_name_plural = 'キーワード'
         unique_together = ['user', 'keyword', 'rakuten_shop_id']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='seo_kw_user_created_idx'),
+            # 自動検索・一括検索の対象（有効なキーワードのみ）
+            models.Index(fields=['user', 'keyword'], condition=Q(is_active=True), name='seo_kw_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.keyword} ({self.user.email})"
 
+    @property
+    def rank_change(self):
+        """前回からの順位変動（上昇はプラス、比較できない場合はNone）"""
+        if self.latest_rank is None or self.previous_rank is None:
+            return None
+        return self.previous_rank - self.latest_rank
+
+    @classmethod
+    def record_latest_result(cls, ranking_result):
+        """
+        最新結果のスナップショットを更新
+        より新しい結果が記録済みの場合は更新しない
+
+        Args:
+            ranking_result: 保存済みの結果
+        """
+        updated = cls.objects.filter(id=ranking_result.keyword_id).filter(
+            Q(latest_checked_at__isnull=True) | Q(latest_checked_at__lte=ranking_result.checked_at)
+        ).update(
+            previous_rank=F('latest_rank'),
+            latest_rank=ranking_result.rank if ranking_result.is_found else None,
+            latest_result=ranking_result,
+            latest_checked_at=ranking_result.checked_at
+        )
+        if updated:
+            StoreKeywordMatrix.record_latest_result('seo', ranking_result)
+        return updated
+
 
 class RankingResult(models.Model):
     """検索順位結果"""
@@ -108,7 +170,28 @@ class RankingResult(models.Model):
         null=True,
         help_text='AIによる競合分析結果'
     )
+    ai_analysis_hash = models.CharField(
+        verbose_name='AI分析入力ハッシュ',
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='AI分析に使用した上位商品データのハッシュ'
+    )
+    ai_analysis_updated_at = models.DateTimeField(
+        verbose_name='AI分析日時',
+        null=True,
+        blank=True
+    )
     
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding or self.pk is None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                Keyword.record_latest_result(self)
+                DailyRankRollup.record_result(self)
+
     @classmethod
     def cleanup_old_data(cls, days_to_keep=90):
         """古いデータを削除（デフォルト90日保持）"""
@@ -116,15 +199,18 @@ class RankingResult(models.Model):
         cutoff_date = timezone.now() - timedelta(days=days_to_keep)
         
         # 関連するTopProductも自動削除される（CASCADE）
-        deleted_count = cls.objects.filter(checked_at__lt=cutoff_date).count()
-        cls.objects.filter(checked_at__lt=cutoff_date).delete()
-        
+        # 主キー順のバッチで削除してロックを短く保つ
+        deleted_count, _ = delete_in_batches(cls.objects.filter(checked_at__lt=cutoff_date))
         return deleted_count
 
     class Meta:
         verbose_name = '順位結果'
         verbose_name_plural = '順位結果'
         ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['keyword', '-checked_at'], name='seo_rr_kw_checked_idx'),
+            models.Index(fields=['-checked_at'], name='seo_rr_checked_idx'),
+        ]
 
     def __str__(self):
         if self.is_found:
@@ -132,6 +218,25 @@ class RankingResult(models.Model):
         return f"{self.keyword.keyword}: 圏外"
 
 
+class DailyRankRollup(DailyRankRollupBase):
+    """SEO順位の日次集計"""
+    keyword = models.ForeignKey(
+        Keyword,
+        on_delete=models.CASCADE,
+        verbose_name='キーワード',
+        related_name='daily_rollups'
+    )
+
+    class Meta:
+        verbose_name = '日次順位集計'
+        verbose_name_plural = '日次順位集計'
+        unique_together = ['keyword', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.keyword.keyword} {self.date}: 最終{self.last_rank or '圏外'}"
+
+
 class TopProduct(models.Model):
     """上位商品情報"""
     ranking_result = models.ForeignKey(
@@ -235,6 +340,12 @@ class TopProduct(models.Model):
         verbose_name='収集日時',
         default=timezone.now
     )
+    keyword_frequency = models.JSONField(
+        verbose_name='キーワード露出頻度',
+        blank=True,
+        null=True,
+        help_text='保存時の検索キーワードで集計した結果'
+    )
 
     class Meta:
         verbose_name = '上位商品'
@@ -268,70 +379,17 @@ class TopProduct(models.Model):
         return processed_url
     
     def get_keyword_frequency(self, keyword: str) -> dict:
-        """検索キーワードの露出頻度を計算（個別キーワード別）"""
-        import re
-        
-        # キーワードを単語に分割（空白区切りを基本とし、さらに文字種で分割）
-        # まず空白で分割
-        space_split_words = keyword.split()
-        keyword_words = []
-        
-        for word in space_split_words:
-            word_lower = word.lower()
-            # 各単語をさらに文字種で分割（ひらがな、カタカナ、漢字、英数字）
-            sub_words = re.findall(r'[ぁ-ん]+|[ァ-ヶー]+|[一-龠々]+|[a-zA-Z0-9]+', word_lower)
-            keyword_words.extend(sub_words)
-        
-        # デバッグ用：キーワード分割結果をログ出力
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Keyword split result: '{keyword}' -> {keyword_words}")
-        
-        # 対象テキストを準備
-        product_name_text = (self.product_name or '').lower()
-        catchcopy_text = (self.catchcopy or '').lower()
-        product_spec_text = (self.product_spec or '').lower()
-        
-        # 各キーワードの詳細カウント
-        keyword_details = {}
-        total_name_count = 0
-        total_catchcopy_count = 0
-        total_spec_count = 0
-        
-        for word in keyword_words:
-            # 漢字・ひらがな・カタカナは1文字でも有効、英数字は2文字以上
-            is_japanese = bool(re.match(r'^[ぁ-んァ-ヶ一-龠々]+$', word))
-            is_english = bool(re.match(r'^[a-zA-Z0-9]+$', word))
-            
-            if (is_japanese and len(word) >= 1) or (is_english and len(word) >= 2):
-                name_count = len(re.findall(re.escape(word), product_name_text))
-                catchcopy_count = len(re.findall(re.escape(word), catchcopy_text))
-                spec_count = len(re.findall(re.escape(word), product_spec_text))
-                
-                word_total = name_count + catchcopy_count + spec_count
-                
-                if word_total > 0:  # 1回以上出現したキーワードのみ記録
-                    keyword_details[word] = {
-                        'name_count': name_count,
-                        'catchcopy_count': catchcopy_count,
-                        'spec_count': spec_count,
-                        'total': word_total
-                    }
-                
-                total_name_count += name_count
-                total_catchcopy_count += catchcopy_count
-                total_spec_count += spec_count
-        
-        total_count = total_name_count + total_catchcopy_count + total_spec_count
-        
-        return {
-            'name_count': total_name_count,
-            'catchcopy_count': total_catchcopy_count,
-            'spec_count': total_spec_count,
-            'total_count': total_count,
-            'keywords_used': keyword_words,
-            'keyword_details': keyword_details  # 個別キーワード詳細を追加
-        }
+        """検索キーワードの露出頻度を取得（保存済みの集計結果があればそれを使用）"""
+        if self.keyword_frequency and self.keyword_frequency.get('keyword') == keyword:
+            return self.keyword_frequency
+        return compute_keyword_frequency(keyword, self.product_name, self.catchcopy, self.product_spec)
+
+    def refresh_keyword_frequency(self, keyword: str) -> dict:
+        """露出頻度を集計して keyword_frequency に設定（保存は呼び出し側で行う）"""
+        self.keyword_frequency = compute_keyword_frequency(
+            keyword, self.product_name, self.catchcopy, self.product_spec
+        )
+        return self.keyword_frequency
 
 
 class SearchLog(models.Model):
@@ -378,19 +436,539 @@ class SearchLog(models.Model):
         from datetime import timedelta
         cutoff_date = timezone.now() - timedelta(days=days_to_keep)
         
-        deleted_count = cls.objects.filter(created_at__lt=cutoff_date).count()
-        cls.objects.filter(created_at__lt=cutoff_date).delete()
-        
+        # 主キー順のバッチで削除してロックを短く保つ
+        deleted_count, _ = delete_in_batches(cls.objects.filter(created_at__lt=cutoff_date))
         return deleted_count
 
     class Meta:
         verbose_name = '検索ログ'
         verbose_name_plural = '検索ログ'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='seo_log_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.keyword} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
 
+class BulkSearchLog(models.Model):
+    """SEO一括検索ジョブ"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待機中'),
+        (STATUS_RUNNING, '実行中'),
+        (STATUS_COMPLETED, '完了'),
+        (STATUS_FAILED, '失敗'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='ユーザー',
+        related_name='bulk_search_logs'
+    )
+    status = models.CharField(
+        verbose_name='ステータス',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    task_id = models.CharField(
+        verbose_name='タスクID',
+        max_length=255,
+        blank=True
+    )
+    keywords_count = models.IntegerField(
+        verbose_name='実行キーワード数',
+        default=0
+    )
+    success_count = models.IntegerField(
+        verbose_name='成功件数',
+        default=0
+    )
+    error_count = models.IntegerField(
+        verbose_name='エラー件数',
+        default=0
+    )
+    total_execution_time = models.FloatField(
+        verbose_name='総実行時間（秒）',
+        default=0
+    )
+    error_message = models.TextField(
+        verbose_name='エラーメッセージ',
+        blank=True,
+        null=True
+    )
+    executed_at = models.DateTimeField(
+        verbose_name='実行日時',
+        default=timezone.now
+    )
+    started_at = models.DateTimeField(
+        verbose_name='開始日時',
+        blank=True,
+        null=True
+    )
+    heartbeat_at = models.DateTimeField(
+        verbose_name='最終進捗日時',
+        blank=True,
+        null=True,
+        help_text='ワーカー停止の検知に使用'
+    )
+    dispatch_generation = models.PositiveIntegerField(
+        verbose_name='投入世代',
+        default=0,
+        help_text='並行実行の開始・再開ごとに増やし、それ以前に投入したchordのタスク・コールバックを無視する'
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='終了日時',
+        blank=True,
+        null=True
+    )
+
+    @property
+    def processed_count(self):
+        """処理済みキーワード数"""
+        return self.success_count + self.error_count
+
+    @property
+    def progress_percent(self):
+        """進捗率（%）"""
+        if not self.keywords_count:
+            return 100 if self.is_finished else 0
+        return int(self.processed_count * 100 / self.keywords_count)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    @classmethod
+    def get_active_job(cls, user):
+        """実行中（または待機中）のジョブを取得"""
+        return cls.objects.filter(user=user, status__in=cls.ACTIVE_STATUSES).first()
+
+    class Meta:
+        verbose_name = 'SEO一括検索ログ'
+        verbose_name_plural = 'SEO一括検索ログ'
+        ordering = ['-executed_at']
+
+    def __str__(self):
+        return f"SEO一括検索: {self.user.email} - {self.executed_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class BulkSearchItem(models.Model):
+    """SEO一括検索のキーワード別進捗"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待機中'),
+        (STATUS_RUNNING, '実行中'),
+        (STATUS_SUCCESS, '成功'),
+        (STATUS_ERROR, 'エラー'),
+    ]
+
+    bulk_log = models.ForeignKey(
+        BulkSearchLog,
+        on_delete=models.CASCADE,
+        verbose_name='一括検索ログ',
+        related_name='items'
+    )
+    keyword = models.ForeignKey(
+        Keyword,
+        on_delete=models.CASCADE,
+        verbose_name='キーワード',
+        related_name='bulk_search_items'
+    )
+    status = models.CharField(
+        verbose_name='ステータス',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    ranking_result = models.ForeignKey(
+        RankingResult,
+        on_delete=models.SET_NULL,
+        verbose_name='検索結果',
+        blank=True,
+        null=True,
+        related_name='+'
+    )
+    error_message = models.TextField(
+        verbose_name='エラーメッセージ',
+        blank=True,
+        null=True
+    )
+    dispatch_generation = models.PositiveIntegerField(
+        verbose_name='投入世代',
+        default=0,
+        help_text='このキーワードを投入した一括検索ログの投入世代'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='更新日時',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'SEO一括検索キーワード'
+        verbose_name_plural = 'SEO一括検索キーワード'
+        ordering = ['id']
+        unique_together = ['bulk_log', 'keyword']
+
+    def __str__(self):
+        return f"{self.keyword.keyword} - {self.get_status_display()}"
+
+
+class ExportJob(models.Model):
+    """順位データのバックグラウンドエクスポート"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待機中'),
+        (STATUS_RUNNING, '実行中'),
+        (STATUS_COMPLETED, '完了'),
+        (STATUS_FAILED, '失敗'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='ユーザー',
+        related_name='export_jobs'
+    )
+    export_type = models.CharField(
+        verbose_name='エクスポート種別',
+        max_length=20
+    )
+    file_format = models.CharField(
+        verbose_name='ファイル形式',
+        max_length=10,
+        default='csv'
+    )
+    params = models.JSONField(
+        verbose_name='抽出条件',
+        default=dict,
+        blank=True
+    )
+    status = models.CharField(
+        verbose_name='ステータス',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    task_id = models.CharField(
+        verbose_name='タスクID',
+        max_length=255,
+        blank=True
+    )
+    row_count = models.IntegerField(
+        verbose_name='出力行数',
+        default=0
+    )
+    file_path = models.CharField(
+        verbose_name='ファイルパス',
+        max_length=255,
+        blank=True,
+        help_text='EXPORT_ROOT からの相対パス'
+    )
+    filename = models.CharField(
+        verbose_name='ダウンロードファイル名',
+        max_length=255,
+        blank=True
+    )
+    error_message = models.TextField(
+        verbose_name='エラーメッセージ',
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='作成日時',
+        auto_now_add=True
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='終了日時',
+        blank=True,
+        null=True
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    class Meta:
+        verbose_name = 'エクスポートジョブ'
+        verbose_name_plural = 'エクスポートジョブ'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='seo_export_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"エクスポート: {self.user.email} - {self.export_type}.{self.file_format} ({self.get_status_display()})"
+
+
+class KeywordImportJob(models.Model):
+    """キーワードのバックグラウンド一括インポート"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待機中'),
+        (STATUS_RUNNING, '実行中'),
+        (STATUS_COMPLETED, '完了'),
+        (STATUS_FAILED, '失敗'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='実行ユーザー',
+        related_name='keyword_import_jobs'
+    )
+    target_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='登録先ユーザー',
+        related_name='+'
+    )
+    keyword_type = models.CharField(
+        verbose_name='キーワード種別',
+        max_length=10,
+        help_text='seo / rpp'
+    )
+    rakuten_shop_id = models.CharField(
+        verbose_name='楽天店舗ID',
+        max_length=100
+    )
+    target_product_url = models.URLField(
+        verbose_name='対象商品URL',
+        blank=True,
+        default=''
+    )
+    is_active = models.BooleanField(
+        verbose_name='有効',
+        default=True
+    )
+    rows = models.JSONField(
+        verbose_name='入力行',
+        default=list,
+        blank=True
+    )
+    status = models.CharField(
+        verbose_name='ステータス',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    task_id = models.CharField(
+        verbose_name='タスクID',
+        max_length=255,
+        blank=True
+    )
+    total_rows = models.IntegerField(
+        verbose_name='入力行数',
+        default=0
+    )
+    created_count = models.IntegerField(
+        verbose_name='登録数',
+        default=0
+    )
+    skipped_count = models.IntegerField(
+        verbose_name='スキップ数',
+        default=0
+    )
+    report = models.JSONField(
+        verbose_name='行ごとの結果',
+        default=dict,
+        blank=True
+    )
+    error_message = models.TextField(
+        verbose_name='エラーメッセージ',
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='作成日時',
+        auto_now_add=True
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='終了日時',
+        blank=True,
+        null=True
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    class Meta:
+        verbose_name = 'キーワードインポートジョブ'
+        verbose_name_plural = 'キーワードインポートジョブ'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"インポート: {self.target_user.email} - {self.keyword_type} {self.total_rows}行 ({self.get_status_display()})"
+
+
+class StoreKeywordMatrix(models.Model):
+    """
+    全店舗キーワード一覧（マスターアカウント向けの集計テーブル）
+    店舗×キーワードごとに SEO / RPP の最新順位をまとめて保持する
+
+    キーワードの保存・削除時（シグナル）と最新結果の記録時に差分更新する。
+    作成・再作成は manage.py rebuild_keyword_matrix で行う。
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='ユーザー',
+        related_name='keyword_matrix_rows'
+    )
+    rakuten_shop_id = models.CharField(
+        verbose_name='楽天店舗ID',
+        max_length=100
+    )
+    keyword = models.CharField(
+        verbose_name='キーワード',
+        max_length=255
+    )
+    company_name = models.CharField(
+        verbose_name='会社名',
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    search_text = models.TextField(
+        verbose_name='検索用テキスト',
+        blank=True,
+        default='',
+        help_text='キーワード・店舗ID・会社名を正規化・小文字化したもの（PostgreSQLではトライグラム索引）'
+    )
+    seo_keyword = models.OneToOneField(
+        Keyword,
+        on_delete=models.SET_NULL,
+        verbose_name='SEOキーワード',
+        related_name='matrix_row',
+        null=True,
+        blank=True
+    )
+    seo_is_active = models.BooleanField(
+        verbose_name='SEO有効',
+        default=False
+    )
+    seo_created_at = models.DateTimeField(
+        verbose_name='SEO登録日時',
+        null=True,
+        blank=True
+    )
+    seo_rank = models.IntegerField(
+        verbose_name='SEO最新順位',
+        null=True,
+        blank=True
+    )
+    seo_previous_rank = models.IntegerField(
+        verbose_name='SEO前回順位',
+        null=True,
+        blank=True
+    )
+    seo_checked_at = models.DateTimeField(
+        verbose_name='SEO最終確認日時',
+        null=True,
+        blank=True
+    )
+    rpp_keyword = models.OneToOneField(
+        'seo_ranking.RPPKeyword',
+        on_delete=models.SET_NULL,
+        verbose_name='RPPキーワード',
+        related_name='matrix_row',
+        null=True,
+        blank=True
+    )
+    rpp_is_active = models.BooleanField(
+        verbose_name='RPP有効',
+        default=False
+    )
+    rpp_created_at = models.DateTimeField(
+        verbose_name='RPP登録日時',
+        null=True,
+        blank=True
+    )
+    rpp_rank = models.IntegerField(
+        verbose_name='RPP最新順位',
+        null=True,
+        blank=True
+    )
+    rpp_previous_rank = models.IntegerField(
+        verbose_name='RPP前回順位',
+        null=True,
+        blank=True
+    )
+    rpp_checked_at = models.DateTimeField(
+        verbose_name='RPP最終確認日時',
+        null=True,
+        blank=True
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='更新日時',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = '全店舗キーワード一覧'
+        verbose_name_plural = '全店舗キーワード一覧'
+        unique_together = ['user', 'rakuten_shop_id', 'keyword']
+        indexes = [
+            # キーセットページネーション（登録日時の降順）
+            models.Index(
+                fields=['-seo_created_at', '-id'],
+                condition=Q(seo_keyword__isnull=False),
+                name='seo_matrix_seo_created_idx'
+            ),
+            models.Index(
+                fields=['-rpp_created_at', '-id'],
+                condition=Q(rpp_keyword__isnull=False),
+                name='seo_matrix_rpp_created_idx'
+            ),
+            models.Index(fields=['rakuten_shop_id'], name='seo_matrix_shop_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.rakuten_shop_id} - {self.keyword}"
+
+    @property
+    def seo_rank_change(self):
+        """SEO順位の前回からの変動（上昇はプラス、比較できない場合はNone）"""
+        if self.seo_rank is None or self.seo_previous_rank is None:
+            return None
+        return self.seo_previous_rank - self.seo_rank
+
+    @classmethod
+    def record_latest_result(cls, prefix, result):
+        """
+        最新結果を一覧に反映（Keyword / RPPKeyword の record_latest_result と同じ条件）
+
+        Args:
+            prefix: seo / rpp
+            result: 保存済みの RankingResult / RPPResult
+        """
+        checked_at_field = f'{prefix}_checked_at'
+        return cls.objects.filter(**{f'{prefix}_keyword_id': result.keyword_id}).filter(
+            Q(**{f'{checked_at_field}__isnull': True}) | Q(**{f'{checked_at_field}__lte': result.checked_at})
+        ).update(**{
+            f'{prefix}_previous_rank': F(f'{prefix}_rank'),
+            f'{prefix}_rank': result.rank if result.is_found else None,
+            checked_at_field: result.checked_at,
+        })
+
+
 # RPP関連モデルをインポート
-from .models_rpp import RPPKeyword, RPPResult, RPPAd, RPPSearchLog, RPPBulkSearchLog
+from .models_rpp import RPPKeyword, RPPResult, RPPDailyRankRollup, RPPAd, RPPSearchLog, RPPBulkSearchLog
@@ -2,9 +2,12 @@
 RPP広告順位関連のモデル
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, F
 from django.utils import timezone
 from accounts.models import User
+from .rollups import DailyRankRollupBase
+from .retention import delete_in_batches
 
 
 class RPPKeyword(models.Model):
@@ -48,15 +51,74 @@ class RPPKeyword(models.Model):
         verbose_name='更新日時',
         auto_now=True
     )
+    # 最新結果のスナップショット（RPPResult 保存時に同じトランザクションで更新）
+    latest_result = models.ForeignKey(
+        'RPPResult',
+        on_delete=models.SET_NULL,
+        verbose_name='最新のRPP結果',
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    latest_rank = models.IntegerField(
+        verbose_name='最新順位',
+        null=True,
+        blank=True,
+        help_text='圏外・エラーの場合はNULL'
+    )
+    previous_rank = models.IntegerField(
+        verbose_name='前回順位',
+        null=True,
+        blank=True
+    )
+    latest_checked_at = models.DateTimeField(
+        verbose_name='最終チェック日時',
+        null=True,
+        blank=True
+    )
 
     class Meta:
         verbose_name = 'RPPキーワード'
         verbose_name_plural = 'RPPキーワード'
         unique_together = ['user', 'keyword', 'rakuten_shop_id']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='rpp_kw_user_created_idx'),
+            # 自動検索・一括検索の対象（有効なキーワードのみ）
+            models.Index(fields=['user', 'keyword'], condition=Q(is_active=True), name='rpp_kw_active_idx'),
+        ]
 
     def __str__(self):
         return f"RPP: {self.keyword} ({self.user.email})"
 
+    @property
+    def rank_change(self):
+        """前回からの順位変動（上昇はプラス、比較できない場合はNone）"""
+        if self.latest_rank is None or self.previous_rank is None:
+            return None
+        return self.previous_rank - self.latest_rank
+
+    @classmethod
+    def record_latest_result(cls, rpp_result):
+        """
+        最新結果のスナップショットを更新
+        より新しい結果が記録済みの場合は更新しない
+
+        Args:
+            rpp_result: 保存済みの結果
+        """
+        updated = cls.objects.filter(id=rpp_result.keyword_id).filter(
+            Q(latest_checked_at__isnull=True) | Q(latest_checked_at__lte=rpp_result.checked_at)
+        ).update(
+            previous_rank=F('latest_rank'),
+            latest_rank=rpp_result.rank if rpp_result.is_found else None,
+            latest_result=rpp_result,
+            latest_checked_at=rpp_result.checked_at
+        )
+        if updated:
+            from .models import StoreKeywordMatrix
+            StoreKeywordMatrix.record_latest_result('rpp', rpp_result)
+        return updated
+
 
 class RPPResult(models.Model):
     """RPP広告検索結果"""
@@ -102,6 +164,14 @@ class RPPResult(models.Model):
         help_text='CPC変更履歴、改善履歴などを記録'
     )
     
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding or self.pk is None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                RPPKeyword.record_latest_result(self)
+                RPPDailyRankRollup.record_result(self)
+
     @classmethod
     def cleanup_old_data(cls, days_to_keep=90):
         """古いデータを削除（デフォルト90日保持）"""
@@ -109,15 +179,18 @@ class RPPResult(models.Model):
         cutoff_date = timezone.now() - timedelta(days=days_to_keep)
         
         # 関連するRPPAdも自動削除される（CASCADE）
-        deleted_count = cls.objects.filter(checked_at__lt=cutoff_date).count()
-        cls.objects.filter(checked_at__lt=cutoff_date).delete()
-        
+        # 主キー順のバッチで削除してロックを短く保つ
+        deleted_count, _ = delete_in_batches(cls.objects.filter(checked_at__lt=cutoff_date))
         return deleted_count
 
     class Meta:
         verbose_name = 'RPP結果'
         verbose_name_plural = 'RPP結果'
         ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['keyword', '-checked_at'], name='rpp_rr_kw_checked_idx'),
+            models.Index(fields=['-checked_at'], name='rpp_rr_checked_idx'),
+        ]
 
     def __str__(self):
         if self.is_found:
@@ -125,6 +198,25 @@ class RPPResult(models.Model):
         return f"RPP {self.keyword.keyword}: 圏外"
 
 
+class RPPDailyRankRollup(DailyRankRollupBase):
+    """RPP広告順位の日次集計"""
+    keyword = models.ForeignKey(
+        RPPKeyword,
+        on_delete=models.CASCADE,
+        verbose_name='キーワード',
+        related_name='daily_rollups'
+    )
+
+    class Meta:
+        verbose_name = 'RPP日次順位集計'
+        verbose_name_plural = 'RPP日次順位集計'
+        unique_together = ['keyword', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"RPP {self.keyword.keyword} {self.date}: 最終{self.last_rank or '圏外'}"
+
+
 class RPPAd(models.Model):
     """RPP広告商品情報"""
     rpp_result = models.ForeignKey(
@@ -254,15 +346,17 @@ class RPPSearchLog(models.Model):
         from datetime import timedelta
         cutoff_date = timezone.now() - timedelta(days=days_to_keep)
         
-        deleted_count = cls.objects.filter(created_at__lt=cutoff_date).count()
-        cls.objects.filter(created_at__lt=cutoff_date).delete()
-        
+        # 主キー順のバッチで削除してロックを短く保つ
+        deleted_count, _ = delete_in_batches(cls.objects.filter(created_at__lt=cutoff_date))
         return deleted_count
 
     class Meta:
         verbose_name = 'RPP検索ログ'
         verbose_name_plural = 'RPP検索ログ'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='rpp_log_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"RPP検索: {self.keyword} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -333,4 +427,4 @@ class RPPBulkSearchLog(models.Model):
         ordering = ['-executed_at']
 
     def __str__(self):
-        return f"RPP一括検索: {self.user.email} - {self.executed_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"RPP一括検索: {self.user.email} - {self.executed_at.strftime('%Y-%m-%d %H:%M')}"
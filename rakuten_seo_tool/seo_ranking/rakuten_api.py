@@ -2,10 +2,15 @@ import requests
 import time
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlencode
 from django.conf import settings
-from .models import SearchLog
+from .rate_limiter import get_rate_limiter, ICHIBA_ITEM, ICHIBA_GENRE, ICHIBA_TAG
+from .genre_cache import get_genre_cache
+from .fetch_cache import get_fetch_cache, ICHIBA_ITEM_SEARCH
+from .http_transport import PooledHttpClient
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +24,12 @@ class RakutenSearchAPI:
     
     def __init__(self, api_key: str = None):
         self.api_key = api_key or settings.RAKUTEN_API_KEY
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 接続はプロセス共通のプールから借りる（インスタンスごとに接続を作らない）
+        self.session = PooledHttpClient(headers={
             'User-Agent': 'Rakuten SEO Tool/1.0'
         })
-        # キャッシュ
-        self._genre_cache = {}
+        # キャッシュ（ジャンル名はワーカー間で共有する genre_cache を使用）
+        self._genre_cache = get_genre_cache()
         self._tag_cache = {}
     
     def _process_image_url(self, image_url: str, size: str = "300x300") -> str:
@@ -74,33 +79,46 @@ class RakutenSearchAPI:
                 processed_words.append(word)
         
         result = ' '.join(processed_words)
-        logger.info(f"Keyword sanitized: '{keyword}' -> '{result}'")
+        logger.debug(f"Keyword sanitized: '{keyword}' -> '{result}'")
         return result
     
+    def get_genre(self, genre_id) -> dict:
+        """
+        IchibaGenre APIでジャンル情報を取得
+        
+        Args:
+            genre_id: ジャンルID（0でルート）
+            
+        Returns:
+            APIレスポンス（current / children / parents を含む）
+        """
+        params = {
+            'format': 'json',
+            'applicationId': self.api_key,
+            'genreId': genre_id
+        }
+        
+        get_rate_limiter(ICHIBA_GENRE).acquire()
+        response = self.session.get(self.GENRE_URL, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
     def get_genre_name(self, genre_id: str) -> str:
         """ジャンルIDからジャンル名を取得"""
         if not genre_id:
             return ''
         
         # キャッシュから取得
-        if genre_id in self._genre_cache:
-            return self._genre_cache[genre_id]
+        genre_name = self._genre_cache.get(genre_id)
+        if genre_name is not None:
+            return genre_name
         
         try:
-            params = {
-                'format': 'json',
-                'applicationId': self.api_key,
-                'genreId': genre_id
-            }
-            
-            response = self.session.get(self.GENRE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.get_genre(genre_id)
             if 'current' in data and data['current']:
                 genre_name = data['current'].get('genreName', '')
                 # キャッシュに保存
-                self._genre_cache[genre_id] = genre_name
+                self._genre_cache.set(genre_id, genre_name)
                 return genre_name
                 
         except Exception as e:
@@ -155,35 +173,35 @@ class RakutenSearchAPI:
     def _get_tags_by_genre(self, genre_id: str, target_tag_ids: list) -> dict:
         """ジャンルIDでタグ一覧を取得（注意：楽天タグAPIにはgenreIdパラメータは存在しない）"""
         result = {}
-        logger.info(f"Skipping genre-based tag retrieval - Rakuten Tag API doesn't support genreId parameter")
+        logger.debug(f"Skipping genre-based tag retrieval - Rakuten Tag API doesn't support genreId parameter")
         return result
     
     def _get_tags_by_tag_ids(self, tag_ids: list, genre_id: str = '') -> dict:
         """個別のタグIDでタグ情報を取得"""
         result = {}
         
+        limiter = get_rate_limiter(ICHIBA_TAG)
+        
         # 最大10個ずつ処理
         for i in range(0, len(tag_ids), 10):
             batch_tag_ids = tag_ids[i:i+10]
             
             try:
-                # API制限対策：1.5秒待機（最初のバッチ以外）
-                if i > 0:
-                    time.sleep(1.5)
-                
                 params = {
                     'format': 'json',
                     'applicationId': self.api_key,
                     'tagId': ','.join(batch_tag_ids)
                 }
                 
+                limiter.acquire()
                 response = self.session.get(self.TAG_URL, params=params, timeout=10)
                 
                 # 429エラー（Too Many Requests）のハンドリング
                 if response.status_code == 429:
-                    logger.warning(f"Tag API rate limit hit for tagIds {batch_tag_ids}, waiting 3 seconds...")
-                    time.sleep(3)
-                    # 1回だけリトライ
+                    logger.warning(f"Tag API rate limit hit for tagIds {batch_tag_ids}, backing off 3 seconds...")
+                    # 全ワーカーの後続リクエストを遅らせてから1回だけリトライ
+                    limiter.penalize(3)
+                    limiter.acquire()
                     response = self.session.get(self.TAG_URL, params=params, timeout=10)
                 
                 # 404エラー（タグが存在しない）のハンドリング
@@ -199,16 +217,17 @@ class RakutenSearchAPI:
                 response.raise_for_status()
                 data = response.json()
                 
-                logger.info(f"Tag API (by tagIds) response keys: {list(data.keys())}")
-                logger.info(f"Tag API (by tagIds) FULL response: {json.dumps(data, indent=2, ensure_ascii=False)}")
+                # レスポンス全体の出力はDEBUG時のみ（整形のコストを通常時にかけない）
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Tag API (by tagIds) FULL response: {json.dumps(data, indent=2, ensure_ascii=False)}")
                 
                 # デバッグ用：レスポンス構造を詳細に確認
                 if 'tagGroup' in data:
-                    logger.info(f"Found tagGroup structure")
+                    logger.debug(f"Found tagGroup structure")
                     if 'tags' in data['tagGroup']:
-                        logger.info(f"Found tags in tagGroup: {data['tagGroup']['tags']}")
+                        logger.debug(f"Found tags in tagGroup: {data['tagGroup']['tags']}")
                 else:
-                    logger.info(f"No tagGroup found, checking other structures...")
+                    logger.debug(f"No tagGroup found, checking other structures...")
                 
                 # レスポンス構造を解析
                 self._parse_tag_response(data, batch_tag_ids, result, genre_id)
@@ -224,7 +243,7 @@ class RakutenSearchAPI:
     def _parse_tag_response(self, data: dict, target_tag_ids: list, result: dict, genre_id: str = ''):
         """タグAPIレスポンスを解析してタグ名を抽出"""
         try:
-            logger.info(f"Parsing tag response for target IDs: {target_tag_ids}")
+            logger.debug(f"Parsing tag response for target IDs: {target_tag_ids}")
             
             # 様々なレスポンス構造に対応
             tags_found = []
@@ -232,7 +251,7 @@ class RakutenSearchAPI:
             # パターン1: tagGroup -> tags -> tag (公式ドキュメント)
             if 'tagGroup' in data and data['tagGroup']:
                 tag_group = data['tagGroup']
-                logger.info(f"Found tagGroup: {tag_group}")
+                logger.debug(f"Found tagGroup: {tag_group}")
                 
                 if 'tags' in tag_group and tag_group['tags']:
                     tags_data = tag_group['tags']
@@ -266,7 +285,7 @@ class RakutenSearchAPI:
                     if isinstance(obj, dict):
                         if 'tagId' in obj and 'tagName' in obj:
                             found.append(obj)
-                            logger.info(f"Found tag at {path}: {obj}")
+                            logger.debug(f"Found tag at {path}: {obj}")
                         else:
                             for key, value in obj.items():
                                 found.extend(find_tags_recursive(value, f"{path}.{key}"))
@@ -276,10 +295,10 @@ class RakutenSearchAPI:
                     return found
                 
                 tags_found = find_tags_recursive(data)
-                logger.info(f"Recursive search found {len(tags_found)} tags")
+                logger.debug(f"Recursive search found {len(tags_found)} tags")
             
             # 見つかったタグを処理
-            logger.info(f"Processing {len(tags_found)} found tags")
+            logger.debug(f"Processing {len(tags_found)} found tags")
             for tag in tags_found:
                 self._extract_tag_info(tag, target_tag_ids, result, genre_id)
             
@@ -309,7 +328,7 @@ class RakutenSearchAPI:
             cache_key = f"{tag_id}_{genre_id}" if genre_id else tag_id
             self._tag_cache[cache_key] = tag_name
             result[tag_id] = tag_name
-            logger.info(f"Found tag: {tag_id} -> {tag_name}")
+            logger.debug(f"Found tag: {tag_id} -> {tag_name}")
     
     def get_tag_names(self, tag_ids_list, genre_id: str = '') -> str:
         """タグIDリストからタグ名を取得"""
@@ -336,11 +355,21 @@ class RakutenSearchAPI:
         
         return ', '.join(tag_names)
     
-    def search_products(self, keyword: str, page: int = 1, per_page: int = 30) -> Dict:
-        """楽天市場で商品を検索"""
+    def search_products(self, keyword: str, page: int = 1, per_page: int = 30, run_id: str = None) -> Dict:
+        """
+        楽天市場で商品を検索
+        
+        run_id（バッチ実行ID）を指定した場合は、同じ実行で他の店舗が取得済みの検索結果を再利用する
+        """
         # キーワードをサニタイズ
         sanitized_keyword = self._sanitize_keyword(keyword)
         
+        # 同じ実行で他の店舗が取得済みの検索結果があれば再利用
+        fetch_cache = get_fetch_cache(ICHIBA_ITEM_SEARCH)
+        cached_result = fetch_cache.get(run_id, sanitized_keyword, page, per_page)
+        if cached_result is not None:
+            return cached_result
+        
         params = {
             'format': 'json',
             'keyword': sanitized_keyword,
@@ -352,8 +381,23 @@ class RakutenSearchAPI:
             'availability': 1,   # 在庫のある商品のみ
         }
         
+        limiter = get_rate_limiter(ICHIBA_ITEM)
+        
         try:
-            response = self.session.get(self.BASE_URL, params=params, timeout=30)
+            with metrics.timer('seo_stage_seconds', pipeline='seo', stage='rate_limit_wait'):
+                limiter.acquire()
+            with metrics.timer('seo_stage_seconds', pipeline='seo', stage='http'):
+                response = self.session.get(self.BASE_URL, params=params, timeout=30)
+            
+            # 429エラー（Too Many Requests）の場合は全ワーカーを減速させて1回だけリトライ
+            if response.status_code == 429:
+                logger.warning(f"Rakuten API rate limit hit for keyword '{keyword}' page {page}, backing off")
+                metrics.inc('seo_http_retries_total', host='app.rakuten.co.jp', reason='rate_limited')
+                limiter.penalize(2)
+                with metrics.timer('seo_stage_seconds', pipeline='seo', stage='rate_limit_wait'):
+                    limiter.acquire()
+                with metrics.timer('seo_stage_seconds', pipeline='seo', stage='http'):
+                    response = self.session.get(self.BASE_URL, params=params, timeout=30)
             
             # ステータスコードをチェックしてエラー詳細を取得
             if response.status_code == 400:
@@ -368,13 +412,15 @@ class RakutenSearchAPI:
             
             response.raise_for_status()
             
-            data = response.json()
+            with metrics.timer('seo_stage_seconds', pipeline='seo', stage='parse'):
+                data = response.json()
             
             # レスポンスの構造を確認
             if 'Items' not in data:
                 logger.error(f"API response missing 'Items' field: {data}")
                 return {'Items': [], 'hits': 0, 'page': page, 'first': 1, 'last': 1}
             
+            fetch_cache.set(run_id, sanitized_keyword, data, page, per_page)
             return data
             
         except requests.exceptions.RequestException as e:
@@ -385,156 +431,221 @@ class RakutenSearchAPI:
             logger.error(f"Unexpected error in search_products: {e}")
             raise
     
+    def _extract_total_count(self, search_result: Dict) -> int:
+        """検索結果から総商品数を取得"""
+        # 楽天APIの総商品数フィールドを確認
+        return (search_result.get('count') or
+                search_result.get('hits') or
+                search_result.get('totalCount') or
+                search_result.get('pageCount', 0) * 30)  # ページ数から推定
+    
+    def _is_target_item(self, item: Dict, target_shop_id: str, target_product_id: str = None,
+                        target_product_url: str = None) -> bool:
+        """商品が自社商品（対象商品）かどうかを判定"""
+        # 店舗IDでマッチング
+        if item.get('shopCode') == target_shop_id:
+            return True
+        
+        # 商品IDでマッチング（指定されている場合）
+        if target_product_id and item.get('itemCode') == target_product_id:
+            return True
+        
+        # 商品URLでマッチング（指定されている場合）
+        if target_product_url and item.get('itemUrl') == target_product_url:
+            return True
+        
+        return False
+    
+    def _build_product_info(self, item: Dict, rank: int, is_match: bool) -> Dict:
+        """APIの商品データから保存用の商品情報を構築"""
+        # 楽天APIの正確なフィールド名を使用
+        genre_id = item.get('genreId', '')
+        # タグAPIを無効化（パフォーマンス改善のため）
+        # tag_ids = item.get('tagIds', [])
+        
+        return {
+            'rank': rank,
+            'product_name': item.get('itemName', ''),
+            'catchcopy': item.get('catchcopy', ''),  # キャッチコピー
+            'product_url': item.get('itemUrl', ''),
+            'product_id': item.get('itemCode', ''),
+            'shop_name': item.get('shopName', ''),
+            'shop_id': item.get('shopCode', ''),
+            'price': item.get('itemPrice', 0),
+            'review_count': item.get('reviewCount', 0),
+            'review_average': item.get('reviewAverage', 0),
+            'image_url': self._process_image_url(
+                item.get('mediumImageUrls', [{}])[0].get('imageUrl', '') if item.get('mediumImageUrls') else '',
+                size="original"  # オリジナルサイズまたは大きなサイズを使用
+            ),
+            'point_rate': item.get('pointRate', 1),  # ポイント倍率
+            'genre_id': genre_id,     # ジャンルID
+            'genre_name': self.get_genre_name(genre_id),  # ジャンル名
+            'tag_ids': '',  # タグAPIを無効化
+            'tag_names': '',  # タグAPIを無効化
+            'product_spec': item.get('itemCaption', ''),  # 商品説明
+            'is_own_product': is_match
+        }
+    
     def find_product_rank(self, keyword: str, target_shop_id: str, target_product_id: str = None, 
-                         target_product_url: str = None, max_pages: int = 10) -> Tuple[Optional[int], List[Dict], int]:
+                         target_product_url: str = None, max_pages: int = 10,
+                         concurrency: int = None, rank_hint: int = None,
+                         strategy: str = None, run_id: str = None) -> Tuple[Optional[int], List[Dict], int, int]:
         """
         指定されたキーワードで商品の順位を検索
         
+        1ページ目で総商品数と上位10商品を確定し、2ページ目以降は検索戦略に従って取得する。
+        
+        - top10: 1ページ目のみ（上位10商品の取得が目的の場合）
+        - full: 2ページ目から順に取得し、最初に見つかった時点で終了（正確な最高順位）
+        - adaptive: 前回順位のページから先に取得し、見つからなければ前後のページへ広げる。
+          見つかった場合は2ページ目から一致したページまでの未取得ページをすべて確認して
+          最高順位を確定する（前回順位が無い場合は full と同じ）
+        
+        いずれの戦略でも、最終ページ（pageCount・30件未満のページ）より先は取得しない。
+        
         Args:
             keyword: 検索キーワード
             target_shop_id: 対象店舗ID
             target_product_id: 対象商品ID（オプション）
             target_product_url: 対象商品URL（オプション）
             max_pages: 最大検索ページ数（デフォルト10ページ = 300商品）
+            concurrency: 同時取得ページ数（未指定時は RAKUTEN_SEARCH_CONCURRENCY、1なら逐次取得）
+            rank_hint: 前回の順位（adaptive で最初に取得するページの決定に使用）
+            strategy: 検索戦略（未指定時は RANK_SEARCH_STRATEGY）
+            run_id: バッチ実行ID（同じ実行内で検索結果を共有する。未指定時は共有しない）
             
         Returns:
-            Tuple[順位または None, 上位10商品のリスト, 総商品数]
+            Tuple[順位または None, 上位10商品のリスト, 総商品数, 取得したページ数]
         """
+        if concurrency is None:
+            concurrency = getattr(settings, 'RAKUTEN_SEARCH_CONCURRENCY', 1)
+        if strategy is None:
+            strategy = getattr(settings, 'RANK_SEARCH_STRATEGY', 'full')
+        concurrency = max(1, int(concurrency))
+        
         start_time = time.time()
         found_rank = None
-        all_products = []
         top_products = []
         total_count = 0
+        pages_checked = 0
+        top_products_page = None
+        
+        def fetch_page(page):
+            # リクエスト間隔は search_products 内の共有レートリミッターで制御
+            try:
+                return page, self.search_products(keyword, page=page, per_page=30, run_id=run_id)
+            except Exception as e:
+                logger.error(f"Error fetching page {page}: {e}")
+                return page, None
+        
+        def process_page(page, search_result):
+            """ページ内の最初の一致順位と最終ページかどうかを返す"""
+            with metrics.timer('seo_stage_seconds', pipeline='seo', stage='match'):
+                return match_page(page, search_result)
+        
+        def match_page(page, search_result):
+            nonlocal pages_checked, top_products_page
+            pages_checked += 1
+            metrics.inc('seo_pages_fetched_total', strategy=strategy)
+            items = search_result.get('Items') or []
+            if not items:
+                logger.warning(f"No items found on page {page}")
+                return None, True
+            
+            page_rank = None
+            for item_index, item_data in enumerate(items):
+                item = item_data.get('Item', {})
+                current_rank = (page - 1) * 30 + item_index + 1
+                is_match = self._is_target_item(item, target_shop_id, target_product_id, target_product_url)
+                
+                # 上位10商品のみ詳細情報を構築（ジャンル名取得のAPI呼び出しを抑える）
+                # 通常は1ページ目、1ページ目の取得に失敗した場合は最初に取得できたページから
+                if top_products_page is None:
+                    top_products_page = page
+                if page == top_products_page and len(top_products) < 10:
+                    top_products.append(self._build_product_info(item, current_rank, is_match))
+                
+                # ページ内は順位順のため最初の一致がそのページの最高順位
+                if is_match and page_rank is None:
+                    page_rank = current_rank
+            
+            # 検索結果が30件未満の場合は最後のページ
+            return page_rank, len(items) < 30
         
         try:
-            for page in range(1, max_pages + 1):
-                logger.info(f"Searching page {page} for keyword: {keyword}")
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                _, first_result = fetch_page(1)
+                last_page = max_pages
+                if first_result is not None:
+                    total_count = self._extract_total_count(first_result)
+                    last_page = min(max_pages, first_result.get('pageCount') or max_pages)
+                    found_rank, is_last = process_page(1, first_result)
+                    if is_last:
+                        last_page = 1
+                if strategy == 'top10':
+                    last_page = 1
                 
-                # APIリクエスト制限を考慮して少し待機
-                if page > 1:
-                    time.sleep(0.5)
+                checked = {1}
+                hint_page = (rank_hint - 1) // 30 + 1 if rank_hint else None
+                adaptive = strategy == 'adaptive' and hint_page is not None and 1 < hint_page <= last_page
                 
-                try:
-                    search_result = self.search_products(keyword, page=page, per_page=30)
-                    
-                    # 最初のページで総商品数を取得
-                    if page == 1:
-                        # 楽天APIの総商品数フィールドを確認
-                        total_count = (search_result.get('count') or 
-                                     search_result.get('hits') or 
-                                     search_result.get('totalCount') or 
-                                     search_result.get('pageCount', 0) * 30)  # ページ数から推定
-                        logger.info(f"Total count from API: {total_count} (raw response keys: {list(search_result.keys())})")
-                    
-                    if not search_result.get('Items'):
-                        logger.warning(f"No items found on page {page}")
-                        break
+                if adaptive:
+                    # 前回順位のページから前後へ広げる順序（h, h+1, h-1, h+2, h-2, ...）
+                    order = [hint_page]
+                    for offset in range(1, last_page):
+                        order.extend(p for p in (hint_page + offset, hint_page - offset) if 1 < p <= last_page)
+                else:
+                    order = list(range(2, last_page + 1))
+                
+                # 1ページ目で見つかった場合はそれが最高順位
+                while found_rank is None and order:
+                    window = [p for p in order[:concurrency] if p <= last_page]
+                    order = order[concurrency:]
+                    if not window:
+                        continue
                     
-                    # 商品を処理
-                    for item_index, item_data in enumerate(search_result['Items']):
-                        item = item_data.get('Item', {})
-                        
-                        # 現在の順位を計算
-                        current_rank = (page - 1) * 30 + item_index + 1
-                        
-                        # 自社商品かどうかを先にチェック
-                        is_match = False
-                        
-                        # 店舗IDでマッチング
-                        if item.get('shopCode') == target_shop_id:
-                            is_match = True
-                        
-                        # 商品IDでマッチング（指定されている場合）
-                        if target_product_id and item.get('itemCode') == target_product_id:
-                            is_match = True
-                        
-                        # 商品URLでマッチング（指定されている場合）
-                        if target_product_url and item.get('itemUrl') == target_product_url:
-                            is_match = True
-                        
-                        # 商品情報を構築（is_own_productフラグを含む）
-                        # 楽天APIの正確なフィールド名を使用
-                        genre_id = item.get('genreId', '')
-                        # タグAPIを無効化（パフォーマンス改善のため）
-                        # tag_ids = item.get('tagIds', [])
-                        
-                        product_info = {
-                            'rank': current_rank,
-                            'product_name': item.get('itemName', ''),
-                            'catchcopy': item.get('catchcopy', ''),  # キャッチコピー
-                            'product_url': item.get('itemUrl', ''),
-                            'product_id': item.get('itemCode', ''),
-                            'shop_name': item.get('shopName', ''),
-                            'shop_id': item.get('shopCode', ''),
-                            'price': item.get('itemPrice', 0),
-                            'review_count': item.get('reviewCount', 0),
-                            'review_average': item.get('reviewAverage', 0),
-                            'image_url': self._process_image_url(
-                                item.get('mediumImageUrls', [{}])[0].get('imageUrl', '') if item.get('mediumImageUrls') else '',
-                                size="original"  # オリジナルサイズまたは大きなサイズを使用
-                            ),
-                            'point_rate': item.get('pointRate', 1),  # ポイント倍率
-                            'genre_id': genre_id,     # ジャンルID
-                            'genre_name': self.get_genre_name(genre_id),  # ジャンル名
-                            'tag_ids': '',  # タグAPIを無効化
-                            'tag_names': '',  # タグAPIを無効化
-                            'product_spec': item.get('itemCaption', ''),  # 商品説明
-                            'is_own_product': is_match
-                        }
-                        
-                        # デバッグ用：APIから取得した全データをログ出力
-                        if current_rank <= 3:  # 上位3商品のみログ出力
-                            logger.info(f"Rank {current_rank} API data keys: {list(item.keys())}")
-                            logger.info(f"Rank {current_rank} full item data: {item}")
-                            logger.info(f"Rank {current_rank} catchcopy: {item.get('catchcopy', 'NOT_FOUND')}")
-                            logger.info(f"Rank {current_rank} pointRate: {item.get('pointRate', 'NOT_FOUND')}")
-                            logger.info(f"Rank {current_rank} genreId: {item.get('genreId', 'NOT_FOUND')}")
-                            logger.info(f"Rank {current_rank} itemCaption: {item.get('itemCaption', 'NOT_FOUND')}")
-                            # タグAPIを無効化したため、タグ関連のログも削除
-                            # logger.info(f"Rank {current_rank} tagIds: {item.get('tagIds', 'NOT_FOUND')}")
-                            # logger.info(f"Rank {current_rank} tagNames: {item.get('tagNames', 'NOT_FOUND')}")
-                        
-                        all_products.append(product_info)
-                        
-                        # 上位10商品を保存
-                        if len(top_products) < 10:
-                            top_products.append(product_info)
-                            logger.debug(f"Added product to top 10: rank={current_rank}, is_own={is_match}, name={product_info['product_name'][:30]}...")
-                        
-                        # 自社商品が見つかった場合
-                        if is_match:
-                            # 最高順位（最も小さい数値）を記録
-                            if found_rank is None or current_rank < found_rank:
-                                found_rank = current_rank
-                                logger.info(f"Found target product at rank {current_rank} (new best rank)")
-                            else:
-                                logger.info(f"Found target product at rank {current_rank} (current best: {found_rank})")
-                        
-                        # 上位10件を収集した場合は検索終了（自社商品発見とは独立）
-                        if len(top_products) >= 10:
-                            execution_time = time.time() - start_time
-                            logger.info(f"Collected 10 top products, ending search. Found rank: {found_rank}")
-                            return found_rank, top_products, total_count
+                    logger.debug(f"Fetching pages {window} for keyword: {keyword}")
+                    for page, search_result in executor.map(fetch_page, window):
+                        checked.add(page)
+                        if search_result is None:
+                            continue
+                        page_rank, is_last = process_page(page, search_result)
+                        if page_rank is not None and (found_rank is None or page_rank < found_rank):
+                            found_rank = page_rank
+                        if is_last:
+                            last_page = min(last_page, page)
                     
-                    # 検索結果が30件未満の場合は最後のページ
-                    if len(search_result.get('Items', [])) < 30:
-                        logger.info(f"Reached end of results at page {page}")
-                        break
-                
-                except Exception as e:
-                    logger.error(f"Error processing page {page}: {e}")
-                    continue
+                    # adaptive: 一致したページより前の未取得ページをすべて確認する
+                    # （前のページにも自社商品がある場合、1つ前のページだけでは最高順位にならない）
+                    while adaptive and found_rank is not None:
+                        match_page_number = (found_rank - 1) // 30 + 1
+                        earlier = [p for p in range(2, match_page_number) if p not in checked]
+                        if not earlier:
+                            break
+                        window = earlier[:concurrency]
+                        logger.debug(f"Verifying earlier pages {window} for keyword: {keyword}")
+                        for page, search_result in executor.map(fetch_page, window):
+                            checked.add(page)
+                            if search_result is None:
+                                continue
+                            page_rank, _ = process_page(page, search_result)
+                            if page_rank is not None and page_rank < found_rank:
+                                found_rank = page_rank
+            
+            if found_rank is not None:
+                logger.debug(f"Found target product at rank {found_rank}")
             
             execution_time = time.time() - start_time
-            logger.info(f"Search completed in {execution_time:.2f}s, checked {len(all_products)} products")
-            logger.info(f"Collected {len(top_products)} top products, found_rank={found_rank}, total_count={total_count}")
+            logger.info(f"Rank search ({strategy}) completed in {execution_time:.2f}s, checked {pages_checked} pages, "
+                        f"found_rank={found_rank}, total_count={total_count}")
             
-            return found_rank, top_products, total_count
+            return found_rank, top_products, total_count, pages_checked
             
         except Exception as e:
             execution_time = time.time() - start_time
             logger.error(f"Search failed after {execution_time:.2f}s: {e}")
-            return None, [], 0
+            return None, [], 0, pages_checked
     
     def get_product_details(self, product_url: str) -> Dict:
         """商品詳細情報を取得"""
@@ -553,88 +664,66 @@ class RakutenSearchManager:
         self.user = user
         self.api = RakutenSearchAPI()
     
-    def execute_keyword_search(self, keyword_obj) -> 'RankingResult':
-        """キーワード検索を実行して結果を保存"""
-        from .models import RankingResult, TopProduct
+    def execute_keyword_search(self, keyword_obj, writer=None, on_saved=None, run_id=None) -> 'RankingResult':
+        """
+        キーワード検索を実行して結果を保存
         
-        start_time = time.time()
+        Args:
+            keyword_obj: Keyword
+            writer: 結果をまとめて保存する SearchResultWriter（省略時はこのキーワード分を即時保存）
+            on_saved: 保存後に同じトランザクション内で呼ばれる関数（引数は RankingResult）
+            run_id: バッチ実行ID（同じ実行の他の店舗と検索結果を共有する。画面からの検索では指定しない）
+            
+        Returns:
+            RankingResult（writer 指定時は保存前の場合がある）
+        """
+        from .result_writer import SearchResultWriter
         
-        # 検索ログを作成
-        search_log = SearchLog.objects.create(
-            user=self.user,
-            keyword=keyword_obj.keyword,
-            success=False  # 初期値
-        )
+        if writer is None:
+            with SearchResultWriter(flush_size=1) as single_writer:
+                return self.execute_keyword_search(
+                    keyword_obj, writer=single_writer, on_saved=on_saved, run_id=run_id
+                )
+        
+        start_time = time.time()
         
         try:
             # 楽天市場で検索実行
-            found_rank, top_products, total_count = self.api.find_product_rank(
+            # 前回順位のページから検索する（adaptive 戦略の場合）
+            found_rank, top_products, total_count, pages_checked = self.api.find_product_rank(
                 keyword=keyword_obj.keyword,
                 target_shop_id=keyword_obj.rakuten_shop_id,
                 target_product_id=keyword_obj.target_product_id,
                 target_product_url=keyword_obj.target_product_url,
-                max_pages=10  # 300商品まで検索
-            )
-            
-            # 結果を保存
-            ranking_result = RankingResult.objects.create(
-                keyword=keyword_obj,
-                rank=found_rank,
-                total_results=len(top_products),
-                total_products=total_count,
-                is_found=found_rank is not None
+                max_pages=getattr(settings, 'RANK_SEARCH_MAX_PAGES', 10),
+                rank_hint=keyword_obj.latest_rank,
+                run_id=run_id
             )
-            
-            # 上位10商品を保存
-            for product_data in top_products:
-                TopProduct.objects.create(
-                    ranking_result=ranking_result,
-                    rank=product_data['rank'],
-                    product_name=product_data['product_name'],
-                    catchcopy=product_data.get('catchcopy', ''),
-                    product_url=product_data['product_url'],
-                    product_id=product_data['product_id'],
-                    shop_name=product_data['shop_name'],
-                    shop_id=product_data['shop_id'],
-                    price=product_data['price'],
-                    review_count=product_data['review_count'],
-                    review_average=product_data['review_average'],
-                    image_url=product_data['image_url'],
-                    point_rate=product_data.get('point_rate', 1),
-                    genre_id=product_data.get('genre_id', ''),
-                    genre_name=product_data.get('genre_name', ''),
-                    tag_ids=product_data.get('tag_ids', ''),
-                    tag_names=product_data.get('tag_names', ''),
-                    product_spec=product_data.get('product_spec', ''),
-                    is_own_product=product_data['is_own_product']
-                )
-            
-            # 検索ログを更新
-            execution_time = time.time() - start_time
-            search_log.execution_time = execution_time
-            search_log.pages_checked = 10  # 最大10ページ
-            search_log.products_found = len(top_products)
-            search_log.success = True
-            search_log.save()
-            
-            logger.info(f"Search completed successfully for keyword: {keyword_obj.keyword}")
-            return ranking_result
-            
         except Exception as e:
-            # エラーログを更新
-            execution_time = time.time() - start_time
-            search_log.execution_time = execution_time
-            search_log.error_details = str(e)
-            search_log.save()
-            
+            metrics.inc('seo_searches_total', pipeline='seo', outcome='error')
             # エラー結果を保存
-            ranking_result = RankingResult.objects.create(
-                keyword=keyword_obj,
-                rank=None,
-                total_results=0,
-                is_found=False,
-                error_message=str(e)
+            writer.add(
+                self.user, keyword_obj,
+                execution_time=time.time() - start_time,
+                error=e,
+                on_saved=on_saved
             )
             
             logger.error(f"Search failed for keyword: {keyword_obj.keyword}, error: {e}")
-            raise
\ No newline at end of file
+            raise
+        
+        metrics.inc('seo_searches_total', pipeline='seo', outcome='found' if found_rank else 'not_found')
+        
+        # 検索ログ・結果・上位10商品を保存（writer がまとめて bulk_create する）
+        ranking_result = writer.add(
+            self.user, keyword_obj,
+            found_rank=found_rank,
+            top_products=top_products,
+            total_count=total_count,
+            pages_checked=pages_checked,
+            execution_time=time.time() - start_time,
+            on_saved=on_saved
+        )
+        
+        logger.info(f"Search completed successfully for keyword: {keyword_obj.keyword}")
+        return ranking_result
\ No newline at end of file
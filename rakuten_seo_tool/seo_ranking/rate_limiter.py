@@ -0,0 +1,188 @@
+"""
+楽天向けリクエストのレート制限
+トークンバケット方式でアプリIDあたりのリクエスト数を制御する
+
+Celeryワーカー間で予算を共有するためRedis上のバケット（GCRA）を使い、
+Redisに接続できない場合はプロセス内のバケットにフォールバックする。
+エンドポイントごとに独立した予算を持つ（settings.RAKUTEN_RATE_LIMITS）。
+"""
+
+import threading
+import time
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# エンドポイント名
+ICHIBA_ITEM = 'ichiba_item'
+ICHIBA_GENRE = 'ichiba_genre'
+ICHIBA_TAG = 'ichiba_tag'
+SEARCH_HTML = 'search_html'
+
+DEFAULT_RATE_LIMITS = {
+    ICHIBA_ITEM: {'rate': 1.0, 'burst': 3},
+    ICHIBA_GENRE: {'rate': 1.0, 'burst': 3},
+    ICHIBA_TAG: {'rate': 0.5, 'burst': 1},
+    SEARCH_HTML: {'rate': 3.0, 'burst': 5},
+}
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        初期化
+
+        Args:
+            rate: 1秒あたりに補充されるトークン数
+            capacity: バケットの最大容量（バースト許容数）
+        """
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        トークンを予約し、使用可能になるまでの待機秒数を返す
+
+        予約は即座に確定するため、呼び出し側は返された秒数だけ待機してからリクエストする
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def penalize(self, seconds: float):
+        """429応答などを受けた場合に、指定秒数ぶん後続リクエストを遅らせる"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= seconds * self.rate
+
+    def acquire(self, tokens: int = 1) -> float:
+        """トークンを取得する（必要に応じて待機）。待機した秒数を返す"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RedisTokenBucket:
+    """
+    Redis上で共有するトークンバケット（GCRA方式）
+
+    キーには「理論到着時刻（TAT）」のみを保存し、WATCH/MULTIで原子的に更新する。
+    時刻はRedisサーバーの時計を使うため、ワーカー間の時計のずれの影響を受けない。
+    """
+
+    def __init__(self, client, key: str, rate: float, capacity: int = 1):
+        self.client = client
+        self.key = key
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._fallback = TokenBucket(rate, capacity)
+
+    def _update_tat(self, compute) -> float:
+        """TATを読み込み、compute(tat, now) -> (new_tat, wait) の結果で更新する"""
+        import redis
+
+        try:
+            with self.client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(self.key)
+                        seconds, microseconds = pipe.time()
+                        now = seconds + microseconds / 1_000_000
+                        stored = pipe.get(self.key)
+                        tat = max(float(stored) if stored else 0.0, now)
+                        new_tat, wait = compute(tat, now)
+                        ttl_ms = int((new_tat - now) * 1000) + 1000
+                        pipe.multi()
+                        pipe.set(self.key, repr(new_tat), px=ttl_ms)
+                        pipe.execute()
+                        return wait
+                    except redis.WatchError:
+                        continue
+        except redis.RedisError as e:
+            logger.warning(f"Redis rate limiter unavailable for {self.key}, using local bucket: {e}")
+            return None
+
+    def reserve(self, tokens: int = 1) -> float:
+        """トークンを予約し、使用可能になるまでの待機秒数を返す"""
+        interval = tokens / self.rate
+        tolerance = (self.capacity - 1) / self.rate
+
+        def compute(tat, now):
+            return tat + interval, max(0.0, tat - tolerance - now)
+
+        wait = self._update_tat(compute)
+        if wait is None:
+            return self._fallback.reserve(tokens)
+        return wait
+
+    def penalize(self, seconds: float):
+        """全ワーカーの後続リクエストを指定秒数遅らせる"""
+        if self._update_tat(lambda tat, now: (tat + seconds, 0.0)) is None:
+            self._fallback.penalize(seconds)
+
+    def acquire(self, tokens: int = 1) -> float:
+        """トークンを取得する（必要に応じて待機）。待機した秒数を返す"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_limit_config(endpoint: str) -> dict:
+    limits = getattr(settings, 'RAKUTEN_RATE_LIMITS', {})
+    config = dict(DEFAULT_RATE_LIMITS.get(endpoint, {'rate': 1.0, 'burst': 1}))
+    config.update(limits.get(endpoint, {}))
+    return config
+
+
+def get_rate_limiter(endpoint: str):
+    """エンドポイント用のレートリミッターを取得（プロセス内でキャッシュ）"""
+    limiter = _limiters.get(endpoint)
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            config = _get_limit_config(endpoint)
+            backend = getattr(settings, 'RATE_LIMIT_BACKEND', 'redis')
+            if backend == 'redis':
+                from .redis_client import get_redis_client
+                limiter = RedisTokenBucket(
+                    get_redis_client(),
+                    key=f"ratelimit:{endpoint}",
+                    rate=config['rate'],
+                    capacity=config['burst'],
+                )
+            else:
+                limiter = TokenBucket(rate=config['rate'], capacity=config['burst'])
+            _limiters[endpoint] = limiter
+            logger.debug(f"Rate limiter initialized: {endpoint} ({backend}) {config['rate']} req/s, burst {config['burst']}")
+    return limiter
+
+
+def reset_rate_limiters():
+    """生成済みのリミッターを破棄する（設定変更時やテスト用）"""
+    with _limiters_lock:
+        _limiters.clear()
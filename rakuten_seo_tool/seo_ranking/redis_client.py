@@ -0,0 +1,53 @@
+"""
+Redis接続ユーティリティ
+レート制限などワーカー間で共有する状態の保存先としてCeleryブローカーのRedisを利用する
+"""
+
+import threading
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+_fake_server = None
+
+
+def _create_client(url: str):
+    """URLからRedisクライアントを生成（fakeredis:// はテスト用のローカル疑似Redis）"""
+    if url.startswith('fakeredis://'):
+        import fakeredis
+        global _fake_server
+        if _fake_server is None:
+            _fake_server = fakeredis.FakeServer()
+        return fakeredis.FakeStrictRedis(server=_fake_server, decode_responses=True)
+
+    import redis
+    return redis.Redis.from_url(
+        url,
+        decode_responses=True,
+        socket_timeout=5,
+        socket_connect_timeout=5,
+        health_check_interval=30,
+    )
+
+
+def get_redis_client():
+    """プロセス共通のRedisクライアントを取得"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                url = getattr(settings, 'RATE_LIMIT_REDIS_URL', None) or settings.CELERY_BROKER_URL
+                _client = _create_client(url)
+                logger.debug(f"Redis client initialized: {url}")
+    return _client
+
+
+def reset_redis_client():
+    """クライアントを破棄する（設定変更時やテスト用）"""
+    global _client, _fake_server
+    with _client_lock:
+        _client = None
+        _fake_server = None
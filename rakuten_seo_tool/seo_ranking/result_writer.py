@@ -0,0 +1,250 @@
+"""
+SEO順位検索結果のバッチ保存
+完了したキーワードの SearchLog / RankingResult / TopProduct をバッファし、
+複数キーワード分を1トランザクションの bulk_create でまとめて保存する
+
+SQLiteは書き込みロックが1つしかないため、行ごとのコミットが並列ワーカー間で
+"database is locked" を引き起こす。コミット回数を減らしてロック保持を短くする。
+"""
+
+import time
+import threading
+import logging
+from django.conf import settings
+from django.db import transaction
+
+from .models import Keyword, SearchLog, RankingResult, TopProduct, DailyRankRollup
+from .keyword_frequency import compute_keyword_frequency
+from .metrics import metrics
+from .dashboard_cache import invalidate_tenants
+
+logger = logging.getLogger(__name__)
+
+
+class PendingSearchResult:
+    """保存待ちのキーワード検索結果"""
+
+    def __init__(self, search_log, ranking_result, top_products, on_saved=None):
+        self.search_log = search_log
+        self.ranking_result = ranking_result
+        self.top_products = top_products
+        self.on_saved = on_saved
+
+    def reset_unsaved(self):
+        """ロールバックされた保存で割り当てられた主キーを外し、未保存の状態に戻す"""
+        for obj in [self.search_log, self.ranking_result, *self.top_products]:
+            obj.pk = None
+            obj._state.adding = True
+
+
+class SearchResultWriter:
+    """
+    検索結果をバッファしてまとめて保存するライター
+
+    flush_size 件たまるか、最初の結果から flush_interval 秒経過した時点で保存する。
+    with 文で使用すると終了時に残りを保存する。
+    """
+
+    def __init__(self, flush_size: int = None, flush_interval: float = None):
+        """
+        初期化
+
+        Args:
+            flush_size: まとめて保存するキーワード数（省略時は settings.RESULT_WRITER_FLUSH_SIZE）
+            flush_interval: バッファを保持する最大秒数（省略時は settings.RESULT_WRITER_FLUSH_INTERVAL）
+        """
+        if flush_size is None:
+            flush_size = getattr(settings, 'RESULT_WRITER_FLUSH_SIZE', 20)
+        if flush_interval is None:
+            flush_interval = getattr(settings, 'RESULT_WRITER_FLUSH_INTERVAL', 5.0)
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = float(flush_interval)
+        self._pending = []
+        self._first_added_at = None
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, user, keyword_obj, found_rank=None, top_products=(), total_count=0,
+            execution_time=0, error=None, on_saved=None, pages_checked=0) -> RankingResult:
+        """
+        キーワードの検索結果をバッファに追加
+
+        Args:
+            user: 検索を実行したユーザー
+            keyword_obj: Keyword
+            found_rank: 自社商品の順位（見つからない場合はNone）
+            top_products: 上位商品データのリスト
+            total_count: 総商品数
+            execution_time: 実行時間（秒）
+            error: エラー内容（失敗時）
+            on_saved: 保存後に同じトランザクション内で呼ばれる関数（引数は RankingResult）
+            pages_checked: 検索で実際に取得したページ数
+
+        Returns:
+            RankingResult（保存前。pk はフラッシュ時に確定する）
+        """
+        if error is None:
+            search_log = SearchLog(
+                user=user,
+                keyword=keyword_obj.keyword,
+                execution_time=execution_time,
+                pages_checked=pages_checked,
+                products_found=len(top_products),
+                success=True
+            )
+            ranking_result = RankingResult(
+                keyword=keyword_obj,
+                rank=found_rank,
+                total_results=len(top_products),
+                total_products=total_count,
+                is_found=found_rank is not None
+            )
+        else:
+            search_log = SearchLog(
+                user=user,
+                keyword=keyword_obj.keyword,
+                execution_time=execution_time,
+                pages_checked=pages_checked,
+                success=False,
+                error_details=str(error)
+            )
+            ranking_result = RankingResult(
+                keyword=keyword_obj,
+                rank=None,
+                total_results=0,
+                is_found=False,
+                error_message=str(error)
+            )
+
+        # キーワード露出頻度は保存前に1回だけ集計する（詳細画面・CSVは保存済みの結果を使用）
+        products = [
+            TopProduct(
+                ranking_result=ranking_result,
+                rank=product_data['rank'],
+                product_name=product_data['product_name'],
+                catchcopy=product_data.get('catchcopy', ''),
+                product_url=product_data['product_url'],
+                product_id=product_data['product_id'],
+                shop_name=product_data['shop_name'],
+                shop_id=product_data['shop_id'],
+                price=product_data['price'],
+                review_count=product_data['review_count'],
+                review_average=product_data['review_average'],
+                image_url=product_data['image_url'],
+                point_rate=product_data.get('point_rate', 1),
+                genre_id=product_data.get('genre_id', ''),
+                genre_name=product_data.get('genre_name', ''),
+                tag_ids=product_data.get('tag_ids', ''),
+                tag_names=product_data.get('tag_names', ''),
+                product_spec=product_data.get('product_spec', ''),
+                is_own_product=product_data['is_own_product'],
+                keyword_frequency=compute_keyword_frequency(
+                    keyword_obj.keyword,
+                    product_data['product_name'],
+                    product_data.get('catchcopy', ''),
+                    product_data.get('product_spec', '')
+                )
+            )
+            for product_data in top_products
+        ]
+
+        with self._lock:
+            if not self._pending:
+                self._first_added_at = time.monotonic()
+            self._pending.append(PendingSearchResult(search_log, ranking_result, products, on_saved))
+
+        self.flush_if_due()
+        return ranking_result
+
+    def flush_if_due(self) -> bool:
+        """保存条件（件数・経過時間）を満たしていれば保存する"""
+        with self._lock:
+            if not self._pending:
+                return False
+            due = (
+                len(self._pending) >= self.flush_size
+                or time.monotonic() - self._first_added_at >= self.flush_interval
+            )
+        if due:
+            self.flush()
+        return due
+
+    def flush(self) -> int:
+        """
+        バッファ内の結果を1トランザクションで保存
+
+        まとめた保存に失敗した場合は1件ずつ保存し直し、それでも失敗した結果はログに残して破棄する
+        （失敗したバッチをバッファに残すと、以降の保存がすべて同じエラーで止まるため）。
+
+        Returns:
+            保存したキーワード数
+        """
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return 0
+            self._pending = []
+            self._first_added_at = None
+
+            try:
+                product_count = self._write(pending)
+                saved = pending
+            except Exception as e:
+                logger.warning(f"Search result batch flush failed ({len(pending)} keywords), retrying individually: {e}")
+                saved = []
+                product_count = 0
+                for entry in pending:
+                    entry.reset_unsaved()
+                    try:
+                        product_count += self._write([entry])
+                        saved.append(entry)
+                    except Exception as entry_error:
+                        logger.error(
+                            f"Search result dropped for keyword {entry.ranking_result.keyword_id}: {entry_error}"
+                        )
+
+        if saved:
+            # bulk_create はシグナルを送らないため、ダッシュボード集計をここで無効化
+            invalidate_tenants(
+                [entry.search_log.user_id for entry in saved]
+                + [entry.ranking_result.keyword.user_id for entry in saved]
+            )
+
+        logger.debug(f"Search results flushed: {len(saved)} keywords, {product_count} products")
+        return len(saved)
+
+    def _write(self, entries) -> int:
+        """結果を1トランザクションで保存し、保存した上位商品数を返す"""
+        with metrics.timer('seo_stage_seconds', pipeline='seo', stage='db_write'), transaction.atomic():
+            SearchLog.objects.bulk_create([entry.search_log for entry in entries])
+            RankingResult.objects.bulk_create([entry.ranking_result for entry in entries])
+
+            # bulk_createで主キーを取得できないDBの場合は個別保存にフォールバック
+            # （個別保存時は save() がキーワードの最新結果・日次集計を更新する）
+            for entry in entries:
+                if entry.ranking_result.pk is None:
+                    entry.ranking_result.save()
+                else:
+                    Keyword.record_latest_result(entry.ranking_result)
+                    DailyRankRollup.record_result(entry.ranking_result)
+
+            products = []
+            for entry in entries:
+                for product in entry.top_products:
+                    product.ranking_result = entry.ranking_result
+                    products.append(product)
+            if products:
+                TopProduct.objects.bulk_create(products)
+
+            for entry in entries:
+                if entry.on_saved:
+                    entry.on_saved(entry.ranking_result)
+        return len(products)
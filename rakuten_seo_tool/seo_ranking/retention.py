@@ -0,0 +1,188 @@
+"""
+保持期間を過ぎたデータの削除
+主キーの範囲で小さなバッチに分けて削除し、バッチごとに短いトランザクションでコミットする
+
+SQLiteは書き込みロックが1つしかないため、1回の大きなカスケード削除は深夜の検索ワーカーを
+長時間待たせる。バッチ間に待機を入れてロックを解放し、実行時間の上限に達した場合は
+途中で終了して次回（再投入されたタスク）に続きから削除する。
+"""
+
+import time
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 進捗を保存するキャッシュキー
+PROGRESS_CACHE_KEY = 'retention:progress'
+
+# 対象ユーザーIDを1クエリで指定する最大数
+USER_CHUNK_SIZE = 500
+
+
+def delete_in_batches(queryset, batch_size: int = None, pause: float = None, deadline: float = None,
+                      on_batch=None):
+    """
+    クエリセットの対象を主キー順のバッチで削除
+
+    Args:
+        queryset: 削除対象のクエリセット
+        batch_size: 1トランザクションで削除する件数（省略時は settings.RETENTION_BATCH_SIZE）
+        pause: バッチ間の待機秒数（省略時は settings.RETENTION_BATCH_PAUSE）
+        deadline: time.monotonic() の期限。超えた場合は途中で終了する
+        on_batch: バッチ削除後に呼ばれる関数（引数は削除件数と最後の主キー）
+
+    Returns:
+        (削除件数, 最後まで削除できたか)
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'RETENTION_BATCH_SIZE', 500)
+    if pause is None:
+        pause = getattr(settings, 'RETENTION_BATCH_PAUSE', 0.1)
+    batch_size = max(1, int(batch_size))
+
+    model = queryset.model
+    deleted_count = 0
+    last_pk = None
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            return deleted_count, False
+
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted_count, True
+
+        # 子テーブル（TopProduct / RPPAd）もこのバッチ分だけカスケード削除される
+        with transaction.atomic():
+            model.objects.filter(pk__in=ids).delete()
+
+        deleted_count += len(ids)
+        last_pk = ids[-1]
+        if on_batch:
+            on_batch(len(ids), last_pk)
+        if len(ids) < batch_size:
+            return deleted_count, True
+        if pause:
+            time.sleep(pause)
+
+
+def _group_users_by_retention():
+    """保持日数ごとにユーザーIDをまとめる（{保持日数: [ユーザーID, ...]}）"""
+    from accounts.models import User
+
+    groups = {}
+    for user in User.objects.all().iterator():
+        groups.setdefault(user.get_data_retention_days(), []).append(user.id)
+    return groups
+
+
+def _build_targets():
+    """削除対象（名前, クエリセット）の一覧を作成"""
+    from .models import RankingResult, SearchLog
+    from .models_rpp import RPPResult, RPPSearchLog
+
+    now = timezone.now()
+    targets = []
+
+    # 順位データはユーザーのプランごとの保持期間
+    for retention_days, user_ids in sorted(_group_users_by_retention().items()):
+        cutoff_date = now - timedelta(days=retention_days)
+        for start in range(0, len(user_ids), USER_CHUNK_SIZE):
+            chunk = user_ids[start:start + USER_CHUNK_SIZE]
+            targets.append((
+                f"ranking_results:{retention_days}d",
+                RankingResult.objects.filter(keyword__user_id__in=chunk, checked_at__lt=cutoff_date)
+            ))
+            targets.append((
+                f"rpp_results:{retention_days}d",
+                RPPResult.objects.filter(keyword__user_id__in=chunk, checked_at__lt=cutoff_date)
+            ))
+
+    # 検索ログは全ユーザー共通の保持期間
+    log_cutoff = now - timedelta(days=getattr(settings, 'LOG_RETENTION_DAYS', 30))
+    targets.append(('search_logs', SearchLog.objects.filter(created_at__lt=log_cutoff)))
+    targets.append(('rpp_search_logs', RPPSearchLog.objects.filter(created_at__lt=log_cutoff)))
+    return targets
+
+
+def get_retention_progress() -> dict:
+    """直近の削除処理の進捗を取得"""
+    try:
+        return cache.get(PROGRESS_CACHE_KEY) or {}
+    except Exception as e:
+        logger.warning(f"Retention progress unavailable: {e}")
+        return {}
+
+
+def _save_progress(progress: dict):
+    try:
+        cache.set(PROGRESS_CACHE_KEY, progress, timeout=60 * 60 * 24 * 7)
+    except Exception as e:
+        logger.warning(f"Failed to save retention progress: {e}")
+
+
+def run_retention(max_seconds: float = None, batch_size: int = None, pause: float = None) -> dict:
+    """
+    SEO・RPPの順位データと検索ログを保持期間に従って削除
+
+    削除条件は毎回計算し直すため、途中で終了しても再実行すれば続きから削除される。
+
+    Args:
+        max_seconds: 実行時間の上限（省略時は settings.RETENTION_MAX_SECONDS、0で無制限）
+        batch_size: 1トランザクションで削除する件数
+        pause: バッチ間の待機秒数
+
+    Returns:
+        テーブルごとの削除件数と完了したかどうか
+    """
+    if max_seconds is None:
+        max_seconds = getattr(settings, 'RETENTION_MAX_SECONDS', 600)
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    started = time.monotonic()
+
+    progress = {
+        'started_at': timezone.now().isoformat(),
+        'updated_at': None,
+        'finished': False,
+        'batches': 0,
+        'deleted': {},
+    }
+
+    def on_batch(name):
+        def record(count, last_pk):
+            progress['batches'] += 1
+            progress['deleted'][name] = progress['deleted'].get(name, 0) + count
+            progress['current'] = {'target': name, 'last_pk': last_pk}
+            progress['updated_at'] = timezone.now().isoformat()
+            _save_progress(progress)
+            if progress['batches'] % 20 == 0:
+                logger.info(f"Retention progress: {progress['deleted']} ({progress['batches']} batches)")
+        return record
+
+    finished = True
+    for name, queryset in _build_targets():
+        _, completed = delete_in_batches(queryset, batch_size, pause, deadline, on_batch(name))
+        if not completed:
+            finished = False
+            logger.warning(f"Retention stopped at {name}: time limit {max_seconds}s reached")
+            break
+
+    progress['finished'] = finished
+    progress['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    progress['updated_at'] = timezone.now().isoformat()
+    if finished:
+        progress.pop('current', None)
+    _save_progress(progress)
+
+    logger.info(
+        f"Retention {'completed' if finished else 'paused'}: {progress['deleted']} "
+        f"({progress['batches']} batches, {progress['elapsed_seconds']}s)"
+    )
+    return progress
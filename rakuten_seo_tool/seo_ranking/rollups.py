@@ -0,0 +1,156 @@
+"""
+順位の日次集計
+キーワード・日付ごとに最高/最低/最終順位と発見率を保持し、グラフはこの集計から描画する
+
+検索結果の保存時に同じトランザクションで更新するため、古い検索結果を削除した後も
+長期間の推移を表示できる。
+"""
+
+import math
+from datetime import timedelta
+from django.db import models
+from django.utils import timezone
+
+# グラフに返す最大点数（超える場合は複数日をまとめる）
+MAX_CHART_POINTS = 365
+
+PERIOD_DAYS = {'7': 7, '30': 30, '90': 90, '365': 365}
+
+
+def apply_result(rollup, rank, checked_at):
+    """
+    検索結果を1件、日次集計の値に加える
+    フィールドのみを使うため、マイグレーションの履歴モデルにも使える
+
+    Args:
+        rollup: 日次集計（DailyRankRollup / RPPDailyRankRollup）
+        rank: 順位（圏外の場合はNone）
+        checked_at: チェック日時
+    """
+    rollup.check_count += 1
+    if rank is not None:
+        rollup.found_count += 1
+        rollup.best_rank = rank if rollup.best_rank is None else min(rollup.best_rank, rank)
+        rollup.worst_rank = rank if rollup.worst_rank is None else max(rollup.worst_rank, rank)
+    if rollup.last_checked_at is None or checked_at >= rollup.last_checked_at:
+        rollup.last_rank = rank
+        rollup.last_checked_at = checked_at
+
+
+class DailyRankRollupBase(models.Model):
+    """日次順位集計の共通フィールド（SEO/RPPで共用）"""
+    date = models.DateField(
+        verbose_name='日付'
+    )
+    best_rank = models.IntegerField(
+        verbose_name='最高順位',
+        null=True,
+        blank=True
+    )
+    worst_rank = models.IntegerField(
+        verbose_name='最低順位',
+        null=True,
+        blank=True,
+        help_text='発見できた検索のうち最も低い順位'
+    )
+    last_rank = models.IntegerField(
+        verbose_name='最終順位',
+        null=True,
+        blank=True,
+        help_text='その日の最後の検索結果（圏外の場合はNULL）'
+    )
+    last_checked_at = models.DateTimeField(
+        verbose_name='最終チェック日時',
+        null=True,
+        blank=True
+    )
+    check_count = models.PositiveIntegerField(
+        verbose_name='検索回数',
+        default=0
+    )
+    found_count = models.PositiveIntegerField(
+        verbose_name='発見回数',
+        default=0
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def found_ratio(self):
+        """発見率（0〜1）"""
+        if not self.check_count:
+            return 0
+        return self.found_count / self.check_count
+
+    def add_result(self, rank, checked_at):
+        """
+        検索結果を1件集計に加える
+
+        Args:
+            rank: 順位（圏外の場合はNone）
+            checked_at: チェック日時
+        """
+        apply_result(self, rank, checked_at)
+
+    @classmethod
+    def record_result(cls, result):
+        """
+        保存済みの検索結果（RankingResult / RPPResult）を日次集計に反映
+        呼び出し側のトランザクション内で実行する
+        """
+        rollup, _ = cls.objects.select_for_update().get_or_create(
+            keyword_id=result.keyword_id,
+            date=timezone.localdate(result.checked_at)
+        )
+        rollup.add_result(result.rank if result.is_found else None, result.checked_at)
+        rollup.save()
+        return rollup
+
+
+def get_period_start_date(period: str):
+    """期間指定（'7' / '30' / '90' / '365' / 'all'）から開始日を取得（'all' はNone）"""
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    return timezone.localdate() - timedelta(days=days)
+
+
+def build_chart_points(rollups, max_points: int = MAX_CHART_POINTS):
+    """
+    日次集計からグラフ用の点データを作成
+
+    Args:
+        rollups: 日付順の日次集計（values() の辞書でも可）
+        max_points: 最大点数。超える場合は連続する日をまとめる
+
+    Returns:
+        [{'date', 'best', 'worst', 'last', 'found_ratio'}, ...]
+    """
+    rows = [row if isinstance(row, dict) else {
+        'date': row.date,
+        'best_rank': row.best_rank,
+        'worst_rank': row.worst_rank,
+        'last_rank': row.last_rank,
+        'check_count': row.check_count,
+        'found_count': row.found_count,
+    } for row in rollups]
+    if not rows:
+        return []
+
+    bucket_size = max(1, math.ceil(len(rows) / max_points))
+    points = []
+    for start in range(0, len(rows), bucket_size):
+        bucket = rows[start:start + bucket_size]
+        best_ranks = [row['best_rank'] for row in bucket if row['best_rank'] is not None]
+        worst_ranks = [row['worst_rank'] for row in bucket if row['worst_rank'] is not None]
+        check_count = sum(row['check_count'] for row in bucket)
+        found_count = sum(row['found_count'] for row in bucket)
+        points.append({
+            'date': bucket[-1]['date'].isoformat(),
+            'best': min(best_ranks) if best_ranks else None,
+            'worst': max(worst_ranks) if worst_ranks else None,
+            'last': bucket[-1]['last_rank'],
+            'found_ratio': round(found_count / check_count, 3) if check_count else 0,
+        })
+    return points
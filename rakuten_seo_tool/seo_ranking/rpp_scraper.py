@@ -4,17 +4,36 @@ RPP広告順位スクレイピング機能
 """
 
 import time
+import asyncio
 import logging
 import re
 import json
+import threading
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote, urljoin
 import requests
+import httpx
 from bs4 import BeautifulSoup
+from django.conf import settings
 from django.utils import timezone
 
+from .rate_limiter import get_rate_limiter, SEARCH_HTML
+from .rpp_state_extractor import extract_state_items
+from .fetch_cache import get_fetch_cache, normalize_keyword, RPP_SEARCH_PAGE
+from .http_transport import PooledHttpClient, record_request
+from .metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+# 最小限のHTTPヘッダーで高速化
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'text/html',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Cache-Control': 'no-cache'
+}
+
 
 class RPPScraper:
     """楽天RPP広告スクレイピングクラス"""
@@ -24,123 +43,160 @@ class RPPScraper:
         初期化
         
         Args:
-            delay_between_requests: リクエスト間の待機時間（秒）
+            delay_between_requests: 互換性のため残している（リクエスト間隔は共有レートリミッターで制御）
         """
         self.delay = delay_between_requests
-        self.session = requests.Session()
-        
-        # コネクションプール設定でネットワーク効率化
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=0  # リトライせずに高速化
-        )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
-        
-        # 最小限のHTTPヘッダーで高速化
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'text/html',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Cache-Control': 'no-cache'
-        })
-    
-    def search_rpp_ads(self, keyword: str, max_pages: int = 3) -> Tuple[List[Dict], bool]:
+        # 接続はプロセス共通のプールから借りる（キーワード・ユーザーをまたいで再利用）
+        self.session = PooledHttpClient(headers=DEFAULT_HEADERS, timeout=8)
+    
+    def search_rpp_ads(self, keyword: str, max_pages: int = 3, run_id: str = None) -> Tuple[List[Dict], bool]:
         """
         指定キーワードでRPP広告を検索
         
         Args:
             keyword: 検索キーワード
             max_pages: 最大検索ページ数（デフォルト3ページ、最大15位まで）
+            run_id: バッチ実行ID（同じ実行内で検索ページを共有する。未指定時は共有しない）
             
         Returns:
             Tuple[広告リスト, 成功フラグ]
         """
+        try:
+            # ページは必要になった時点で1ページずつ取得する
+            page_results = (
+                (page, self._scrape_page(keyword, page, run_id))
+                for page in range(1, max_pages + 1)
+            )
+            ads = self._rank_page_ads(keyword, page_results)
+            
+            logger.info(f"RPP検索完了: {keyword} - 総広告数: {len(ads)}")
+            return ads, True
+            
+        except Exception as e:
+            logger.error(f"RPP検索エラー ({keyword}): {e}")
+            return [], False
+    
+    def _rank_page_ads(self, keyword: str, page_results) -> List[Dict]:
+        """
+        ページごとの広告に全体順位を付与する（15位まで）
+        
+        Args:
+            keyword: 検索キーワード
+            page_results: (ページ番号, 広告リスト) をページ順に返すイテラブル
+            
+        Returns:
+            順位付きの広告リスト
+        """
         ads = []
         overall_rank = 1
         
         consecutive_empty_pages = 0
         
-        try:
-            for page in range(1, max_pages + 1):
-                logger.debug(f"RPP検索: {keyword} - ページ {page}")
-                
-                # ページのスクレイピング
-                page_ads = self._scrape_page(keyword, page)
-                
-                if not page_ads:
-                    consecutive_empty_pages += 1
-                    logger.debug(f"ページ {page} でRPP広告が見つかりませんでした")
-                    
-                    # 連続2ページで広告が見つからない場合は終了（高速化）
-                    if consecutive_empty_pages >= 1 and page > 1:  # 2ページ目以降は1ページ空で終了
-                        logger.debug(f"連続{consecutive_empty_pages}ページで広告なし、検索終了")
-                        break
-                    continue
-                else:
-                    consecutive_empty_pages = 0  # リセット
-                
-                # 全体順位を設定
-                for ad in page_ads:
-                    # 15位まででカットオフ
-                    if overall_rank > 15:
-                        logger.info(f"15位に達したため広告処理を終了")
-                        break
-                    
-                    ad['rank'] = overall_rank
-                    ad['page_number'] = page
-                    overall_rank += 1
-                    ads.append(ad)
+        for page, page_ads in page_results:
+            logger.debug(f"RPP検索: {keyword} - ページ {page}")
+            
+            if not page_ads:
+                consecutive_empty_pages += 1
+                logger.debug(f"ページ {page} でRPP広告が見つかりませんでした")
                 
-                # 15位に達したら検索終了
+                # 連続2ページで広告が見つからない場合は終了（高速化）
+                if consecutive_empty_pages >= 1 and page > 1:  # 2ページ目以降は1ページ空で終了
+                    logger.debug(f"連続{consecutive_empty_pages}ページで広告なし、検索終了")
+                    break
+                continue
+            else:
+                consecutive_empty_pages = 0  # リセット
+            
+            # 全体順位を設定
+            for ad in page_ads:
+                # 15位まででカットオフ
                 if overall_rank > 15:
-                    logger.debug(f"15位に達したため検索を終了")
+                    logger.info(f"15位に達したため広告処理を終了")
                     break
                 
-                # リクエスト間隔を空ける（効率化のため短縮）
-                if page < max_pages and len(ads) < 15:  # 15位分整ったら間隔なし
-                    time.sleep(self.delay)
-            
-            logger.info(f"RPP検索完了: {keyword} - 総広告数: {len(ads)}")
-            return ads, True
-            
-        except Exception as e:
-            logger.error(f"RPP検索エラー ({keyword}): {e}")
-            return ads, False
+                ad['rank'] = overall_rank
+                ad['page_number'] = page
+                overall_rank += 1
+                ads.append(ad)
+            
+            # 15位に達したら検索終了
+            if overall_rank > 15:
+                logger.debug(f"15位に達したため検索を終了")
+                break
+        
+        return ads
     
-    def _scrape_page(self, keyword: str, page: int) -> List[Dict]:
+    def _build_search_url(self, keyword: str, page: int) -> str:
+        """楽天検索URLを構築"""
+        encoded_keyword = quote(keyword)
+        url = f"https://search.rakuten.co.jp/search/mall/{encoded_keyword}/"
+        
+        if page > 1:
+            url += f"?p={page}"
+        
+        return url
+    
+    def _parse_page(self, content: bytes, page: int) -> List[Dict]:
+        """取得したHTMLから広告を抽出"""
+        with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='parse'):
+            return self._parse_page_content(content, page)
+    
+    def _parse_page_content(self, content: bytes, page: int) -> List[Dict]:
+        # 高速化：__INITIAL_STATE__をバイト列から直接抽出（HTML全体は解析しない）
+        items = extract_state_items(content)
+        if items is not None:
+            return self._extract_ads_from_state_items(items, page)
+        
+        # __INITIAL_STATE__が無い場合のみBeautifulSoupでHTML解析
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # RPP広告を抽出
+        return self._extract_rpp_ads(soup, page)
+    
+    def _scrape_page(self, keyword: str, page: int, run_id: str = None) -> List[Dict]:
         """
         指定ページから広告を抽出
         
         Args:
             keyword: 検索キーワード
             page: ページ番号
+            run_id: バッチ実行ID（未指定時は取得キャッシュを使わない）
             
         Returns:
             広告データのリスト
         """
         try:
-            # 楽天検索URLを構築
-            encoded_keyword = quote(keyword)
-            url = f"https://search.rakuten.co.jp/search/mall/{encoded_keyword}/"
+            # 同じ実行で他の店舗が取得済みのページがあれば再利用
+            fetch_cache = get_fetch_cache(RPP_SEARCH_PAGE)
+            cached_ads = fetch_cache.get(run_id, normalize_keyword(keyword), page)
+            if cached_ads is not None:
+                return cached_ads
             
-            if page > 1:
-                url += f"?p={page}"
+            # 楽天検索URLを構築
+            url = self._build_search_url(keyword, page)
             
             logger.debug(f"リクエスト URL: {url}")
             
             # ページを取得（適切なタイムアウト設定）
-            response = self.session.get(url, timeout=8, stream=False)
+            limiter = get_rate_limiter(SEARCH_HTML)
+            with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='rate_limit_wait'):
+                limiter.acquire()
+            with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='http'):
+                response = self.session.get(url, timeout=8, stream=False)
+            
+            # 429エラーの場合は全ワーカーを減速させて1回だけリトライ
+            if response.status_code == 429:
+                logger.warning(f"検索ページのレート制限 (page {page})、待機後にリトライ")
+                metrics.inc('seo_http_retries_total', host='search.rakuten.co.jp', reason='rate_limited')
+                limiter.penalize(3)
+                with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='rate_limit_wait'):
+                    limiter.acquire()
+                with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='http'):
+                    response = self.session.get(url, timeout=8, stream=False)
             response.raise_for_status()
             
-            # BeautifulSoupでHTML解析（高速パーサー使用）
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # RPP広告を抽出
-            ads = self._extract_rpp_ads(soup, page)
-            
+            ads = self._parse_page(response.content, page)
+            fetch_cache.set(run_id, normalize_keyword(keyword), ads, page)
             return ads
             
         except requests.exceptions.RequestException as e:
@@ -150,9 +206,93 @@ class RPPScraper:
             logger.error(f"ページ解析エラー (page {page}): {e}")
             return []
     
+    def _extract_ads_from_state_items(self, items: List[Dict], page: int) -> List[Dict]:
+        """
+        __INITIAL_STATE__ の商品リストからRPP広告を抽出
+        
+        Args:
+            items: data.ichibaSearch.items
+            page: ページ番号
+            
+        Returns:
+            広告データのリスト
+        """
+        ads = []
+        position_on_page = 1
+        
+        logger.debug(f"検索結果アイテム数: {len(items)}")
+        
+        for i, item in enumerate(items, 1):
+            # アイテムがNoneでないかチェック
+            if not item or not isinstance(item, dict):
+                continue
+                
+            # CPC情報をチェックしてRPP広告かどうか判定
+            item_options = item.get('itemOptions')
+            if not item_options or not isinstance(item_options, dict):
+                continue
+                
+            cpc_info = item_options.get('cpc')
+            if not cpc_info or not isinstance(cpc_info, dict):
+                continue
+            
+            # "type": "grp07rpp"がRPP広告の印
+            if cpc_info.get('type') == 'grp07rpp':
+                # RPP広告として商品情報を抽出
+                shop_info = item.get('shop')
+                if not shop_info or not isinstance(shop_info, dict):
+                    shop_info = {}
+                
+                original_url = item.get('originalItemUrl', '')
+                
+                # 商品名が意味のあるものかチェック（フィルタリング用）
+                product_name = item.get('name', '')
+                if not product_name or product_name in ['すべてのジャンル', '']:
+                    continue
+                
+                ad_data = {
+                    'product_name': product_name,
+                    'product_url': original_url,
+                    'price': item.get('price'),
+                    'shop_name': shop_info.get('urlCode', ''),  # shop.urlCodeから店舗IDを取得
+                    'image_url': '',
+                    'catchcopy': item.get('subtitle', ''),
+                    'position_on_page': len(ads) + 1,  # 有効な広告の連番
+                    'page_number': page,
+                    'product_id': ''
+                }
+                
+                # 画像URL
+                images = item.get('images', [])
+                if images and isinstance(images, list) and len(images) > 0:
+                    first_image = images[0]
+                    if isinstance(first_image, dict):
+                        ad_data['image_url'] = first_image.get('url', '')
+                
+                # originalItemUrlから商品IDを抽出
+                if original_url:
+                    url_match = re.search(r'item\.rakuten\.co\.jp/([^/]+)/([^/?]+)', original_url)
+                    if url_match:
+                        # shop.urlCodeが空の場合はURLから抽出
+                        if not ad_data['shop_name']:
+                            ad_data['shop_name'] = url_match.group(1)
+                        ad_data['product_id'] = url_match.group(2)
+                
+                ads.append(ad_data)
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"RPP広告検出: {ad_data['position_on_page']}位 - {product_name[:30]} (店舗: {ad_data['shop_name']})")
+                position_on_page += 1
+                
+                # 各ページで8広告見つかったら早期終了（高速化）
+                if len(ads) >= 8:
+                    break
+        
+        return ads
+    
     def _extract_rpp_ads(self, soup: BeautifulSoup, page: int) -> List[Dict]:
         """
-        BeautifulSoupオブジェクトからRPP広告を抽出
+        BeautifulSoupオブジェクトからRPP広告を抽出（__INITIAL_STATE__が無い場合のフォールバック）
         
         Args:
             soup: BeautifulSoupオブジェクト
@@ -165,197 +305,54 @@ class RPPScraper:
         position_on_page = 1
         
         try:
-            # 高速化：__INITIAL_STATE__を効率的に抽出
-            script_tags = soup.find_all('script', limit=15)  # 最初の15個のスクリプトタグのみチェック
-            initial_state_found = False
-            
+            # __INITIAL_STATE__が無い場合はJSON-LD方式
+            script_tags = soup.find_all('script', type='application/ld+json')
             for script in script_tags:
-                if script.string and 'window.__INITIAL_STATE__' in script.string:
-                    try:
-                        # JavaScriptコードからJSONデータを抽出
-                        script_content = script.string
-                        start_index = script_content.find('window.__INITIAL_STATE__ = ') + len('window.__INITIAL_STATE__ = ')
-                        
-                        # JSONの終端を見つける（次の;</の手前まで）
-                        end_index = script_content.find(';\n', start_index)
-                        if end_index == -1:
-                            end_index = script_content.find('};', start_index)
-                            if end_index != -1:
-                                end_index += 1  # }を含める
-                            else:
-                                end_index = len(script_content)
-                        
-                        json_str = script_content[start_index:end_index].strip()
-                        
-                        initial_state = json.loads(json_str)
-                        
-                        # itemsを取得（再帰的検索を含む）
-                        items = []
-                        
-                        # まず通常のパスを試す
-                        data = initial_state.get('data', {})
-                        if data and isinstance(data, dict):
-                            ichiba_search = data.get('ichibaSearch', {})
-                            if ichiba_search and isinstance(ichiba_search, dict):
-                                items = ichiba_search.get('items', [])
-                        
-                        # 通常のパスで見つからない場合は効率的な検索を実行
-                        if not items:
-                            def find_items_optimized(obj, max_depth=3, current_depth=0):
-                                """効率化された商品リスト検索（深度制限付き）"""
-                                if current_depth > max_depth:
-                                    return None
-                                    
-                                if isinstance(obj, dict):
-                                    # よく使われるキー名を優先的にチェック
-                                    priority_keys = ['items', 'products', 'itemList', 'results']
-                                    for key in priority_keys:
-                                        value = obj.get(key)
-                                        if isinstance(value, list) and value:
-                                            return value
-                                    
-                                    # 'items'キーが最も可能性が高いので、限定的に再帰
-                                    for key, value in obj.items():
-                                        if 'item' in key.lower() or 'product' in key.lower():
-                                            if isinstance(value, list) and value:
-                                                return value
-                                            elif isinstance(value, dict):
-                                                result = find_items_optimized(value, max_depth, current_depth + 1)
-                                                if result:
-                                                    return result
-                                elif isinstance(obj, list) and len(obj) > 0:
-                                    # 最初の要素のみチェック（パフォーマンス重視）
-                                    result = find_items_optimized(obj[0], max_depth, current_depth + 1)
-                                    if result:
-                                        return result
-                                return None
-                            
-                            items = find_items_optimized(initial_state) or []
-                        
-                        logger.debug(f"検索結果アイテム数: {len(items)}")
-                        
-                        for i, item in enumerate(items, 1):
-                            # アイテムがNoneでないかチェック
-                            if not item or not isinstance(item, dict):
-                                continue
-                                
-                            # CPC情報をチェックしてRPP広告かどうか判定
-                            item_options = item.get('itemOptions')
-                            if not item_options or not isinstance(item_options, dict):
-                                continue
-                                
-                            cpc_info = item_options.get('cpc')
-                            if not cpc_info or not isinstance(cpc_info, dict):
-                                continue
+                try:
+                    data = json.loads(script.string)
+                    if data.get('@type') == 'ItemList':
+                        items = data.get('itemListElement', [])
+                        for item in items:
+                            product_data = item.get('item', {})
+                            position = item.get('position')
                             
-                            # "type": "grp07rpp"がRPP広告の印
-                            if cpc_info.get('type') == 'grp07rpp':
-                                # RPP広告として商品情報を抽出
-                                shop_info = item.get('shop')
-                                if not shop_info or not isinstance(shop_info, dict):
-                                    shop_info = {}
-                                
-                                original_url = item.get('originalItemUrl', '')
-                                
-                                # 商品名が意味のあるものかチェック（フィルタリング用）
-                                product_name = item.get('name', '')
-                                if not product_name or product_name in ['すべてのジャンル', '']:
-                                    continue
-                                
+                            if product_data:
+                                # JSON-LDから基本情報を抽出
                                 ad_data = {
-                                    'product_name': product_name,
-                                    'product_url': original_url,
-                                    'price': item.get('price'),
-                                    'shop_name': shop_info.get('urlCode', ''),  # shop.urlCodeから店舗IDを取得
+                                    'product_name': product_data.get('name', ''),
+                                    'product_url': product_data.get('url', ''),
+                                    'price': None,
+                                    'shop_name': '',
                                     'image_url': '',
-                                    'catchcopy': item.get('subtitle', ''),
-                                    'position_on_page': len(ads) + 1,  # 有効な広告の連番
+                                    'catchcopy': '',
+                                    'position_on_page': position or position_on_page,
                                     'page_number': page,
                                     'product_id': ''
                                 }
                                 
+                                # 価格情報
+                                offers = product_data.get('offers', {})
+                                if offers.get('price'):
+                                    ad_data['price'] = offers['price']
+                                
                                 # 画像URL
-                                images = item.get('images', [])
-                                if images and isinstance(images, list) and len(images) > 0:
-                                    first_image = images[0]
-                                    if isinstance(first_image, dict):
-                                        ad_data['image_url'] = first_image.get('url', '')
+                                images = product_data.get('image', [])
+                                if images:
+                                    ad_data['image_url'] = images[0] if isinstance(images, list) else images
                                 
-                                # originalItemUrlから商品IDを抽出
-                                if original_url:
-                                    url_match = re.search(r'item\.rakuten\.co\.jp/([^/]+)/([^/?]+)', original_url)
+                                # 商品URLから店舗IDと商品IDを抽出
+                                if ad_data['product_url']:
+                                    # 楽天商品URLのパターン: https://item.rakuten.co.jp/shop_id/product_id/
+                                    url_match = re.search(r'item\.rakuten\.co\.jp/([^/]+)/([^/?]+)', ad_data['product_url'])
                                     if url_match:
-                                        # shop.urlCodeが空の場合はURLから抽出
-                                        if not ad_data['shop_name']:
-                                            ad_data['shop_name'] = url_match.group(1)
+                                        ad_data['shop_name'] = url_match.group(1)
                                         ad_data['product_id'] = url_match.group(2)
                                 
                                 ads.append(ad_data)
-                                
-                                logger.debug(f"RPP広告検出: {ad_data['position_on_page']}位 - {product_name[:30]} (店舗: {ad_data['shop_name']})")
                                 position_on_page += 1
-                                
-                                # 各ページで8広告見つかったら早期終了（高速化）
-                                if len(ads) >= 8:
-                                    break
-                        
-                        initial_state_found = True
-                        break
-                        
-                    except (json.JSONDecodeError, KeyError, IndexError) as e:
-                        logger.debug(f"__INITIAL_STATE__解析エラー: {e}")
-                        continue
-            
-            # __INITIAL_STATE__が見つからない場合は従来のJSON-LD方式
-            if not initial_state_found:
-                logger.debug("__INITIAL_STATE__が見つからないため、JSON-LD方式にフォールバック")
-                script_tags = soup.find_all('script', type='application/ld+json')
-                for script in script_tags:
-                    try:
-                        data = json.loads(script.string)
-                        if data.get('@type') == 'ItemList':
-                            items = data.get('itemListElement', [])
-                            for item in items:
-                                product_data = item.get('item', {})
-                                position = item.get('position')
-                                
-                                if product_data:
-                                    # JSON-LDから基本情報を抽出
-                                    ad_data = {
-                                        'product_name': product_data.get('name', ''),
-                                        'product_url': product_data.get('url', ''),
-                                        'price': None,
-                                        'shop_name': '',
-                                        'image_url': '',
-                                        'catchcopy': '',
-                                        'position_on_page': position or position_on_page,
-                                        'page_number': page,
-                                        'product_id': ''
-                                    }
-                                    
-                                    # 価格情報
-                                    offers = product_data.get('offers', {})
-                                    if offers.get('price'):
-                                        ad_data['price'] = offers['price']
-                                    
-                                    # 画像URL
-                                    images = product_data.get('image', [])
-                                    if images:
-                                        ad_data['image_url'] = images[0] if isinstance(images, list) else images
-                                    
-                                    # 商品URLから店舗IDと商品IDを抽出
-                                    if ad_data['product_url']:
-                                        # 楽天商品URLのパターン: https://item.rakuten.co.jp/shop_id/product_id/
-                                        url_match = re.search(r'item\.rakuten\.co\.jp/([^/]+)/([^/?]+)', ad_data['product_url'])
-                                        if url_match:
-                                            ad_data['shop_name'] = url_match.group(1)
-                                            ad_data['product_id'] = url_match.group(2)
-                                    
-                                    ads.append(ad_data)
-                                    position_on_page += 1
-                    except (json.JSONDecodeError, KeyError) as e:
-                        logger.debug(f"JSON-LD解析エラー: {e}")
-                        continue
+                except (json.JSONDecodeError, KeyError) as e:
+                    logger.debug(f"JSON-LD解析エラー: {e}")
+                    continue
             
             # JSON-LDで見つからない場合は従来の方法を使用
             if not ads:
@@ -578,13 +575,194 @@ class RPPScraper:
         return None
     
     def close(self):
-        """セッションを閉じる"""
-        if hasattr(self, 'session'):
-            self.session.close()
+        """互換性のため残している（共通の接続プールは閉じない）"""
+
+
+class AsyncRPPScraper(RPPScraper):
+    """
+    asyncioベースのRPP広告スクレイピングクラス
+    
+    キープアライブの接続プールを複数キーワードで共有し、1〜3ページ目を同時に取得する。
+    HTML解析は RPPScraper と共通。
+    """
+    
+    def __init__(self, client: httpx.AsyncClient = None, max_connections: int = 20):
+        """
+        初期化
+        
+        Args:
+            client: 共有するhttpxクライアント（省略時は内部で生成）
+            max_connections: 接続プールの最大接続数
+        """
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=8,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=30,
+            ),
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def _wait_for_token(self, limiter):
+        """共有レートリミッターのトークンを予約し、イベントループを止めずに待機"""
+        wait = await asyncio.to_thread(limiter.reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    async def _get(self, url: str) -> httpx.Response:
+        """GETリクエストを送信し、共通のホスト別統計に記録する"""
+        host = httpx.URL(url).host
+        start_time = time.monotonic()
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            record_request(host, time.monotonic() - start_time, error=type(e).__name__)
+            raise
+        record_request(host, time.monotonic() - start_time, status=response.status_code)
+        return response
+    
+    async def _scrape_page_async(self, keyword: str, page: int, run_id: str = None) -> List[Dict]:
+        """指定ページから広告を抽出（非同期版）"""
+        try:
+            # 同じ実行で他の店舗が取得済みのページがあれば再利用
+            fetch_cache = get_fetch_cache(RPP_SEARCH_PAGE)
+            cached_ads = await asyncio.to_thread(fetch_cache.get, run_id, normalize_keyword(keyword), page)
+            if cached_ads is not None:
+                return cached_ads
+            
+            url = self._build_search_url(keyword, page)
+            logger.debug(f"リクエスト URL: {url}")
+            
+            limiter = get_rate_limiter(SEARCH_HTML)
+            with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='rate_limit_wait'):
+                await self._wait_for_token(limiter)
+            with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='http'):
+                response = await self._get(url)
+            
+            # 429エラーの場合は全ワーカーを減速させて1回だけリトライ
+            if response.status_code == 429:
+                logger.warning(f"検索ページのレート制限 (page {page})、待機後にリトライ")
+                metrics.inc('seo_http_retries_total', host='search.rakuten.co.jp', reason='rate_limited')
+                await asyncio.to_thread(limiter.penalize, 3)
+                with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='rate_limit_wait'):
+                    await self._wait_for_token(limiter)
+                with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='http'):
+                    response = await self._get(url)
+            response.raise_for_status()
+            
+            ads = await asyncio.to_thread(self._parse_page, response.content, page)
+            await asyncio.to_thread(fetch_cache.set, run_id, normalize_keyword(keyword), ads, page)
+            return ads
+            
+        except httpx.HTTPError as e:
+            logger.error(f"ページ取得エラー (page {page}): {e}")
+            return []
+        except Exception as e:
+            logger.error(f"ページ解析エラー (page {page}): {e}")
+            return []
+    
+    async def search_rpp_ads_async(self, keyword: str, max_pages: int = 3,
+                                   run_id: str = None) -> Tuple[List[Dict], bool]:
+        """
+        指定キーワードでRPP広告を検索（全ページを同時に取得）
+        
+        Args:
+            keyword: 検索キーワード
+            max_pages: 最大検索ページ数（デフォルト3ページ、最大15位まで）
+            run_id: バッチ実行ID（同じ実行内で検索ページを共有する。未指定時は共有しない）
+            
+        Returns:
+            Tuple[広告リスト, 成功フラグ]
+        """
+        try:
+            pages = range(1, max_pages + 1)
+            page_ads_list = await asyncio.gather(
+                *(self._scrape_page_async(keyword, page, run_id) for page in pages)
+            )
+            ads = self._rank_page_ads(keyword, zip(pages, page_ads_list))
+            
+            logger.info(f"RPP検索完了: {keyword} - 総広告数: {len(ads)}")
+            return ads, True
+            
+        except Exception as e:
+            logger.error(f"RPP検索エラー ({keyword}): {e}")
+            return [], False
+    
+    async def aclose(self):
+        """内部で生成したクライアントを閉じる"""
+        if self._owns_client:
+            await self.client.aclose()
+    
+    def close(self):
+        """同期セッションは持たないため何もしない（aclose を使用）"""
+        pass
+
+
+def _build_rpp_result(scraper: RPPScraper, ads: List[Dict], success: bool,
+                      target_shop_id: str, target_product_url: str,
+                      execution_time: float) -> Dict:
+    """検索結果の辞書を作成"""
+    if not success:
+        return {
+            'success': False,
+            'rank': None,
+            'is_found': False,
+            'total_ads': 0,
+            'ads': [],
+            'execution_time': execution_time,
+            'error': 'スクレイピングに失敗しました'
+        }
+    
+    # 自社商品の順位を検索
+    own_rank = scraper.find_own_product_rank(ads, target_shop_id, target_product_url)
+    
+    return {
+        'success': True,
+        'rank': own_rank,
+        'is_found': own_rank is not None,
+        'total_ads': len(ads),
+        'ads': ads,
+        'execution_time': execution_time,
+        'error': None
+    }
+
+
+def _error_result(error: Exception) -> Dict:
+    return {
+        'success': False,
+        'rank': None,
+        'is_found': False,
+        'total_ads': 0,
+        'ads': [],
+        'execution_time': 0,
+        'error': str(error)
+    }
+
+
+_thread_local = threading.local()
+
+
+def _get_shared_scraper() -> RPPScraper:
+    """スレッドごとに共有する同期スクレイパーを取得（接続プールをキーワード間で再利用）"""
+    scraper = getattr(_thread_local, 'scraper', None)
+    if scraper is None:
+        scraper = RPPScraper()
+        _thread_local.scraper = scraper
+    return scraper
 
 
 def scrape_rpp_ranking(keyword: str, target_shop_id: str, 
-                      target_product_url: str = None, max_pages: int = 3) -> Dict:
+                      target_product_url: str = None, max_pages: int = 3, run_id: str = None) -> Dict:
     """
     RPP広告順位を検索する便利関数
     
@@ -593,54 +771,81 @@ def scrape_rpp_ranking(keyword: str, target_shop_id: str,
         target_shop_id: 対象店舗ID
         target_product_url: 対象商品URL（任意）
         max_pages: 最大検索ページ数（デフォルト3ページ、最大15位まで）
+        run_id: バッチ実行ID（同じ実行の他の店舗と検索ページを共有する。画面からの検索では指定しない）
         
     Returns:
         検索結果の辞書
     """
-    scraper = RPPScraper()
+    scraper = _get_shared_scraper()
     
     try:
         start_time = time.time()
         
         # RPP広告を検索
-        ads, success = scraper.search_rpp_ads(keyword, max_pages)
+        ads, success = scraper.search_rpp_ads(keyword, max_pages, run_id)
         
         execution_time = time.time() - start_time
         
-        if not success:
-            return {
-                'success': False,
-                'rank': None,
-                'is_found': False,
-                'total_ads': 0,
-                'ads': [],
-                'execution_time': execution_time,
-                'error': 'スクレイピングに失敗しました'
-            }
-        
-        # 自社商品の順位を検索
-        own_rank = scraper.find_own_product_rank(ads, target_shop_id, target_product_url)
-        
-        return {
-            'success': True,
-            'rank': own_rank,
-            'is_found': own_rank is not None,
-            'total_ads': len(ads),
-            'ads': ads,
-            'execution_time': execution_time,
-            'error': None
-        }
+        return _build_rpp_result(scraper, ads, success, target_shop_id, target_product_url, execution_time)
         
     except Exception as e:
         logger.error(f"RPP順位検索エラー: {e}")
-        return {
-            'success': False,
-            'rank': None,
-            'is_found': False,
-            'total_ads': 0,
-            'ads': [],
-            'execution_time': 0,
-            'error': str(e)
-        }
-    finally:
-        scraper.close()
\ No newline at end of file
+        return _error_result(e)
+
+
+async def _scrape_rpp_ranking_many_async(keywords: List[Dict], max_pages: int,
+                                         concurrency: int, run_id: str = None) -> List[Dict]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async with AsyncRPPScraper() as scraper:
+        async def search(keyword):
+            async with semaphore:
+                start_time = time.time()
+                ads, success = await scraper.search_rpp_ads_async(keyword, max_pages, run_id)
+                return ads, success, time.time() - start_time
+        
+        # 同じキーワードを登録している店舗は1回の検索結果を共有する
+        searches = {}
+        for item in keywords:
+            normalized = normalize_keyword(item['keyword'])
+            if normalized not in searches:
+                searches[normalized] = asyncio.ensure_future(search(item['keyword']))
+        
+        async def run(item):
+            try:
+                ads, success, execution_time = await searches[normalize_keyword(item['keyword'])]
+                return _build_rpp_result(
+                    scraper, [dict(ad) for ad in ads], success,
+                    item['target_shop_id'], item.get('target_product_url'),
+                    execution_time
+                )
+            except Exception as e:
+                logger.error(f"RPP順位検索エラー ({item.get('keyword')}): {e}")
+                return _error_result(e)
+        
+        return await asyncio.gather(*(run(item) for item in keywords))
+
+
+def scrape_rpp_ranking_many(keywords: List[Dict], max_pages: int = 3,
+                            concurrency: int = None, run_id: str = None) -> List[Dict]:
+    """
+    複数キーワードのRPP広告順位をまとめて検索する
+    
+    1つの接続プールを全キーワードで共有し、共有レートリミッターの範囲内で同時に取得する。
+    
+    Args:
+        keywords: keyword / target_shop_id / target_product_url（任意）を持つ辞書のリスト
+        max_pages: 最大検索ページ数（デフォルト3ページ、最大15位まで）
+        concurrency: 同時に処理するキーワード数（省略時は settings.RPP_SCRAPE_CONCURRENCY）
+        run_id: バッチ実行ID（別のタスクで処理中の同じ実行の店舗と検索ページを共有する）
+        
+    Returns:
+        keywords と同じ順序の検索結果の辞書のリスト
+    """
+    if not keywords:
+        return []
+    
+    if concurrency is None:
+        concurrency = getattr(settings, 'RPP_SCRAPE_CONCURRENCY', 4)
+    
+    return asyncio.run(_scrape_rpp_ranking_many_async(list(keywords), max_pages, concurrency, run_id))
@@ -0,0 +1,189 @@
+"""
+楽天検索ページの __INITIAL_STATE__ 抽出
+HTML全体をBeautifulSoupで解析せず、生のバイト列から状態JSONを切り出して
+data.ichibaSearch のみをデコードし、その items を取り出す
+
+抽出経路ごとの件数を集計し、DOM解析へのフォールバック頻度を確認できるようにする。
+"""
+
+import json
+import threading
+import logging
+from typing import List, Optional
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STATE_MARKER = b'window.__INITIAL_STATE__'
+SCRIPT_END = b'</script>'
+ICHIBA_SEARCH_KEY = b'"ichibaSearch"'
+
+# 抽出経路
+PATH_ITEMS = 'items'          # ichibaSearch のみをデコード
+PATH_FULL_STATE = 'full_state'  # 状態JSON全体をデコード
+PATH_DOM = 'dom'              # 状態JSONが無い/壊れている → DOM解析へフォールバック
+
+# 集計結果をログ出力する間隔（ページ数）
+STATS_LOG_INTERVAL = 500
+
+_decoder = json.JSONDecoder()
+_stats = {PATH_ITEMS: 0, PATH_FULL_STATE: 0, PATH_DOM: 0}
+_stats_lock = threading.Lock()
+
+
+def _record(path: str):
+    metrics.inc('seo_parser_path_total', path=path)
+    with _stats_lock:
+        _stats[path] += 1
+        total = sum(_stats.values())
+        if total % STATS_LOG_INTERVAL == 0:
+            logger.info(f"__INITIAL_STATE__抽出経路: {dict(_stats)}（計{total}ページ）")
+
+
+def get_extractor_stats() -> dict:
+    """抽出経路ごとの件数を取得"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_extractor_stats():
+    """集計をリセットする（テスト用）"""
+    with _stats_lock:
+        for path in _stats:
+            _stats[path] = 0
+
+
+def find_state_blob(content: bytes) -> Optional[bytes]:
+    """
+    HTMLのバイト列から __INITIAL_STATE__ のJSON部分を切り出す
+
+    Args:
+        content: レスポンスのバイト列
+
+    Returns:
+        JSON部分のバイト列（見つからない場合はNone）
+    """
+    marker_index = content.find(STATE_MARKER)
+    if marker_index == -1:
+        return None
+
+    equals_index = content.find(b'=', marker_index + len(STATE_MARKER))
+    if equals_index == -1:
+        return None
+
+    end_index = content.find(SCRIPT_END, equals_index)
+    if end_index == -1:
+        end_index = len(content)
+
+    blob = content[equals_index + 1:end_index].strip()
+    return blob.rstrip(b';').rstrip() or None
+
+
+def find_items(obj, max_depth: int = 3, current_depth: int = 0):
+    """効率化された商品リスト検索（深度制限付き）"""
+    if current_depth > max_depth:
+        return None
+
+    if isinstance(obj, dict):
+        # よく使われるキー名を優先的にチェック
+        priority_keys = ['items', 'products', 'itemList', 'results']
+        for key in priority_keys:
+            value = obj.get(key)
+            if isinstance(value, list) and value:
+                return value
+
+        # 'items'キーが最も可能性が高いので、限定的に再帰
+        for key, value in obj.items():
+            if 'item' in key.lower() or 'product' in key.lower():
+                if isinstance(value, list) and value:
+                    return value
+                elif isinstance(value, dict):
+                    result = find_items(value, max_depth, current_depth + 1)
+                    if result:
+                        return result
+    elif isinstance(obj, list) and len(obj) > 0:
+        # 最初の要素のみチェック（パフォーマンス重視）
+        result = find_items(obj[0], max_depth, current_depth + 1)
+        if result:
+            return result
+    return None
+
+
+def _decode_items_only(blob: bytes) -> Optional[list]:
+    """状態JSONから "ichibaSearch" オブジェクトだけをデコードし、直下の "items" 配列を返す"""
+    search_index = blob.find(ICHIBA_SEARCH_KEY)
+    if search_index == -1:
+        return None
+
+    object_index = blob.find(b'{', search_index + len(ICHIBA_SEARCH_KEY))
+    if object_index == -1 or blob[search_index + len(ICHIBA_SEARCH_KEY):object_index].strip() != b':':
+        return None
+
+    # ichibaSearch の先頭からデコードし、オブジェクトの終端で停止する（以降の状態は読まない）。
+    # 入れ子の filters・genre などにある "items" は拾わず、直下のキーのみ参照する
+    ichiba_search, _ = _decoder.raw_decode(blob[object_index:].decode('utf-8'))
+    if not isinstance(ichiba_search, dict):
+        return None
+    items = ichiba_search.get('items')
+
+    # 想定外の構造の場合は全体デコードに任せる
+    if not isinstance(items, list) or not items:
+        return None
+    first = items[0]
+    if not isinstance(first, dict) or not ('itemOptions' in first or 'name' in first):
+        return None
+    return items
+
+
+def _decode_full_state(blob: bytes) -> list:
+    """状態JSON全体をデコードして商品リストを探す"""
+    # 状態JSONの後ろに別のスクリプトが続いていても、オブジェクトの終端で停止する
+    initial_state, _ = _decoder.raw_decode(blob.decode('utf-8'))
+
+    items = []
+    data = initial_state.get('data', {}) if isinstance(initial_state, dict) else {}
+    if data and isinstance(data, dict):
+        ichiba_search = data.get('ichibaSearch', {})
+        if ichiba_search and isinstance(ichiba_search, dict):
+            items = ichiba_search.get('items', [])
+
+    # 通常のパスで見つからない場合は効率的な検索を実行
+    if not items:
+        items = find_items(initial_state) or []
+    return items
+
+
+def extract_state_items(content: bytes) -> Optional[List[dict]]:
+    """
+    検索ページの __INITIAL_STATE__ から商品リストを取得
+
+    Args:
+        content: レスポンスのバイト列
+
+    Returns:
+        商品リスト（状態JSONが無い/デコードできない場合はNone → DOM解析へフォールバック）
+    """
+    blob = find_state_blob(content)
+    if blob is None:
+        logger.debug("__INITIAL_STATE__が見つからないため、DOM解析にフォールバック")
+        _record(PATH_DOM)
+        return None
+
+    try:
+        items = _decode_items_only(blob)
+        if items is not None:
+            _record(PATH_ITEMS)
+            return items
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.debug(f"ichibaSearch.items の部分デコードに失敗: {e}")
+
+    try:
+        items = _decode_full_state(blob)
+        _record(PATH_FULL_STATE)
+        return items
+    except (ValueError, UnicodeDecodeError, AttributeError) as e:
+        logger.debug(f"__INITIAL_STATE__解析エラー: {e}")
+
+    _record(PATH_DOM)
+    return None
@@ -0,0 +1,62 @@
+"""
+ダッシュボード集計キャッシュの無効化と全店舗キーワード一覧の差分更新
+キーワード・検索結果・サブスクリプションの変更時に該当店舗と全店舗の集計を無効化する
+キーワード・会社名の変更は StoreKeywordMatrix に反映する（最新順位は record_latest_result で反映）
+
+SearchResultWriter の bulk_create はシグナルを送らないため、保存後に writer 側で無効化する。
+検索結果・検索ログの削除（保持期間の整理）は post_delete を受けると一括削除が1件ずつになるため、
+保存時のみ無効化し、削除分はTTLで反映する。
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Keyword, SearchLog, RankingResult
+from .models_rpp import RPPKeyword
+from .dashboard_cache import invalidate_tenants
+from . import store_matrix
+
+
+@receiver([post_save, post_delete], sender=Keyword)
+@receiver([post_save, post_delete], sender=RPPKeyword)
+@receiver(post_save, sender=SearchLog)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    """キーワード・検索ログの変更時に店舗の集計を無効化"""
+    invalidate_tenants([instance.user_id])
+
+
+@receiver(post_save, sender=Keyword)
+@receiver(post_save, sender=RPPKeyword)
+def sync_keyword_matrix(sender, instance, **kwargs):
+    """キーワードの登録・編集を全店舗キーワード一覧に反映"""
+    store_matrix.sync_keywords([instance])
+
+
+@receiver(post_delete, sender=Keyword)
+@receiver(post_delete, sender=RPPKeyword)
+def remove_keyword_matrix(sender, instance, **kwargs):
+    """キーワードの削除を全店舗キーワード一覧に反映"""
+    store_matrix.remove_keyword(instance)
+
+
+@receiver(post_save, sender=RankingResult)
+def invalidate_result_dashboard(sender, instance, **kwargs):
+    """検索結果の保存時に店舗の集計を無効化"""
+    invalidate_tenants([instance.keyword.user_id])
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_store_dashboard(sender, instance, update_fields=None, **kwargs):
+    """店舗・サブスクリプションの変更時に集計を無効化（ログイン時の last_login 更新は除く）"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_tenants([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_store_matrix(sender, instance, created=False, update_fields=None, **kwargs):
+    """会社名の変更を全店舗キーワード一覧に反映"""
+    if created or (update_fields and 'company_name' not in update_fields):
+        return
+    store_matrix.sync_user(instance)
@@ -0,0 +1,236 @@
+"""
+全店舗キーワード一覧（StoreKeywordMatrix）の更新・検索・ページ送り
+
+マスターアカウントの全店舗表示（RPP全店舗データ・店舗未選択のキーワード一覧）は、
+キーワード表と会社名を毎回 icontains で検索せず、店舗×キーワードごとに
+SEO / RPP の最新順位を持つ集計テーブルを検索する。
+
+- 更新: キーワードの保存・削除はシグナル、最新結果は record_latest_result、
+  一括インポートは sync_keywords() で差分反映する
+- 検索: 正規化・小文字化した search_text への部分一致（PostgreSQLでは pg_trgm のGIN索引を使用）
+- ページ送り: (登録日時, ID) のキーセットで OFFSET を使わずに前後のページを取得する
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Keyword, StoreKeywordMatrix
+from .models_rpp import RPPKeyword
+from .fetch_cache import normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+MATRIX_PREFIXES = {
+    Keyword: 'seo',
+    RPPKeyword: 'rpp',
+}
+
+UNIQUE_FIELDS = ['user', 'rakuten_shop_id', 'keyword']
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def build_search_text(keyword: str, rakuten_shop_id: str, company_name: str) -> str:
+    """検索用テキスト（項目をまたいで一致しないよう改行で区切る）"""
+    return '\n'.join(normalize_keyword(value).lower() for value in (keyword, rakuten_shop_id, company_name))
+
+
+def normalize_search_query(query: str) -> str:
+    """検索語を search_text と同じ形に正規化"""
+    return normalize_keyword(query).lower()
+
+
+def _keyword_values(prefix: str, keyword) -> dict:
+    return {
+        f'{prefix}_keyword': keyword,
+        f'{prefix}_is_active': keyword.is_active,
+        f'{prefix}_created_at': keyword.created_at,
+        f'{prefix}_rank': keyword.latest_rank,
+        f'{prefix}_previous_rank': keyword.previous_rank,
+        f'{prefix}_checked_at': keyword.latest_checked_at,
+    }
+
+
+def _clear(prefix: str, rows_filter: Q, matrix_model=StoreKeywordMatrix):
+    """行から SEO / RPP 側の値を外し、どちらも無くなった行を削除"""
+    matrix_model.objects.filter(rows_filter).update(**{
+        f'{prefix}_keyword': None,
+        f'{prefix}_is_active': False,
+        f'{prefix}_created_at': None,
+        f'{prefix}_rank': None,
+        f'{prefix}_previous_rank': None,
+        f'{prefix}_checked_at': None,
+    })
+    matrix_model.objects.filter(rows_filter).filter(
+        seo_keyword__isnull=True, rpp_keyword__isnull=True
+    ).delete()
+
+
+def sync_keywords(keywords, batch_size: int = 500, prefix: str = None, matrix_model=StoreKeywordMatrix) -> int:
+    """
+    キーワード（同じ種別）を一覧に反映
+
+    Args:
+        keywords: Keyword または RPPKeyword のリスト（user を select_related 済みだとクエリが減る）
+        batch_size: 1回に保存する行数
+        prefix: 'seo' / 'rpp'（省略時はキーワードのモデルから判定）
+        matrix_model: 一覧のモデル（マイグレーションでは履歴モデルを渡す）
+
+    Returns:
+        反映した行数
+    """
+    keywords = list(keywords)
+    if not keywords:
+        return 0
+    if prefix is None:
+        prefix = MATRIX_PREFIXES[type(keywords[0])]
+    link_field = f'{prefix}_keyword_id'
+    keys = {keyword.id: (keyword.user_id, keyword.rakuten_shop_id, keyword.keyword) for keyword in keywords}
+
+    rows = [
+        matrix_model(
+            user_id=keyword.user_id,
+            rakuten_shop_id=keyword.rakuten_shop_id,
+            keyword=keyword.keyword,
+            company_name=keyword.user.company_name or '',
+            search_text=build_search_text(keyword.keyword, keyword.rakuten_shop_id, keyword.user.company_name or ''),
+            **_keyword_values(prefix, keyword)
+        )
+        for keyword in keywords
+    ]
+
+    with transaction.atomic():
+        # キーワード・店舗IDが変更された場合は以前の行との紐付けを外す
+        stale_ids = [
+            row_id
+            for row_id, keyword_id, user_id, rakuten_shop_id, keyword in (
+                matrix_model.objects.filter(**{f'{link_field}__in': list(keys)})
+                .values_list('id', link_field, 'user_id', 'rakuten_shop_id', 'keyword')
+            )
+            if keys[keyword_id] != (user_id, rakuten_shop_id, keyword)
+        ]
+        if stale_ids:
+            _clear(prefix, Q(id__in=stale_ids), matrix_model)
+
+        matrix_model.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=['company_name', 'search_text', 'updated_at', *_keyword_values(prefix, keywords[0])]
+        )
+    return len(rows)
+
+
+def remove_keyword(keyword):
+    """削除されたキーワードを一覧から外す（紐付けは on_delete=SET_NULL で解除済み）"""
+    prefix = MATRIX_PREFIXES[type(keyword)]
+    _clear(prefix, Q(
+        user_id=keyword.user_id,
+        rakuten_shop_id=keyword.rakuten_shop_id,
+        keyword=keyword.keyword,
+        **{f'{prefix}_keyword__isnull': True}
+    ))
+
+
+def sync_user(user) -> int:
+    """会社名の変更を店舗の行に反映"""
+    company_name = user.company_name or ''
+    rows = list(StoreKeywordMatrix.objects.filter(user_id=user.pk).exclude(company_name=company_name))
+    for row in rows:
+        row.company_name = company_name
+        row.search_text = build_search_text(row.keyword, row.rakuten_shop_id, company_name)
+    if rows:
+        StoreKeywordMatrix.objects.bulk_update(rows, ['company_name', 'search_text'], batch_size=500)
+    return len(rows)
+
+
+def filter_search(queryset, query: str):
+    """キーワード・店舗ID・会社名の部分一致で絞り込み"""
+    query = normalize_search_query(query)
+    if not query:
+        return queryset
+    # search_text は小文字化済みのため大文字小文字を区別する contains（LIKE）でトライグラム索引を使う
+    return queryset.filter(search_text__contains=query)
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    """ページ位置（登録日時・ID）を文字列にする"""
+    microseconds = (value - _EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds}_{pk}"
+
+
+def decode_cursor(cursor: str):
+    """encode_cursor() の文字列を (登録日時, ID) に戻す（不正な値はNone）"""
+    try:
+        microseconds, pk = cursor.split('_', 1)
+        return _EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class KeysetPage:
+    """キーセットページネーションの1ページ（Paginator の Page と同じ名前の属性を持つ）"""
+
+    def __init__(self, object_list, order_field: str, has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = None
+        self.previous_cursor = None
+        if object_list:
+            first, last = object_list[0], object_list[-1]
+            self.previous_cursor = encode_cursor(getattr(first, order_field), first.pk)
+            self.next_cursor = encode_cursor(getattr(last, order_field), last.pk)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, order_field: str, per_page: int, after: str = None, before: str = None) -> KeysetPage:
+    """
+    (order_field, id) の降順でキーセットページネーション
+
+    Args:
+        queryset: 対象のクエリセット（order_field がNULLの行は除外しておく）
+        order_field: 並び順の日時フィールド
+        per_page: 1ページの件数
+        after: 次のページを取得する場合のカーソル（前ページの next_cursor）
+        before: 前のページを取得する場合のカーソル（次ページの previous_cursor）
+
+    Returns:
+        KeysetPage
+    """
+    before_cursor = decode_cursor(before) if before else None
+    if before_cursor:
+        value, pk = before_cursor
+        rows = list(
+            queryset.filter(Q(**{f'{order_field}__gt': value}) | Q(**{order_field: value, 'pk__gt': pk}))
+            .order_by(order_field, 'pk')[:per_page + 1]
+        )
+        if rows:
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page]
+            rows.reverse()
+            return KeysetPage(rows, order_field, has_next=True, has_previous=has_previous)
+
+    after_cursor = decode_cursor(after) if after else None
+    if after_cursor:
+        value, pk = after_cursor
+        queryset = queryset.filter(Q(**{f'{order_field}__lt': value}) | Q(**{order_field: value, 'pk__lt': pk}))
+    rows = list(queryset.order_by(f'-{order_field}', '-pk')[:per_page + 1])
+    return KeysetPage(
+        rows[:per_page],
+        order_field,
+        has_next=len(rows) > per_page,
+        has_previous=after_cursor is not None
+    )
@@ -6,7 +6,10 @@ import time
 
 from .models import Keyword, RankingResult, TopProduct, SearchLog, RPPKeyword, RPPResult, RPPAd, RPPBulkSearchLog
 from .rakuten_api import RakutenSearchManager
-from .rpp_scraper import scrape_rpp_ranking
+from .rpp_scraper import scrape_rpp_ranking, scrape_rpp_ranking_many
+from .result_writer import SearchResultWriter
+from .fetch_cache import new_run_id
+from .metrics import metrics
 from accounts.models import User
 
 logger = logging.getLogger(__name__)
@@ -43,6 +46,9 @@ def auto_keyword_search():
     
     logger.info(f"Found {len(users_to_search)} master users for auto search")
     
+    # 同じ実行内の店舗どうしで同じキーワードの検索結果を共有する
+    run_id = new_run_id('auto')
+    
     # 各マスターユーザーの自動検索を実行（招待アカウント全体が対象）
     for master_user in users_to_search:
         try:
@@ -74,7 +80,7 @@ def auto_keyword_search():
                     # SEO自動検索（マスターの設定に従う）
                     if master_user.auto_seo_search_enabled:
                         try:
-                            result = execute_user_auto_search(user.id)
+                            result = execute_user_auto_search(user.id, run_id=run_id)
                             user_seo_success = result.get('success', False) if result else False
                             if user_seo_success:
                                 total_seo_success += 1
@@ -82,23 +88,16 @@ def auto_keyword_search():
                         except Exception as e:
                             logger.error(f"SEO auto search failed for user {user.email}: {e}")
                     
-                    # 負荷軽減のため間隔を空ける
-                    time.sleep(3)
-                    
                     # RPP自動検索（マスターの設定に従う）
                     if master_user.auto_rpp_search_enabled:
                         try:
-                            result = execute_user_auto_rpp_search(user.id)
+                            result = execute_user_auto_rpp_search(user.id, run_id=run_id)
                             user_rpp_success = result.get('success', False) if result else False
                             if user_rpp_success:
                                 total_rpp_success += 1
                             logger.info(f"RPP auto search for user {user.email}: {'success' if user_rpp_success else 'failed'}")
                         except Exception as e:
                             logger.error(f"RPP auto search failed for user {user.email}: {e}")
-                    
-                    # ユーザー間の間隔
-                    if user != target_users[-1]:  # 最後のユーザーでない場合
-                        time.sleep(5)
                         
                 except Exception as e:
                     logger.error(f"Failed auto search for user {user.email}: {e}")
@@ -114,12 +113,42 @@ def auto_keyword_search():
     logger.info("Auto keyword search task completed")
 
 
+def _get_auto_search_flags(user):
+    """
+    ユーザーのSEO/RPP自動検索の有効設定を取得
+    招待ユーザーはマスターアカウントの設定に従う
+    """
+    if user.is_invited_user:
+        master_user = User.objects.filter(is_master=True, is_active=True).first()
+        seo_enabled = master_user.auto_seo_search_enabled if master_user else False
+        rpp_enabled = master_user.auto_rpp_search_enabled if master_user else False
+        logger.info(f"Invited user {user.email} using master settings - SEO: {seo_enabled}, RPP: {rpp_enabled}")
+        return seo_enabled, rpp_enabled
+    
+    # 一般ユーザーは自分の設定に従う
+    return user.auto_seo_search_enabled, user.auto_rpp_search_enabled
+
+
+def _nighttime_dispatched_key(date):
+    """その夜に投入済みのユーザーIDを保持するRedisキー"""
+    return f"nighttime_auto_search:dispatched:{date.isoformat()}"
+
+
 @shared_task
 def nighttime_auto_search():
     """
     深夜自動検索タスク（一般ユーザー向け）
-    深夜0時-7時の間に全ユーザーの自動検索を順次実行
+    深夜0時-7時の間、対象ユーザーごとのタスクを7時まで均等に分散して投入する
+    
+    Celery beatから定期実行され、毎回「残りユーザー数 / 7時までの残り実行回数」件ずつ投入する。
+    分散ロックで同時実行を防ぎ、投入済みのユーザーはRedisに記録して二重投入しない。
     """
+    import math
+    import random
+    from django.conf import settings
+    from .locks import RedisLock
+    from .redis_client import get_redis_client
+    
     logger.info("Starting nighttime auto search task")
     
     from django.utils import timezone as tz
@@ -129,103 +158,165 @@ def nighttime_auto_search():
     
     logger.info(f"Current local time: {current_time}, Current date: {current_date}")
     
+    end_hour = getattr(settings, 'NIGHTTIME_END_HOUR', 7)
+    
     # 深夜0時-7時の間のみ実行
-    if not (0 <= current_time.hour < 7):
+    if not (0 <= current_time.hour < end_hour):
         logger.info(f"Not nighttime hours (current: {current_time.hour:02d}:XX), skipping auto search")
         return
     
-    # 自動検索が有効なユーザーを取得（一般ユーザー + 招待ユーザー）
-    eligible_users = []
+    tick_seconds = getattr(settings, 'NIGHTTIME_SCHEDULER_INTERVAL', 300)
     
-    # 一般ユーザー（マスター以外の非招待ユーザー）
-    for user in User.objects.filter(is_active=True, is_master=False, is_invited_user=False):
-        # 既に今日実行済みかチェック
-        if user.last_bulk_search_date == current_date:
-            continue
-            
-        # SEOかRPPのどちらかが有効な場合のみ実行
-        if user.auto_seo_search_enabled or user.auto_rpp_search_enabled:
-            eligible_users.append(user)
-    
-    # 招待ユーザー（マスターアカウントの設定に従う）
-    master_user = User.objects.filter(is_master=True, is_active=True).first()
-    if master_user:
-        for invited_user in User.objects.filter(is_invited_user=True, is_active=True):
+    # beatの実行が重なった場合の二重実行を防止
+    lock = RedisLock('nighttime_auto_search', timeout=tick_seconds)
+    if not lock.acquire():
+        logger.info("Nighttime auto search scheduler is already running, skipping")
+        return
+    
+    try:
+        # 自動検索が有効なユーザーを取得（一般ユーザー + 招待ユーザー）
+        eligible_users = []
+        
+        # 一般ユーザー（マスター以外の非招待ユーザー）
+        for user in User.objects.filter(is_active=True, is_master=False, is_invited_user=False):
             # 既に今日実行済みかチェック
-            if invited_user.last_bulk_search_date == current_date:
+            if user.last_bulk_search_date == current_date:
                 continue
                 
-            # マスターアカウントの設定に従う
-            if master_user.auto_seo_search_enabled or master_user.auto_rpp_search_enabled:
-                eligible_users.append(invited_user)
-                logger.info(f"Added invited user {invited_user.email} based on master settings")
+            # SEOかRPPのどちらかが有効な場合のみ実行
+            if user.auto_seo_search_enabled or user.auto_rpp_search_enabled:
+                eligible_users.append(user)
+        
+        # 招待ユーザー（マスターアカウントの設定に従う）
+        master_user = User.objects.filter(is_master=True, is_active=True).first()
+        if master_user:
+            for invited_user in User.objects.filter(is_invited_user=True, is_active=True):
+                # 既に今日実行済みかチェック
+                if invited_user.last_bulk_search_date == current_date:
+                    continue
+                    
+                # マスターアカウントの設定に従う
+                if master_user.auto_seo_search_enabled or master_user.auto_rpp_search_enabled:
+                    eligible_users.append(invited_user)
+        
+        # 今夜すでに投入済みのユーザーを除外
+        client = get_redis_client()
+        dispatched_key = _nighttime_dispatched_key(current_date)
+        dispatched_ids = client.smembers(dispatched_key)
+        eligible_users = [user for user in eligible_users if str(user.id) not in dispatched_ids]
+        
+        if not eligible_users:
+            logger.info("No eligible users for nighttime auto search")
+            return
+        
+        # 7時までの残り実行回数で均等に割り、今回の投入数を決める
+        window_end = current_datetime.replace(hour=end_hour, minute=0, second=0, microsecond=0)
+        remaining_ticks = max(1, math.ceil((window_end - current_datetime).total_seconds() / tick_seconds))
+        batch_size = math.ceil(len(eligible_users) / remaining_ticks)
+        
+        random.shuffle(eligible_users)  # ランダム順序で実行
+        batch = eligible_users[:batch_size]
+        
+        logger.info(f"Dispatching nighttime auto search: {len(batch)}/{len(eligible_users)} users (remaining ticks: {remaining_ticks})")
+        
+        # 今回の投入分も次の実行までの間に均等に分散
+        # （同じ回に投入したユーザーどうしで同じキーワードの検索結果を共有する）
+        interval = tick_seconds / len(batch)
+        run_id = new_run_id('nighttime')
+        for i, user in enumerate(batch):
+            client.sadd(dispatched_key, user.id)
+            execute_nighttime_user_search.apply_async(
+                args=[user.id], kwargs={'run_id': run_id}, countdown=int(i * interval)
+            )
+        client.expire(dispatched_key, 60 * 60 * 24)
+        
+    except Exception as e:
+        logger.error(f"Nighttime auto search scheduling failed: {e}")
+    finally:
+        lock.release()
     
-    if not eligible_users:
-        logger.info("No eligible users for nighttime auto search")
-        return
+    logger.info("Nighttime auto search task completed")
+
+
+@shared_task(bind=True, max_retries=60)
+def execute_nighttime_user_search(self, user_id, run_id=None):
+    """
+    1ユーザー分の深夜自動検索（SEO・RPP）を実行
+    同時実行数は NIGHTTIME_MAX_CONCURRENCY に制限し、枠が空くまで再試行する
+    """
+    from django.conf import settings
+    from celery.exceptions import MaxRetriesExceededError
+    from .locks import RedisSemaphore
+    from .redis_client import get_redis_client
     
-    logger.info(f"Found {len(eligible_users)} users for nighttime auto search")
+    try:
+        user = User.objects.get(id=user_id, is_active=True)
+    except User.DoesNotExist:
+        logger.error(f"User {user_id} not found for nighttime auto search")
+        return {'success': False, 'error': 'User not found'}
     
-    # ユーザーを順次実行（負荷分散のため）
-    import random
-    random.shuffle(eligible_users)  # ランダム順序で実行
+    today = timezone.localdate()
+    if user.last_bulk_search_date == today:
+        logger.info(f"User {user.email} already searched today, skipping")
+        return {'success': True, 'skipped': True}
     
-    for i, user in enumerate(eligible_users):
+    semaphore = RedisSemaphore(
+        'nighttime_auto_search',
+        limit=getattr(settings, 'NIGHTTIME_MAX_CONCURRENCY', 4),
+        timeout=60 * 60
+    )
+    token = semaphore.acquire()
+    if token is None:
         try:
-            logger.info(f"Executing nighttime auto search for user {user.email} ({i+1}/{len(eligible_users)})")
-            
-            # SEOとRPPの両方を実行
-            seo_success = False
-            rpp_success = False
-            
-            # 招待ユーザーの場合はマスターアカウントの設定に従う
-            if user.is_invited_user:
-                master_user = User.objects.filter(is_master=True, is_active=True).first()
-                seo_enabled = master_user.auto_seo_search_enabled if master_user else False
-                rpp_enabled = master_user.auto_rpp_search_enabled if master_user else False
-                logger.info(f"Invited user {user.email} using master settings - SEO: {seo_enabled}, RPP: {rpp_enabled}")
-            else:
-                # 一般ユーザーは自分の設定に従う
-                seo_enabled = user.auto_seo_search_enabled
-                rpp_enabled = user.auto_rpp_search_enabled
-            
-            # SEO自動検索
-            if seo_enabled:
-                try:
-                    result = execute_user_auto_search(user.id)
-                    seo_success = result.get('success', False) if result else False
-                    logger.info(f"SEO auto search for user {user.email}: {'success' if seo_success else 'failed'}")
-                except Exception as e:
-                    logger.error(f"SEO auto search failed for user {user.email}: {e}")
-            
-            # 負荷軽減のため間隔を空ける
-            time.sleep(5)
-            
-            # RPP自動検索
-            if rpp_enabled:
-                try:
-                    result = execute_user_auto_rpp_search(user.id)
-                    rpp_success = result.get('success', False) if result else False
-                    logger.info(f"RPP auto search for user {user.email}: {'success' if rpp_success else 'failed'}")
-                except Exception as e:
-                    logger.error(f"RPP auto search failed for user {user.email}: {e}")
-            
-            # どちらか一つでも成功した場合は日付を更新
-            if seo_success or rpp_success:
-                user.update_last_auto_search_date()
-            
-            # ユーザー間の間隔を空ける（負荷分散）
-            if i < len(eligible_users) - 1:  # 最後のユーザーでない場合
-                time.sleep(10)  # 10秒間隔
-                
-        except Exception as e:
-            logger.error(f"Nighttime auto search failed for user {user.id}: {e}")
+            raise self.retry(countdown=60)
+        except MaxRetriesExceededError:
+            # 次回のスケジューラ実行で再投入されるよう投入済みの記録から外す
+            get_redis_client().srem(_nighttime_dispatched_key(today), user_id)
+            logger.warning(f"Nighttime auto search for user {user.email} postponed: no free slot")
+            return {'success': False, 'error': 'No free slot'}
     
-    logger.info("Nighttime auto search task completed")
+    try:
+        logger.info(f"Executing nighttime auto search for user {user.email}")
+        
+        seo_enabled, rpp_enabled = _get_auto_search_flags(user)
+        
+        # SEOとRPPの両方を実行
+        seo_success = False
+        rpp_success = False
+        
+        # SEO自動検索
+        if seo_enabled:
+            try:
+                result = execute_user_auto_search(user.id, run_id=run_id)
+                seo_success = result.get('success', False) if result else False
+                logger.info(f"SEO auto search for user {user.email}: {'success' if seo_success else 'failed'}")
+            except Exception as e:
+                logger.error(f"SEO auto search failed for user {user.email}: {e}")
+        
+        # RPP自動検索
+        if rpp_enabled:
+            try:
+                result = execute_user_auto_rpp_search(user.id, run_id=run_id)
+                rpp_success = result.get('success', False) if result else False
+                logger.info(f"RPP auto search for user {user.email}: {'success' if rpp_success else 'failed'}")
+            except Exception as e:
+                logger.error(f"RPP auto search failed for user {user.email}: {e}")
+        
+        # どちらか一つでも成功した場合は日付を更新
+        if seo_success or rpp_success:
+            user.update_last_auto_search_date()
+        
+        return {'success': seo_success or rpp_success, 'user_id': user_id}
+        
+    except Exception as e:
+        logger.error(f"Nighttime auto search failed for user {user_id}: {e}")
+        return {'success': False, 'error': str(e)}
+    finally:
+        semaphore.release(token)
 
 
 @shared_task
-def execute_user_auto_search(user_id):
+def execute_user_auto_search(user_id, run_id=None):
     """
     特定ユーザーの自動検索を実行
     """
@@ -253,22 +344,20 @@ def execute_user_auto_search(user_id):
         
         logger.info(f"Starting auto search for user {user_id}, {total_count} keywords")
         
-        for i, keyword in enumerate(active_keywords):
-            try:
-                # 楽天API制限を考慮して間隔を空ける
-                if i > 0:
-                    time.sleep(1)  # 1秒間隔
-                
-                # 検索実行
-                ranking_result = search_manager.execute_keyword_search(keyword)
-                success_count += 1
-                
-                logger.info(f"Auto search progress for user {user_id}: {i+1}/{total_count}")
-                
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error in auto search for keyword {keyword.keyword}: {e}")
-                continue
+        # 結果は複数キーワード分をまとめて保存
+        with SearchResultWriter() as writer:
+            for i, keyword in enumerate(active_keywords):
+                try:
+                    # 検索実行（リクエスト間隔は共有レートリミッターで制御）
+                    search_manager.execute_keyword_search(keyword, writer=writer, run_id=run_id)
+                    success_count += 1
+                    
+                    logger.info(f"Auto search progress for user {user_id}: {i+1}/{total_count}")
+                    
+                except Exception as e:
+                    error_count += 1
+                    logger.error(f"Error in auto search for keyword {keyword.keyword}: {e}")
+                    continue
         
         # 最終一括検索日を更新
         user.update_last_auto_search_date()
@@ -291,8 +380,97 @@ def execute_user_auto_search(user_id):
         return {'success': False, 'error': str(e)}
 
 
+def _bulk_run_id(kind, bulk_log_id):
+    """一括検索の実行ID（再開後も同じ一括検索の検索結果を共有する）"""
+    return f"{kind}:{bulk_log_id}"
+
+
+def _save_rpp_search_result(keyword, result):
+    """
+    RPP検索結果を保存（失敗時もエラー内容を保存）
+    
+    Args:
+        keyword: RPPKeyword
+        result: scrape_rpp_ranking の戻り値
+        
+    Returns:
+        作成したRPPResult
+    """
+    if not result['success']:
+        outcome = 'error'
+    else:
+        outcome = 'found' if result['is_found'] else 'not_found'
+    metrics.inc('seo_searches_total', pipeline='rpp', outcome=outcome)
+    
+    with metrics.timer('seo_stage_seconds', pipeline='rpp', stage='db_write'):
+        return _create_rpp_search_result(keyword, result)
+
+
+def _create_rpp_search_result(keyword, result):
+    if not result['success']:
+        return RPPResult.objects.create(
+            keyword=keyword,
+            rank=None,
+            total_ads=0,
+            pages_checked=0,
+            is_found=False,
+            error_message=result['error']
+        )
+    
+    rpp_result = RPPResult.objects.create(
+        keyword=keyword,
+        rank=result['rank'],
+        total_ads=result['total_ads'],
+        pages_checked=3,
+        is_found=result['is_found'],
+        error_message=result['error']
+    )
+    
+    # 広告データを保存（bulk_create使用で高速化）
+    rpp_ads_to_create = []
+    for ad_data in result['ads']:
+        # 自社商品かどうかを判定
+        is_own = False
+        if keyword.rakuten_shop_id.lower() in ad_data.get('shop_name', '').lower():
+            is_own = True
+        elif keyword.target_product_url and ad_data.get('product_url'):
+            if keyword.target_product_url in ad_data['product_url']:
+                is_own = True
+        
+        rpp_ad = RPPAd(
+            rpp_result=rpp_result,
+            rank=ad_data.get('rank', 0),
+            product_name=ad_data.get('product_name', ''),
+            product_url=ad_data.get('product_url', ''),
+            product_id=ad_data.get('product_id', ''),
+            price=ad_data.get('price'),
+            shop_name=ad_data.get('shop_name', ''),
+            image_url=ad_data.get('image_url', ''),
+            catchcopy=ad_data.get('catchcopy', ''),
+            page_number=ad_data.get('page_number', 1),
+            position_on_page=ad_data.get('position_on_page', 0),
+            is_own_product=is_own
+        )
+        rpp_ads_to_create.append(rpp_ad)
+    
+    # 一括作成で高速化
+    if rpp_ads_to_create:
+        try:
+            RPPAd.objects.bulk_create(rpp_ads_to_create)
+        except Exception as bulk_error:
+            logger.error(f"RPP広告データ一括保存エラー: {bulk_error}")
+            # フォールバック：個別作成
+            for rpp_ad in rpp_ads_to_create:
+                try:
+                    rpp_ad.save()
+                except Exception:
+                    pass
+    
+    return rpp_result
+
+
 @shared_task
-def execute_user_auto_rpp_search(user_id):
+def execute_user_auto_rpp_search(user_id, run_id=None):
     """
     特定ユーザーのRPP自動検索を実行
     """
@@ -318,84 +496,25 @@ def execute_user_auto_rpp_search(user_id):
         
         logger.info(f"Starting RPP auto search for user {user_id}, {total_count} keywords")
         
-        for i, keyword in enumerate(active_rpp_keywords):
+        # 全キーワードを1つの接続プールでまとめて検索（リクエスト間隔は共有レートリミッターで制御）
+        active_rpp_keywords = list(active_rpp_keywords)
+        results = scrape_rpp_ranking_many([
+            {
+                'keyword': keyword.keyword,
+                'target_shop_id': keyword.rakuten_shop_id,
+                'target_product_url': keyword.target_product_url,
+            }
+            for keyword in active_rpp_keywords
+        ], run_id=run_id)
+        
+        for i, (keyword, result) in enumerate(zip(active_rpp_keywords, results)):
             try:
-                # 楽天API制限を考慮して間隔を空ける
-                if i > 0:
-                    time.sleep(2)  # RPPは2秒間隔
-                
-                # RPP検索実行
-                result = scrape_rpp_ranking(
-                    keyword=keyword.keyword,
-                    target_shop_id=keyword.rakuten_shop_id,
-                    target_product_url=keyword.target_product_url
-                )
+                _save_rpp_search_result(keyword, result)
                 
                 if result['success']:
-                    # 結果を保存
-                    from .models import RPPResult, RPPAd
-                    rpp_result = RPPResult.objects.create(
-                        keyword=keyword,
-                        rank=result['rank'],
-                        total_ads=result['total_ads'],
-                        pages_checked=3,
-                        is_found=result['is_found'],
-                        error_message=result['error']
-                    )
-                    
-                    # 広告データを保存（bulk_create使用で高速化）
-                    rpp_ads_to_create = []
-                    for ad_data in result['ads']:
-                        # 自社商品かどうかを判定
-                        is_own = False
-                        if keyword.rakuten_shop_id.lower() in ad_data.get('shop_name', '').lower():
-                            is_own = True
-                        elif keyword.target_product_url and ad_data.get('product_url'):
-                            if keyword.target_product_url in ad_data['product_url']:
-                                is_own = True
-                        
-                        rpp_ad = RPPAd(
-                            rpp_result=rpp_result,
-                            rank=ad_data.get('rank', 0),
-                            product_name=ad_data.get('product_name', ''),
-                            product_url=ad_data.get('product_url', ''),
-                            product_id=ad_data.get('product_id', ''),
-                            price=ad_data.get('price'),
-                            shop_name=ad_data.get('shop_name', ''),
-                            image_url=ad_data.get('image_url', ''),
-                            catchcopy=ad_data.get('catchcopy', ''),
-                            page_number=ad_data.get('page_number', 1),
-                            position_on_page=ad_data.get('position_on_page', 0),
-                            is_own_product=is_own
-                        )
-                        rpp_ads_to_create.append(rpp_ad)
-                    
-                    # 一括作成で高速化
-                    if rpp_ads_to_create:
-                        try:
-                            RPPAd.objects.bulk_create(rpp_ads_to_create)
-                        except Exception as bulk_error:
-                            logger.error(f"RPP広告データ一括保存エラー: {bulk_error}")
-                            # フォールバック：個別作成
-                            for rpp_ad in rpp_ads_to_create:
-                                try:
-                                    rpp_ad.save()
-                                except Exception:
-                                    pass
-                    
                     success_count += 1
                     logger.info(f"RPP auto search progress for user {user_id}: {i+1}/{total_count}")
                 else:
-                    # エラーの場合も結果を保存
-                    from .models import RPPResult
-                    RPPResult.objects.create(
-                        keyword=keyword,
-                        rank=None,
-                        total_ads=0,
-                        pages_checked=0,
-                        is_found=False,
-                        error_message=result['error']
-                    )
                     error_count += 1
                     logger.error(f"Error in RPP auto search for keyword {keyword.keyword}: {result['error']}")
                 
@@ -449,100 +568,33 @@ def execute_rpp_bulk_search(user_id, bulk_log_id):
         success_count = 0
         error_count = 0
         
-        # 各キーワードを順次実行
-        total_keywords = keywords.count()
-        for i, keyword in enumerate(keywords, 1):
+        # 全キーワードを1つの接続プールでまとめて検索（リクエスト間隔は共有レートリミッターで制御）
+        keywords = list(keywords)
+        total_keywords = len(keywords)
+        logger.info(f"RPP検索実行中: {total_keywords}件")
+        results = scrape_rpp_ranking_many([
+            {
+                'keyword': keyword.keyword,
+                'target_shop_id': keyword.rakuten_shop_id,
+                'target_product_url': keyword.target_product_url,
+            }
+            for keyword in keywords
+        ], run_id=_bulk_run_id('rpp_bulk', bulk_log_id))
+        
+        for keyword, result in zip(keywords, results):
             try:
-                logger.info(f"RPP検索実行中: {keyword.keyword} ({keyword.rakuten_shop_id}) - {i}/{total_keywords}")
-                
-                # 長時間実行の場合は間隔を空ける
-                if i > 1 and total_keywords > 20:
-                    time.sleep(3)  # 3秒間隔
-                elif i > 1 and total_keywords > 10:
-                    time.sleep(2)  # 2秒間隔
-                elif i > 1:
-                    time.sleep(1)  # 1秒間隔
-                
-                # RPP順位検索を実行
-                result = scrape_rpp_ranking(
-                    keyword=keyword.keyword,
-                    target_shop_id=keyword.rakuten_shop_id,
-                    target_product_url=keyword.target_product_url
-                )
+                _save_rpp_search_result(keyword, result)
                 
                 if result['success']:
-                    # 結果を保存
-                    rpp_result = RPPResult.objects.create(
-                        keyword=keyword,
-                        rank=result['rank'],
-                        total_ads=result['total_ads'],
-                        pages_checked=3,
-                        is_found=result['is_found'],
-                        error_message=result['error']
-                    )
-                    
-                    # 広告データを保存（bulk_create使用で高速化）
-                    rpp_ads_to_create = []
-                    for ad_data in result['ads']:
-                        rpp_ad = RPPAd(
-                            rpp_result=rpp_result,
-                            rank=ad_data.get('rank', 0),
-                            product_name=ad_data.get('product_name', ''),
-                            product_url=ad_data.get('product_url', ''),
-                            product_id=ad_data.get('product_id', ''),
-                            price=ad_data.get('price'),
-                            shop_name=ad_data.get('shop_name', ''),
-                            image_url=ad_data.get('image_url', ''),
-                            catchcopy=ad_data.get('catchcopy', ''),
-                            page_number=ad_data.get('page_number', 1),
-                            position_on_page=ad_data.get('position_on_page', 0)
-                        )
-                        rpp_ads_to_create.append(rpp_ad)
-                    
-                    # 一括作成で高速化
-                    if rpp_ads_to_create:
-                        try:
-                            RPPAd.objects.bulk_create(rpp_ads_to_create)
-                        except Exception as bulk_error:
-                            logger.error(f"RPP広告データ一括保存エラー: {bulk_error}")
-                            # フォールバック：個別作成
-                            for rpp_ad in rpp_ads_to_create:
-                                try:
-                                    rpp_ad.save()
-                                except Exception:
-                                    pass
-                    
                     success_count += 1
                     logger.info(f"RPP検索成功: {keyword.keyword} - 順位: {result['rank']}")
                 else:
-                    # エラーの場合も結果を保存
-                    RPPResult.objects.create(
-                        keyword=keyword,
-                        rank=None,
-                        total_ads=0,
-                        pages_checked=0,
-                        is_found=False,
-                        error_message=result['error']
-                    )
                     error_count += 1
                     logger.error(f"RPP検索失敗: {keyword.keyword} - エラー: {result['error']}")
                 
             except Exception as e:
                 error_count += 1
-                logger.error(f"RPP検索エラー: {keyword.keyword} - {str(e)}")
-                
-                # エラーの場合も結果を保存
-                try:
-                    RPPResult.objects.create(
-                        keyword=keyword,
-                        rank=None,
-                        total_ads=0,
-                        pages_checked=0,
-                        is_found=False,
-                        error_message=str(e)
-                    )
-                except Exception as save_error:
-                    logger.error(f"結果保存エラー: {save_error}")
+                logger.error(f"RPP結果保存エラー: {keyword.keyword} - {str(e)}")
         
         # 実行ログを更新
         execution_time = time.time() - start_time
@@ -564,44 +616,38 @@ def execute_rpp_bulk_search(user_id, bulk_log_id):
             pass
 
 
-@shared_task
-def cleanup_old_data_task():
+@shared_task(bind=True)
+def cleanup_old_data_task(self):
     """
     古いデータを定期的にクリーンアップするタスク
-    ユーザーのプランに応じて保持期間を調整
+    ユーザーのプランに応じた保持期間で、SEO・RPPの順位データと検索ログをバッチ削除する
+    実行時間の上限に達した場合は、少し間を空けて続きを再投入する
     """
-    logger.info("Starting scheduled data cleanup task")
+    from django.conf import settings
+    from .locks import RedisLock
+    from .retention import run_retention
     
-    total_ranking_deleted = 0
-    total_log_deleted = 0
-    
-    # ユーザーごとに異なる保持期間でクリーンアップ
-    for user in User.objects.all():
-        retention_days = user.get_data_retention_days()
-        
-        # そのユーザーの古い順位データを削除
-        cutoff_date = timezone.now() - timedelta(days=retention_days)
-        
-        user_ranking_results = RankingResult.objects.filter(
-            keyword__user=user,
-            checked_at__lt=cutoff_date
-        )
-        
-        user_ranking_count = user_ranking_results.count()
-        if user_ranking_count > 0:
-            user_ranking_results.delete()
-            total_ranking_deleted += user_ranking_count
-            logger.info(f"Deleted {user_ranking_count} ranking results for user {user.email} (retention: {retention_days} days)")
+    max_seconds = getattr(settings, 'RETENTION_MAX_SECONDS', 600)
+    lock = RedisLock('cleanup_old_data', timeout=max_seconds + 300)
+    if not lock.acquire():
+        logger.info("Data cleanup is already running, skipping")
+        return {'skipped': True}
     
-    # 検索ログは全ユーザー共通で30日保持
-    log_deleted = SearchLog.cleanup_old_logs(30)
-    total_log_deleted += log_deleted
+    try:
+        logger.info("Starting scheduled data cleanup task")
+        progress = run_retention(max_seconds=max_seconds)
+    finally:
+        lock.release()
     
-    logger.info(f"Data cleanup completed - Rankings: {total_ranking_deleted}, Logs: {total_log_deleted}")
+    if not progress['finished']:
+        self.apply_async(countdown=getattr(settings, 'RETENTION_RESUME_DELAY', 60))
     
+    deleted = progress['deleted']
     return {
-        'ranking_deleted': total_ranking_deleted,
-        'log_deleted': total_log_deleted,
+        'ranking_deleted': sum(count for name, count in deleted.items() if name.startswith('ranking_results')),
+        'rpp_deleted': sum(count for name, count in deleted.items() if name.startswith('rpp_results')),
+        'log_deleted': deleted.get('search_logs', 0) + deleted.get('rpp_search_logs', 0),
+        'finished': progress['finished'],
         'cleanup_date': timezone.now().isoformat()
     }
 
@@ -742,7 +788,7 @@ def save_rpp_search_data_async(keyword_id, search_result, execution_time):
 
 
 @shared_task
-def execute_single_rpp_search(keyword_id):
+def execute_single_rpp_search(keyword_id, run_id=None):
     """
     単一キーワードのRPP検索を実行する並行処理用タスク
     """
@@ -764,7 +810,8 @@ def execute_single_rpp_search(keyword_id):
         result = scrape_rpp_ranking(
             keyword=keyword.keyword,
             target_shop_id=keyword.rakuten_shop_id,
-            target_product_url=keyword.target_product_url
+            target_product_url=keyword.target_product_url,
+            run_id=run_id
         )
         
         execution_time = time.time() - start_time
@@ -863,58 +910,560 @@ def execute_single_rpp_search(keyword_id):
         }
 
 
+def _dispatch_rpp_bulk_window(user_id, keyword_ids, bulk_log_id, started_at):
+    """
+    RPP一括検索の次のキーワード群をchordで投入する
+    同時に実行するタスク数は BULK_SEARCH_MAX_IN_FLIGHT 件まで（残りは完了後のコールバックで投入）
+    
+    Returns:
+        投入したキーワード数
+    """
+    from celery import chord
+    from django.conf import settings
+    
+    limit = max(1, getattr(settings, 'BULK_SEARCH_MAX_IN_FLIGHT', 3))
+    window, remaining = keyword_ids[:limit], keyword_ids[limit:]
+    if not window:
+        return 0
+    
+    run_id = _bulk_run_id('rpp_bulk', bulk_log_id)
+    chord(execute_single_rpp_search.s(keyword_id, run_id=run_id) for keyword_id in window)(
+        continue_parallel_rpp_bulk_search.s(user_id, remaining, bulk_log_id, started_at)
+    )
+    return len(window)
+
+
 @shared_task
 def execute_parallel_rpp_bulk_search(user_id, keyword_ids, bulk_log_id):
     """
     複数キーワードを並行処理でRPP検索する管理タスク
+    サブタスクの完了は待たず、chordのコールバックで集計・次の投入を行う
     """
     try:
-        from celery import group
-        from accounts.models import User
-        from .models import RPPBulkSearchLog
+        logger.info(f"RPP並行一括検索開始: user {user_id} - {len(keyword_ids)}件")
         
-        user = User.objects.get(id=user_id)
-        bulk_log = RPPBulkSearchLog.objects.get(id=bulk_log_id)
+        dispatched = _dispatch_rpp_bulk_window(user_id, list(keyword_ids), bulk_log_id, time.time())
+        if not dispatched:
+            RPPBulkSearchLog.objects.filter(id=bulk_log_id).update(is_completed=True)
         
-        logger.info(f"RPP並行一括検索開始: user {user.id} - {len(keyword_ids)}件")
+        return {'success': True, 'dispatched': dispatched}
         
-        start_time = time.time()
+    except Exception as e:
+        logger.error(f"RPP並行一括検索エラー: {str(e)}")
+        RPPBulkSearchLog.objects.filter(id=bulk_log_id).update(is_completed=False)
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def continue_parallel_rpp_bulk_search(results, user_id, keyword_ids, bulk_log_id, started_at):
+    """
+    RPP並行一括検索のchordコールバック
+    完了したキーワード群の結果を集計し、残りがあれば次のキーワード群を投入する
+    """
+    from django.db.models import F
+    
+    success_count = sum(1 for r in results if r.get('success'))
+    error_count = len(results) - success_count
+    total_execution_time = time.time() - started_at
+    
+    RPPBulkSearchLog.objects.filter(id=bulk_log_id).update(
+        success_count=F('success_count') + success_count,
+        error_count=F('error_count') + error_count,
+        total_execution_time=total_execution_time
+    )
+    
+    try:
+        dispatched = _dispatch_rpp_bulk_window(user_id, keyword_ids, bulk_log_id, started_at)
+    except Exception as e:
+        logger.error(f"RPP並行一括検索の投入エラー: {str(e)}")
+        return {'success': False, 'error': str(e)}
+    if dispatched:
+        return {'success': True, 'dispatched': dispatched}
+    
+    # 全キーワード完了
+    RPPBulkSearchLog.objects.filter(id=bulk_log_id).update(is_completed=True)
+    bulk_log = RPPBulkSearchLog.objects.filter(id=bulk_log_id).first()
+    if bulk_log:
+        logger.info(f"RPP並行一括検索完了: user {user_id} - 成功: {bulk_log.success_count}, エラー: {bulk_log.error_count}, 実行時間: {total_execution_time:.2f}秒")
+    
+    return {'success': True, 'bulk_log_id': bulk_log_id, 'total_execution_time': total_execution_time}
+
+
+def _bulk_item_saver(item):
+    """検索結果の保存時にキーワード別の進捗を更新する関数を作成"""
+    from .models import BulkSearchItem
+    
+    def on_saved(ranking_result):
+        item.ranking_result = ranking_result
+        item.error_message = ranking_result.error_message
+        item.status = BulkSearchItem.STATUS_ERROR if ranking_result.error_message else BulkSearchItem.STATUS_SUCCESS
+        item.save(update_fields=['status', 'ranking_result', 'error_message', 'updated_at'])
+    
+    return on_saved
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def execute_bulk_keyword_search(self, bulk_log_id):
+    """
+    SEO一括検索をバックグラウンドで実行するタスク
+    キーワード別の進捗を BulkSearchItem に記録し、再実行時は未処理のキーワードから再開する
+    """
+    from .models import BulkSearchLog, BulkSearchItem
+    
+    try:
+        bulk_log = BulkSearchLog.objects.select_related('user').get(id=bulk_log_id)
+    except BulkSearchLog.DoesNotExist:
+        logger.error(f"SEO一括検索ログが見つかりません: ID {bulk_log_id}")
+        return {'success': False, 'error': 'Bulk search log not found'}
+    
+    if bulk_log.is_finished:
+        logger.info(f"SEO一括検索は既に終了しています: ID {bulk_log_id}")
+        return {'success': True, 'skipped': True}
+    
+    try:
+        now = timezone.now()
+        bulk_log.status = BulkSearchLog.STATUS_RUNNING
+        bulk_log.task_id = self.request.id or bulk_log.task_id
+        bulk_log.started_at = bulk_log.started_at or now
+        bulk_log.heartbeat_at = now
+        bulk_log.save(update_fields=['status', 'task_id', 'started_at', 'heartbeat_at'])
         
-        # グループタスクで並行実行
-        job = group(execute_single_rpp_search.s(keyword_id) for keyword_id in keyword_ids)
-        result = job.apply_async()
+        # 処理済みの件数を引き継ぐ（ワーカー再起動後の再開時）
+        success_count = bulk_log.items.filter(status=BulkSearchItem.STATUS_SUCCESS).count()
+        error_count = bulk_log.items.filter(status=BulkSearchItem.STATUS_ERROR).count()
         
-        # 全タスクの完了を待機
-        results = result.get()
+        pending_items = list(
+            bulk_log.items.select_related('keyword')
+            .filter(status__in=[BulkSearchItem.STATUS_PENDING, BulkSearchItem.STATUS_RUNNING])
+        )
         
-        # 結果を集計
-        success_count = sum(1 for r in results if r['success'])
-        error_count = len(results) - success_count
-        total_execution_time = time.time() - start_time
+        logger.info(f"SEO一括検索開始: user {bulk_log.user_id} - 残り{len(pending_items)}/{bulk_log.keywords_count}件")
         
-        # 実行ログを更新
-        bulk_log.is_completed = True
-        bulk_log.success_count = success_count
-        bulk_log.error_count = error_count
-        bulk_log.total_execution_time = total_execution_time
-        bulk_log.save()
+        search_manager = RakutenSearchManager(bulk_log.user)
+        
+        def save_progress():
+            bulk_log.success_count = success_count
+            bulk_log.error_count = error_count
+            bulk_log.heartbeat_at = timezone.now()
+            bulk_log.save(update_fields=['success_count', 'error_count', 'heartbeat_at'])
+        
+        # 検索結果とキーワード別の進捗は同じトランザクションでまとめて保存する
+        with SearchResultWriter() as writer:
+            for item in pending_items:
+                try:
+                    # 検索実行（リクエスト間隔は共有レートリミッターで制御）
+                    search_manager.execute_keyword_search(
+                        item.keyword, writer=writer, on_saved=_bulk_item_saver(item),
+                        run_id=_bulk_run_id('seo_bulk', bulk_log_id)
+                    )
+                    success_count += 1
+                except Exception as e:
+                    error_count += 1
+                    logger.error(f"Error in bulk search for keyword {item.keyword.keyword}: {e}")
+                
+                # 保存済みの件数だけを進捗として公開する
+                if not len(writer):
+                    save_progress()
+                
+                logger.info(f"Bulk search progress: {success_count + error_count}/{bulk_log.keywords_count} - Keyword: {item.keyword.keyword}")
         
-        logger.info(f"RPP並行一括検索完了: user {user.id} - 成功: {success_count}, エラー: {error_count}, 実行時間: {total_execution_time:.2f}秒")
+        save_progress()
+        
+        finished_at = timezone.now()
+        bulk_log.status = BulkSearchLog.STATUS_COMPLETED
+        bulk_log.finished_at = finished_at
+        bulk_log.total_execution_time = (finished_at - bulk_log.started_at).total_seconds()
+        bulk_log.save(update_fields=['status', 'finished_at', 'total_execution_time'])
+        
+        logger.info(f"SEO一括検索完了: user {bulk_log.user_id} - 成功: {success_count}, エラー: {error_count}, 実行時間: {bulk_log.total_execution_time:.2f}秒")
         
         return {
             'success': True,
+            'bulk_log_id': bulk_log_id,
             'success_count': success_count,
-            'error_count': error_count,
-            'total_execution_time': total_execution_time,
-            'results': results
+            'error_count': error_count
         }
         
     except Exception as e:
-        logger.error(f"RPP並行一括検索エラー: {str(e)}")
+        logger.error(f"SEO一括検索タスクエラー: {str(e)}")
+        BulkSearchLog.objects.filter(id=bulk_log_id).update(
+            status=BulkSearchLog.STATUS_FAILED,
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def execute_single_keyword_search(bulk_log_id, item_id, generation=None):
+    """
+    SEO一括検索の1キーワードを検索する並行処理用タスク
+    結果は BulkSearchItem に記録し、処理済みのキーワードは再実行しない
+    
+    generation はこのタスクを投入した時点の投入世代。再開で別の世代として投入し直された
+    キーワードは検索しない（古いchordのタスクと新しいタスクで二重に検索しないため）
+    """
+    from .models import BulkSearchLog, BulkSearchItem
+    
+    try:
+        item = BulkSearchItem.objects.select_related('keyword', 'bulk_log__user').get(
+            id=item_id, bulk_log_id=bulk_log_id
+        )
+    except BulkSearchItem.DoesNotExist:
+        logger.error(f"SEO一括検索キーワードが見つかりません: ID {item_id}")
+        return {'success': False, 'item_id': item_id, 'error': 'Bulk search item not found'}
+    
+    finished_statuses = (BulkSearchItem.STATUS_SUCCESS, BulkSearchItem.STATUS_ERROR)
+    if item.status in finished_statuses:
+        return {'success': item.status == BulkSearchItem.STATUS_SUCCESS, 'item_id': item_id, 'skipped': True}
+    if generation is not None and item.dispatch_generation != generation:
+        logger.info(f"SEO一括検索キーワードは再投入済みのためスキップ: ID {item_id} (世代 {generation} → {item.dispatch_generation})")
+        return {'success': False, 'item_id': item_id, 'skipped': True}
+    
+    # 実行開始を記録（待機が長いだけのキーワードと区別して、止まったものだけを再開する）
+    BulkSearchItem.objects.filter(id=item.id).update(updated_at=timezone.now())
+    
+    error = None
+    try:
+        search_manager = RakutenSearchManager(item.bulk_log.user)
+        search_manager.execute_keyword_search(
+            item.keyword, on_saved=_bulk_item_saver(item), run_id=_bulk_run_id('seo_bulk', bulk_log_id)
+        )
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Error in bulk search for keyword {item.keyword.keyword}: {e}")
+        # エラー結果も保存できなかった場合はキーワード別の進捗だけ更新する
+        if item.status not in finished_statuses:
+            BulkSearchItem.objects.filter(id=item.id).update(
+                status=BulkSearchItem.STATUS_ERROR, error_message=error, updated_at=timezone.now()
+            )
+    
+    # 件数はchordのコールバックでキーワード別の進捗から集計する（ここでは加算しない）
+    BulkSearchLog.objects.filter(id=bulk_log_id).update(heartbeat_at=timezone.now())
+    
+    return {'success': error is None, 'item_id': item_id, 'keyword_id': item.keyword_id, 'error': error}
+
+
+def _dispatch_bulk_keyword_window(bulk_log_id, generation):
+    """
+    SEO一括検索の待機中キーワードをchordで投入する
+    同じ店舗で同時に実行するタスク数は BULK_SEARCH_MAX_IN_FLIGHT 件まで（実行中のキーワードも含む）
+    （店舗ごとに実行中の一括検索は1件のみのため、ジョブ単位の上限が店舗単位の上限になる）
+    
+    Returns:
+        投入したキーワード数
+    """
+    from celery import chord
+    from django.conf import settings
+    from .models import BulkSearchItem
+    
+    limit = max(1, getattr(settings, 'BULK_SEARCH_MAX_IN_FLIGHT', 3))
+    items = BulkSearchItem.objects.filter(bulk_log_id=bulk_log_id)
+    available = limit - items.filter(status=BulkSearchItem.STATUS_RUNNING).count()
+    if available <= 0:
+        return 0
+    item_ids = list(
+        items.filter(status=BulkSearchItem.STATUS_PENDING)
+        .order_by('id').values_list('id', flat=True)[:available]
+    )
+    if not item_ids:
+        return 0
+    
+    BulkSearchItem.objects.filter(id__in=item_ids).update(
+        status=BulkSearchItem.STATUS_RUNNING, dispatch_generation=generation, updated_at=timezone.now()
+    )
+    chord(execute_single_keyword_search.s(bulk_log_id, item_id, generation) for item_id in item_ids)(
+        continue_bulk_keyword_search.s(bulk_log_id, generation)
+    )
+    return len(item_ids)
+
+
+@shared_task(bind=True)
+def execute_parallel_bulk_keyword_search(self, bulk_log_id):
+    """
+    SEO一括検索をキーワード単位のタスクで並行実行する管理タスク
+    サブタスクの完了は待たず、chordのコールバックで進捗の集計・次の投入を行う
+    """
+    from django.db.models import F
+    from .models import BulkSearchLog, BulkSearchItem
+    
+    try:
+        bulk_log = BulkSearchLog.objects.get(id=bulk_log_id)
+    except BulkSearchLog.DoesNotExist:
+        logger.error(f"SEO一括検索ログが見つかりません: ID {bulk_log_id}")
+        return {'success': False, 'error': 'Bulk search log not found'}
+    
+    if bulk_log.is_finished:
+        logger.info(f"SEO一括検索は既に終了しています: ID {bulk_log_id}")
+        return {'success': True, 'skipped': True}
+    
+    try:
+        now = timezone.now()
+        # 世代を進め、以前に投入したchordのコールバックから次のキーワードが投入されないようにする
+        BulkSearchLog.objects.filter(id=bulk_log_id).update(
+            status=BulkSearchLog.STATUS_RUNNING,
+            task_id=self.request.id or bulk_log.task_id,
+            started_at=bulk_log.started_at or now,
+            heartbeat_at=now,
+            dispatch_generation=F('dispatch_generation') + 1
+        )
+        generation = BulkSearchLog.objects.values_list('dispatch_generation', flat=True).get(id=bulk_log_id)
+        
+        # 再開時は実行中のまま止まったキーワードだけを待機中に戻す（実行中のタスクはそのまま完了させる）
+        BulkSearchItem.objects.filter(
+            bulk_log_id=bulk_log_id, status=BulkSearchItem.STATUS_RUNNING, updated_at__lt=_bulk_stale_threshold()
+        ).update(status=BulkSearchItem.STATUS_PENDING, updated_at=now)
+        
+        logger.info(f"SEO並行一括検索開始: user {bulk_log.user_id} - {bulk_log.keywords_count}件（世代 {generation}）")
+        return continue_bulk_keyword_search([], bulk_log_id, generation)
+        
+    except Exception as e:
+        logger.error(f"SEO並行一括検索タスクエラー: {str(e)}")
+        BulkSearchLog.objects.filter(id=bulk_log_id).update(
+            status=BulkSearchLog.STATUS_FAILED,
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def continue_bulk_keyword_search(results, bulk_log_id, generation=None):
+    """
+    SEO並行一括検索のchordコールバック
+    キーワード別の進捗から件数を集計し直し、待機中のキーワードがあれば次を投入する
+    
+    再開で世代が進んだ後の古いコールバックは集計と完了判定のみ行い、次の投入はしない
+    （投入を続けると2つのchordが並行して上限を超えて実行されるため）
+    """
+    from .models import BulkSearchLog, BulkSearchItem
+    
+    bulk_log = BulkSearchLog.objects.filter(id=bulk_log_id).first()
+    if bulk_log is None or bulk_log.is_finished:
+        return {'success': True, 'skipped': True}
+    
+    bulk_log.success_count = bulk_log.items.filter(status=BulkSearchItem.STATUS_SUCCESS).count()
+    bulk_log.error_count = bulk_log.items.filter(status=BulkSearchItem.STATUS_ERROR).count()
+    bulk_log.heartbeat_at = timezone.now()
+    bulk_log.save(update_fields=['success_count', 'error_count', 'heartbeat_at'])
+    
+    superseded = generation is not None and generation != bulk_log.dispatch_generation
+    if superseded:
+        logger.info(f"SEO一括検索の古い世代のコールバック: ID {bulk_log_id} (世代 {generation} → {bulk_log.dispatch_generation})")
+        dispatched = 0
+    else:
         try:
-            bulk_log = RPPBulkSearchLog.objects.get(id=bulk_log_id)
-            bulk_log.is_completed = False
-            bulk_log.save()
-        except:
-            pass
-        return {'success': False, 'error': str(e)}
\ No newline at end of file
+            dispatched = _dispatch_bulk_keyword_window(bulk_log_id, bulk_log.dispatch_generation)
+        except Exception as e:
+            logger.error(f"SEO並行一括検索の投入エラー: {str(e)}")
+            BulkSearchLog.objects.filter(id=bulk_log_id).update(
+                status=BulkSearchLog.STATUS_FAILED,
+                error_message=str(e),
+                finished_at=timezone.now()
+            )
+            return {'success': False, 'error': str(e)}
+    
+    if dispatched:
+        logger.info(f"Bulk search progress: {bulk_log.processed_count}/{bulk_log.keywords_count} - next {dispatched} keywords")
+        return {'success': True, 'bulk_log_id': bulk_log_id, 'dispatched': dispatched}
+    
+    # 別の世代のタスクが実行中・待機中のキーワードがある場合は、そのコールバックで完了させる
+    if bulk_log.items.filter(status__in=[BulkSearchItem.STATUS_PENDING, BulkSearchItem.STATUS_RUNNING]).exists():
+        return {'success': True, 'bulk_log_id': bulk_log_id, 'dispatched': 0, 'superseded': superseded}
+    
+    finished_at = timezone.now()
+    bulk_log.status = BulkSearchLog.STATUS_COMPLETED
+    bulk_log.finished_at = finished_at
+    bulk_log.total_execution_time = (finished_at - (bulk_log.started_at or bulk_log.executed_at)).total_seconds()
+    bulk_log.save(update_fields=['status', 'finished_at', 'total_execution_time'])
+    
+    logger.info(f"SEO一括検索完了: user {bulk_log.user_id} - 成功: {bulk_log.success_count}, エラー: {bulk_log.error_count}, 実行時間: {bulk_log.total_execution_time:.2f}秒")
+    
+    return {
+        'success': True,
+        'bulk_log_id': bulk_log_id,
+        'success_count': bulk_log.success_count,
+        'error_count': bulk_log.error_count
+    }
+
+
+def enqueue_bulk_keyword_search(bulk_log_id):
+    """
+    SEO一括検索タスクを投入する
+    BULK_SEARCH_PARALLEL が有効な場合はキーワード単位の並行実行、無効な場合は1タスクで順に実行
+    """
+    from django.conf import settings
+    
+    if getattr(settings, 'BULK_SEARCH_PARALLEL', True):
+        return execute_parallel_bulk_keyword_search.delay(bulk_log_id)
+    return execute_bulk_keyword_search.delay(bulk_log_id)
+
+
+def _bulk_stale_threshold():
+    """この日時より前から進捗の無い一括検索・キーワードを停止とみなす"""
+    from django.conf import settings
+    
+    return timezone.now() - timedelta(minutes=getattr(settings, 'BULK_SEARCH_STALE_MINUTES', 10))
+
+
+@shared_task
+def resume_stale_bulk_searches():
+    """
+    ワーカー停止などで進捗が止まったSEO一括検索を再投入する
+    最終進捗から BULK_SEARCH_STALE_MINUTES 分以上経過した未完了ジョブが対象
+    
+    実行中のキーワードのうち、同じ時間内に更新（実行開始・完了）されたものがあるジョブは
+    まだ動いているため対象外
+    """
+    from django.db.models import Q, Exists, OuterRef
+    from .models import BulkSearchLog, BulkSearchItem
+    
+    threshold = _bulk_stale_threshold()
+    
+    active_items = BulkSearchItem.objects.filter(
+        bulk_log=OuterRef('pk'), status=BulkSearchItem.STATUS_RUNNING, updated_at__gte=threshold
+    )
+    stale_logs = BulkSearchLog.objects.filter(
+        status__in=BulkSearchLog.ACTIVE_STATUSES
+    ).filter(
+        Q(heartbeat_at__lt=threshold) | Q(heartbeat_at__isnull=True, executed_at__lt=threshold)
+    ).exclude(Exists(active_items))
+    
+    resumed_count = 0
+    for bulk_log in stale_logs:
+        # 二重投入を防ぐため、再投入前に最終進捗日時を更新しておく
+        BulkSearchLog.objects.filter(id=bulk_log.id).update(heartbeat_at=timezone.now())
+        task = enqueue_bulk_keyword_search(bulk_log.id)
+        BulkSearchLog.objects.filter(id=bulk_log.id).update(task_id=task.id)
+        resumed_count += 1
+        logger.warning(f"停止したSEO一括検索を再開: ID {bulk_log.id} (user {bulk_log.user_id})")
+    
+    return {'resumed_count': resumed_count}
+
+
+@shared_task
+def generate_ranking_ai_analysis(ranking_result_id):
+    """
+    順位結果のAI分析をバックグラウンドで生成して保存する
+    入力（上位商品データ）が前回と同じ場合はAPIを呼ばない
+    """
+    from .ai_analysis import generate_ranking_analysis
+    
+    try:
+        ranking_result = RankingResult.objects.select_related('keyword').get(id=ranking_result_id)
+    except RankingResult.DoesNotExist:
+        logger.warning(f"AI分析対象の順位結果が見つかりません: ID {ranking_result_id}")
+        return {'success': False, 'error': 'RankingResult not found'}
+    
+    result = generate_ranking_analysis(ranking_result)
+    logger.info(f"AI分析生成完了: RankingResult {ranking_result_id} (success={result.get('success')})")
+    return {'success': bool(result.get('success')), 'ranking_result_id': ranking_result_id}
+
+
+@shared_task
+def execute_export_job(export_job_id):
+    """
+    順位データのエクスポートファイルをバックグラウンドで作成する
+    完了後はメールで通知し、保存期間を過ぎた古いファイルを削除する
+    """
+    import os
+    from django.conf import settings
+    from django.core.mail import send_mail
+    from django.urls import reverse
+    from .models import ExportJob
+    from .exports import build_export_filters, write_export_file, get_export_root, build_filename, purge_expired_exports
+    
+    try:
+        job = ExportJob.objects.select_related('user').get(id=export_job_id)
+    except ExportJob.DoesNotExist:
+        logger.warning(f"エクスポートジョブが見つかりません: ID {export_job_id}")
+        return {'success': False, 'error': 'ExportJob not found'}
+    
+    ExportJob.objects.filter(id=job.id).update(status=ExportJob.STATUS_RUNNING)
+    relative_path = f"{job.user_id}/export_{job.id}.{job.file_format}"
+    full_path = os.path.join(get_export_root(), relative_path)
+    
+    try:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        filters = build_export_filters(job.user, job.params)
+        row_count = write_export_file(job.export_type, job.file_format, filters, full_path)
+    except Exception as e:
+        logger.error(f"エクスポート失敗: ID {job.id} - {e}")
+        ExportJob.objects.filter(id=job.id).update(
+            status=ExportJob.STATUS_FAILED,
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        return {'success': False, 'export_job_id': job.id, 'error': str(e)}
+    
+    ExportJob.objects.filter(id=job.id).update(
+        status=ExportJob.STATUS_COMPLETED,
+        row_count=row_count,
+        file_path=relative_path,
+        filename=build_filename(job.export_type, job.file_format, f"_{job.id}"),
+        finished_at=timezone.now()
+    )
+    logger.info(f"エクスポート完了: ID {job.id} ({row_count}行, {job.export_type}.{job.file_format})")
+    
+    # 完了通知（メール送信に失敗してもジョブは完了扱い）
+    if job.user.email:
+        download_path = reverse('seo_ranking:export_job_download', args=[job.id])
+        send_mail(
+            '【順位データ】エクスポートが完了しました',
+            f"エクスポートが完了しました（{row_count}行）。\n"
+            f"ログイン後、以下のURLからダウンロードできます。\n{download_path}\n\n"
+            f"ファイルは{getattr(settings, 'EXPORT_FILE_TTL_HOURS', 72)}時間後に削除されます。",
+            settings.DEFAULT_FROM_EMAIL,
+            [job.user.email],
+            fail_silently=True
+        )
+    
+    purge_expired_exports()
+    return {'success': True, 'export_job_id': job.id, 'row_count': row_count}
+
+
+@shared_task
+def execute_keyword_import_job(import_job_id):
+    """
+    キーワードの一括インポートをバックグラウンドで実行する
+    行ごとの結果はジョブの report に保存し、入力行は完了後に削除する
+    """
+    from .models import KeywordImportJob
+    from .keyword_import import KeywordImporter
+    
+    try:
+        job = KeywordImportJob.objects.select_related('target_user').get(id=import_job_id)
+    except KeywordImportJob.DoesNotExist:
+        logger.warning(f"キーワードインポートジョブが見つかりません: ID {import_job_id}")
+        return {'success': False, 'error': 'KeywordImportJob not found'}
+    
+    KeywordImportJob.objects.filter(id=job.id).update(status=KeywordImportJob.STATUS_RUNNING)
+    
+    try:
+        importer = KeywordImporter(
+            job.keyword_type,
+            job.target_user,
+            job.rakuten_shop_id,
+            target_product_url=job.target_product_url,
+            is_active=job.is_active
+        )
+        report = importer.run(job.rows)
+    except Exception as e:
+        logger.error(f"キーワードインポート失敗: ID {job.id} - {e}")
+        KeywordImportJob.objects.filter(id=job.id).update(
+            status=KeywordImportJob.STATUS_FAILED,
+            error_message=str(e),
+            finished_at=timezone.now()
+        )
+        return {'success': False, 'import_job_id': job.id, 'error': str(e)}
+    
+    KeywordImportJob.objects.filter(id=job.id).update(
+        status=KeywordImportJob.STATUS_COMPLETED,
+        created_count=report['created_count'],
+        skipped_count=report['skipped_count'],
+        report=report,
+        rows=[],
+        finished_at=timezone.now()
+    )
+    logger.info(f"キーワードインポート完了: ID {job.id} ({report['created_count']}/{report['total_rows']}件登録)")
+    return {'success': True, 'import_job_id': job.id, 'created_count': report['created_count']}
@@ -1,3 +1,789 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from inspice_seo_tool.celery import app as celery_app
+
+from accounts.models import User
+from .models import (
+    Keyword, RankingResult, TopProduct, DailyRankRollup, StoreKeywordMatrix, BulkSearchLog, BulkSearchItem,
+    KeywordImportJob,
+)
+from .models_rpp import RPPKeyword
+from .backfills import rebuild_daily_rollups, backfill_keyword_matrix
+from .rakuten_api import RakutenSearchAPI
+from .fetch_cache import FetchCache, new_run_id
+from .metrics import metrics
+from . import dashboard_cache
+from .management.commands.migrate_sqlite_to_postgres import Command as MigrateCommand, SOURCE_ALIAS, sort_models_by_dependency
+from .result_writer import SearchResultWriter
+from .keyword_import import (
+    KeywordImporter, parse_keyword_rows, read_uploaded_text,
+    KEYWORD_TYPE_SEO, KEYWORD_TYPE_RPP, ROW_CREATED, ROW_EXISTS, ROW_DUPLICATE, ROW_INVALID, ROW_OVER_LIMIT,
+)
+from .ai_analysis import generate_ranking_analysis
+from .views import _get_or_enqueue_ai_analysis
+from .tasks import (
+    execute_parallel_bulk_keyword_search, execute_single_keyword_search, continue_bulk_keyword_search,
+    resume_stale_bulk_searches, execute_keyword_import_job,
+)
+
+from .rpp_state_extractor import extract_state_items, get_extractor_stats, reset_extractor_stats, PATH_ITEMS, PATH_FULL_STATE
+from .rate_limiter import TokenBucket, RedisTokenBucket, get_rate_limiter, reset_rate_limiters
+from .redis_client import get_redis_client, reset_redis_client
+
+
+class TokenBucketTests(SimpleTestCase):
+    """プロセス内トークンバケット"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('seo_ranking.rate_limiter.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=2.0, capacity=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(rate=1.0, capacity=2)
+        bucket.reserve()
+        bucket.reserve()
+        self.now += 100
+        self.assertEqual([bucket.reserve() for _ in range(2)], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_penalize_delays_next_request(self):
+        bucket = TokenBucket(rate=1.0, capacity=1)
+        bucket.penalize(5)
+        self.assertAlmostEqual(bucket.reserve(), 5.0)
+
+
+class RedisTokenBucketTests(SimpleTestCase):
+    """Redis上のトークンバケット（GCRA）"""
+
+    def setUp(self):
+        import fakeredis
+        self.client = fakeredis.FakeStrictRedis(decode_responses=True)
+
+    def test_gcra_burst_then_interval(self):
+        bucket = RedisTokenBucket(self.client, 'ratelimit:test', rate=1.0, capacity=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 1.0, delta=0.1)
+        self.assertAlmostEqual(bucket.reserve(), 2.0, delta=0.1)
+
+    def test_budget_is_shared_between_buckets_with_same_key(self):
+        first = RedisTokenBucket(self.client, 'ratelimit:shared', rate=1.0, capacity=1)
+        second = RedisTokenBucket(self.client, 'ratelimit:shared', rate=1.0, capacity=1)
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertAlmostEqual(second.reserve(), 1.0, delta=0.1)
+
+    def test_penalize_delays_all_workers(self):
+        bucket = RedisTokenBucket(self.client, 'ratelimit:penalty', rate=1.0, capacity=1)
+        bucket.penalize(5)
+        self.assertAlmostEqual(bucket.reserve(), 5.0, delta=0.1)
+
+    def test_falls_back_to_local_bucket_when_redis_is_down(self):
+        client = mock.Mock()
+        client.pipeline.side_effect = redis.ConnectionError('down')
+        bucket = RedisTokenBucket(client, 'ratelimit:down', rate=1.0, capacity=1)
+        with self.assertLogs('seo_ranking.rate_limiter', level='WARNING'):
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertGreater(bucket.reserve(), 0.0)
+            bucket.penalize(5)
+            self.assertAlmostEqual(bucket.reserve(), 7.0, delta=0.1)
+
+
+@override_settings(RATE_LIMIT_BACKEND='redis', RATE_LIMIT_REDIS_URL='fakeredis://')
+class GetRateLimiterTests(SimpleTestCase):
+    """エンドポイント別リミッターの取得"""
+
+    def setUp(self):
+        reset_rate_limiters()
+        reset_redis_client()
+        self.addCleanup(reset_rate_limiters)
+        self.addCleanup(reset_redis_client)
+
+    def test_redis_backend_uses_shared_client(self):
+        limiter = get_rate_limiter('ichiba_item')
+        self.assertIsInstance(limiter, RedisTokenBucket)
+        self.assertIs(limiter.client, get_redis_client())
+        self.assertIs(get_rate_limiter('ichiba_item'), limiter)
+
+    @override_settings(RATE_LIMIT_BACKEND='local', RAKUTEN_RATE_LIMITS={'ichiba_tag': {'rate': 4.0}})
+    def test_local_backend_applies_overrides(self):
+        limiter = get_rate_limiter('ichiba_tag')
+        self.assertIsInstance(limiter, TokenBucket)
+        self.assertEqual(limiter.rate, 4.0)
+        self.assertEqual(limiter.capacity, 1)
+
+
+@override_settings(METRICS_BACKEND='local')
+class RPPStateExtractorTests(SimpleTestCase):
+    """__INITIAL_STATE__ からの商品リスト抽出"""
+
+    def setUp(self):
+        reset_extractor_stats()
+        self.addCleanup(reset_extractor_stats)
+
+    def _page(self, state):
+        return (
+            '<html><script>window.__INITIAL_STATE__ = '
+            + json.dumps(state, ensure_ascii=False)
+            + ';</script><script>var other = {"items": []};</script></html>'
+        ).encode('utf-8')
+
+    def test_ignores_nested_items_before_direct_child(self):
+        state = {'data': {'ichibaSearch': {
+            'filters': {'items': [{'name': 'ジャンル'}]},
+            'genre': {'children': {'items': [{'name': '子ジャンル'}]}},
+            'items': [{'name': '商品A', 'itemOptions': {}}, {'name': '商品B'}],
+        }}}
+        items = extract_state_items(self._page(state))
+        self.assertEqual([item['name'] for item in items], ['商品A', '商品B'])
+        self.assertEqual(get_extractor_stats()[PATH_ITEMS], 1)
+
+    def test_falls_back_to_full_state_without_direct_items(self):
+        state = {'data': {
+            'ichibaSearch': {'filters': {'items': [{'name': 'ジャンル'}]}},
+            'results': {'items': [{'name': '商品A'}]},
+        }}
+        items = extract_state_items(self._page(state))
+        self.assertEqual(get_extractor_stats()[PATH_ITEMS], 0)
+        self.assertEqual(get_extractor_stats()[PATH_FULL_STATE], 1)
+        self.assertNotIn({'name': 'ジャンル'}, items)
+
+    def test_missing_state_returns_none(self):
+        self.assertIsNone(extract_state_items(b'<html><body>no state</body></html>'))
+
+
+def _product(rank, product_id):
+    return {
+        'rank': rank,
+        'product_name': f'商品{product_id}',
+        'product_url': f'https://item.rakuten.co.jp/shop/{product_id}/',
+        'product_id': product_id,
+        'shop_name': 'テスト店舗',
+        'shop_id': 'shop',
+        'price': 1000,
+        'review_count': 0,
+        'review_average': 0,
+        'image_url': '',
+        'is_own_product': False,
+    }
+
+
+@override_settings(METRICS_BACKEND='local')
+class SearchResultWriterTests(TestCase):
+    """検索結果のバッチ保存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        cls.keyword = Keyword.objects.create(user=cls.user, keyword='テスト', rakuten_shop_id='shop')
+
+    def test_failed_flush_does_not_block_later_flushes(self):
+        def fail(result):
+            raise RuntimeError('boom')
+
+        writer = SearchResultWriter(flush_size=10, flush_interval=60)
+        writer.add(self.user, self.keyword, found_rank=3, on_saved=fail)
+        writer.add(self.user, self.keyword, found_rank=4, top_products=[_product(1, 'a')])
+        with self.assertLogs('seo_ranking.result_writer', level='WARNING') as logs:
+            self.assertEqual(writer.flush(), 1)
+        self.assertTrue(any('dropped' in message for message in logs.output))
+        self.assertEqual(len(writer), 0)
+        self.assertEqual(list(RankingResult.objects.values_list('rank', flat=True)), [4])
+
+        writer.add(self.user, self.keyword, found_rank=2, top_products=[_product(1, 'b')])
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(sorted(RankingResult.objects.values_list('rank', flat=True)), [2, 4])
+        self.assertEqual(TopProduct.objects.count(), 2)
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.latest_rank, 2)
+
+    def test_batch_failure_retries_entries_individually(self):
+        calls = []
+
+        def fail_once(result):
+            calls.append(result.pk)
+            if len(calls) == 1:
+                raise RuntimeError('temporary')
+
+        writer = SearchResultWriter(flush_size=10, flush_interval=60)
+        writer.add(self.user, self.keyword, found_rank=5, top_products=[_product(1, 'a')], on_saved=fail_once)
+        writer.add(self.user, self.keyword, found_rank=6, top_products=[_product(1, 'b')], on_saved=fail_once)
+        with self.assertLogs('seo_ranking.result_writer', level='WARNING'):
+            self.assertEqual(writer.flush(), 2)
+        self.assertEqual(sorted(RankingResult.objects.values_list('rank', flat=True)), [5, 6])
+        self.assertEqual(
+            sorted(TopProduct.objects.values_list('ranking_result__rank', 'product_id')),
+            [(5, 'a'), (6, 'b')]
+        )
+
+
+@override_settings(METRICS_BACKEND='local')
+class FindProductRankTests(SimpleTestCase):
+    """順位検索の戦略（adaptive でも最高順位を返す）"""
+
+    OWN_RANKS = {45, 160}
+
+    def setUp(self):
+        self.api = RakutenSearchAPI(api_key='test')
+        self.fetched = []
+        patcher = mock.patch.object(self.api, 'search_products', side_effect=self._search)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.api, 'get_genre_name', return_value='')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _search(self, keyword, page=1, per_page=30, run_id=None):
+        self.fetched.append(page)
+        items = []
+        for index in range(per_page):
+            rank = (page - 1) * per_page + index + 1
+            shop = 'own' if rank in self.OWN_RANKS else 'other'
+            items.append({'Item': {'shopCode': shop, 'itemCode': f'{shop}:{rank}', 'itemName': f'商品{rank}'}})
+        return {'Items': items, 'count': 300, 'pageCount': 10}
+
+    def test_adaptive_checks_every_page_before_the_match(self):
+        for concurrency in (1, 3):
+            with self.subTest(concurrency=concurrency):
+                self.fetched = []
+                found_rank, top_products, total_count, _ = self.api.find_product_rank(
+                    'テスト', 'own', concurrency=concurrency, rank_hint=160, strategy='adaptive'
+                )
+                self.assertEqual(found_rank, 45)
+                self.assertEqual(len(top_products), 10)
+                self.assertEqual(total_count, 300)
+                self.assertEqual(len(self.fetched), len(set(self.fetched)))
+                self.assertTrue({1, 2, 6}.issubset(self.fetched))
+
+    def test_full_stops_at_first_match(self):
+        found_rank, _, _, pages_checked = self.api.find_product_rank('テスト', 'own', concurrency=1, strategy='full')
+        self.assertEqual(found_rank, 45)
+        self.assertEqual(pages_checked, 2)
+
+    def test_default_strategy_is_full(self):
+        self.api.find_product_rank('テスト', 'own', concurrency=1, rank_hint=160)
+        self.assertEqual(self.fetched, [1, 2])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    METRICS_BACKEND='local',
+)
+class FetchCacheTests(SimpleTestCase):
+    """バッチ実行ごとの検索結果の共有（実行IDの無い検索はキャッシュしない）"""
+
+    def setUp(self):
+        cache.clear()
+        self.api = RakutenSearchAPI(api_key='test')
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'Items': [{'Item': {'shopCode': 'shop'}}], 'count': 1}
+        patcher = mock.patch.object(self.api.session, 'get', return_value=response)
+        self.http_get = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('seo_ranking.rakuten_api.get_rate_limiter')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_interactive_search_is_not_cached(self):
+        self.api.search_products('テスト')
+        self.api.search_products('テスト')
+        self.assertEqual(self.http_get.call_count, 2)
+
+    def test_same_run_shares_results(self):
+        run_id = new_run_id('auto')
+        self.api.search_products('テスト', run_id=run_id)
+        self.assertEqual(self.api.search_products(' テスト ', run_id=run_id)['count'], 1)
+        self.assertEqual(self.http_get.call_count, 1)
+
+        # 別の実行・実行IDの無い検索は取得し直す
+        self.api.search_products('テスト', run_id=new_run_id('auto'))
+        self.api.search_products('テスト')
+        self.assertEqual(self.http_get.call_count, 3)
+
+    def test_cache_ignores_missing_run_id(self):
+        fetch_cache = FetchCache('test', window=60)
+        fetch_cache.set(None, 'テスト', ['result'], 1)
+        self.assertIsNone(fetch_cache.get(None, 'テスト', 1))
+        fetch_cache.set('run', 'テスト', ['result'], 1)
+        self.assertEqual(fetch_cache.get('run', 'テスト', 1), ['result'])
+        self.assertIsNone(fetch_cache.get('run', 'テスト', 2))
+
+
+@override_settings(METRICS_BACKEND='local')
+class DashboardCacheTests(TestCase):
+    """ダッシュボード集計のキャッシュとシグナルによる無効化"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cache@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        cls.keyword = Keyword.objects.create(user=cls.user, keyword='テスト', rakuten_shop_id='shop')
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return self.calls
+
+    def _cached(self, scope=None):
+        return dashboard_cache.get_or_compute(scope or dashboard_cache.tenant_scope(self.user.pk), 'summary:2026-01-01', self._compute)
+
+    def _count(self, result):
+        series = f'seo_cache_requests_total{{cache="dashboard",panel="summary",result="{result}"}}'
+        return metrics.collect().get(series, 0)
+
+    def test_tests_use_local_memory_cache(self):
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+
+    def test_hit_and_miss_are_counted(self):
+        hits, misses = self._count('hit'), self._count('miss')
+        self.assertEqual(self._cached(), 1)
+        self.assertEqual(self._cached(), 1)
+        self.assertEqual(self._count('miss') - misses, 1)
+        self.assertEqual(self._count('hit') - hits, 1)
+
+    def test_keyword_and_result_saves_invalidate_tenant(self):
+        self.assertEqual(self._cached(), 1)
+        Keyword.objects.create(user=self.user, keyword='追加', rakuten_shop_id='shop')
+        self.assertEqual(self._cached(), 2)
+
+        RankingResult.objects.create(keyword=self.keyword, rank=3, total_results=100)
+        self.assertEqual(self._cached(), 3)
+
+        self.keyword.delete()
+        self.assertEqual(self._cached(), 4)
+        self.assertEqual(self._cached(), 4)
+
+    def test_other_tenants_and_login_keep_cache(self):
+        other = User.objects.create_user('other@example.com', 'password', rakuten_shop_id='other', company_name='別店舗')
+        self.assertEqual(self._cached(), 1)
+        Keyword.objects.create(user=other, keyword='別', rakuten_shop_id='other')
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self._cached(), 1)
+
+        # 店舗の変更は全店舗の集計も無効化する
+        self.assertEqual(self._cached(dashboard_cache.STORES_SCOPE), 2)
+        self.user.company_name = '変更後'
+        self.user.save()
+        self.assertEqual(self._cached(dashboard_cache.STORES_SCOPE), 3)
+
+
+@override_settings(METRICS_BACKEND='local')
+class DailyRollupBackfillTests(TestCase):
+    """既存の検索結果からの日次集計の作成"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rollup@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        cls.keyword = Keyword.objects.create(user=cls.user, keyword='テスト', rakuten_shop_id='shop')
+
+    def _result(self, rank, checked_at):
+        return RankingResult(keyword=self.keyword, rank=rank, is_found=rank is not None, checked_at=checked_at)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        day = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=3)
+        for rank, checked_at in [
+            (5, day), (None, day + timedelta(hours=1)), (3, day + timedelta(hours=2)), (8, day + timedelta(days=1)),
+        ]:
+            self._result(rank, checked_at).save()
+        fields = ['date', 'best_rank', 'worst_rank', 'last_rank', 'check_count', 'found_count']
+        expected = list(DailyRankRollup.objects.values_list(*fields))
+        self.assertEqual(len(expected), 2)
+
+        DailyRankRollup.objects.all().delete()
+        self.assertEqual(rebuild_daily_rollups(RankingResult, DailyRankRollup, overwrite=False), 2)
+        self.assertEqual(list(DailyRankRollup.objects.values_list(*fields)), expected)
+        self.assertEqual(expected[0][1:], (3, 5, 3, 3, 2))
+
+        # 上書きの場合は既存の集計を置き換える（二重に数えない）
+        self.assertEqual(rebuild_daily_rollups(RankingResult, DailyRankRollup, batch_size=1), 2)
+        self.assertEqual(list(DailyRankRollup.objects.values_list(*fields)), expected)
+
+
+@override_settings(METRICS_BACKEND='local')
+class KeywordMatrixBackfillTests(TestCase):
+    """登録済みキーワードからの全店舗キーワード一覧の作成"""
+
+    def test_backfill_merges_seo_and_rpp_keywords(self):
+        user = User.objects.create_user('matrix@example.com', 'password', rakuten_shop_id='shop', company_name='テスト商会')
+        seo_keywords = [
+            Keyword.objects.create(user=user, keyword=f'キーワード{index}', rakuten_shop_id='shop') for index in range(3)
+        ]
+        rpp_keyword = RPPKeyword.objects.create(user=user, keyword='キーワード1', rakuten_shop_id='shop')
+        RPPKeyword.objects.create(user=user, keyword='RPPのみ', rakuten_shop_id='shop')
+        StoreKeywordMatrix.objects.all().delete()
+
+        self.assertEqual(backfill_keyword_matrix(Keyword, StoreKeywordMatrix, 'seo', batch_size=2), 3)
+        self.assertEqual(backfill_keyword_matrix(RPPKeyword, StoreKeywordMatrix, 'rpp', batch_size=2), 2)
+
+        self.assertEqual(StoreKeywordMatrix.objects.count(), 4)
+        row = StoreKeywordMatrix.objects.get(keyword='キーワード1')
+        self.assertEqual((row.seo_keyword_id, row.rpp_keyword_id), (seo_keywords[1].id, rpp_keyword.id))
+        self.assertIn('テスト商会', row.search_text)
+        self.assertIsNone(StoreKeywordMatrix.objects.get(keyword='RPPのみ').seo_keyword_id)
+
+
+class KeywordImportTests(TestCase):
+    """キーワードの一括インポート（解析・重複除外・登録上限・バックグラウンドジョブ）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('import@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        Keyword.objects.create(user=cls.user, keyword='登録済み', rakuten_shop_id='shop')
+
+    def _import(self, text, keyword_type=KEYWORD_TYPE_SEO, delimiter=None):
+        return KeywordImporter(keyword_type, self.user, 'shop').run(parse_keyword_rows(text, delimiter=delimiter))
+
+    def _statuses(self, report):
+        return [(row['keyword'], row['status']) for row in report['rows']]
+
+    def test_parse_text_and_files(self):
+        self.assertEqual(
+            [(row['line'], row['keyword']) for row in parse_keyword_rows('キーワード\nテスト 商品\n\n  別  \n')],
+            [(2, 'テスト 商品'), (4, '別')]
+        )
+        rows = parse_keyword_rows('keyword,url,active\nテスト,https://item.rakuten.co.jp/shop/item-1/,0\n', delimiter=',')
+        self.assertEqual(rows, [{
+            'line': 2, 'keyword': 'テスト',
+            'target_product_url': 'https://item.rakuten.co.jp/shop/item-1/', 'is_active': '0',
+        }])
+        # タブを含む貼り付けはTSVとして扱う
+        self.assertEqual(parse_keyword_rows('テスト\t\t1')[0]['target_product_url'], None)
+        self.assertEqual(parse_keyword_rows('テスト\t\t1')[0]['is_active'], '1')
+
+        uploaded = SimpleUploadedFile('keywords.csv', 'キーワード\nテスト\n'.encode('cp932'))
+        self.assertEqual(read_uploaded_text(uploaded), 'キーワード\nテスト\n')
+
+    def test_import_dedups_and_validates_rows(self):
+        report = self._import(
+            'テスト 商品\n テスト  商品 \n登録済み\nあ\n別商品,https://item.rakuten.co.jp/shop/item-2/,無効\nURL,not-a-url\n',
+            delimiter=','
+        )
+        self.assertEqual(self._statuses(report), [
+            ('テスト 商品', ROW_CREATED),
+            ('テスト 商品', ROW_DUPLICATE),
+            ('登録済み', ROW_EXISTS),
+            ('あ', ROW_INVALID),
+            ('別商品', ROW_CREATED),
+            ('URL', ROW_INVALID),
+        ])
+        self.assertEqual((report['created_count'], report['skipped_count']), (2, 4))
+        keyword = Keyword.objects.get(user=self.user, keyword='別商品')
+        self.assertEqual((keyword.target_product_id, keyword.is_active), ('item-2', False))
+        self.assertTrue(StoreKeywordMatrix.objects.filter(user=self.user, keyword='別商品').exists())
+
+    def test_plan_limit_is_applied_once(self):
+        with mock.patch.object(User, 'get_keyword_limit', return_value=3):
+            report = self._import('一つ目\n二つ目\n三つ目\n')
+        self.assertEqual([status for _, status in self._statuses(report)], [ROW_CREATED, ROW_CREATED, ROW_OVER_LIMIT])
+        self.assertEqual(report['created_count'], 2)
+        self.assertEqual(Keyword.objects.filter(user=self.user).count(), 3)
+
+    def test_keywords_registered_during_import_are_not_counted(self):
+        from . import keyword_import
+
+        def register_concurrently(value, default):
+            Keyword.objects.get_or_create(user=self.user, keyword='同時登録', rakuten_shop_id='shop')
+            return default
+
+        with mock.patch.object(keyword_import, '_parse_is_active', side_effect=register_concurrently):
+            report = self._import('同時登録\n新規\n')
+        self.assertEqual(self._statuses(report), [('同時登録', ROW_EXISTS), ('新規', ROW_CREATED)])
+        self.assertEqual((report['created_count'], report['skipped_count']), (1, 1))
+        self.assertEqual(Keyword.objects.filter(user=self.user, keyword='同時登録').count(), 1)
+
+    def test_background_job_saves_report(self):
+        job = KeywordImportJob.objects.create(
+            user=self.user, target_user=self.user, keyword_type=KEYWORD_TYPE_RPP, rakuten_shop_id='shop',
+            rows=parse_keyword_rows('RPP1\nRPP1\nRPP<2>\n'), total_rows=3
+        )
+        result = execute_keyword_import_job(job.id)
+        self.assertEqual(result['created_count'], 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, KeywordImportJob.STATUS_COMPLETED)
+        self.assertEqual((job.created_count, job.skipped_count, job.rows), (1, 2, []))
+        self.assertEqual(
+            [row['status'] for row in job.report['rows']], [ROW_CREATED, ROW_DUPLICATE, ROW_INVALID]
+        )
+        self.assertEqual(list(RPPKeyword.objects.filter(user=self.user).values_list('keyword', flat=True)), ['RPP1'])
+
+    def test_background_job_records_failure(self):
+        job = KeywordImportJob.objects.create(
+            user=self.user, target_user=self.user, keyword_type='unknown', rakuten_shop_id='shop',
+            rows=parse_keyword_rows('テスト\n'), total_rows=1
+        )
+        self.assertFalse(execute_keyword_import_job(job.id)['success'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, KeywordImportJob.STATUS_FAILED)
+        self.assertTrue(job.error_message)
+
+
+@override_settings(BULK_SEARCH_MAX_IN_FLIGHT=2, BULK_SEARCH_STALE_MINUTES=10, METRICS_BACKEND='local')
+class ParallelBulkKeywordSearchTests(TestCase):
+    """SEO並行一括検索（同時実行数の上限・再開・完了時の件数）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bulk@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        cls.keywords = [
+            Keyword.objects.create(user=cls.user, keyword=f'キーワード{index}', rakuten_shop_id='shop')
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', celery_app.conf.task_always_eager)
+        celery_app.conf.task_always_eager = True
+        self.searched = []
+        patcher = mock.patch('seo_ranking.tasks.RakutenSearchManager')
+        manager = patcher.start()
+        self.addCleanup(patcher.stop)
+        manager.return_value.execute_keyword_search.side_effect = self._search
+        self.bulk_log = BulkSearchLog.objects.create(user=self.user, keywords_count=len(self.keywords))
+        self.items = BulkSearchItem.objects.bulk_create([
+            BulkSearchItem(bulk_log=self.bulk_log, keyword=keyword) for keyword in self.keywords
+        ])
+
+    def _search(self, keyword, on_saved=None, **kwargs):
+        self.searched.append(keyword.keyword)
+        if keyword.keyword == 'キーワード3':
+            raise RuntimeError('search failed')
+        on_saved(RankingResult.objects.create(keyword=keyword, rank=1, is_found=True))
+
+    def _statuses(self):
+        return list(BulkSearchItem.objects.filter(bulk_log=self.bulk_log).values_list('status', flat=True))
+
+    def _make_stale(self, item_ids=None):
+        stale = timezone.now() - timedelta(minutes=30)
+        BulkSearchLog.objects.filter(id=self.bulk_log.id).update(
+            status=BulkSearchLog.STATUS_RUNNING, heartbeat_at=stale
+        )
+        items = BulkSearchItem.objects.filter(bulk_log=self.bulk_log, status=BulkSearchItem.STATUS_RUNNING)
+        if item_ids is not None:
+            items = items.filter(id__in=item_ids)
+        items.update(updated_at=stale)
+
+    def test_completes_with_counts_from_items(self):
+        execute_parallel_bulk_keyword_search.apply(args=[self.bulk_log.id])
+
+        self.bulk_log.refresh_from_db()
+        self.assertEqual(self.bulk_log.status, BulkSearchLog.STATUS_COMPLETED)
+        self.assertEqual((self.bulk_log.success_count, self.bulk_log.error_count), (4, 1))
+        self.assertEqual(sorted(self.searched), sorted(keyword.keyword for keyword in self.keywords))
+
+    @mock.patch('celery.chord')
+    def test_window_is_capped_including_running_items(self, chord):
+        execute_parallel_bulk_keyword_search.apply(args=[self.bulk_log.id])
+        header = list(chord.call_args.args[0])
+        self.assertEqual(len(header), 2)
+        self.assertEqual(self._statuses().count(BulkSearchItem.STATUS_RUNNING), 2)
+
+        # 実行中のキーワードが上限に達している間は次を投入しない
+        chord.reset_mock()
+        self.bulk_log.refresh_from_db()
+        continue_bulk_keyword_search([], self.bulk_log.id, self.bulk_log.dispatch_generation)
+        chord.assert_not_called()
+        self.bulk_log.refresh_from_db()
+        self.assertFalse(self.bulk_log.is_finished)
+
+    @mock.patch('celery.chord')
+    def test_resume_skips_jobs_with_recently_started_items(self, chord):
+        execute_parallel_bulk_keyword_search.apply(args=[self.bulk_log.id])
+        running_ids = [item.id for item in self.items[:2]]
+        self._make_stale(running_ids[:1])
+
+        self.assertEqual(resume_stale_bulk_searches()['resumed_count'], 0)
+
+        self._make_stale()
+        self.assertEqual(resume_stale_bulk_searches()['resumed_count'], 1)
+        self.bulk_log.refresh_from_db()
+        self.assertEqual(self.bulk_log.dispatch_generation, 2)
+        # 止まったキーワードは新しい世代で投入し直され、同時実行数は上限のまま
+        self.assertEqual(self._statuses().count(BulkSearchItem.STATUS_RUNNING), 2)
+        self.assertEqual(
+            set(BulkSearchItem.objects.filter(id__in=running_ids).values_list('dispatch_generation', flat=True)), {2}
+        )
+
+    @mock.patch('celery.chord')
+    def test_old_generation_tasks_and_callbacks_are_ignored(self, chord):
+        execute_parallel_bulk_keyword_search.apply(args=[self.bulk_log.id])
+        self._make_stale()
+        resume_stale_bulk_searches()
+        chord.reset_mock()
+
+        # 古いchordのタスクは再投入済みのキーワードを検索せず、コールバックは次を投入しない
+        result = execute_single_keyword_search(self.bulk_log.id, self.items[0].id, 1)
+        self.assertTrue(result['skipped'])
+        self.assertEqual(self.searched, [])
+        BulkSearchItem.objects.filter(id__in=[item.id for item in self.items[:2]]).update(
+            status=BulkSearchItem.STATUS_SUCCESS
+        )
+        continue_bulk_keyword_search([], self.bulk_log.id, 1)
+        chord.assert_not_called()
+
+        # 現在の世代のコールバックは次を投入し、全キーワードが終わるまで完了にしない
+        continue_bulk_keyword_search([], self.bulk_log.id, 2)
+        self.assertEqual(len(list(chord.call_args.args[0])), 2)
+        self.bulk_log.refresh_from_db()
+        self.assertEqual(self.bulk_log.status, BulkSearchLog.STATUS_RUNNING)
+        self.assertEqual(self.bulk_log.success_count, 2)
+
+
+class MigrateSqliteToPostgresTests(TestCase):
+    """SQLiteからのデータ移行（コピー先はテスト用データベース）"""
+
+    # コピー元の接続は setUpClass で登録するため、登録済みの全接続を許可する
+    databases = '__all__'
+    source_models = [User, Keyword, RankingResult, TopProduct]
+
+    @classmethod
+    def setUpClass(cls):
+        # テーブルはテストのトランザクション開始前に作成する（SQLiteはトランザクション内でスキーマ変更できない）
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.command = MigrateCommand()
+        cls.source = cls.command._open_source(Path(cls.temp_dir.name) / 'source.sqlite3')
+        with cls.source.schema_editor() as editor:
+            for model in cls.source_models:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.source.close()
+        del connections[SOURCE_ALIAS]
+        connections.settings.pop(SOURCE_ALIAS, None)
+        cls.temp_dir.cleanup()
+
+    def test_sort_models_by_dependency_handles_cycles(self):
+        ordered = sort_models_by_dependency([RankingResult, Keyword, User])
+        self.assertEqual(ordered[0], User)
+        self.assertEqual(set(ordered), {User, Keyword, RankingResult})
+        self.assertEqual(len(ordered), 3)
+
+        # 循環参照が無い場合は参照先が先になる
+        self.assertEqual(sort_models_by_dependency([TopProduct, RankingResult]), [RankingResult, TopProduct])
+
+    def test_copy_source_rows_and_verify_counts(self):
+        models = sort_models_by_dependency(self.source_models)
+
+        # コピー元のデータ（シグナルを送らないよう bulk_create で作成）
+        User.objects.using(SOURCE_ALIAS).bulk_create([
+            User(id=10, email='source@example.com', rakuten_shop_id='shop', company_name='コピー元'),
+        ])
+        Keyword.objects.using(SOURCE_ALIAS).bulk_create([
+            Keyword(id=20, user_id=10, keyword='テスト', rakuten_shop_id='shop'),
+            Keyword(id=21, user_id=10, keyword='サンプル', rakuten_shop_id='shop'),
+        ])
+        RankingResult.objects.using(SOURCE_ALIAS).bulk_create([
+            RankingResult(id=30, keyword_id=20, rank=5, is_found=True),
+            RankingResult(id=31, keyword_id=20, rank=None, is_found=False),
+            RankingResult(id=32, keyword_id=21, rank=12, is_found=True),
+        ])
+        TopProduct.objects.using(SOURCE_ALIAS).bulk_create([
+            TopProduct(ranking_result_id=30, **_product(1, 'a')),
+        ])
+        Keyword.objects.using(SOURCE_ALIAS).filter(id=20).update(latest_result_id=31, latest_rank=None, previous_rank=5)
+
+        target = connections['default']
+        with transaction.atomic():
+            self.command._flush_target(target, models)
+            for model in models:
+                self.command._copy_model(model, self.source, target, chunk_size=2)
+            self.command._reset_sequences(target, models)
+
+        self.assertEqual(self.command._verify_counts(models, self.source), [])
+        self.assertEqual(RankingResult.objects.count(), 3)
+        keyword = Keyword.objects.get(id=20)
+        self.assertEqual((keyword.latest_result_id, keyword.previous_rank), (31, 5))
+        self.assertEqual(TopProduct.objects.get().ranking_result_id, 30)
+
+        RankingResult.objects.using(SOURCE_ALIAS).bulk_create([RankingResult(id=33, keyword_id=21, rank=1, is_found=True)])
+        self.assertEqual(
+            self.command._verify_counts(models, self.source),
+            [(RankingResult._meta.db_table, 4, 3)]
+        )
+
+
+AI_RESULT = {'success': True, 'analysis': {'overall_assessment': 'テスト'}, 'error': None}
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CELERY_TASK_ALWAYS_EAGER=True,
+    METRICS_BACKEND='local',
+)
+class AIAnalysisQueueTests(TestCase):
+    """AI分析の投入（重複抑止）・ポーリング・入力ハッシュによる再利用"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.master = User.objects.create_user('master@example.com', 'password', is_master=True, company_name='マスター')
+        cls.user = User.objects.create_user('ai@example.com', 'password', rakuten_shop_id='shop', company_name='テスト')
+        cls.keyword = Keyword.objects.create(user=cls.user, keyword='テスト', rakuten_shop_id='shop')
+
+    def setUp(self):
+        cache.clear()
+        # Celeryの設定は起動時に読み込まれるため、即時実行をテスト中だけ切り替える
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', celery_app.conf.task_always_eager)
+        celery_app.conf.task_always_eager = True
+        analyzer = mock.patch('seo_ranking.ai_analysis.ClaudeAnalyzer.analyze_ranking_data', return_value=AI_RESULT)
+        self.analyze = analyzer.start()
+        self.addCleanup(analyzer.stop)
+
+    def _result(self, product_ids=('a', 'b')):
+        result = RankingResult.objects.create(keyword=self.keyword, rank=3, is_found=True)
+        for rank, product_id in enumerate(product_ids, start=1):
+            TopProduct.objects.create(ranking_result=result, **_product(rank, product_id))
+        return RankingResult.objects.select_related('keyword').get(id=result.id)
+
+    def test_duplicate_enqueue_is_suppressed(self):
+        result = self._result()
+        with mock.patch('seo_ranking.tasks.generate_ranking_ai_analysis.delay') as delay:
+            self.assertIsNone(_get_or_enqueue_ai_analysis(result))
+            self.assertIsNone(_get_or_enqueue_ai_analysis(result))
+        delay.assert_called_once_with(result.id)
+
+    def test_poll_returns_pending_then_ready(self):
+        result = self._result()
+        self.client.force_login(self.master)
+        url = reverse('seo_ranking:ranking_ai_analysis_status', args=[result.id])
+
+        # 初回は（即時実行の）タスクを投入して pending、2回目は保存済みの結果を返す
+        self.assertEqual(self.client.get(url).json()['status'], 'pending')
+        response = self.client.get(url).json()
+        self.assertEqual(response['status'], 'ready')
+        self.assertEqual(response['analysis'], AI_RESULT['analysis'])
+        self.assertEqual(self.analyze.call_count, 1)
+
+    def test_same_inputs_reuse_saved_analysis(self):
+        first = self._result()
+        second = self._result()
+        generate_ranking_analysis(first)
+        self.assertEqual(generate_ranking_analysis(second), AI_RESULT)
+        self.assertEqual(self.analyze.call_count, 1)
+
+        # 入力（上位商品）が変わった場合は再生成する
+        generate_ranking_analysis(self._result(product_ids=('c',)))
+        self.assertEqual(self.analyze.call_count, 2)
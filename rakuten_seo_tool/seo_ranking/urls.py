@@ -1,6 +1,8 @@
 from django.urls import path
 from . import views
 from . import views_rpp
+from . import views_export
+from . import views_keyword_import
 
 app_name = 'seo_ranking'
 
@@ -12,17 +14,26 @@ urlpatterns = [
     path('keywords/', views.keyword_list, name='keyword_list'),
     path('keywords/create/', views.keyword_create, name='keyword_create'),
     path('keywords/bulk-create/', views.keyword_bulk_create, name='keyword_bulk_create'),
+    path('keywords/import/jobs/<int:import_job_id>/', views_keyword_import.keyword_import_job, name='keyword_import_job'),
     path('keywords/<int:keyword_id>/edit/', views.keyword_edit, name='keyword_edit'),
     path('keywords/<int:keyword_id>/delete/', views.keyword_delete, name='keyword_delete'),
     path('keywords/<int:keyword_id>/search/', views.keyword_search, name='keyword_search'),
     path('keywords/bulk-search/', views.bulk_keyword_search, name='bulk_keyword_search'),
+    path('keywords/bulk-search/<int:bulk_log_id>/status/', views.bulk_keyword_search_status, name='bulk_keyword_search_status'),
     
     # SEO順位結果
     path('keywords/<int:keyword_id>/results/', views.ranking_results, name='ranking_results'),
+    path('keywords/<int:keyword_id>/chart-data/', views.ranking_chart_data, name='ranking_chart_data'),
     path('results/<int:result_id>/', views.ranking_detail, name='ranking_detail'),
+    path('results/<int:result_id>/ai-analysis/', views.ranking_ai_analysis_status, name='ranking_ai_analysis_status'),
     path('results/<int:result_id>/export-csv/', views.export_ranking_csv, name='export_ranking_csv'),
     path('results/<int:result_id>/update-memo/', views.update_ranking_memo, name='update_ranking_memo'),
     
+    # 一括エクスポート
+    path('export/', views_export.export_results, name='export_results'),
+    path('export/jobs/<int:export_job_id>/', views_export.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:export_job_id>/download/', views_export.export_job_download, name='export_job_download'),
+    
     # SEO検索ログ
     path('logs/', views.search_logs, name='search_logs'),
     
@@ -37,6 +48,7 @@ urlpatterns = [
     
     # RPP順位結果
     path('rpp/results/<int:keyword_id>/', views_rpp.rpp_results, name='rpp_results'),
+    path('rpp/results/<int:keyword_id>/chart-data/', views_rpp.rpp_chart_data, name='rpp_chart_data'),
     path('rpp/detail/<int:result_id>/', views_rpp.rpp_detail, name='rpp_detail'),
     path('rpp/export/<int:result_id>/', views_rpp.export_rpp_csv, name='export_rpp_csv'),
     path('rpp/memo/update/<int:result_id>/', views_rpp.update_rpp_memo, name='update_rpp_memo'),
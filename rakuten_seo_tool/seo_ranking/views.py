@@ -4,13 +4,19 @@ from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Count
+from django.core.cache import cache
+from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Keyword, RankingResult, TopProduct, SearchLog
+from .models import Keyword, RankingResult, TopProduct, SearchLog, BulkSearchLog, BulkSearchItem
 from .rakuten_api import RakutenSearchManager
 from .forms import KeywordForm, BulkKeywordForm
-from .ai_analysis import get_ai_analysis
+from .ai_analysis import get_cached_ai_analysis, get_ranking_analysis_hash
+from .rollups import get_period_start_date, build_chart_points
+from .dashboard_cache import get_or_compute, tenant_scope, STORES_SCOPE
+from .views_keyword_import import run_keyword_import
 import logging
 import time
 import csv
@@ -24,28 +30,20 @@ def keyword_list(request):
     """キーワード一覧"""
     # マスターアカウントの場合は選択店舗のキーワードを表示
     if request.user.is_master:
+        target_user = None
         selected_store_id = request.session.get('selected_store_id')
         if selected_store_id:
             try:
                 from accounts.models import User
-                selected_user = User.objects.get(id=selected_store_id, is_invited_user=True)
-                keywords = Keyword.objects.filter(user=selected_user).order_by('-created_at')
-                target_user = selected_user
+                target_user = User.objects.get(id=selected_store_id, is_invited_user=True)
             except User.DoesNotExist:
                 # 選択店舗が見つからない場合は招待ユーザーのキーワードのみ
-                from accounts.models import User
-                invited_users = User.objects.filter(is_invited_user=True)
-                keywords = Keyword.objects.filter(user__in=invited_users).order_by('-created_at')
-                target_user = None
-        else:
-            # 招待ユーザーのキーワードのみ
-            from accounts.models import User
-            invited_users = User.objects.filter(is_invited_user=True)
-            keywords = Keyword.objects.filter(user__in=invited_users).order_by('-created_at')
-            target_user = None
+                pass
+        if target_user is None:
+            return _all_stores_keyword_list(request)
     else:
-        keywords = Keyword.objects.filter(user=request.user).order_by('-created_at')
         target_user = request.user
+    keywords = Keyword.objects.filter(user=target_user).order_by('-created_at')
     
     # 検索フィルタ
     search_query = request.GET.get('search', '')
@@ -68,18 +66,9 @@ def keyword_list(request):
     page_obj = paginator.get_page(page_number)
     
     # 登録数情報を追加
-    if request.user.is_master:
-        if target_user:
-            total_keywords = Keyword.objects.filter(user=target_user).count()
-        else:
-            # 招待ユーザーのキーワード数のみ
-            from accounts.models import User
-            invited_users = User.objects.filter(is_invited_user=True)
-            total_keywords = Keyword.objects.filter(user__in=invited_users).count()
-        keyword_limit = None  # マスターアカウントは制限なし
-    else:
-        total_keywords = Keyword.objects.filter(user=request.user).count()
-        keyword_limit = request.user.get_keyword_limit()
+    total_keywords = Keyword.objects.filter(user=target_user).count()
+    # マスターアカウントは制限なし
+    keyword_limit = None if request.user.is_master else request.user.get_keyword_limit()
     
     return render(request, 'seo_ranking/keyword_list.html', {
         'page_obj': page_obj,
@@ -91,6 +80,56 @@ def keyword_list(request):
     })
 
 
+def _all_stores_keyword_list(request):
+    """
+    招待ユーザー全店舗のキーワード一覧（店舗未選択のマスターアカウント）
+    全店舗キーワード一覧（StoreKeywordMatrix）を検索し、キーセットでページ送りする
+    """
+    from .models import StoreKeywordMatrix
+    from .store_matrix import filter_search, keyset_paginate
+    
+    rows = StoreKeywordMatrix.objects.filter(
+        seo_keyword__isnull=False,
+        user__is_invited_user=True
+    ).select_related('seo_keyword')
+    
+    # 検索フィルタ（キーワード・店舗ID・会社名）
+    search_query = request.GET.get('search', '')
+    rows = filter_search(rows, search_query)
+    
+    # アクティブフィルタ
+    active_filter = request.GET.get('active', '')
+    if active_filter == 'true':
+        rows = rows.filter(seo_is_active=True)
+    elif active_filter == 'false':
+        rows = rows.filter(seo_is_active=False)
+    
+    # ページネーション（キーセット）
+    page_obj = keyset_paginate(
+        rows, 'seo_created_at', 20,
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+    page_obj.object_list = [row.seo_keyword for row in page_obj.object_list]
+    
+    # 招待ユーザーのキーワード数のみ
+    total_keywords = get_or_compute(
+        STORES_SCOPE,
+        'invited_keyword_count',
+        lambda: Keyword.objects.filter(user__is_invited_user=True).count()
+    )
+    
+    return render(request, 'seo_ranking/keyword_list.html', {
+        'page_obj': page_obj,
+        'keyset_pagination': True,
+        'search_query': search_query,
+        'active_filter': active_filter,
+        'total_keywords': total_keywords,
+        'keyword_limit': None,
+        'target_user': None,
+    })
+
+
 @login_required
 def keyword_create(request):
     """キーワード作成"""
@@ -176,70 +215,9 @@ def keyword_bulk_create(request):
         return redirect('seo_ranking:keyword_list')
     
     if request.method == 'POST':
-        form = BulkKeywordForm(request.POST, user=request.user, selected_store=selected_store)
+        form = BulkKeywordForm(request.POST, request.FILES, user=request.user, selected_store=selected_store)
         if form.is_valid():
-            keywords_list = form.cleaned_data['keywords']
-            rakuten_shop_id = form.cleaned_data['rakuten_shop_id']
-            target_product_url = form.cleaned_data.get('target_product_url', '')
-            is_active = form.cleaned_data.get('is_active', True)
-            
-            # 商品IDを商品URLから抽出（target_product_idの代替）
-            target_product_id = ''
-            if target_product_url:
-                import re
-                # URLから商品IDを抽出: https://item.rakuten.co.jp/shop-id/item-id/
-                match = re.search(r'/([^/]+)/?$', target_product_url.rstrip('/'))
-                if match:
-                    target_product_id = match.group(1)
-            
-            # 重複チェック用に既存キーワードを取得
-            existing_keywords = set(
-                Keyword.objects.filter(user=target_user, rakuten_shop_id=rakuten_shop_id)
-                .values_list('keyword', flat=True)
-            )
-            
-            # 一括登録処理
-            created_count = 0
-            skipped_count = 0
-            
-            # 現在の登録数を取得
-            current_count = Keyword.objects.filter(user=target_user).count()
-            
-            for keyword_text in keywords_list:
-                if keyword_text in existing_keywords:
-                    skipped_count += 1
-                    continue
-                
-                # 登録数制限チェック
-                keyword_limit = target_user.get_keyword_limit()
-                if keyword_limit is not None and current_count >= keyword_limit:
-                    store_name = selected_store.company_name if selected_store else "あなた"
-                    messages.error(request, f'{store_name}のキーワード登録数の上限（{keyword_limit}個）に達したため、"{keyword_text}" 以降の登録を中断しました。')
-                    break
-                
-                try:
-                    Keyword.objects.create(
-                        user=target_user,
-                        keyword=keyword_text,
-                        rakuten_shop_id=rakuten_shop_id,
-                        target_product_url=target_product_url,
-                        target_product_id=target_product_id,
-                        is_active=is_active
-                    )
-                    created_count += 1
-                    current_count += 1
-                except Exception as e:
-                    logger.error(f'Error creating keyword "{keyword_text}": {e}')
-                    skipped_count += 1
-            
-            # 結果メッセージ
-            store_name = selected_store.company_name if selected_store else "あなた"
-            if created_count > 0:
-                messages.success(request, f'{store_name}に{created_count}個のキーワードを登録しました。')
-            if skipped_count > 0:
-                messages.warning(request, f'{skipped_count}個のキーワードはスキップされました（重複または処理エラー）。')
-            
-            return redirect('seo_ranking:keyword_list')
+            return run_keyword_import(request, form, 'seo', target_user, selected_store)
     else:
         form = BulkKeywordForm(user=request.user, selected_store=selected_store)
     
@@ -384,6 +362,27 @@ def ranking_results(request, keyword_id):
     })
 
 
+@login_required
+def ranking_chart_data(request, keyword_id):
+    """順位推移グラフのデータ（日次集計から作成・JSON）"""
+    # マスターアカウントの場合は全店舗のキーワードにアクセス可能
+    if request.user.is_master:
+        keyword = get_object_or_404(Keyword, id=keyword_id)
+    else:
+        keyword = get_object_or_404(Keyword, id=keyword_id, user=request.user)
+    
+    rollups = keyword.daily_rollups.order_by('date')
+    start_date = get_period_start_date(request.GET.get('period', '365'))
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    
+    return JsonResponse({
+        'success': True,
+        'keyword': keyword.keyword,
+        'points': build_chart_points(rollups.values('date', 'best_rank', 'worst_rank', 'last_rank', 'check_count', 'found_count')),
+    })
+
+
 @login_required
 def ranking_detail(request, result_id):
     """順位結果詳細"""
@@ -446,11 +445,6 @@ def ranking_detail(request, result_id):
                 'avg': sum(keyword_frequencies) // len(keyword_frequencies)
             }
     
-    # AI分析を実行（マスターアカウントのみ）
-    ai_analysis_result = None
-    if request.user.is_master:
-        ai_analysis_result = get_ai_analysis(result.keyword, result, top_products)
-    
     context = {
         'result': result,
         'top_products': top_products,
@@ -459,13 +453,66 @@ def ranking_detail(request, result_id):
         'statistics': statistics,
     }
     
-    # マスターアカウントの場合のみAI分析結果を追加
-    if ai_analysis_result:
-        context['ai_analysis'] = ai_analysis_result
+    # AI分析（マスターアカウントのみ）は保存済みの結果を表示し、無ければバックグラウンドで生成する
+    if request.user.is_master:
+        context['ai_analysis'] = _get_or_enqueue_ai_analysis(result)
+        context['ai_analysis_status_url'] = reverse('seo_ranking:ranking_ai_analysis_status', args=[result.id])
     
     return render(request, 'seo_ranking/ranking_detail.html', context)
 
 
+def _get_or_enqueue_ai_analysis(result):
+    """
+    保存済みのAI分析結果を取得し、無い場合は生成タスクを投入する
+    
+    Returns:
+        AI分析結果の辞書（生成待ちの場合はNone）
+    """
+    analysis_hash = get_ranking_analysis_hash(result)
+    ai_analysis = get_cached_ai_analysis(result, analysis_hash)
+    if ai_analysis is not None:
+        return ai_analysis
+    
+    # 同じ入力の生成タスクを重複して投入しない
+    queued_key = f"ai_analysis:queued:{result.id}:{analysis_hash}"
+    try:
+        if not cache.add(queued_key, True, timeout=300):
+            return None
+    except Exception as e:
+        logger.warning(f"AI分析の投入状態を確認できません: {e}")
+    
+    try:
+        from .tasks import generate_ranking_ai_analysis
+        generate_ranking_ai_analysis.delay(result.id)
+    except Exception as e:
+        logger.error(f"AI分析タスクの投入に失敗: RankingResult {result.id}: {e}")
+        try:
+            cache.delete(queued_key)
+        except Exception:
+            pass
+    return None
+
+
+@login_required
+def ranking_ai_analysis_status(request, result_id):
+    """順位結果のAI分析の生成状況を返す（JSONポーリング用・マスターアカウントのみ）"""
+    if not request.user.is_master:
+        return JsonResponse({'success': False, 'error': '権限がありません'}, status=403)
+    
+    result = get_object_or_404(RankingResult.objects.select_related('keyword'), id=result_id)
+    ai_analysis = _get_or_enqueue_ai_analysis(result)
+    
+    if ai_analysis is None:
+        return JsonResponse({'success': True, 'status': 'pending'})
+    return JsonResponse({
+        'success': True,
+        'status': 'ready',
+        'ai_success': bool(ai_analysis.get('success')),
+        'analysis': ai_analysis.get('analysis'),
+        'error': ai_analysis.get('error'),
+    })
+
+
 @login_required
 def export_ranking_csv(request, result_id):
     """順位結果詳細をCSVでエクスポート"""
@@ -611,40 +658,47 @@ def search_logs(request):
 @login_required
 def dashboard(request):
     """SEOダッシュボード"""
-    # 統計データを取得
-    total_keywords = Keyword.objects.filter(user=request.user).count()
-    active_keywords = Keyword.objects.filter(user=request.user, is_active=True).count()
+    user = request.user
+    today = timezone.now().date()
+    
+    def compute_stats():
+        # 今日の検索ログと直近30日の成功率
+        recent_logs = SearchLog.objects.filter(
+            user=user,
+            created_at__gte=timezone.now() - timedelta(days=30)
+        ).aggregate(
+            total=Count('id'),
+            succeeded=Count('id', filter=Q(success=True)),
+            today=Count('id', filter=Q(created_at__date=today)),
+        )
+        keyword_counts = Keyword.objects.filter(user=user).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+        )
+        success_rate = 0
+        if recent_logs['total']:
+            success_rate = (recent_logs['succeeded'] / recent_logs['total']) * 100
+        return {
+            'total_keywords': keyword_counts['total'],
+            'active_keywords': keyword_counts['active'],
+            'today_logs': recent_logs['today'],
+            'success_rate': success_rate,
+        }
+    
+    # 集計値は店舗ごとにキャッシュ（キーワード・検索結果の変更時に無効化）
+    stats = get_or_compute(tenant_scope(user.id), f"seo_dashboard_stats:{today.isoformat()}", compute_stats)
     
     # 最新の検索結果
     recent_results = RankingResult.objects.filter(
-        keyword__user=request.user
-    ).order_by('-checked_at')[:10]
-    
-    # 今日の検索ログ
-    today = timezone.now().date()
-    today_logs = SearchLog.objects.filter(
-        user=request.user,
-        created_at__date=today
-    ).count()
-    
-    # 成功率計算
-    recent_logs = SearchLog.objects.filter(
-        user=request.user,
-        created_at__gte=timezone.now() - timedelta(days=30)
-    )
-    success_rate = 0
-    if recent_logs.exists():
-        success_rate = (recent_logs.filter(success=True).count() / recent_logs.count()) * 100
+        keyword__user=user
+    ).select_related('keyword').order_by('-checked_at')[:10]
     
     # 一括検索実行可能かチェック
-    can_bulk_search = request.user.can_execute_auto_search_today()
+    can_bulk_search = user.can_execute_auto_search_today()
     
     return render(request, 'seo_ranking/dashboard.html', {
-        'total_keywords': total_keywords,
-        'active_keywords': active_keywords,
+        **stats,
         'recent_results': recent_results,
-        'today_logs': today_logs,
-        'success_rate': success_rate,
         'can_bulk_search': can_bulk_search,
     })
 
@@ -678,57 +732,57 @@ def bulk_keyword_search(request):
         return JsonResponse({'success': False, 'error': '一括検索は1日1回のみ実行可能です。明日再度お試しください。'})
     
     try:
+        # 実行中のジョブがある場合はその進捗を返す（二重実行防止）
+        active_job = BulkSearchLog.get_active_job(target_user)
+        if active_job:
+            return JsonResponse({
+                'success': True,
+                'message': '実行中の一括検索があります。完了までお待ちください。',
+                'bulk_log_id': active_job.id,
+                'status_url': reverse('seo_ranking:bulk_keyword_search_status', args=[active_job.id]),
+                'total_count': active_job.keywords_count
+            })
+        
         # 対象ユーザーのアクティブなキーワードを取得
-        active_keywords = Keyword.objects.filter(user=target_user, is_active=True)
+        keyword_ids = list(
+            Keyword.objects.filter(user=target_user, is_active=True).values_list('id', flat=True)
+        )
         
-        if not active_keywords.exists():
+        if not keyword_ids:
             messages.warning(request, 'アクティブなキーワードが見つかりません。')
             return JsonResponse({'success': False, 'error': 'アクティブなキーワードが見つかりません。'})
         
-        # 検索マネージャーを初期化（対象ユーザーで初期化）
-        search_manager = RakutenSearchManager(target_user)
+        total_count = len(keyword_ids)
         
-        success_count = 0
-        error_count = 0
-        total_count = active_keywords.count()
-        
-        store_name = target_user.company_name if user.is_master else target_user.email
-        logger.info(f"Starting bulk search for user {target_user.id} ({store_name}), {total_count} keywords")
+        # ジョブとキーワード別の進捗を作成
+        with transaction.atomic():
+            bulk_log = BulkSearchLog.objects.create(
+                user=target_user,
+                keywords_count=total_count
+            )
+            BulkSearchItem.objects.bulk_create([
+                BulkSearchItem(bulk_log=bulk_log, keyword_id=keyword_id)
+                for keyword_id in keyword_ids
+            ])
         
-        for i, keyword in enumerate(active_keywords):
-            try:
-                # 楽天API制限を考慮して間隔を空ける
-                if i > 0:
-                    time.sleep(1)  # 1秒間隔
-                
-                # 検索実行
-                ranking_result = search_manager.execute_keyword_search(keyword)
-                success_count += 1
-                
-                logger.info(f"Bulk search progress: {i+1}/{total_count} - Keyword: {keyword.keyword}")
-                
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error in bulk search for keyword {keyword.keyword}: {e}")
-                continue
+        # バックグラウンドで実行（Gunicornのタイムアウトを回避）
+        from .tasks import enqueue_bulk_keyword_search
+        task = enqueue_bulk_keyword_search(bulk_log.id)
+        BulkSearchLog.objects.filter(id=bulk_log.id).update(task_id=task.id)
         
         # 最終一括検索日を更新（マスターアカウント以外）
         if not user.is_master:
             target_user.update_last_bulk_search_date()
         
-        # 結果メッセージ
-        store_info = f"店舗「{target_user.company_name}」の" if user.is_master else ""
-        message = f'{store_info}一括検索が完了しました。成功: {success_count}件'
-        if error_count > 0:
-            message += f', エラー: {error_count}件'
-        
-        messages.success(request, message)
+        store_name = target_user.company_name if user.is_master else target_user.email
+        logger.info(f"Starting bulk search for user {target_user.id} ({store_name}), {total_count} keywords - task {task.id}")
         
+        store_info = f"店舗「{target_user.company_name}」の" if user.is_master else ""
         return JsonResponse({
             'success': True,
-            'message': message,
-            'success_count': success_count,
-            'error_count': error_count,
+            'message': f'{store_info}一括検索をバックグラウンドで開始しました（{total_count}件）',
+            'bulk_log_id': bulk_log.id,
+            'status_url': reverse('seo_ranking:bulk_keyword_search_status', args=[bulk_log.id]),
             'total_count': total_count
         })
         
@@ -738,6 +792,46 @@ def bulk_keyword_search(request):
         return JsonResponse({'success': False, 'error': '検索処理でエラーが発生しました'})
 
 
+@login_required
+@require_http_methods(["GET"])
+def bulk_keyword_search_status(request, bulk_log_id):
+    """一括キーワード検索の進捗を返す（JSONポーリング用）"""
+    # マスターアカウントの場合は全店舗のジョブを参照可能
+    if request.user.is_master:
+        bulk_log = get_object_or_404(BulkSearchLog, id=bulk_log_id)
+    else:
+        bulk_log = get_object_or_404(BulkSearchLog, id=bulk_log_id, user=request.user)
+    
+    items = bulk_log.items.select_related('keyword', 'ranking_result')
+    
+    error = None
+    if bulk_log.status == BulkSearchLog.STATUS_FAILED:
+        error = bulk_log.error_message or '検索処理でエラーが発生しました'
+    
+    return JsonResponse({
+        'success': bulk_log.status != BulkSearchLog.STATUS_FAILED,
+        'status': bulk_log.status,
+        'status_display': bulk_log.get_status_display(),
+        'is_finished': bulk_log.is_finished,
+        'total_count': bulk_log.keywords_count,
+        'success_count': bulk_log.success_count,
+        'error_count': bulk_log.error_count,
+        'processed_count': bulk_log.processed_count,
+        'progress_percent': bulk_log.progress_percent,
+        'error': error,
+        'items': [
+            {
+                'keyword_id': item.keyword_id,
+                'keyword': item.keyword.keyword,
+                'status': item.status,
+                'rank': item.ranking_result.rank if item.ranking_result else None,
+                'error': item.error_message,
+            }
+            for item in items
+        ]
+    })
+
+
 @login_required
 @require_http_methods(["POST"])
 def update_ranking_memo(request, result_id):
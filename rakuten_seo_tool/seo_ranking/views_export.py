@@ -0,0 +1,122 @@
+"""
+順位データの一括エクスポート関連のビュー
+"""
+
+import os
+import tempfile
+import logging
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from .models import ExportJob
+from .exports import (
+    EXPORT_TYPES, FORMATS, FORMAT_CSV, CONTENT_TYPES,
+    build_export_filters, get_export_queryset, iter_export_rows, stream_csv, write_xlsx_file,
+    get_export_root, build_filename, content_disposition,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _get_export_params(request):
+    """リクエストからエクスポート条件を取得"""
+    return {
+        'keyword_ids': request.GET.getlist('keyword_id'),
+        'shop_id': request.GET.get('shop_id', '').strip(),
+        'date_from': request.GET.get('date_from', '').strip(),
+        'date_to': request.GET.get('date_to', '').strip(),
+    }
+
+
+def _export_job_payload(job):
+    payload = {
+        'success': job.status != ExportJob.STATUS_FAILED,
+        'export_job_id': job.id,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'is_finished': job.is_finished,
+        'row_count': job.row_count,
+        'status_url': reverse('seo_ranking:export_job_status', args=[job.id]),
+        'download_url': None,
+        'error': job.error_message if job.status == ExportJob.STATUS_FAILED else None,
+    }
+    if job.status == ExportJob.STATUS_COMPLETED:
+        payload['download_url'] = reverse('seo_ranking:export_job_download', args=[job.id])
+    return payload
+
+
+@login_required
+def export_results(request):
+    """
+    複数の順位結果をCSV/XLSXでエクスポート
+
+    GETパラメータ:
+        type: seo / seo_products / rpp / rpp_ads
+        format: csv / xlsx
+        keyword_id（複数可）, shop_id, date_from, date_to（YYYY-MM-DD）
+
+    件数が EXPORT_SYNC_MAX_ROWS 以下の場合はその場でダウンロードし、
+    それを超える場合はバックグラウンドジョブを作成してステータスURLを返す。
+    """
+    export_type = request.GET.get('type', 'seo')
+    file_format = request.GET.get('format', FORMAT_CSV)
+    if export_type not in EXPORT_TYPES or file_format not in FORMATS:
+        return JsonResponse({'success': False, 'error': 'エクスポート種別または形式が正しくありません'}, status=400)
+
+    params = _get_export_params(request)
+    try:
+        filters = build_export_filters(request.user, params)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': '日付またはキーワードIDの形式が正しくありません'}, status=400)
+
+    # 上限+1件までのカウントで同期/非同期を判定（全件カウントはしない）
+    sync_max_rows = getattr(settings, 'EXPORT_SYNC_MAX_ROWS', 20000)
+    row_count = get_export_queryset(export_type, filters)[:sync_max_rows + 1].count()
+
+    if row_count > sync_max_rows:
+        job = ExportJob.objects.create(
+            user=request.user,
+            export_type=export_type,
+            file_format=file_format,
+            params=params
+        )
+        from .tasks import execute_export_job
+        task = execute_export_job.delay(job.id)
+        ExportJob.objects.filter(id=job.id).update(task_id=task.id)
+        logger.info(f"Export job queued: ID {job.id} ({export_type}.{file_format}, >{sync_max_rows} rows)")
+        return JsonResponse(_export_job_payload(job), status=202)
+
+    filename = build_filename(export_type, file_format)
+    rows = iter_export_rows(export_type, filters)
+    if file_format == FORMAT_CSV:
+        response = StreamingHttpResponse(stream_csv(rows), content_type=CONTENT_TYPES[file_format])
+    else:
+        # XLSXはZIP形式のため一時ファイルに書き出してから返す（閉じると自動で削除される）
+        temp_file = tempfile.TemporaryFile()
+        write_xlsx_file(rows, temp_file, EXPORT_TYPES[export_type][0])
+        temp_file.seek(0)
+        response = FileResponse(temp_file, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = content_disposition(filename)
+    return response
+
+
+@login_required
+def export_job_status(request, export_job_id):
+    """エクスポートジョブの状態を返す（JSONポーリング用）"""
+    job = get_object_or_404(ExportJob, id=export_job_id, user=request.user)
+    return JsonResponse(_export_job_payload(job))
+
+
+@login_required
+def export_job_download(request, export_job_id):
+    """作成済みのエクスポートファイルをダウンロード（作成したユーザーのみ）"""
+    job = get_object_or_404(ExportJob, id=export_job_id, user=request.user, status=ExportJob.STATUS_COMPLETED)
+    full_path = os.path.join(get_export_root(), job.file_path)
+    if not job.file_path or not os.path.exists(full_path):
+        raise Http404('エクスポートファイルの保存期間が終了しました')
+
+    response = FileResponse(open(full_path, 'rb'), content_type=CONTENT_TYPES.get(job.file_format))
+    response['Content-Disposition'] = content_disposition(job.filename or os.path.basename(job.file_path))
+    return response
@@ -0,0 +1,114 @@
+"""
+キーワード一括インポート関連のビュー
+"""
+
+import logging
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from .models import KeywordImportJob
+from .keyword_import import KeywordImporter, KEYWORD_TYPE_RPP, ROW_CREATED, ROW_STATUS_LABELS, summarize_report
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_LIST_URLS = {
+    'seo': 'seo_ranking:keyword_list',
+    'rpp': 'seo_ranking:rpp_keyword_list',
+}
+
+
+def run_keyword_import(request, form, keyword_type, target_user, selected_store=None):
+    """
+    一括登録フォームの入力行を登録
+
+    行数が KEYWORD_IMPORT_SYNC_MAX_ROWS 以下の場合はその場で登録して結果を表示し、
+    それを超える場合はバックグラウンドジョブを作成してジョブの画面へ移動する。
+    """
+    rows = form.cleaned_data['rows']
+    rakuten_shop_id = form.cleaned_data['rakuten_shop_id']
+    target_product_url = form.cleaned_data.get('target_product_url') or ''
+    is_active = form.cleaned_data.get('is_active', True)
+    store_name = selected_store.company_name if selected_store else "あなた"
+
+    sync_max_rows = getattr(settings, 'KEYWORD_IMPORT_SYNC_MAX_ROWS', 500)
+    if len(rows) > sync_max_rows:
+        job = KeywordImportJob.objects.create(
+            user=request.user,
+            target_user=target_user,
+            keyword_type=keyword_type,
+            rakuten_shop_id=rakuten_shop_id,
+            target_product_url=target_product_url,
+            is_active=is_active,
+            rows=rows,
+            total_rows=len(rows)
+        )
+        from .tasks import execute_keyword_import_job
+        task = execute_keyword_import_job.delay(job.id)
+        KeywordImportJob.objects.filter(id=job.id).update(task_id=task.id)
+        logger.info(f"Keyword import job queued: ID {job.id} ({keyword_type}, {len(rows)} rows)")
+        messages.info(request, f'{len(rows)}行のキーワードをバックグラウンドで登録しています。')
+        return redirect('seo_ranking:keyword_import_job', import_job_id=job.id)
+
+    importer = KeywordImporter(
+        keyword_type,
+        target_user,
+        rakuten_shop_id,
+        target_product_url=target_product_url,
+        is_active=is_active
+    )
+    report = importer.run(rows)
+
+    label = 'RPPキーワード' if keyword_type == KEYWORD_TYPE_RPP else 'キーワード'
+    if report['created_count'] > 0:
+        messages.success(request, f'{store_name}に{report["created_count"]}個の{label}を登録しました。')
+    if report['skipped_count'] > 0:
+        messages.warning(request, f'{report["skipped_count"]}行はスキップされました（登録済み・重複・入力エラー・上限超過）。')
+
+    # 全件登録できた場合は従来どおり一覧へ戻る
+    if report['skipped_count'] == 0:
+        return redirect(KEYWORD_LIST_URLS[keyword_type])
+    return _render_report(request, keyword_type, report, selected_store=selected_store)
+
+
+def _render_report(request, keyword_type, report, job=None, selected_store=None):
+    skipped_rows = [
+        dict(row, status_display=ROW_STATUS_LABELS.get(row['status'], row['status']))
+        for row in report.get('rows', [])
+        if row['status'] != ROW_CREATED
+    ]
+    return render(request, 'seo_ranking/keyword_import_result.html', {
+        'keyword_type': keyword_type,
+        'report': report,
+        'summary': summarize_report(report),
+        'skipped_rows': skipped_rows,
+        'job': job,
+        'selected_store': selected_store,
+        'list_url': reverse(KEYWORD_LIST_URLS[keyword_type]),
+    })
+
+
+def _import_job_payload(job):
+    return {
+        'success': job.status != KeywordImportJob.STATUS_FAILED,
+        'import_job_id': job.id,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'is_finished': job.is_finished,
+        'total_rows': job.total_rows,
+        'created_count': job.created_count,
+        'skipped_count': job.skipped_count,
+        'rows': job.report.get('rows', []) if job.status == KeywordImportJob.STATUS_COMPLETED else [],
+        'error': job.error_message if job.status == KeywordImportJob.STATUS_FAILED else None,
+    }
+
+
+@login_required
+def keyword_import_job(request, import_job_id):
+    """キーワードインポートジョブの状態と行ごとの結果（?format=json でJSON）"""
+    job = get_object_or_404(KeywordImportJob, id=import_job_id, user=request.user)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(_import_job_payload(job))
+    return _render_report(request, job.keyword_type, job.report or {'total_rows': job.total_rows}, job=job)
@@ -0,0 +1,30 @@
+"""
+検索パイプラインのメトリクス出力（Prometheus形式）
+"""
+
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .metrics import metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _is_authorized(request) -> bool:
+    """METRICS_TOKEN 設定時はBearerトークン、未設定時はマスターアカウントのログインを要求"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        scheme, _, value = auth_header.partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip(), token)
+    return request.user.is_authenticated and request.user.is_master
+
+
+@require_GET
+def metrics_endpoint(request):
+    """メトリクスをPrometheusのテキスト形式で出力"""
+    if not _is_authorized(request):
+        return HttpResponseForbidden('Forbidden', content_type='text/plain')
+    return HttpResponse(metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -9,13 +9,17 @@ from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 import math
-from .models import RPPKeyword, RPPResult, RPPAd, RPPSearchLog, RPPBulkSearchLog
+from .models import RPPKeyword, RPPResult, RPPAd, RPPSearchLog, RPPBulkSearchLog, StoreKeywordMatrix
 from .forms_rpp import RPPKeywordForm, BulkRPPKeywordForm
 from .rpp_scraper import scrape_rpp_ranking
+from .rollups import get_period_start_date, build_chart_points
+from .views_keyword_import import run_keyword_import
+from .dashboard_cache import get_or_compute, STORES_SCOPE
+from .store_matrix import filter_search, keyset_paginate
 import logging
 import time
 import csv
@@ -179,77 +183,17 @@ def rpp_keyword_bulk_create(request):
             messages.error(request, '店舗が選択されていません。店舗を選択してからキーワードを登録してください。')
             return redirect('seo_ranking:rpp_keyword_list')
     
-    # キーワード登録数チェック（招待ユーザー以外）
-    if not target_user.is_invited_user:
-        current_count = RPPKeyword.objects.filter(user=target_user).count()
-        if current_count >= 10:
-            store_name = selected_store.company_name if selected_store else "あなた"
-            messages.error(request, f'{store_name}のRPPキーワード登録数の上限（10個）に達しています。既存のキーワードを削除してから登録してください。')
-            return redirect('seo_ranking:rpp_keyword_list')
+    # キーワード登録数チェック（プランの上限）
+    if not target_user.can_register_keyword('rpp'):
+        keyword_limit = target_user.get_keyword_limit()
+        store_name = selected_store.company_name if selected_store else "あなた"
+        messages.error(request, f'{store_name}のRPPキーワード登録数の上限（{keyword_limit}個）に達しています。既存のキーワードを削除してから登録してください。')
+        return redirect('seo_ranking:rpp_keyword_list')
     
     if request.method == 'POST':
-        form = BulkRPPKeywordForm(request.POST, user=request.user, selected_store=selected_store)
+        form = BulkRPPKeywordForm(request.POST, request.FILES, user=request.user, selected_store=selected_store)
         if form.is_valid():
-            keywords_list = form.cleaned_data['keywords']
-            rakuten_shop_id = form.cleaned_data['rakuten_shop_id']
-            target_product_url = form.cleaned_data.get('target_product_url', '')
-            is_active = form.cleaned_data.get('is_active', True)
-            
-            # 商品IDを商品URLから抽出
-            target_product_id = ''
-            if target_product_url:
-                import re
-                match = re.search(r'/([^/]+)/?$', target_product_url.rstrip('/'))
-                if match:
-                    target_product_id = match.group(1)
-            
-            # 重複チェック用に既存キーワードを取得
-            existing_keywords = set(
-                RPPKeyword.objects.filter(user=target_user, rakuten_shop_id=rakuten_shop_id)
-                .values_list('keyword', flat=True)
-            )
-            
-            # 一括登録処理
-            created_count = 0
-            skipped_count = 0
-            
-            # 現在の登録数を取得
-            current_count = RPPKeyword.objects.filter(user=target_user).count()
-            
-            for keyword_text in keywords_list:
-                if keyword_text in existing_keywords:
-                    skipped_count += 1
-                    continue
-                
-                # 登録数制限チェック（各店舗10個まで）- 招待ユーザー除く
-                if not target_user.is_invited_user and current_count >= 10:
-                    store_name = selected_store.company_name if selected_store else "あなた"
-                    messages.error(request, f'{store_name}のRPPキーワード登録数の上限（10個）に達したため、"{keyword_text}" 以降の登録を中断しました。')
-                    break
-                
-                try:
-                    RPPKeyword.objects.create(
-                        user=target_user,
-                        keyword=keyword_text,
-                        rakuten_shop_id=rakuten_shop_id,
-                        target_product_url=target_product_url,
-                        target_product_id=target_product_id,
-                        is_active=is_active
-                    )
-                    created_count += 1
-                    current_count += 1
-                except Exception as e:
-                    logger.error(f'Error creating RPP keyword "{keyword_text}": {e}')
-                    skipped_count += 1
-            
-            # 結果メッセージ
-            store_name = selected_store.company_name if selected_store else "あなた"
-            if created_count > 0:
-                messages.success(request, f'{store_name}に{created_count}個のRPPキーワードを登録しました。')
-            if skipped_count > 0:
-                messages.warning(request, f'{skipped_count}個のキーワードはスキップされました（重複または処理エラー）。')
-            
-            return redirect('seo_ranking:rpp_keyword_list')
+            return run_keyword_import(request, form, 'rpp', target_user, selected_store)
     else:
         form = BulkRPPKeywordForm(user=request.user, selected_store=selected_store)
     
@@ -447,6 +391,27 @@ def rpp_results(request, keyword_id):
     })
 
 
+@login_required
+def rpp_chart_data(request, keyword_id):
+    """RPP順位推移グラフのデータ（日次集計から作成・JSON）"""
+    # マスターアカウントの場合は全店舗のキーワードにアクセス可能
+    if request.user.is_master:
+        keyword = get_object_or_404(RPPKeyword, id=keyword_id)
+    else:
+        keyword = get_object_or_404(RPPKeyword, id=keyword_id, user=request.user)
+    
+    rollups = keyword.daily_rollups.order_by('date')
+    start_date = get_period_start_date(request.GET.get('period', '365'))
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    
+    return JsonResponse({
+        'success': True,
+        'keyword': keyword.keyword,
+        'points': build_chart_points(rollups.values('date', 'best_rank', 'worst_rank', 'last_rank', 'check_count', 'found_count')),
+    })
+
+
 @login_required
 def rpp_detail(request, result_id):
     """RPP結果詳細"""
@@ -577,29 +542,24 @@ def rpp_all_data(request):
         messages.error(request, 'この機能はマスターアカウント限定です。')
         return redirect('seo_ranking:dashboard')
     
-    # 全店舗のRPPキーワードを取得
-    keywords = RPPKeyword.objects.all().order_by('-created_at')
+    # 全店舗キーワード一覧（StoreKeywordMatrix）から取得
+    rows = StoreKeywordMatrix.objects.filter(rpp_keyword__isnull=False)
     
-    # 検索フィルタ
+    # 検索フィルタ（キーワード・店舗ID・会社名）
     search_query = request.GET.get('search', '')
-    if search_query:
-        keywords = keywords.filter(
-            Q(keyword__icontains=search_query) |
-            Q(rakuten_shop_id__icontains=search_query) |
-            Q(user__company_name__icontains=search_query)
-        )
+    rows = filter_search(rows, search_query)
     
-    # 店舗IDフィルタ
+    # 店舗IDフィルタ（店舗一覧から選択）
     shop_filter = request.GET.get('shop', '')
     if shop_filter:
-        keywords = keywords.filter(rakuten_shop_id__icontains=shop_filter)
+        rows = rows.filter(rakuten_shop_id=shop_filter)
     
     # アクティブフィルタ
     active_filter = request.GET.get('active', '')
     if active_filter == 'true':
-        keywords = keywords.filter(is_active=True)
+        rows = rows.filter(rpp_is_active=True)
     elif active_filter == 'false':
-        keywords = keywords.filter(is_active=False)
+        rows = rows.filter(rpp_is_active=False)
     
     # 期間フィルタ
     period = request.GET.get('period', '30')
@@ -613,20 +573,36 @@ def rpp_all_data(request):
         start_date = None
     
     if start_date:
-        keywords = keywords.filter(created_at__gte=start_date)
-    
-    # ページネーション
-    paginator = Paginator(keywords, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # 統計情報
-    total_keywords = keywords.count()
-    active_keywords = keywords.filter(is_active=True).count()
-    total_shops = keywords.values('rakuten_shop_id').distinct().count()
+        rows = rows.filter(rpp_created_at__gte=start_date)
+    
+    # ページネーション（キーセット）
+    page_obj = keyset_paginate(
+        rows.select_related('rpp_keyword'), 'rpp_created_at', 50,
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+    
+    # 統計情報（1回の集計。検索・店舗指定が無い場合はキャッシュ）
+    def compute_stats():
+        return rows.aggregate(
+            total_keywords=Count('id'),
+            active_keywords=Count('id', filter=Q(rpp_is_active=True)),
+            total_shops=Count('rakuten_shop_id', distinct=True)
+        )
+    if search_query or shop_filter:
+        stats = compute_stats()
+    else:
+        stats = get_or_compute(STORES_SCOPE, f'rpp_all_stats:{period}:{active_filter}', compute_stats)
     
     # 店舗一覧（フィルタ用）
-    shop_list = RPPKeyword.objects.values_list('rakuten_shop_id', flat=True).distinct().order_by('rakuten_shop_id')
+    shop_list = get_or_compute(
+        STORES_SCOPE,
+        'rpp_shop_list',
+        lambda: list(
+            StoreKeywordMatrix.objects.filter(rpp_keyword__isnull=False)
+            .values_list('rakuten_shop_id', flat=True).distinct().order_by('rakuten_shop_id')
+        )
+    )
     
     return render(request, 'seo_ranking/rpp_all_data.html', {
         'page_obj': page_obj,
@@ -634,9 +610,9 @@ def rpp_all_data(request):
         'shop_filter': shop_filter,
         'active_filter': active_filter,
         'period': period,
-        'total_keywords': total_keywords,
-        'active_keywords': active_keywords,
-        'total_shops': total_shops,
+        'total_keywords': stats['total_keywords'],
+        'active_keywords': stats['active_keywords'],
+        'total_shops': stats['total_shops'],
         'shop_list': shop_list,
     })
 
@@ -114,6 +114,29 @@ function hideLoading() {
     $('#loading-overlay').hide();
 }
 
+// 一括検索ジョブの完了待ち（ステータスAPIをポーリングし、終了時のステータスでresolve）
+function pollBulkSearchStatus(statusUrl, onProgress, intervalMs) {
+    intervalMs = intervalMs || 3000;
+    return new Promise(function(resolve, reject) {
+        function poll() {
+            fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    if (data.is_finished) {
+                        resolve(data);
+                        return;
+                    }
+                    if (onProgress) {
+                        onProgress(data);
+                    }
+                    setTimeout(poll, intervalMs);
+                })
+                .catch(reject);
+        }
+        poll();
+    });
+}
+
 // Ajaxエラーハンドリング
 $(document).ajaxError(function(event, xhr, settings, error) {
     hideLoading();
@@ -159,4 +182,72 @@ function showAlert(type, message) {
             $('.alert:not(.alert-info)').fadeOut('slow');
         }, 5000);
     }
-}
\ No newline at end of file
+}
+
+// 順位推移グラフ（日次集計APIから取得して描画）
+function renderRankChart(canvasId, dataUrl, maxRank) {
+    const canvas = document.getElementById(canvasId);
+    if (!canvas || typeof Chart === 'undefined') {
+        return;
+    }
+    fetch(dataUrl, { headers: { 'Accept': 'application/json' } })
+        .then(function(response) { return response.json(); })
+        .then(function(data) {
+            const points = data.points || [];
+            if (!points.length) {
+                canvas.parentNode.innerHTML = '<p class="text-muted text-center mb-0">グラフ表示できるデータがありません</p>';
+                return;
+            }
+            new Chart(canvas.getContext('2d'), {
+                type: 'line',
+                data: {
+                    labels: points.map(function(point) { return point.date.slice(5).replace('-', '/'); }),
+                    datasets: [{
+                        label: '最終順位',
+                        data: points.map(function(point) { return point.last; }),
+                        borderColor: 'rgb(75, 192, 192)',
+                        backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                        tension: 0.1,
+                        spanGaps: true
+                    }, {
+                        label: '最高順位',
+                        data: points.map(function(point) { return point.best; }),
+                        borderColor: 'rgba(54, 162, 235, 0.5)',
+                        borderDash: [4, 4],
+                        pointRadius: 0,
+                        tension: 0.1,
+                        spanGaps: true
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    scales: {
+                        y: {
+                            reverse: true,
+                            beginAtZero: false,
+                            min: 1,
+                            max: maxRank || 100
+                        }
+                    },
+                    plugins: {
+                        tooltip: {
+                            callbacks: {
+                                title: function(items) {
+                                    return points[items[0].dataIndex].date;
+                                },
+                                label: function(context) {
+                                    const point = points[context.dataIndex];
+                                    const rank = context.parsed.y !== null ? context.parsed.y + '位' : '圏外';
+                                    return context.dataset.label + ': ' + rank + '（発見率 ' + Math.round(point.found_ratio * 100) + '%）';
+                                }
+                            }
+                        }
+                    }
+                }
+            });
+        })
+        .catch(function(error) {
+            console.error('グラフデータの取得に失敗しました', error);
+        });
+}